@@ -0,0 +1,46 @@
+"""Add media_fingerprints table
+
+Revision ID: 3f8d6c2a9b17
+Revises: 9a4e2b7c1d05
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8d6c2a9b17"
+down_revision: Union[str, Sequence[str], None] = "9a4e2b7c1d05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "media_fingerprints",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("file_unique_id", sa.String(length=64), nullable=False),
+        sa.Column("kind", sa.String(length=32), nullable=True),
+        sa.Column("detections", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_seen", sa.DateTime(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_media_fingerprints_id"), "media_fingerprints", ["id"], unique=False)
+    op.create_index(op.f("ix_media_fingerprints_file_unique_id"), "media_fingerprints", ["file_unique_id"], unique=True)
+    op.create_index(op.f("ix_media_fingerprints_last_seen"), "media_fingerprints", ["last_seen"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_media_fingerprints_last_seen"), table_name="media_fingerprints")
+    op.drop_index(op.f("ix_media_fingerprints_file_unique_id"), table_name="media_fingerprints")
+    op.drop_index(op.f("ix_media_fingerprints_id"), table_name="media_fingerprints")
+    op.drop_table("media_fingerprints")
@@ -0,0 +1,48 @@
+"""Add learned_bots table
+
+Revision ID: 5c1f3a9d7e42
+Revises: e2b091aa88ca
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1f3a9d7e42"
+down_revision: Union[str, Sequence[str], None] = "e2b091aa88ca"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "learned_bots",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(length=64), nullable=False),
+        sa.Column("detections", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("first_seen", sa.DateTime(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("is_overridden", sa.Boolean(), nullable=False, server_default="0"),
+        sa.Column("overridden_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_learned_bots_id"), "learned_bots", ["id"], unique=False)
+    op.create_index(op.f("ix_learned_bots_username"), "learned_bots", ["username"], unique=True)
+    op.create_index(op.f("ix_learned_bots_expires_at"), "learned_bots", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_learned_bots_expires_at"), table_name="learned_bots")
+    op.drop_index(op.f("ix_learned_bots_username"), table_name="learned_bots")
+    op.drop_index(op.f("ix_learned_bots_id"), table_name="learned_bots")
+    op.drop_table("learned_bots")
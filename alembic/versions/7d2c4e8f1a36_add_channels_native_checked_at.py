@@ -0,0 +1,30 @@
+"""Add channels.native_checked_at
+
+Revision ID: 7d2c4e8f1a36
+Revises: 3f8d6c2a9b17
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2c4e8f1a36"
+down_revision: Union[str, Sequence[str], None] = "3f8d6c2a9b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL: their is_native was never checked and is re-read from the Bot API
+    op.add_column("channels", sa.Column("native_checked_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("channels", "native_checked_at")
@@ -0,0 +1,44 @@
+"""Add source_reputations table
+
+Revision ID: 9a4e2b7c1d05
+Revises: 5c1f3a9d7e42
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4e2b7c1d05"
+down_revision: Union[str, Sequence[str], None] = "5c1f3a9d7e42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "source_reputations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("chat_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=True),
+        sa.Column("spam_score", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("clean_score", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("scored_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_source_reputations_id"), "source_reputations", ["id"], unique=False)
+    op.create_index(op.f("ix_source_reputations_chat_id"), "source_reputations", ["chat_id"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_source_reputations_chat_id"), table_name="source_reputations")
+    op.drop_index(op.f("ix_source_reputations_id"), table_name="source_reputations")
+    op.drop_table("source_reputations")
@@ -7,7 +7,7 @@
 
 from aiogram.types import CallbackQuery, Message
 
-from app.config import load_config
+from app.config import get_config
 from app.utils.security import (
     safe_format_message,
     sanitize_for_logging,
@@ -65,9 +65,10 @@ class AuthorizationService:
     """Service for handling user authorization and permissions."""
 
     def __init__(self):
-        self.config = load_config()
-        self.admin_ids = set(self.config.admin_ids_list)
-        self.super_admin_id = self.config.admin_ids_list[0] if self.config.admin_ids_list else None
+        snapshot = get_config()
+        self.config = snapshot.settings
+        self.admin_ids = snapshot.admin_ids
+        self.super_admin_id = snapshot.primary_admin_id
 
     def get_user_role(self, user_id: int) -> Role:
         """Get user role based on user ID."""
@@ -1,5 +1,7 @@
 import logging
-from typing import List
+import threading
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Tuple
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -34,6 +36,10 @@ class Settings(BaseSettings):
     allow_photos_without_caption: bool = True  # Разрешать фото без подписи
     allow_videos_without_caption: bool = True  # Разрешать видео без подписи
     max_document_size_suspicious: int = 50000  # Максимальный размер документа для подозрения (байты)
+    image_hash_enabled: bool = Field(default=False, description="Искать похожие спам-картинки (нужен extra images)")
+    qr_decode_enabled: bool = Field(default=False, description="Распознавать QR-коды в медиа без подписи (extra images)")
+    spam_classifier_model: str = Field(default="", description="Модель классификатора спама (.npz), пусто - выключен")
+    pii_encryption_key: str = Field(default="", description="Ключ шифрования логов анализа спама, пусто - новый при запуске")
 
     # Настройки уведомлений
     show_limits_on_startup: bool = True  # Показывать лимиты при запуске бота
@@ -169,3 +175,74 @@ def _validate_config(config: Settings) -> None:
     # Проверяем, что токен не является placeholder (только для production)
     if config.bot_token == "your_telegram_bot_token_here" and not config.bot_token.startswith("test_token"):
         raise ValueError("BOT_TOKEN не настроен. Замените 'your_telegram_bot_token_here' на реальный токен.")
+
+
+class FrozenSettings(Settings):
+    """Settings, которые нельзя изменить после загрузки."""
+
+    model_config = {**Settings.model_config, "frozen": True}
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Неизменяемый снимок конфигурации.
+
+    Производные значения (ID админов, native каналы) вычисляются один раз
+    при загрузке, чтобы проверки на горячем пути были O(1).
+    """
+
+    settings: FrozenSettings
+    admin_ids: FrozenSet[int]
+    admin_ids_list: Tuple[int, ...]
+    native_channel_ids: Tuple[int, ...]
+    version: int
+
+    @classmethod
+    def from_settings(cls, settings: Settings, version: int) -> "ConfigSnapshot":
+        """Построить снимок из загруженных Settings."""
+        frozen = FrozenSettings.model_construct(_fields_set=settings.model_fields_set, **dict(settings))
+        admin_ids_list = tuple(settings.admin_ids_list)
+        return cls(
+            settings=frozen,
+            admin_ids=frozenset(admin_ids_list),
+            admin_ids_list=admin_ids_list,
+            native_channel_ids=tuple(settings.native_channel_ids_list),
+            version=version,
+        )
+
+    @property
+    def primary_admin_id(self) -> Optional[int]:
+        """Основной администратор (первый в ADMIN_IDS)."""
+        return self.admin_ids_list[0] if self.admin_ids_list else None
+
+    def is_admin(self, user_id: Optional[int]) -> bool:
+        """Является ли пользователь администратором."""
+        return user_id in self.admin_ids
+
+
+_snapshot: Optional[ConfigSnapshot] = None
+_reload_lock = threading.Lock()
+
+
+def get_config() -> ConfigSnapshot:
+    """Текущий снимок конфигурации (загружается при первом обращении)."""
+    snapshot = _snapshot
+    if snapshot is None:
+        snapshot = reload_config()
+    return snapshot
+
+
+def reload_config() -> ConfigSnapshot:
+    """Перечитать конфигурацию и атомарно заменить снимок.
+
+    При ошибке валидации выбрасывает ValueError, текущий снимок остается.
+    """
+    global _snapshot
+
+    with _reload_lock:
+        version = _snapshot.version + 1 if _snapshot else 1
+        snapshot = ConfigSnapshot.from_settings(load_config(), version)
+        _snapshot = snapshot
+
+    logger.info(f"Конфигурация загружена (версия {snapshot.version}, админов: {len(snapshot.admin_ids)})")
+    return snapshot
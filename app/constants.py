@@ -172,3 +172,127 @@ class ErrorCodes:
 # Кэширование
 CACHE_TTL = 300  # 5 минут
 MAX_CACHE_SIZE = 1000
+
+# Общий кэш между репликами (локальный уровень + Redis)
+SHARED_CACHE_LOCAL_TTL = 30  # Верхняя граница рассинхронизации при потере pub/sub сообщения
+SHARED_CACHE_LOCAL_MAX_ENTRIES = 10000  # Ключей в пространстве имен локального уровня (LRU)
+SHARED_CACHE_REDIS_TTL = 300
+SHARED_CACHE_KEY_PREFIX = "flame:cache"
+SHARED_CACHE_INVALIDATION_CHANNEL = "flame:cache:invalidate"
+
+# =============================================================================
+# ЛИМИТЫ TELEGRAM BOT API (исходящие запросы)
+# =============================================================================
+
+# Глобальный лимит бота: ~30 сообщений в секунду на все реплики
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_GLOBAL_BURST = 30
+
+# Лимит на группу: ~20 сообщений в минуту
+TELEGRAM_CHAT_RATE_PER_MINUTE = 20
+
+# Резерв токенов, недоступный уведомлениям и lookup-запросам
+TELEGRAM_PRIORITY_RESERVE = 5
+# Сколько токенов удаление/бан могут занять у будущего пополнения
+TELEGRAM_TAKEDOWN_BORROW = 5
+
+TELEGRAM_LIMITER_KEY_PREFIX = "flame:tg"
+
+# Планировщик исходящих запросов (адаптивная конкурентность, AIMD)
+TELEGRAM_SCHEDULER_INITIAL_CONCURRENCY = 8
+TELEGRAM_SCHEDULER_MIN_CONCURRENCY = 1
+TELEGRAM_SCHEDULER_MAX_CONCURRENCY = 32
+TELEGRAM_SCHEDULER_LATENCY_TOLERANCE = 2.0  # Во сколько раз задержка может превысить минимальную
+TELEGRAM_MAX_RETRIES = 3
+TELEGRAM_RETRY_JITTER = 0.5  # Секунды случайной добавки к retry_after
+
+# Дедупликация модерационных действий при всплесках спама
+MODERATION_DEDUP_TTL = 60  # Повторный бан того же пользователя в чате в течение TTL - no-op
+
+# Недавние сообщения пользователей для очистки при бане
+RECENT_MESSAGES_PER_USER = 50  # Размер кольцевого буфера на (chat_id, user_id)
+RECENT_MESSAGES_MAX_USERS = 20000  # ~8 МБ при 50 ID по 8 байт; старые пары вытесняются (LRU)
+DELETE_MESSAGES_BATCH_SIZE = 100  # Лимит Bot API deleteMessages
+
+# Глобальный бан во всех управляемых чатах
+GLOBAL_BAN_CONCURRENCY = 10
+GLOBAL_BAN_PROGRESS_INTERVAL = 2.0  # Секунды между обновлениями сообщения о прогрессе
+
+# Кэш прав бота в каналах (is_native_channel без запросов к Bot API)
+CHANNEL_CAPABILITY_TTL = 3600  # my_chat_member обновляет запись сразу, TTL - страховка
+CHANNEL_CAPABILITY_FAILURE_TTL = 300  # Неудачный запрос к Bot API не повторяется для каждого сообщения
+CHANNEL_SYNC_CONCURRENCY = 10
+
+# Реестр каналов: повторный запрос linked_chat группы комментариев
+CHANNEL_LINKED_CHAT_TTL = 3600
+
+# Кэш справочных запросов к Bot API (TTL в секундах по методу)
+TELEGRAM_LOOKUP_CACHE_TTLS = {
+    "getChat": 300,
+    "getChatMember": 60,
+    "getChatMemberCount": 300,
+    "getChatAdministrators": 120,
+    "getUserProfilePhotos": 600,
+}
+TELEGRAM_LOOKUP_NEGATIVE_TTL = 60  # "chat not found" и т.п.
+TELEGRAM_LOOKUP_CACHE_MAX_ENTRIES = 5000
+
+# Hot-reload limits.json
+LIMITS_FILE = "limits.json"
+LIMITS_WATCH_DEBOUNCE = 0.5  # Секунды тишины после последнего изменения файла
+
+# Блок-листы доменов и username (по одной записи в строке, рядом строится индекс .idx)
+BLOCKLIST_DOMAINS_FILE = "blocklists/domains.txt"
+BLOCKLIST_USERNAMES_FILE = "blocklists/usernames.txt"
+BLOCKLIST_WATCH_DEBOUNCE = 1.0
+
+# Выученные username ботов (из подтвержденных удалений за ссылки на ботов)
+LEARNED_BOT_TTL = 7 * 24 * 3600  # Срок жизни записи после одного обнаружения, секунды
+LEARNED_BOT_TTL_MAX_FACTOR = 8  # Каждое повторное обнаружение продлевает срок, но не больше чем в 8 раз
+
+# Репутация источников пересылок (forward_from_chat): счетчики с экспоненциальным затуханием
+SOURCE_REPUTATION_HALF_LIFE = 7 * 24 * 3600  # Вес вердикта падает вдвое за неделю
+SOURCE_REPUTATION_MIN_EVIDENCE = 3.0  # Сколько (затухших) вердиктов нужно для решения по источнику
+SOURCE_REPUTATION_ALLOW_RATIO = 0.1  # Доля спама, при которой источник считается надежным
+SOURCE_REPUTATION_DENY_RATIO = 0.5  # Доля спама, при которой источник считается спам-фермой
+SOURCE_REPUTATION_FLUSH_INTERVAL = 60  # Как часто изменения пишутся в БД, секунды
+SOURCE_REPUTATION_PRUNE_EVIDENCE = 0.05  # Записи с меньшим весом удаляются из памяти
+
+# Альбомы (media_group): части собираются и проверяются одним сообщением
+MEDIA_GROUP_LATENCY = 0.5  # Ждем новые части альбома столько секунд после последней
+MEDIA_GROUP_MAX_WAIT = 2.0  # Но не дольше этого с первой части
+MEDIA_GROUP_PARTS_TTL = 300  # Сколько помнить ID частей обработанного альбома (для удаления)
+
+# Отпечатки спам-вложений (file_unique_id удаленных как спам фото, видео и документов)
+MEDIA_FINGERPRINT_MAX_ENTRIES = 50000  # Сколько последних отпечатков держать в памяти
+
+# Похожие спам-картинки (перцептивный хэш самого маленького размера фото, нужен extra "images")
+IMAGE_HASH_WORKERS = 2  # Процессов для хэширования и одновременных проверок
+IMAGE_HASH_QUEUE_SIZE = 64  # Проверок в очереди; сверх этого фото не проверяются
+IMAGE_HASH_MAX_DISTANCE = 6  # Сколько бит из 64 может отличаться у похожей картинки
+IMAGE_HASH_CACHE_SIZE = 20000  # Хэшей, запомненных по file_unique_id
+IMAGE_HASH_MAX_KNOWN = 5000  # Хэшей удаленных спам-картинок
+IMAGE_HASH_DOWNLOAD_TIMEOUT = 10  # Секунды на скачивание фото
+IMAGE_HASH_MAX_FILE_SIZE = 512 * 1024  # Фото больше этого не скачиваются, байты
+
+# QR-коды на фото и картинках-документах без подписи (нужен extra "images")
+QR_DECODE_WORKERS = 2  # Процессов для распознавания и одновременных проверок
+QR_DECODE_QUEUE_SIZE = 16  # Проверок в очереди; сверх этого картинка не распознается
+QR_DECODE_TIMEOUT = 5  # Секунды на скачивание и распознавание одной картинки
+QR_DECODE_MAX_FILE_SIZE = 1024 * 1024  # Картинки больше этого не скачиваются, байты
+QR_DECODE_CACHE_SIZE = 20000  # Результатов, запомненных по file_unique_id
+
+# Статистический классификатор спам-текстов (модель обучается scripts/train_spam_classifier.py, нужен extra "classifier")
+SPAM_CLASSIFIER_THRESHOLD = 0.97  # Вероятность спама, с которой сообщение удаляется
+SPAM_CLASSIFIER_BATCH_WINDOW = 0.005  # Сколько секунд копить сообщения в батч
+SPAM_CLASSIFIER_MAX_BATCH = 64  # Батч оценивается сразу, когда набралось столько сообщений
+
+# Волны почти одинакового спама в разных чатах (MinHash LSH по окну времени)
+SPAM_WAVE_WINDOW = 600  # Окно, в котором считаются копии, секунды
+SPAM_WAVE_BUCKETS = 10  # Окно - кольцо из стольких корзин по времени
+SPAM_WAVE_MIN_COPIES = 5  # Копий в окне, чтобы сообщение считалось волной
+SPAM_WAVE_MIN_USERS = 3  # И от стольких разных пользователей
+SPAM_WAVE_MIN_CHATS = 2  # И в стольких разных чатах (повтор в одном чате - флешмоб, а не рассылка)
+SPAM_WAVE_MIN_WORDS = 6  # Сообщения короче не учитываются ("спасибо", "+1")
+SPAM_WAVE_SIMILARITY = 0.6  # Доля совпавших значений MinHash, с которой сообщение - копия
+SPAM_WAVE_MAX_CLUSTERS = 20000  # Сколько разных текстов держать в окне (давно не повторявшиеся вытесняются)
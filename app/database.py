@@ -3,12 +3,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 
-from app.config import load_config
+from app.config import get_config
 
 Base = declarative_base()
 
 # Get database URL from config
-config = load_config()
+config = get_config().settings
 database_url = f"sqlite+aiosqlite:///{config.db_path}"
 
 # Create async engine
@@ -33,7 +33,10 @@ async def create_tables() -> None:
     from app.models import (  # noqa: F401
         Bot,
         Channel,
+        LearnedBot,
+        MediaFingerprint,
         ModerationLog,
+        SourceReputation,
         SuspiciousProfile,
         User,
     )
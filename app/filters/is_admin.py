@@ -5,7 +5,7 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import CallbackQuery, Message
 
-from app.config import load_config
+from app.config import get_config
 
 
 class IsAdminFilter(BaseFilter):
@@ -13,8 +13,6 @@ class IsAdminFilter(BaseFilter):
 
     async def __call__(self, obj: Union[Message, CallbackQuery]) -> bool:
         """Check if user is admin."""
-        config = load_config()
-
         # Get user ID
         if isinstance(obj, Message):
             user_id = obj.from_user.id if obj.from_user else None
@@ -27,4 +25,4 @@ async def __call__(self, obj: Union[Message, CallbackQuery]) -> bool:
             return False
 
         # Check if user is in admin list
-        return user_id in config.admin_ids_list
+        return get_config().is_admin(user_id)
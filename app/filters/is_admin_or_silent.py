@@ -5,18 +5,15 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import CallbackQuery, Message
 
-from app.config import load_config
+from app.config import get_config
 
 
 class IsAdminOrSilentFilter(BaseFilter):
     """Filter that allows admins and silently ignores non-admins."""
 
     def __init__(self):
-        # Load config once during initialization
-        self.config = load_config()
-        self.admin_ids = self.config.admin_ids_list
         logger = __import__("logging").getLogger(__name__)
-        logger.info(f"Admin filter initialized with admin_ids: {self.admin_ids}")
+        logger.info(f"Admin filter initialized with admin_ids: {list(get_config().admin_ids_list)}")
 
     async def __call__(self, obj: Union[Message, CallbackQuery]) -> bool:
         """Check if user is admin, silently ignore others."""
@@ -32,12 +29,12 @@ async def __call__(self, obj: Union[Message, CallbackQuery]) -> bool:
             if not user_id:
                 return False
 
-            # Get fresh admin IDs from config
-            current_config = load_config()
-            admin_ids = current_config.admin_ids_list
+            # Current config snapshot (swapped atomically on reload)
+            config = get_config()
+            admin_ids = config.admin_ids
 
             # Check if user is in admin list
-            is_admin = user_id in admin_ids
+            is_admin = config.is_admin(user_id)
 
             # Log admin filter results for debugging
             logger = __import__("logging").getLogger(__name__)
@@ -45,7 +42,7 @@ async def __call__(self, obj: Union[Message, CallbackQuery]) -> bool:
                 logger.info(f"Admin filter: user {user_id}, is_admin: {is_admin}, admin_ids: {admin_ids}, text: {obj.text}")
                 logger.info(f"DEBUG: user_id={user_id}, admin_ids={admin_ids}, is_admin={is_admin}")
                 if obj.text and "bots" in obj.text.lower():
-                    logger.info(f"BOTS COMMAND DETECTED: user {user_id}, is_admin: {is_admin}, admin_ids: {self.admin_ids}")
+                    logger.info(f"BOTS COMMAND DETECTED: user {user_id}, is_admin: {is_admin}, admin_ids: {admin_ids}")
 
             # Log non-admin attempts for security monitoring
             if not is_admin:
@@ -2,7 +2,9 @@
 Команды для управления ботами
 """
 
+import html
 import logging
+from datetime import datetime
 
 from aiogram import Router
 from aiogram.filters import Command
@@ -11,6 +13,7 @@
 from app.filters.is_admin_or_silent import IsAdminOrSilentFilter
 from app.middlewares.silent_logging import send_silent_response
 from app.services.bots_admin import BotsAdminService
+from app.services.learned_bots import get_learned_bots
 from app.utils.error_handling import handle_errors
 from app.utils.security import sanitize_for_logging
 
@@ -132,3 +135,64 @@ async def handle_remove_bot_command(
     except Exception as e:
         logger.error(f"Error in remove_bot command: {sanitize_for_logging(str(e))}")
         await send_silent_response(message, "❌ Ошибка удаления бота")
+
+
+@bots_router.message(Command("learned_bots"), IsAdminOrSilentFilter())
+@handle_errors(user_message="❌ Ошибка выполнения команды /learned_bots")
+async def handle_learned_bots_command(message: Message) -> None:
+    """Показать ботов, выученных из удалений за ссылки на ботов."""
+    try:
+        if not message.from_user:
+            return
+        logger.info(f"Learned bots command from {sanitize_for_logging(str(message.from_user.id))}")
+
+        learned_bots = get_learned_bots()
+        entries = learned_bots.top()
+        if not entries:
+            await send_silent_response(message, "📭 Выученных ботов пока нет")
+            return
+
+        stats = learned_bots.get_stats()
+        lines = [f"🧠 <b>Выученные боты</b> (мгновенных вердиктов: {stats['hits']})\n"]
+        for entry in entries:
+            expires = datetime.fromtimestamp(entry.expires_at).strftime("%d.%m.%Y")
+            lines.append(f"• @{html.escape(entry.username)} - обнаружений: {entry.detections}, до {expires}")
+        lines.append("\n💡 Снять вердикт: /forget_bot &lt;bot_username&gt;")
+
+        await send_silent_response(message, "\n".join(lines))
+
+    except Exception as e:
+        logger.error(f"Error in learned_bots command: {sanitize_for_logging(str(e))}")
+        await send_silent_response(message, "❌ Ошибка получения выученных ботов")
+
+
+@bots_router.message(Command("forget_bot"), IsAdminOrSilentFilter())
+@handle_errors(user_message="❌ Ошибка выполнения команды /forget_bot")
+async def handle_forget_bot_command(message: Message, admin_id: int) -> None:
+    """Снять выученный вердикт с username и больше его не выучивать."""
+    try:
+        if not message.from_user:
+            return
+        logger.info(f"Forget bot command from {sanitize_for_logging(str(message.from_user.id))}")
+
+        args = message.text.split()[1:] if message.text else []
+        if not args:
+            await send_silent_response(
+                message,
+                "❌ <b>Использование:</b> /forget_bot &lt;bot_username&gt;\n\n"
+                "💡 <b>Примеры:</b>\n"
+                "• /forget_bot @mybot\n"
+                "• /forget_bot mybot",
+            )
+            return
+
+        entry = await get_learned_bots().override(args[0], admin_id)
+        await send_silent_response(
+            message,
+            f"✅ Вердикт для @{html.escape(entry.username)} снят (обнаружений было: {entry.detections}).\n"
+            "Username больше не выучивается автоматически.",
+        )
+
+    except Exception as e:
+        logger.error(f"Error in forget_bot command: {sanitize_for_logging(str(e))}")
+        await send_silent_response(message, "❌ Ошибка снятия вердикта")
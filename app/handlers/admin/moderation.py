@@ -1,13 +1,15 @@
 """
-Команды модерации (unban, banned, ban_history, sync_bans)
+Команды модерации (unban, banned, ban_history, sync_bans, gban)
 """
 
 import logging
+import time
 
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from app.constants import GLOBAL_BAN_PROGRESS_INTERVAL
 from app.filters.is_admin_or_silent import IsAdminOrSilentFilter
 from app.services.admin import AdminService
 from app.services.channels import ChannelService
@@ -553,3 +555,71 @@ async def handle_sync_bans_command(
 
         logger.error(f"Sync_bans traceback: {traceback.format_exc()}")
         await message.answer(f"❌ Ошибка синхронизации банов: {sanitize_for_logging(str(e))}")
+
+
+@moderation_router.message(Command("gban"), IsAdminOrSilentFilter())
+async def handle_global_ban_command(
+    message: Message,
+    moderation_service: ModerationService,
+    channel_service: ChannelService,
+    admin_id: int,
+) -> None:
+    """Заблокировать пользователя во всех управляемых чатах."""
+    try:
+        if not message.from_user:
+            return
+        logger.info(f"Global ban command from {sanitize_for_logging(str(message.from_user.id))}")
+
+        args = message.text.split(maxsplit=2)[1:] if message.text else []
+        if not args:
+            await message.answer(
+                "❌ Укажите ID пользователя\n\n"
+                "💡 <b>Использование:</b>\n"
+                "• <code>/gban &lt;user_id&gt; [причина]</code> - заблокировать во всех чатах"
+            )
+            return
+
+        try:
+            user_id = int(args[0])
+        except ValueError:
+            await message.answer("❌ Неверный формат ID пользователя")
+            return
+        reason = args[1] if len(args) > 1 else "Глобальный бан"
+
+        chat_ids = await channel_service.get_managed_chat_ids()
+        if not chat_ids:
+            await message.answer("❌ Нет чатов где бот является администратором")
+            return
+
+        # Один статусный ответ: прогресс и итог редактируют это же сообщение
+        status_message = await message.answer(
+            f"⏳ Глобальный бан <code>{user_id}</code>: 0/{len(chat_ids)} чатов..."
+        )
+        last_update = time.monotonic()
+
+        async def report_progress(done: int, total: int) -> None:
+            nonlocal last_update
+            now = time.monotonic()
+            if done < total and now - last_update >= GLOBAL_BAN_PROGRESS_INTERVAL:
+                last_update = now
+                await status_message.edit_text(f"⏳ Глобальный бан <code>{user_id}</code>: {done}/{total} чатов...")
+
+        result = await moderation_service.global_ban(
+            user_id=user_id, chat_ids=chat_ids, admin_id=admin_id, reason=reason, progress=report_progress
+        )
+
+        text = f"🚫 <b>Глобальный бан</b> <code>{user_id}</code>\n\n"
+        text += f"✅ Заблокирован в {len(result.banned)} из {result.total} чатов\n"
+        text += f"⏱ Время: {result.latency:.1f} с\n"
+        if result.failed:
+            text += f"\n❌ <b>Ошибки ({len(result.failed)}):</b>\n"
+            for chat_id, error in list(result.failed.items())[:10]:
+                text += f"• <code>{chat_id}</code>: {sanitize_for_logging(error)[:80]}\n"
+            if len(result.failed) > 10:
+                text += f"... и еще {len(result.failed) - 10}\n"
+
+        await status_message.edit_text(text)
+
+    except Exception as e:
+        logger.error(f"Error in gban command: {sanitize_for_logging(str(e))}")
+        await message.answer(f"❌ Ошибка глобального бана: {sanitize_for_logging(str(e))}")
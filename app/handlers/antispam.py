@@ -3,6 +3,7 @@
 """
 
 import logging
+from typing import Optional
 
 from aiogram import F, Router
 from aiogram.types import Message
@@ -12,6 +13,7 @@
 from app.services.links import LinkService
 from app.services.moderation import ModerationService
 from app.services.profiles import ProfileService
+from app.utils.message_features import MessageFeatures
 from app.utils.security import sanitize_for_logging
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,7 @@ async def handle_edited_messages(
     channel_service: ChannelService,
     bot_service: BotService,
     admin_id: int,
+    message_features: Optional[MessageFeatures] = None,
 ) -> None:
     """
     Обрабатывает ОТРЕДАКТИРОВАННЫЕ сообщения - критично для антиспама!
@@ -43,7 +46,7 @@ async def handle_edited_messages(
         # Спамеры могут отредактировать команду и добавить бот-ссылку
 
         # Проверяем на бот-ссылки и подозрительный контент
-        results = await link_service.check_message_for_bot_links(message)
+        results = await link_service.check_message_for_bot_links(message, message_features)
 
         if results:
             logger.warning(f"EDITED MESSAGE SPAM DETECTED: {results}")
@@ -66,6 +69,7 @@ async def handle_channel_posts(
     channel_service: ChannelService,
     bot_service: BotService,
     admin_id: int,
+    message_features: Optional[MessageFeatures] = None,
 ) -> None:
     """
     Обрабатывает посты в каналах (нативные посты канала).
@@ -74,7 +78,7 @@ async def handle_channel_posts(
         logger.info(f"Channel post processing: {message.text[:50] if message.text else 'Media'}...")
 
         # Проверяем на бот-ссылки и подозрительный контент
-        results = await link_service.check_message_for_bot_links(message)
+        results = await link_service.check_message_for_bot_links(message, message_features)
 
         if results:
             logger.warning(f"CHANNEL POST SPAM DETECTED: {results}")
@@ -84,6 +88,9 @@ async def handle_channel_posts(
         else:
             logger.info("Channel post passed antispam checks")
 
+            # Пережатые копии удаленных спам-картинок проверяются в фоне
+            link_service.check_similar_images(message)
+
     except Exception as e:
         logger.error(f"Error processing channel post: {e}")
 
@@ -97,6 +104,7 @@ async def handle_all_messages(
     channel_service: ChannelService,
     bot_service: BotService,
     admin_id: int,
+    message_features: Optional[MessageFeatures] = None,
 ) -> None:
     """
     Обрабатывает ВСЕ сообщения - основной антиспам фильтр.
@@ -134,7 +142,7 @@ async def handle_all_messages(
             channel_id = message.sender_chat.id if message.sender_chat else message.chat.id
 
             # Проверяем на бот-ссылки и подозрительный контент
-            bot_links = await link_service.check_message_for_bot_links(message)
+            bot_links = await link_service.check_message_for_bot_links(message, message_features)
 
             if bot_links:
                 logger.warning(f"Bot links detected: {bot_links}")
@@ -151,6 +159,9 @@ async def handle_all_messages(
             else:
                 logger.info("No bot links detected, message allowed")
 
+                # Пережатые копии удаленных спам-картинок проверяются в фоне
+                link_service.check_similar_images(message)
+
                 # Если нет бот-ссылок, но есть отправитель - анализируем его профиль
                 if message.from_user:
                     try:
@@ -1,6 +1,7 @@
 """Channel message handlers."""
 
 import logging
+from typing import Optional
 
 from aiogram import Router
 from aiogram.filters import BaseFilter
@@ -10,6 +11,7 @@
 from app.services.links import LinkService
 from app.services.moderation import ModerationService
 from app.services.profiles import ProfileService
+from app.utils.message_features import MessageFeatures
 from app.utils.security import safe_format_message, sanitize_for_logging
 
 # DI will inject services automatically
@@ -37,6 +39,7 @@ async def handle_channel_message(
     profile_service: ProfileService,
     moderation_service: ModerationService,
     admin_id: int,
+    message_features: Optional[MessageFeatures] = None,
 ) -> None:
     """Handle messages from channels and channel comment groups."""
     try:
@@ -78,6 +81,7 @@ async def handle_channel_message(
                 profile_service,
                 moderation_service,
                 admin_id,
+                message_features,
             )
         else:
             # Foreign channel - check for spam and rate limiting
@@ -89,6 +93,7 @@ async def handle_channel_message(
                 profile_service,
                 moderation_service,
                 admin_id,
+                message_features,
             )
 
     except Exception as e:
@@ -102,13 +107,14 @@ async def _handle_native_channel_message(
     profile_service: ProfileService,
     moderation_service: ModerationService,
     admin_id: int,
+    features: Optional[MessageFeatures] = None,
 ) -> None:
     """Handle messages from native channel with basic spam checking."""
     try:
         logger.info(f"Native channel message: {sanitize_for_logging(message.text) if message.text else 'None'}")
 
         # Check for bot links in message
-        bot_links = await link_service.check_message_for_bot_links(message)
+        bot_links = await link_service.check_message_for_bot_links(message, features)
         logger.info(f"Bot links found: {bot_links}")
 
         if bot_links:
@@ -139,6 +145,7 @@ async def _handle_foreign_channel_message(
     profile_service: ProfileService,
     moderation_service: ModerationService,
     admin_id: int,
+    features: Optional[MessageFeatures] = None,
 ) -> None:
     """Handle messages from foreign channels with spam checking."""
     try:
@@ -148,7 +155,7 @@ async def _handle_foreign_channel_message(
         channel_id = message.sender_chat.id if message.sender_chat else message.chat.id
 
         # Check for bot links and suspicious content in message
-        bot_links = await link_service.check_message_for_bot_links(message)
+        bot_links = await link_service.check_message_for_bot_links(message, features)
         logger.info(f"Bot links found in foreign channel: {bot_links}")
 
         # Check for suspicious media content
@@ -208,6 +215,10 @@ async def handle_channel_member_update(update, channel_service: ChannelService,
             )
         )
 
+        # Bot rights changed - refresh cached capabilities and is_native
+        if getattr(update, "chat", None) and getattr(update, "new_chat_member", None):
+            await channel_service.update_channel_capabilities(update.chat.id, update.new_chat_member)
+
         # Check if bot was added to a channel
         if (
             hasattr(update, "new_chat_member")
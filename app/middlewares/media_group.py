@@ -0,0 +1,44 @@
+"""
+Media Group Middleware
+Пропускает альбом дальше по цепочке одним сообщением
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+from app.services.media_groups import MediaGroupCollector, combine_album, get_media_groups
+
+# Ключ в data со всеми частями альбома
+MEDIA_GROUP_KEY = "album"
+
+
+class MediaGroupMiddleware(BaseMiddleware):
+    """Собирает части альбома; хендлеры вызываются один раз на альбом.
+
+    Регистрируется после RecentMessagesMiddleware (все части попадают
+    в индекс для очистки при бане) и перед MessageFeaturesMiddleware,
+    чтобы признаки считались по объединенной подписи.
+    """
+
+    def __init__(self, collector: Optional[MediaGroupCollector] = None):
+        super().__init__()
+        self.collector = collector or get_media_groups()
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Message) or not event.media_group_id:
+            return await handler(event, data)
+
+        album = await self.collector.collect(event)
+        if album is None:
+            # Часть уже собираемого альбома: обработается вместе с ним
+            return None
+
+        data[MEDIA_GROUP_KEY] = album
+        return await handler(combine_album(album), data)
@@ -0,0 +1,30 @@
+"""
+Message Features Middleware
+Вычисляет MessageFeatures один раз на update и кладет в data
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+from app.utils.message_features import MESSAGE_FEATURES_KEY, extract_features
+
+
+class MessageFeaturesMiddleware(BaseMiddleware):
+    """Добавляет data["message_features"] для сообщений и постов.
+
+    Регистрируется перед ValidationMiddleware: валидация, антиспам
+    и LinkService берут признаки отсюда, а не считают их заново.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Message) and MESSAGE_FEATURES_KEY not in data:
+            data[MESSAGE_FEATURES_KEY] = extract_features(event)
+
+        return await handler(event, data)
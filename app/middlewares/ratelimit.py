@@ -6,7 +6,7 @@
 from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery, Message, TelegramObject
 
-from app.config import load_config
+from app.config import get_config
 
 
 class RateLimitMiddleware(BaseMiddleware):
@@ -31,7 +31,6 @@ def __init__(self, user_limit: int = 10, admin_limit: int = 100, interval: int =
         self.admin_limit = admin_limit
         self.interval = interval
         self.requests = {}  # user_id -> [timestamps]
-        self.config = load_config()
 
     async def __call__(
         self,
@@ -48,7 +47,7 @@ async def __call__(
             return await handler(event, data)
 
         # Determine if user is admin and set appropriate limit
-        is_admin = user_id in self.config.admin_ids_list
+        is_admin = get_config().is_admin(user_id)
         limit = self.admin_limit if is_admin else self.user_limit
 
         # Check rate limit using monotonic time for accuracy
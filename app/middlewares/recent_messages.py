@@ -0,0 +1,37 @@
+"""
+Recent Messages Middleware
+Запоминает ID сообщений пользователей в группах для очистки при бане
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message
+
+from app.services.message_history import RecentMessageIndex, get_recent_messages
+
+GROUP_CHAT_TYPES = frozenset({"group", "supergroup"})
+
+
+class RecentMessagesMiddleware(BaseMiddleware):
+    """Записывает каждое сообщение группы в RecentMessageIndex.
+
+    Регистрируется первым, чтобы учитывались и сообщения,
+    отброшенные дальнейшими middleware (rate limit, валидация).
+    """
+
+    def __init__(self, index: Optional[RecentMessageIndex] = None):
+        super().__init__()
+        self.index = index or get_recent_messages()
+
+    async def __call__(
+        self,
+        handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any],
+    ) -> Any:
+        if isinstance(event, Message) and event.from_user and not event.sender_chat:
+            if event.chat.type in GROUP_CHAT_TYPES:
+                self.index.record(event.chat.id, event.from_user.id, event.message_id)
+
+        return await handler(event, data)
@@ -0,0 +1,40 @@
+"""
+Telegram Lookup Cache Middleware
+Request middleware для сессии бота: кэш справочных запросов к Bot API
+"""
+
+from typing import TYPE_CHECKING, Optional
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from app.services.telegram_lookup_cache import TelegramLookupCache, get_telegram_lookup_cache
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+class TelegramLookupCacheMiddleware(BaseRequestMiddleware):
+    """Отдает getChat/getChatMember и т.п. из кэша.
+
+    Регистрируется до TelegramSchedulerMiddleware, чтобы попадания
+    в кэш не занимали слоты и токены планировщика.
+    """
+
+    def __init__(self, cache: Optional[TelegramLookupCache] = None):
+        self.cache = cache or get_telegram_lookup_cache()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        if self.cache.is_cacheable(method):
+            return await self.cache.fetch(bot.id, method, lambda: make_request(bot, method))
+
+        result = await make_request(bot, method)
+        if self.cache.is_invalidating(method):
+            self.cache.invalidate_chat(getattr(method, "chat_id", None))
+        return result
@@ -0,0 +1,40 @@
+"""
+Telegram Scheduler Middleware
+Request middleware для сессии бота: приоритеты, лимиты и повторы после 429
+"""
+
+from typing import TYPE_CHECKING, Optional
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from app.services.telegram_limiter import classify_method, get_limited_chat_id, get_method_name
+from app.services.telegram_scheduler import TelegramScheduler, get_telegram_scheduler
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+
+class TelegramSchedulerMiddleware(BaseRequestMiddleware):
+    """Проводит все запросы к Bot API через TelegramScheduler (лимиты TelegramLimiter и повторы после 429).
+
+    Подключается к сессии: ``bot.session.middleware(TelegramSchedulerMiddleware())``
+    """
+
+    def __init__(self, scheduler: Optional[TelegramScheduler] = None):
+        self.scheduler = scheduler or get_telegram_scheduler()
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: "Bot",
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        priority = classify_method(method)
+        if priority is None:
+            return await make_request(bot, method)
+
+        return await self.scheduler.run(
+            priority, lambda: make_request(bot, method), chat_id=get_limited_chat_id(method), method=get_method_name(method)
+        )
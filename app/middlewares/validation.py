@@ -3,12 +3,14 @@
 """
 
 import logging
-from typing import Any, Callable, Dict, List
+from typing import AbstractSet, Any, Callable, Dict, List, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import CallbackQuery, Message, TelegramObject
 
 from app.constants import ERROR_MESSAGES
+from app.utils.keyword_engine import get_keyword_engine
+from app.utils.message_features import MESSAGE_FEATURES_KEY, MessageFeatures, compute_char_stats
 from app.utils.security import (
     log_security_event,
     sanitize_for_logging,
@@ -30,6 +32,21 @@ class ValidationMiddleware(BaseMiddleware):
     - Защиту от атак
     """
 
+    # Категории KeywordEngine: ссылки и спам-слова в группах и каналах
+    SUSPICIOUS_MESSAGE_CATEGORIES = ("link_markers", "spam_words")
+    SUSPICIOUS_TEXT_CATEGORIES = (
+        "javascript_injection",
+        "javascript_url",
+        "eval_function",
+        "alert_function",
+        "confirm_function",
+        "prompt_function",
+        "path_traversal",
+        "path_traversal_windows",
+        "sql_statement",
+    )
+    SUSPICIOUS_CALLBACK_CATEGORIES = ("script_tag", "javascript_url", "path_traversal", "sql_keyword")
+
     async def __call__(
         self, handler: Callable[[TelegramObject, Dict[str, Any]], Any], event: TelegramObject, data: Dict[str, Any]
     ) -> Any:
@@ -84,27 +101,30 @@ async def _validate_event(self, event: TelegramObject, data: Dict[str, Any]) ->
         errors = []
 
         if isinstance(event, Message):
-            errors.extend(await self._validate_message(event))
+            errors.extend(await self._validate_message(event, data.get(MESSAGE_FEATURES_KEY)))
         elif isinstance(event, CallbackQuery):
             errors.extend(await self._validate_callback_query(event))
 
         return {"is_valid": len(errors) == 0, "errors": errors}
 
-    async def _validate_message(self, message: Message) -> List[str]:
+    async def _validate_message(self, message: Message, features: Optional[MessageFeatures] = None) -> List[str]:
         """
         Валидирует сообщение (оптимизированная версия).
 
         Args:
             message: Сообщение для валидации
+            features: Признаки сообщения из MessageFeaturesMiddleware
 
         Returns:
             Список ошибок валидации
         """
+        keyword_hits = features.keyword_hits if features is not None else None
+
         # 1. ВАЛИДАЦИЯ КОМАНД (всегда)
         if message.text and message.text.startswith("/"):
             errors = []
             if message.text:
-                text_errors = input_validator._validate_text_content(message.text, "message_text")
+                text_errors = input_validator._validate_text_content(message.text, "message_text", keyword_hits)
                 for error in text_errors:
                     if error.severity in [ValidationSeverity.CRITICAL, ValidationSeverity.HIGH]:
                         logger.warning(f"Command validation error: {error.field} - {error.message}")
@@ -119,7 +139,7 @@ async def _validate_message(self, message: Message) -> List[str]:
                 if message.from_user.id in waiting_for_user_input:
                     errors = []
                     if message.text:
-                        text_errors = input_validator._validate_text_content(message.text, "message_text")
+                        text_errors = input_validator._validate_text_content(message.text, "message_text", keyword_hits)
                         for error in text_errors:
                             if error.severity in [ValidationSeverity.CRITICAL, ValidationSeverity.HIGH]:
                                 logger.warning(f"Interactive input validation error: {error.field} - {error.message}")
@@ -131,8 +151,8 @@ async def _validate_message(self, message: Message) -> List[str]:
         # 3. ПРОВЕРКА ТИПА ЧАТА - в группах комментариев валидируем только подозрительные
         if message.chat and message.chat.type in ["group", "supergroup"]:
             # В группах валидируем только подозрительные сообщения
-            if self._is_suspicious_message(message):
-                return self._validate_suspicious_message(message)
+            if self._is_suspicious_message(message, features):
+                return self._validate_suspicious_message(message, keyword_hits)
             else:
                 # Обычные сообщения в группах пропускаем
                 return []
@@ -143,38 +163,40 @@ async def _validate_message(self, message: Message) -> List[str]:
 
         # 5. ВАЛИДАЦИЯ В КАНАЛАХ (только подозрительные)
         if message.chat and message.chat.type == "channel":
-            if self._is_suspicious_message(message):
-                return self._validate_suspicious_message(message)
+            if self._is_suspicious_message(message, features):
+                return self._validate_suspicious_message(message, keyword_hits)
             else:
                 return []
 
         # 6. ПО УМОЛЧАНИЮ - пропускаем
         return []
 
-    def _is_suspicious_message(self, message: Message) -> bool:
+    def _is_suspicious_message(self, message: Message, features: Optional[MessageFeatures] = None) -> bool:
         """
         Проверяет, является ли сообщение подозрительным.
 
         Args:
             message: Сообщение для проверки
+            features: Готовые признаки текста (если нет - считаются здесь)
 
         Returns:
             True если сообщение подозрительное
         """
         # Проверяем на спам-паттерны
         if message.text:
-            # Ссылки
-            if "http" in message.text.lower() or "www." in message.text.lower():
-                return True
-            # Подозрительные слова
-            spam_words = ["реклама", "заработок", "быстро", "легко", "без вложений", "кликни", "перейди"]
-            if any(word in message.text.lower() for word in spam_words):
+            if features is not None:
+                hits, chars = features.keyword_hits, features.chars
+            else:
+                hits = get_keyword_engine().scan(message.text, self.SUSPICIOUS_MESSAGE_CATEGORIES)
+                chars = compute_char_stats(message.text)
+            # Ссылки и подозрительные слова
+            if any(category in hits for category in self.SUSPICIOUS_MESSAGE_CATEGORIES):
                 return True
             # Много заглавных букв
-            if len([c for c in message.text if c.isupper()]) > len(message.text) * 0.7:
+            if chars.upper > chars.length * 0.7:
                 return True
             # Много повторяющихся символов
-            if any(message.text.count(c) > 5 for c in set(message.text)):
+            if chars.max_char_frequency > 5:
                 return True
 
         # Проверяем медиа без подписи
@@ -187,12 +209,15 @@ def _is_suspicious_message(self, message: Message) -> bool:
 
         return False
 
-    def _validate_suspicious_message(self, message: Message) -> List[str]:
+    def _validate_suspicious_message(
+        self, message: Message, keyword_hits: Optional[AbstractSet[str]] = None
+    ) -> List[str]:
         """
         Валидирует подозрительное сообщение.
 
         Args:
             message: Подозрительное сообщение
+            keyword_hits: Категории KeywordEngine из MessageFeatures
 
         Returns:
             Список ошибок валидации
@@ -205,7 +230,7 @@ def _validate_suspicious_message(self, message: Message) -> List[str]:
 
         # Проверка текста
         if message.text:
-            text_errors = input_validator._validate_text_content(message.text, "message_text")
+            text_errors = input_validator._validate_text_content(message.text, "message_text", keyword_hits)
             for error in text_errors:
                 if error.severity in [ValidationSeverity.CRITICAL, ValidationSeverity.HIGH]:
                     errors.append(f"{error.field}: {error.message}")
@@ -289,29 +314,7 @@ def _is_suspicious_text(self, text: str) -> bool:
         Returns:
             True если текст подозрительный
         """
-        suspicious_patterns = [
-            r"<script[^>]*>.*?</script>",  # JavaScript
-            r"javascript:",  # JavaScript URLs
-            r"eval\s*\(",  # eval function
-            r"alert\s*\(",  # alert function
-            r"confirm\s*\(",  # confirm function
-            r"prompt\s*\(",  # prompt function
-            r"\.\./",  # Path traversal
-            r"\.\.\\",  # Path traversal (Windows)
-            r"SELECT.*FROM",  # SQL injection
-            r"INSERT.*INTO",  # SQL injection
-            r"UPDATE.*SET",  # SQL injection
-            r"DELETE.*FROM",  # SQL injection
-            r"DROP.*TABLE",  # SQL injection
-        ]
-
-        import re
-
-        for pattern in suspicious_patterns:
-            if re.search(pattern, text, re.IGNORECASE | re.DOTALL):
-                return True
-
-        return False
+        return bool(get_keyword_engine().scan(text, self.SUSPICIOUS_TEXT_CATEGORIES))
 
     def _is_suspicious_callback_data(self, data: str) -> bool:
         """
@@ -323,20 +326,7 @@ def _is_suspicious_callback_data(self, data: str) -> bool:
         Returns:
             True если data подозрительные
         """
-        suspicious_patterns = [
-            r"<script",  # HTML/JavaScript
-            r"javascript:",  # JavaScript URLs
-            r"\.\./",  # Path traversal
-            r"SELECT|INSERT|UPDATE|DELETE|DROP",  # SQL injection
-        ]
-
-        import re
-
-        for pattern in suspicious_patterns:
-            if re.search(pattern, data, re.IGNORECASE):
-                return True
-
-        return False
+        return bool(get_keyword_engine().scan(data, self.SUSPICIOUS_CALLBACK_CATEGORIES))
 
     def _is_safe_media(self, message: Message) -> bool:
         """
@@ -455,6 +445,8 @@ class CommandValidationMiddleware(BaseMiddleware):
     - Безопасность команд
     """
 
+    SUSPICIOUS_TEXT_CATEGORIES = ("javascript_injection", "javascript_url", "eval_function", "path_traversal", "sql_injection")
+
     async def __call__(
         self, handler: Callable[[TelegramObject, Dict[str, Any]], Any], event: TelegramObject, data: Dict[str, Any]
     ) -> Any:
@@ -523,21 +515,7 @@ def _is_suspicious_text(self, text: str) -> bool:
         Returns:
             True если текст подозрительный
         """
-        suspicious_patterns = [
-            r"<script[^>]*>.*?</script>",  # JavaScript
-            r"javascript:",  # JavaScript URLs
-            r"eval\s*\(",  # eval function
-            r"\.\./",  # Path traversal
-            r"SELECT.*FROM",  # SQL injection
-        ]
-
-        import re
-
-        for pattern in suspicious_patterns:
-            if re.search(pattern, text, re.IGNORECASE | re.DOTALL):
-                return True
-
-        return False
+        return bool(get_keyword_engine().scan(text, self.SUSPICIOUS_TEXT_CATEGORIES))
 
     async def _handle_command_validation_error(self, message: Message, errors: List[str]) -> None:
         """
@@ -2,7 +2,10 @@
 
 from .bot import Bot
 from .channel import Channel
+from .learned_bot import LearnedBot
+from .media_fingerprint import MediaFingerprint
 from .moderation_log import ModerationLog
+from .source_reputation import SourceReputation
 from .suspicious_profile import SuspiciousProfile
 from .user import User
 
@@ -12,4 +15,7 @@
     "Bot",
     "ModerationLog",
     "SuspiciousProfile",
+    "LearnedBot",
+    "SourceReputation",
+    "MediaFingerprint",
 ]
@@ -33,6 +33,7 @@ class Channel(Base):
     status = Column(Enum(ChannelStatus), default=ChannelStatus.PENDING, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
     is_native = Column(Boolean, default=False, nullable=False)
+    native_checked_at = Column(DateTime, nullable=True)  # Когда is_native сверен с Bot API (None - никогда)
 
     # Metadata
     member_count = Column(Integer, nullable=True)
@@ -0,0 +1,33 @@
+"""Learned bot username model."""
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, String
+
+from app.database import Base
+
+
+class LearnedBot(Base):
+    """Bot username learned from confirmed bot link takedowns."""
+
+    __tablename__ = "learned_bots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    username = Column(String(64), unique=True, index=True, nullable=False)  # lowercase, without "@"
+
+    # Detection history
+    detections = Column(Integer, default=0, nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    # Admin override: the username is never judged by this list
+    is_overridden = Column(Boolean, default=False, nullable=False)
+    overridden_by = Column(Integer, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<LearnedBot(username={self.username}, detections={self.detections}, overridden={self.is_overridden})>"
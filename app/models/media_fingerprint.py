@@ -0,0 +1,29 @@
+"""Spam media fingerprint model."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from app.database import Base
+
+
+class MediaFingerprint(Base):
+    """file_unique_id of media deleted as spam."""
+
+    __tablename__ = "media_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    file_unique_id = Column(String(64), unique=True, index=True, nullable=False)
+    kind = Column(String(32), nullable=True)  # photo, video, document, ...
+
+    # Detection history
+    detections = Column(Integer, default=0, nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<MediaFingerprint(file_unique_id={self.file_unique_id}, kind={self.kind}, detections={self.detections})>"
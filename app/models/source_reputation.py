@@ -0,0 +1,29 @@
+"""Forward source reputation model."""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from app.database import Base
+
+
+class SourceReputation(Base):
+    """Decayed spam/clean verdict counts for a forward source chat."""
+
+    __tablename__ = "source_reputations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chat_id = Column(Integer, unique=True, index=True, nullable=False)  # forward_from_chat.id
+    title = Column(String(255), nullable=True)
+
+    # Verdict counts, decayed to scored_at
+    spam_score = Column(Float, default=0.0, nullable=False)
+    clean_score = Column(Float, default=0.0, nullable=False)
+    scored_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SourceReputation(chat_id={self.chat_id}, spam={self.spam_score:.2f}, clean={self.clean_score:.2f})>"
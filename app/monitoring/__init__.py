@@ -2,6 +2,6 @@
 
 from .alerts import AlertManager
 from .health import HealthChecker
-from .metrics import MetricsCollector
+from .metrics import MetricsCollector, get_metrics_collector
 
-__all__ = ["MetricsCollector", "HealthChecker", "AlertManager"]
+__all__ = ["MetricsCollector", "HealthChecker", "AlertManager", "get_metrics_collector"]
@@ -125,3 +125,17 @@ def export_metrics(self) -> Dict[str, Any]:
             "summary": self.get_summary(),
             "timestamp": time.time(),
         }
+
+
+# Глобальный экземпляр коллектора метрик
+_metrics_collector: Optional[MetricsCollector] = None
+
+
+def get_metrics_collector() -> MetricsCollector:
+    """Получить глобальный экземпляр коллектора метрик."""
+    global _metrics_collector
+
+    if _metrics_collector is None:
+        _metrics_collector = MetricsCollector()
+
+    return _metrics_collector
@@ -0,0 +1,271 @@
+"""
+Blocklist - блок-листы доменов и username с индексом в отображаемом файле.
+
+Исходные списки - текстовые файлы (одна запись в строке, "#" - комментарий).
+Рядом с каждым строится индекс <файл>.idx: открытая адресация по 64-битным
+хэшам (uint64, линейное пробирование, заполнение не больше половины).
+Индекс открывается через mmap только на чтение, поэтому перезапуски и
+несколько процессов бота используют одни и те же страницы page cache,
+а загрузка не зависит от размера списка. Индекс пересобирается, только
+если исходный файл изменился (mtime и размер хранятся в заголовке).
+
+Хэш записи: старшие 32 бита - crc32 (быстрый, по нему выбирается слот),
+младшие - blake2b, который считается только при совпадении crc32. Для
+отсутствующих записей (почти все проверки) поиск - один crc32 и одно-два
+чтения слота.
+
+Домены проверяются по суффиксам: запись "scam.com" блокирует и
+"scam.com", и "www.scam.com". Username сравниваются без "@" и регистра.
+
+Изменения файлов подхватывает BlocklistHotReload: новый индекс строится
+в отдельном потоке, записывается во временный файл и переименовывается
+(os.replace), после чего Blocklist целиком подменяется одной ссылкой.
+"""
+
+import array
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.constants import BLOCKLIST_DOMAINS_FILE, BLOCKLIST_USERNAMES_FILE, BLOCKLIST_WATCH_DEBOUNCE
+from app.utils.file_watcher import FileWatcher
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"FSBLIDX1"
+# magic, маркер порядка байт, число слотов, число записей, mtime_ns и размер исходного файла
+INDEX_HEADER = struct.Struct("=8sQQQqQ")
+BYTE_ORDER_MARK = 0x0102030405060708
+MIN_SLOTS = 8
+
+SourceStamp = Tuple[int, int]
+
+
+def _entry_hash(key: bytes) -> Tuple[int, int]:
+    """(crc32, полный 64-битный хэш) записи; 0 зарезервирован под пустой слот."""
+    crc = zlib.crc32(key)
+    low = int.from_bytes(hashlib.blake2b(key, digest_size=4).digest(), "little") or 1
+    return crc, crc << 32 | low
+
+
+def canonical_username(value: str) -> str:
+    return value.strip().lstrip("@").lower()
+
+
+def canonical_domain(value: str) -> str:
+    value = value.strip().lower()
+    if "://" in value:
+        value = urlsplit(value).hostname or ""
+    return value.lstrip("*.").rstrip(".")
+
+
+class HashIndex:
+    """Множество строк в mmap-файле: только проверка вхождения."""
+
+    def __init__(self, path: Path, mapped: mmap.mmap):
+        magic, mark, slots, entries, mtime_ns, size = INDEX_HEADER.unpack_from(mapped, 0)
+        if magic != INDEX_MAGIC or mark != BYTE_ORDER_MARK or slots & (slots - 1):
+            raise ValueError(f"{path}: не индекс блок-листа")
+        if len(mapped) != INDEX_HEADER.size + slots * 8:
+            raise ValueError(f"{path}: неверный размер индекса")
+
+        self.path = path
+        self.entries = entries
+        self.source: SourceStamp = (mtime_ns, size)
+        self._mapped = mapped
+        self._slots = memoryview(mapped)[INDEX_HEADER.size :].cast("Q")
+        self._mask = slots - 1
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def __contains__(self, key: str) -> bool:
+        encoded = key.encode()
+        crc = zlib.crc32(encoded)
+        slots, mask = self._slots, self._mask
+        position = crc & mask
+        full = 0
+        while True:
+            value = slots[position]
+            if value == 0:
+                return False
+            if value >> 32 == crc:
+                full = full or _entry_hash(encoded)[1]
+                if value == full:
+                    return True
+            position = (position + 1) & mask
+
+    @classmethod
+    def open(cls, path: Path) -> Optional["HashIndex"]:
+        """Открыть индекс; None, если файла нет или он поврежден."""
+        try:
+            with open(path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            return cls(path, mapped)
+        except (ValueError, struct.error) as e:
+            logger.warning(f"Индекс блок-листа будет пересобран: {e}")
+            mapped.close()
+            return None
+
+    @staticmethod
+    def build(keys: Iterable[str], path: Path, source: SourceStamp = (0, 0)) -> int:
+        """Записать индекс для keys атомарно (временный файл + os.replace)."""
+        hashes = {_entry_hash(key.encode()) for key in keys}
+        slots = MIN_SLOTS
+        while slots < len(hashes) * 2:
+            slots *= 2
+        mask = slots - 1
+
+        table = array.array("Q", bytes(slots * 8))
+        for crc, full in hashes:
+            position = crc & mask
+            while table[position]:
+                position = (position + 1) & mask
+            table[position] = full
+
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temporary, "wb") as file:
+            file.write(INDEX_HEADER.pack(INDEX_MAGIC, BYTE_ORDER_MARK, slots, len(hashes), *source))
+            file.write(table.tobytes())
+        os.replace(temporary, path)
+        return len(hashes)
+
+
+def read_entries(source: Path, canonical) -> List[str]:
+    """Записи исходного файла в каноническом виде."""
+    entries = []
+    with open(source, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.split("#", 1)[0]
+            entry = canonical(line) if line.strip() else ""
+            if entry:
+                entries.append(entry)
+    return entries
+
+
+def open_list(source: Path, canonical) -> Optional[HashIndex]:
+    """Индекс для исходного файла: готовый, если актуален, иначе пересобранный."""
+    try:
+        stat = source.stat()
+    except OSError:
+        return None
+
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    index_path = source.with_name(source.name + INDEX_SUFFIX)
+    index = HashIndex.open(index_path)
+    if index is not None and index.source == stamp:
+        return index
+
+    count = HashIndex.build(read_entries(source, canonical), index_path, stamp)
+    logger.info(f"Индекс блок-листа {source} собран: {count} записей")
+    return HashIndex.open(index_path)
+
+
+class Blocklist:
+    """Снимок блок-листов доменов и username."""
+
+    def __init__(self, domains: Optional[HashIndex] = None, usernames: Optional[HashIndex] = None):
+        self.domains = domains
+        self.usernames = usernames
+
+    def is_username_blocked(self, username: str) -> bool:
+        return self.usernames is not None and canonical_username(username) in self.usernames
+
+    def is_domain_blocked(self, host: str) -> bool:
+        """Домен или любой его родительский домен в списке."""
+        domains = self.domains
+        if domains is None or not host:
+            return False
+        host = host.lower().rstrip(".")
+        if host in domains:
+            return True
+        position = host.find(".")
+        while position >= 0:
+            if host[position + 1 :] in domains:
+                return True
+            position = host.find(".", position + 1)
+        return False
+
+    def is_url_blocked(self, url: str) -> bool:
+        if self.domains is None:
+            return False
+        try:
+            host = urlsplit(url if "://" in url else "http://" + url).hostname
+        except ValueError:
+            return False
+        return self.is_domain_blocked(host or "")
+
+    def __repr__(self) -> str:
+        return f"<Blocklist domains={len(self.domains or ())} usernames={len(self.usernames or ())}>"
+
+
+def build_blocklist(domains_path: str = BLOCKLIST_DOMAINS_FILE, usernames_path: str = BLOCKLIST_USERNAMES_FILE) -> Blocklist:
+    """Открыть (при необходимости пересобрать) индексы обоих списков."""
+    return Blocklist(
+        domains=open_list(Path(domains_path), canonical_domain),
+        usernames=open_list(Path(usernames_path), canonical_username),
+    )
+
+
+# Текущий снимок блок-листов (подменяется целиком)
+_blocklist: Optional[Blocklist] = None
+
+
+def publish_blocklist(blocklist: Blocklist) -> Blocklist:
+    """Сделать снимок текущим."""
+    global _blocklist
+
+    _blocklist = blocklist
+    logger.info(f"Блок-листы обновлены: {blocklist!r}")
+    return blocklist
+
+
+def get_blocklist() -> Blocklist:
+    """Получить текущие блок-листы (первое обращение открывает файлы по умолчанию)."""
+    if _blocklist is None:
+        return publish_blocklist(build_blocklist())
+    return _blocklist
+
+
+class BlocklistHotReload:
+    """Пересборка индексов при изменении исходных файлов."""
+
+    def __init__(self, domains_path: str = BLOCKLIST_DOMAINS_FILE, usernames_path: str = BLOCKLIST_USERNAMES_FILE):
+        self.domains_path = domains_path
+        self.usernames_path = usernames_path
+        self.watchers = [
+            FileWatcher(path, self._on_change, debounce=BLOCKLIST_WATCH_DEBOUNCE) for path in (domains_path, usernames_path)
+        ]
+
+    async def start(self) -> None:
+        """Загрузить блок-листы и следить за файлами."""
+        await self.reload()
+        for watcher in self.watchers:
+            await watcher.start()
+
+    async def stop(self) -> None:
+        for watcher in self.watchers:
+            await watcher.stop()
+
+    async def reload(self) -> Blocklist:
+        """Собрать индексы в отдельном потоке и подменить снимок."""
+        blocklist = await asyncio.to_thread(build_blocklist, self.domains_path, self.usernames_path)
+        return publish_blocklist(blocklist)
+
+    async def _on_change(self, path: Path) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Ошибка обновления блок-листа {path}: {e}")
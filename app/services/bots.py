@@ -4,12 +4,13 @@
 from typing import List, Optional
 
 from aiogram import Bot as AiogramBot
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from app.auth.authorization import require_admin, safe_user_operation
 from app.models.bot import Bot
 from app.models.moderation_log import ModerationAction, ModerationLog
+from app.services.shared_cache import BOT_WHITELIST_NAMESPACE, MISSING, get_shared_cache
 
 # from app.utils.security import safe_format_message, sanitize_for_logging
 
@@ -22,6 +23,7 @@ class BotService:
     def __init__(self, bot: AiogramBot, db_session: AsyncSession):
         self.bot = bot
         self.db = db_session
+        self.cache = get_shared_cache()
 
     async def add_bot_to_whitelist(self, username: str, admin_id: int, telegram_id: Optional[int] = None) -> bool:
         """Add bot to whitelist."""
@@ -41,6 +43,7 @@ async def add_bot_to_whitelist(self, username: str, admin_id: int, telegram_id:
                 self.db.add(new_bot)
 
             await self.db.commit()
+            await self.cache.invalidate(BOT_WHITELIST_NAMESPACE, username.lower())
 
             # Log moderation action
             await self._log_bot_action(action=ModerationAction.ALLOW_BOT, bot_username=username, admin_id=admin_id)
@@ -61,6 +64,7 @@ async def remove_bot_from_whitelist(self, username: str, admin_id: int) -> bool:
             if bot:
                 bot.is_whitelisted = False
                 await self.db.commit()
+                await self.cache.invalidate(BOT_WHITELIST_NAMESPACE, username.lower())
 
                 # Log moderation action
                 await self._log_bot_action(action=ModerationAction.BLOCK_BOT, bot_username=username, admin_id=admin_id)
@@ -76,10 +80,18 @@ async def remove_bot_from_whitelist(self, username: str, admin_id: int) -> bool:
             return False
 
     async def is_bot_whitelisted(self, username: str) -> bool:
-        """Check if bot is whitelisted."""
-        result = await self.db.execute(select(Bot.is_whitelisted).where(Bot.username == username))
-        is_whitelisted = result.scalar_one_or_none()
-        return is_whitelisted is True
+        """Check if bot is whitelisted (usernames are case-insensitive)."""
+        username = username.lower()
+        cached = await self.cache.get(BOT_WHITELIST_NAMESPACE, username)
+        if cached is not MISSING:
+            return cached is True
+
+        result = await self.db.execute(
+            select(Bot.is_whitelisted).where(func.lower(Bot.username) == username, Bot.is_whitelisted.is_(True)).limit(1)
+        )
+        is_whitelisted = result.scalar_one_or_none() is True
+        await self.cache.set(BOT_WHITELIST_NAMESPACE, username, is_whitelisted)
+        return is_whitelisted
 
     async def get_whitelisted_bots(self) -> List[Bot]:
         """Get list of whitelisted bots."""
@@ -0,0 +1,122 @@
+"""
+Channel Registry - in-memory копия метаданных каналов.
+
+save_channel_info вызывается на каждое сообщение канала или группы
+комментариев. Реестр хранит последние записанные title/username/флаги
+по telegram_id, поэтому запись в БД выполняется только при реальном
+изменении, а linked_chat группы комментариев запрашивается у Bot API
+не чаще раза в CHANNEL_LINKED_CHAT_TTL. Реестр прогревается из БД при
+старте.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import CHANNEL_LINKED_CHAT_TTL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ChannelRecord:
+    """Поля канала, которые обновляет save_channel_info."""
+
+    telegram_id: int
+    title: Optional[str]
+    username: Optional[str]
+    is_comment_group: bool
+    linked_chat_id: Optional[int] = None
+
+
+class ChannelRegistry:
+    """Реестр каналов, совпадающий с последним записанным состоянием БД."""
+
+    def __init__(self, linked_chat_ttl: float = CHANNEL_LINKED_CHAT_TTL):
+        self.linked_chat_ttl = linked_chat_ttl
+        self._records: Dict[int, ChannelRecord] = {}
+        self._linked_chat_checked: Dict[int, float] = {}
+        self._stats = {"writes": 0, "unchanged": 0, "linked_chat_lookups": 0}
+
+    async def warm(self, session: AsyncSession) -> int:
+        """Загрузить все каналы из БД."""
+        from app.models.channel import Channel as ChannelModel
+
+        result = await session.execute(
+            select(
+                ChannelModel.telegram_id,
+                ChannelModel.title,
+                ChannelModel.username,
+                ChannelModel.is_comment_group,
+                ChannelModel.linked_chat_id,
+            )
+        )
+
+        now = time.monotonic()
+        for row in result.all():
+            record = ChannelRecord(*row)
+            self._records[record.telegram_id] = record
+            # Уже известный linked_chat не перепроверяем сразу после старта
+            if record.linked_chat_id is not None:
+                self._linked_chat_checked[record.telegram_id] = now
+
+        logger.info(f"Реестр каналов прогрет: {len(self._records)} записей")
+        return len(self._records)
+
+    def get(self, telegram_id: int) -> Optional[ChannelRecord]:
+        """Последнее записанное состояние канала."""
+        return self._records.get(telegram_id)
+
+    def is_unchanged(self, record: ChannelRecord) -> bool:
+        """Совпадает ли запись с состоянием БД (запись не нужна)."""
+        if self._records.get(record.telegram_id) == record:
+            self._stats["unchanged"] += 1
+            return True
+        return False
+
+    def put(self, record: ChannelRecord) -> None:
+        """Запомнить состояние после записи в БД."""
+        self._records[record.telegram_id] = record
+        self._stats["writes"] += 1
+
+    def linked_chat_due(self, telegram_id: int) -> bool:
+        """Пора ли (пере)запросить linked_chat группы комментариев."""
+        checked_at = self._linked_chat_checked.get(telegram_id)
+        return checked_at is None or time.monotonic() - checked_at >= self.linked_chat_ttl
+
+    def mark_linked_chat_checked(self, telegram_id: int) -> None:
+        """Отметить запрос linked_chat (успешный или нет)."""
+        self._linked_chat_checked[telegram_id] = time.monotonic()
+        self._stats["linked_chat_lookups"] += 1
+
+    def forget(self, telegram_id: int) -> None:
+        """Удалить канал из реестра (следующее сообщение пойдет в БД)."""
+        self._records.pop(telegram_id, None)
+        self._linked_chat_checked.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        """Очистить реестр."""
+        self._records.clear()
+        self._linked_chat_checked.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика реестра."""
+        return {**self._stats, "entries": len(self._records)}
+
+
+# Глобальный реестр каналов
+_channel_registry: Optional[ChannelRegistry] = None
+
+
+def get_channel_registry() -> ChannelRegistry:
+    """Получить глобальный реестр каналов."""
+    global _channel_registry
+
+    if _channel_registry is None:
+        _channel_registry = ChannelRegistry()
+
+    return _channel_registry
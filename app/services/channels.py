@@ -1,22 +1,78 @@
 """Channel management service."""
 
+import asyncio
 import logging
-from typing import List, Optional
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from aiogram import Bot
-from aiogram.types import Message
+from aiogram.types import ChatMember, Message
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from app.auth.authorization import require_admin, safe_user_operation
+from app.constants import CHANNEL_CAPABILITY_FAILURE_TTL, CHANNEL_CAPABILITY_TTL, CHANNEL_SYNC_CONCURRENCY
 from app.models.channel import Channel as ChannelModel
 from app.models.channel import ChannelStatus
 from app.models.moderation_log import ModerationAction, ModerationLog
+from app.services.channel_registry import ChannelRecord, get_channel_registry
 from app.services.moderation import ModerationService
+from app.services.shared_cache import (
+    CHANNEL_CAPABILITIES_NAMESPACE,
+    CHANNEL_STATUS_NAMESPACE,
+    MISSING,
+    get_shared_cache,
+)
+from app.services.telegram_lookup_cache import get_telegram_lookup_cache
 from app.utils.security import safe_format_message, sanitize_for_logging
 
 logger = logging.getLogger(__name__)
 
+ADMIN_STATUSES = ("administrator", "creator")
+
+
+@dataclass
+class ChannelCapabilities:
+    """What the bot can do in a channel.
+
+    Rights are None when only the persisted is_native flag is known.
+    """
+
+    status: str
+    can_delete_messages: Optional[bool] = None
+    can_restrict_members: Optional[bool] = None
+    linked_chat_id: Optional[int] = None
+
+    @property
+    def is_admin(self) -> bool:
+        return self.status in ADMIN_STATUSES
+
+    @classmethod
+    def from_member(cls, member: ChatMember, linked_chat_id: Optional[int] = None) -> "ChannelCapabilities":
+        """Build capabilities from the bot's ChatMember object."""
+        status = getattr(member.status, "value", member.status)
+        if status == "creator":
+            return cls(status=status, can_delete_messages=True, can_restrict_members=True, linked_chat_id=linked_chat_id)
+        return cls(
+            status=status,
+            can_delete_messages=getattr(member, "can_delete_messages", None),
+            can_restrict_members=getattr(member, "can_restrict_members", None),
+            linked_chat_id=linked_chat_id,
+        )
+
+    @classmethod
+    def from_channel(cls, channel: ChannelModel) -> "ChannelCapabilities":
+        """Build capabilities from the persisted channel row."""
+        return cls(status="administrator" if channel.is_native else "member", linked_chat_id=channel.linked_chat_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChannelCapabilities":
+        return cls(**data)
+
 
 class ChannelService:
     """Service for managing channel whitelist/blacklist."""
@@ -26,6 +82,8 @@ def __init__(self, bot: Bot, db_session: AsyncSession, native_channel_ids: List[
         self.db = db_session
         self.native_channel_ids = native_channel_ids or []
         self.moderation_service = ModerationService(bot, db_session)
+        self.cache = get_shared_cache()
+        self.registry = get_channel_registry()
 
     async def handle_channel_message(self, message: Message, admin_id: int) -> bool:
         """Handle message from channel (sender_chat)."""
@@ -36,6 +94,14 @@ async def handle_channel_message(self, message: Message, admin_id: int) -> bool:
         channel_username = message.sender_chat.username
         channel_title = message.sender_chat.title or "Unknown Channel"
 
+        # Fast path: allowed/blocked status from shared cache, no DB round-trip
+        cached_status = await self.cache.get(CHANNEL_STATUS_NAMESPACE, str(channel_id))
+        if cached_status == ChannelStatus.ALLOWED.value:
+            return False
+        if cached_status == ChannelStatus.BLOCKED.value:
+            await self._delete_blocked_channel_message(message, channel_id)
+            return True
+
         # Check if channel is already in database
         channel = await self._get_channel_by_id(channel_id)
 
@@ -53,19 +119,13 @@ async def handle_channel_message(self, message: Message, admin_id: int) -> bool:
 
             return True
 
+        if channel.status.value in (ChannelStatus.ALLOWED.value, ChannelStatus.BLOCKED.value):
+            await self.cache.set(CHANNEL_STATUS_NAMESPACE, str(channel_id), channel.status.value)
+
         # Check channel status
         if channel.status.value == ChannelStatus.BLOCKED.value:
             # Channel is blocked - delete message and ban channel
-            await self.moderation_service.delete_message(
-                chat_id=message.chat.id, message_id=message.message_id, admin_id=0  # System action
-            )
-
-            logger.info(
-                safe_format_message(
-                    "Deleted message from blocked channel {channel_id}",
-                    channel_id=sanitize_for_logging(channel_id),
-                )
-            )
+            await self._delete_blocked_channel_message(message, channel_id)
             return True
 
         elif channel.status.value == ChannelStatus.ALLOWED.value:
@@ -77,6 +137,19 @@ async def handle_channel_message(self, message: Message, admin_id: int) -> bool:
             await self._notify_admin_about_channel(admin_id=admin_id, channel=channel, message=message)
             return True
 
+    async def _delete_blocked_channel_message(self, message: Message, channel_id: int) -> None:
+        """Delete message posted by blocked channel."""
+        await self.moderation_service.delete_message(
+            chat_id=message.chat.id, message_id=message.message_id, admin_id=0  # System action
+        )
+
+        logger.info(
+            safe_format_message(
+                "Deleted message from blocked channel {channel_id}",
+                channel_id=sanitize_for_logging(channel_id),
+            )
+        )
+
     async def allow_channel(self, channel_id: int, admin_id: int) -> bool:
         """Allow channel to post messages."""
         try:
@@ -93,6 +166,7 @@ async def allow_channel(self, channel_id: int, admin_id: int) -> bool:
             # Update channel status
             setattr(channel, "status", ChannelStatus.ALLOWED)
             await self.db.commit()
+            await self.cache.invalidate(CHANNEL_STATUS_NAMESPACE, str(channel_id))
 
             # Log moderation action
             await self._log_channel_action(action=ModerationAction.ALLOW_CHANNEL, channel_id=channel_id, admin_id=admin_id)
@@ -135,6 +209,7 @@ async def block_channel(self, channel_id: int, reason: str, admin_id: int) -> bo
             if hasattr(channel, "notes"):
                 channel.notes = reason
             await self.db.commit()
+            await self.cache.invalidate(CHANNEL_STATUS_NAMESPACE, str(channel_id))
 
             # Log moderation action
             await self._log_channel_action(action=ModerationAction.BLOCK_CHANNEL, channel_id=channel_id, admin_id=admin_id)
@@ -228,33 +303,104 @@ async def _log_channel_action(self, action: ModerationAction, channel_id: int, a
     async def is_native_channel(self, channel_id: int) -> bool:
         """Check if channel is native (where bot has admin rights)."""
         try:
-            logger.info(f"Checking if channel {channel_id} is native...")
-            logger.info(f"Configured native channels: {self.native_channel_ids}")
-
             # First check if channel is in the configured native channels list
             if channel_id in self.native_channel_ids:
-                logger.info(f"Channel {channel_id} is in native list: True")
                 return True
 
-            # If not in list, check if bot has admin rights in this channel
-            try:
-                # Get bot's member status in the channel
-                bot_member = await self.bot.get_chat_member(chat_id=channel_id, user_id=self.bot.id)
+            capabilities = await self.get_channel_capabilities(channel_id)
+            return capabilities is not None and capabilities.is_admin
+
+        except Exception as e:
+            logger.error(safe_format_message("Error checking if channel is native: {error}", error=sanitize_for_logging(e)))
+            return False
+
+    async def get_channel_capabilities(self, channel_id: int) -> Optional[ChannelCapabilities]:
+        """Get bot capabilities in channel.
 
-                # Check if bot is admin or creator
-                is_admin = bot_member.status in ["administrator", "creator"]
-                logger.info(f"Channel {channel_id} bot admin status: {is_admin} (status: {bot_member.status})")
+        Lookup order: shared cache, persisted channel row, Bot API. Channel rows
+        are kept current by my_chat_member updates, so the API is only asked
+        about channels the bot has never seen or whose flag was never checked
+        (rows written before is_native was maintained). Failed lookups are
+        cached for CHANNEL_CAPABILITY_FAILURE_TTL.
+        """
+        cached = self.cache.get_local(CHANNEL_CAPABILITIES_NAMESPACE, str(channel_id))
+        if cached is not MISSING:
+            return ChannelCapabilities.from_dict(cached) if cached is not None else None
 
-                return is_admin
+        channel = await self._get_channel_by_id(channel_id)
+        if channel is not None and channel.native_checked_at is not None:
+            capabilities = ChannelCapabilities.from_channel(channel)
+        else:
+            capabilities = await self._fetch_channel_capabilities(channel_id)
+            if capabilities is None:
+                self.cache.set_local(CHANNEL_CAPABILITIES_NAMESPACE, str(channel_id), None, ttl=CHANNEL_CAPABILITY_FAILURE_TTL)
+                return None
+            if channel is not None:
+                capabilities.linked_chat_id = channel.linked_chat_id
+                await self._persist_native_status(
+                    {channel_id: capabilities.is_admin or channel_id in self.native_channel_ids}
+                )
 
-            except Exception as e:
-                # If we can't get member status, assume it's not native
-                logger.warning(f"Could not check admin status for channel {channel_id}: {e}")
-                return False
+        self.cache.set_local(
+            CHANNEL_CAPABILITIES_NAMESPACE, str(channel_id), capabilities.to_dict(), ttl=CHANNEL_CAPABILITY_TTL
+        )
+        return capabilities
+
+    async def update_channel_capabilities(self, channel_id: int, member: ChatMember) -> ChannelCapabilities:
+        """Apply bot membership change (my_chat_member) without asking the API."""
+        channel = await self._get_channel_by_id(channel_id)
+        capabilities = ChannelCapabilities.from_member(member, channel.linked_chat_id if channel else None)
+
+        await self._persist_native_status({channel_id: capabilities.is_admin or channel_id in self.native_channel_ids})
+        get_telegram_lookup_cache().invalidate_chat(channel_id)
+        await self.cache.publish(
+            CHANNEL_CAPABILITIES_NAMESPACE, str(channel_id), capabilities.to_dict(), ttl=CHANNEL_CAPABILITY_TTL
+        )
+
+        logger.info(f"Channel {channel_id} capabilities updated: status={capabilities.status}")
+        return capabilities
 
+    async def _fetch_channel_capabilities(self, channel_id: int) -> Optional[ChannelCapabilities]:
+        """Ask Bot API for the bot's member status in channel."""
+        try:
+            bot_member = await self.bot.get_chat_member(chat_id=channel_id, user_id=self.bot.id)
         except Exception as e:
-            logger.error(safe_format_message("Error checking if channel is native: {error}", error=sanitize_for_logging(e)))
-            return False
+            # If we can't get member status, assume it's not native
+            logger.warning(f"Could not check admin status for channel {channel_id}: {e}")
+            return None
+
+        capabilities = ChannelCapabilities.from_member(bot_member)
+        logger.info(f"Channel {channel_id} bot admin status: {capabilities.is_admin} (status: {capabilities.status})")
+        return capabilities
+
+    async def _persist_native_status(self, statuses: Dict[int, bool]) -> int:
+        """Write is_native for channels whose flag changed or was never checked, in one commit.
+
+        Returns the number of channels whose flag changed.
+        """
+        if not statuses:
+            return 0
+
+        result = await self.db.execute(select(ChannelModel).where(ChannelModel.telegram_id.in_(list(statuses))))
+        channels = result.scalars().all()
+        changed = [channel for channel in channels if channel.is_native != statuses[channel.telegram_id]]
+        unchecked = [channel for channel in channels if channel.native_checked_at is None and channel not in changed]
+        if not changed and not unchecked:
+            return 0
+
+        checked_at = datetime.utcnow()
+        try:
+            for channel in changed + unchecked:
+                channel.is_native = statuses[channel.telegram_id]
+                channel.native_checked_at = checked_at
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        for channel in changed:
+            logger.info(f"Updated channel {channel.telegram_id} native status to {statuses[channel.telegram_id]}")
+        return len(changed)
 
     async def mark_channel_as_suspicious(self, channel_id: int, reason: str, admin_id: int) -> None:
         """Mark channel as suspicious."""
@@ -269,6 +415,7 @@ async def mark_channel_as_suspicious(self, channel_id: int, reason: str, admin_i
                 if hasattr(channel, "notes"):
                     channel.notes = reason
                 await self.db.commit()
+                await self.cache.invalidate(CHANNEL_STATUS_NAMESPACE, str(channel_id))
 
                 # Log the action
                 await self._log_channel_action(ModerationAction.MARK_SUSPICIOUS, channel_id, admin_id)
@@ -322,6 +469,14 @@ async def get_all_channels(self) -> List[ChannelModel]:
             logger.error(f"Error getting all channels: {e}")
             return []
 
+    async def get_managed_chat_ids(self) -> List[int]:
+        """Get IDs of chats where the bot moderates (native channels and comment groups)."""
+        chat_ids = list(self.native_channel_ids)
+        for channel in await self.get_all_channels():
+            if channel.is_native or channel.is_comment_group:
+                chat_ids.append(channel.telegram_id)
+        return list(dict.fromkeys(chat_ids))
+
     async def get_total_channels_count(self) -> int:
         """Get total number of channels."""
         try:
@@ -339,17 +494,7 @@ async def sync_channel_native_status(self, channel_id: int) -> bool:
                 logger.warning(f"Channel {channel_id} not found for sync")
                 return False
 
-            # Check current native status
-            is_native = await self.is_native_channel(channel_id)
-
-            # Update if status changed
-            if channel.is_native != is_native:
-                channel.is_native = is_native
-                await self.db.commit()
-                logger.info(f"Updated channel {channel_id} native status to {is_native}")
-                return True
-
-            return False
+            return await self._refresh_channels_capabilities([channel]) > 0
         except Exception as e:
             logger.error(f"Error syncing channel {channel_id} native status: {e}")
             return False
@@ -358,11 +503,7 @@ async def sync_all_channels_native_status(self) -> int:
         """Sync native status for all channels."""
         try:
             channels = await self.get_all_channels()
-            updated_count = 0
-
-            for channel in channels:
-                if await self.sync_channel_native_status(channel.telegram_id):
-                    updated_count += 1
+            updated_count = await self._refresh_channels_capabilities(channels)
 
             logger.info(f"Synced native status for {updated_count} channels")
             return updated_count
@@ -370,6 +511,37 @@ async def sync_all_channels_native_status(self) -> int:
             logger.error(f"Error syncing all channels native status: {e}")
             return 0
 
+    async def _refresh_channels_capabilities(self, channels: List[ChannelModel]) -> int:
+        """Re-read capabilities from Bot API concurrently and persist changes."""
+        semaphore = asyncio.Semaphore(CHANNEL_SYNC_CONCURRENCY)
+
+        async def fetch(channel: ChannelModel) -> Optional[ChannelCapabilities]:
+            # Explicit refresh - skip cached getChatMember answers
+            get_telegram_lookup_cache().invalidate_chat(channel.telegram_id)
+            async with semaphore:
+                capabilities = await self._fetch_channel_capabilities(channel.telegram_id)
+            if capabilities is not None:
+                capabilities.linked_chat_id = channel.linked_chat_id
+            return capabilities
+
+        fetched = await asyncio.gather(*(fetch(channel) for channel in channels))
+
+        statuses: Dict[int, bool] = {}
+        for channel, capabilities in zip(channels, fetched):
+            if capabilities is None:
+                continue
+            # Configured native channels stay native regardless of rights
+            statuses[channel.telegram_id] = capabilities.is_admin or channel.telegram_id in self.native_channel_ids
+            await self.cache.publish(
+                CHANNEL_CAPABILITIES_NAMESPACE,
+                str(channel.telegram_id),
+                capabilities.to_dict(),
+                ttl=CHANNEL_CAPABILITY_TTL,
+            )
+
+        # Session is not safe for concurrent use - writes happen after all fetches
+        return await self._persist_native_status(statuses)
+
     async def get_channel_info(self, chat_id: int) -> dict:
         """Get channel information from Telegram API."""
         try:
@@ -394,39 +566,41 @@ async def get_channel_info(self, chat_id: int) -> dict:
             }
 
     async def save_channel_info(self, chat, sender_chat=None) -> None:
-        """Save channel information to database."""
-        try:
-            logger.info(f"save_channel_info called: chat={chat}, sender_chat={sender_chat}")
+        """Save channel information to database.
 
+        Writes only when title, username or flags differ from the registry.
+        """
+        try:
             # Determine target chat and if it's a comment group
             if sender_chat:
                 # Message from a channel - save the channel
                 target_chat = sender_chat
                 is_comment_group = False
-                linked_chat_id = None
             else:
                 # Message in comment group - save the comment group
                 target_chat = chat
                 is_comment_group = True
 
-                # Try to get linked_chat_id from Telegram API
-                linked_chat_id = None
-                try:
-                    chat_info = await self.bot.get_chat(chat.id)
-                    if hasattr(chat_info, "linked_chat") and chat_info.linked_chat:
-                        linked_chat_id = chat_info.linked_chat.id
-                        logger.info(f"Found linked chat: {linked_chat_id} for comment group {chat.id}")
-                except Exception as e:
-                    logger.warning(f"Could not get linked chat info for {chat.id}: {e}")
-                    # Still save as comment group even if we can't get linked_chat_id
-
             if not target_chat:
                 logger.info("No target_chat, returning")
                 return
 
-            # Determine if this is a comment group (not needed for now)
-            # is_comment_group = chat.type == "supergroup" and sender_chat is not None
-            # linked_chat_id = sender_chat.id if is_comment_group else None
+            known = self.registry.get(target_chat.id)
+            linked_chat_id = known.linked_chat_id if known else None
+
+            # Resolve linked_chat_id for comment groups at most once per TTL
+            if is_comment_group and self.registry.linked_chat_due(target_chat.id):
+                linked_chat_id = await self._get_linked_chat_id(target_chat.id) or linked_chat_id
+
+            record = ChannelRecord(
+                telegram_id=target_chat.id,
+                title=target_chat.title,
+                username=target_chat.username,
+                is_comment_group=is_comment_group,
+                linked_chat_id=linked_chat_id,
+            )
+            if self.registry.is_unchanged(record):
+                return
 
             # Check if channel already exists
             result = await self.db.execute(select(ChannelModel).where(ChannelModel.telegram_id == target_chat.id))
@@ -443,13 +617,16 @@ async def save_channel_info(self, chat, sender_chat=None) -> None:
                     f"Updated channel info: {target_chat.title} ({target_chat.id}), is_comment_group={is_comment_group}"
                 )
             else:
-                # Create new channel
+                # Create new channel; a failed capability lookup leaves the flag unchecked, to be asked again
+                capabilities = await self.get_channel_capabilities(target_chat.id)
                 new_channel = ChannelModel(
                     telegram_id=target_chat.id,
                     title=target_chat.title,
                     username=target_chat.username,
                     status=ChannelStatus.ALLOWED,  # Use ALLOWED instead of ACTIVE
-                    is_native=False,  # Will be determined later
+                    is_native=(capabilities is not None and capabilities.is_admin)
+                    or target_chat.id in self.native_channel_ids,
+                    native_checked_at=datetime.utcnow() if capabilities is not None else None,
                     is_comment_group=is_comment_group,
                     linked_chat_id=linked_chat_id,
                 )
@@ -458,6 +635,25 @@ async def save_channel_info(self, chat, sender_chat=None) -> None:
 
             await self.db.commit()
 
+            if existing_channel and not linked_chat_id:
+                record = replace(record, linked_chat_id=existing_channel.linked_chat_id)
+            self.registry.put(record)
+
         except Exception as e:
             logger.error(f"Error saving channel info: {e}")
             await self.db.rollback()
+
+    async def _get_linked_chat_id(self, chat_id: int) -> Optional[int]:
+        """Get linked channel of a comment group from Telegram API."""
+        self.registry.mark_linked_chat_checked(chat_id)
+        try:
+            chat_info = await self.bot.get_chat(chat_id)
+        except Exception as e:
+            # Still save as comment group even if we can't get linked_chat_id
+            logger.warning(f"Could not get linked chat info for {chat_id}: {e}")
+            return None
+
+        if getattr(chat_info, "linked_chat_id", None):
+            logger.info(f"Found linked chat: {chat_info.linked_chat_id} for comment group {chat_id}")
+            return chat_info.linked_chat_id
+        return None
@@ -3,7 +3,6 @@
 Реализует hot-reload для limits.json и других настроек.
 """
 
-import asyncio
 import json
 import logging
 import subprocess
@@ -13,92 +12,86 @@
 from pathlib import Path
 from typing import Any, Callable, Dict, Optional
 
+from app.constants import LIMITS_FILE, LIMITS_WATCH_DEBOUNCE
+from app.services.limits import validate_limits
+from app.utils.file_watcher import FileWatcher
+
 logger = logging.getLogger(__name__)
 
 
 class ConfigWatcher:
-    """Сервис для мониторинга изменений в конфигурационных файлах."""
+    """Сервис для мониторинга изменений в конфигурационных файлах.
+
+    Изменения приходят от FileWatcher (inotify, при недоступности - опрос),
+    callback вызывается только при реальном изменении содержимого.
+    """
 
-    def __init__(self, config_file: str, on_change_callback: Optional[Callable] = None):
+    def __init__(
+        self, config_file: str, on_change_callback: Optional[Callable] = None, debounce: float = LIMITS_WATCH_DEBOUNCE
+    ):
         self.config_file = Path(config_file)
         self.on_change_callback = on_change_callback
-        self.last_modified = 0
+        self.debounce = debounce
         self.last_content = ""
-        self.is_running = False
-        self.watch_task: Optional[asyncio.Task] = None
+        self.watcher: Optional[FileWatcher] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.watcher is not None
 
     async def start_watching(self, interval: float = 1.0) -> None:
-        """Запустить мониторинг файла."""
+        """Запустить мониторинг файла (interval - период опроса в резервном режиме)."""
         if self.is_running:
             logger.warning("ConfigWatcher уже запущен")
             return
 
-        self.is_running = True
-        self.watch_task = asyncio.create_task(self._watch_loop(interval))
-        logger.info(f"ConfigWatcher запущен для файла: {self.config_file}")
+        self.watcher = FileWatcher(
+            str(self.config_file), self._on_file_changed, debounce=self.debounce, poll_interval=interval
+        )
+        await self.watcher.start()
+        logger.info(f"ConfigWatcher запущен для файла: {self.config_file} ({self.watcher.backend})")
+
+        # Текущее содержимое - первое "изменение"
+        await self._check_file_changes()
 
     async def stop_watching(self) -> None:
         """Остановить мониторинг файла."""
         if not self.is_running:
             return
 
-        self.is_running = False
-        if self.watch_task:
-            self.watch_task.cancel()
-            try:
-                await self.watch_task
-            except asyncio.CancelledError:
-                pass
+        await self.watcher.stop()
+        self.watcher = None
         logger.info("ConfigWatcher остановлен")
 
-    async def _watch_loop(self, interval: float) -> None:
-        """Основной цикл мониторинга."""
-        while self.is_running:
-            try:
-                await self._check_file_changes()
-                await asyncio.sleep(interval)
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Ошибка в ConfigWatcher: {e}")
-                await asyncio.sleep(interval)
+    async def _on_file_changed(self, path: Path) -> None:
+        """Событие от FileWatcher."""
+        await self._check_file_changes()
 
     async def _check_file_changes(self) -> None:
         """Проверить изменения в файле."""
-        if not self.config_file.exists():
-            return
-
         try:
-            # Проверяем время модификации
-            current_modified = self.config_file.stat().st_mtime
-            if current_modified <= self.last_modified:
-                return
-
-            # Читаем содержимое файла
             with open(self.config_file, "r", encoding="utf-8") as f:
                 current_content = f.read()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Ошибка при проверке файла {self.config_file}: {e}")
+            return
 
-            # Проверяем, изменилось ли содержимое
-            if current_content == self.last_content:
-                self.last_modified = current_modified
-                return
-
-            # Файл изменился
-            logger.info(f"Обнаружены изменения в файле: {self.config_file}")
-
-            # Обновляем кэш
-            self.last_modified = current_modified
-            self.last_content = current_content
+        # Проверяем, изменилось ли содержимое
+        if current_content == self.last_content:
+            return
 
-            # Вызываем callback
-            if self.on_change_callback:
-                try:
-                    await self.on_change_callback(self.config_file, current_content)
-                except Exception as e:
-                    logger.error(f"Ошибка в callback ConfigWatcher: {e}")
+        # Файл изменился
+        logger.info(f"Обнаружены изменения в файле: {self.config_file}")
+        self.last_content = current_content
 
-        except Exception as e:
-            logger.error(f"Ошибка при проверке файла {self.config_file}: {e}")
+        # Вызываем callback
+        if self.on_change_callback:
+            try:
+                await self.on_change_callback(self.config_file, current_content)
+            except Exception as e:
+                logger.error(f"Ошибка в callback ConfigWatcher: {e}")
 
     async def force_reload(self) -> bool:
         """Принудительно перезагрузить конфигурацию."""
@@ -125,12 +118,12 @@ def __init__(self, limits_service, bot, admin_ids: list):
         self.limits_service = limits_service
         self.bot = bot
         self.admin_ids = admin_ids
-        self.watcher = ConfigWatcher("limits.json", self._on_limits_changed)
+        self.watcher = ConfigWatcher(LIMITS_FILE, self._on_limits_changed)
         self.show_limits_on_startup = True  # Показывать лимиты при запуске
 
     async def start(self) -> None:
         """Запустить hot-reload для лимитов."""
-        await self.watcher.start_watching(interval=2.0)  # Проверяем каждые 2 секунды
+        await self.watcher.start_watching(interval=2.0)  # Опрос каждые 2 секунды, если нет inotify
         logger.info("Hot-reload для лимитов запущен")
 
     async def stop(self) -> None:
@@ -143,19 +136,14 @@ async def _on_limits_changed(self, file_path: Path, content: str) -> None:
         try:
             # Парсим новый контент
             new_limits = json.loads(content)
+            old_limits = dict(self.limits_service.get_current_limits())
 
-            # Валидируем новые лимиты
-            if not self._validate_limits(new_limits):
+            # Невалидный файл не трогает действующий снимок лимитов
+            if not isinstance(new_limits, dict) or not self.limits_service.apply_limits(new_limits):
                 logger.error("Новые лимиты не прошли валидацию")
+                await self._notify_admins_about_error("limits.json не прошел валидацию, действуют прежние лимиты")
                 return
 
-            # Обновляем лимиты в сервисе
-            old_limits = self.limits_service.get_current_limits()
-
-            # Обновляем каждый лимит
-            for key, value in new_limits.items():
-                self.limits_service.update_limit(key, value)
-
             # Уведомляем администраторов
             await self._notify_admins_about_reload(old_limits, new_limits)
 
@@ -170,32 +158,7 @@ async def _on_limits_changed(self, file_path: Path, content: str) -> None:
 
     def _validate_limits(self, limits: Dict[str, Any]) -> bool:
         """Валидация новых лимитов."""
-        required_keys = [
-            "max_messages_per_minute",
-            "max_links_per_message",
-            "ban_duration_hours",
-            "suspicion_threshold",
-        ]
-
-        # Проверяем наличие всех ключей
-        if not all(key in limits for key in required_keys):
-            logger.error("Отсутствуют обязательные ключи в limits.json")
-            return False
-
-        # Проверяем типы и значения
-        try:
-            if not isinstance(limits["max_messages_per_minute"], int) or limits["max_messages_per_minute"] <= 0:
-                return False
-            if not isinstance(limits["max_links_per_message"], int) or limits["max_links_per_message"] <= 0:
-                return False
-            if not isinstance(limits["ban_duration_hours"], int) or limits["ban_duration_hours"] <= 0:
-                return False
-            if not isinstance(limits["suspicion_threshold"], (int, float)) or not (0 <= limits["suspicion_threshold"] <= 1):
-                return False
-        except (TypeError, ValueError):
-            return False
-
-        return True
+        return validate_limits(limits)
 
     async def _notify_admins_about_reload(self, old_limits: Dict, new_limits: Dict) -> None:
         """Уведомить администраторов об обновлении лимитов."""
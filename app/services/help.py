@@ -186,6 +186,13 @@ def _initialize_commands(self) -> Dict[str, CommandInfo]:
                 examples=["/sync_bans 1", "/sync_bans -1001234567890"],
                 admin_only=True,
             ),
+            "gban": CommandInfo(
+                command="/gban",
+                description="Заблокировать пользователя во всех управляемых чатах",
+                usage="/gban &lt;user_id&gt; [причина]",
+                examples=["/gban 123456789", "/gban 123456789 Спам-рассылка"],
+                admin_only=True,
+            ),
             # Лимиты и настройки
             "setlimits": CommandInfo(
                 command="/setlimits",
@@ -318,7 +325,7 @@ def _get_admin_commands_structured(self) -> str:
             "📺 Управление каналами": ["channels", "my_chats", "find_chat"],
             "🤖 Управление ботами": ["bots"],
             "🔍 Подозрительные профили": ["suspicious", "suspicious_reset", "suspicious_analyze", "suspicious_remove"],
-            "🚫 Модерация и баны": ["unban", "force_unban", "banned", "ban_history", "sync_bans"],
+            "🚫 Модерация и баны": ["unban", "force_unban", "banned", "ban_history", "sync_bans", "gban"],
             "⚙️ Лимиты и настройки": ["setlimits", "setlimit", "reload_limits"],
             "📋 Логи и отладка": ["logs"],
             "📖 Инструкции": ["instructions"],
@@ -354,7 +361,9 @@ def _get_admin_commands_detailed(self) -> str:
             "🤖 <b>Управление ботами:</b>\n"
             "<b>/bots</b> - Список ботов\n"
             "<b>/add_bot</b> - Добавить бота в whitelist\n"
-            "<b>/remove_bot</b> - Удалить бота из whitelist\n\n"
+            "<b>/remove_bot</b> - Удалить бота из whitelist\n"
+            "<b>/learned_bots</b> - Выученные боты\n"
+            "<b>/forget_bot</b> - Снять выученный вердикт\n\n"
             "🔍 <b>Подозрительные профили:</b>\n"
             "<b>/suspicious</b> - Список подозрительных\n"
             "<b>/suspicious_reset</b> - Сбросить все\n"
@@ -367,7 +376,8 @@ def _get_admin_commands_detailed(self) -> str:
             "<b>/banned</b> - Список заблокированных\n"
             "<b>/ban_history</b> - История банов\n"
             "<b>/sync_bans</b> - Синхронизация банов\n"
-            "<b>/force_unban</b> - Принудительный разбан\n\n"
+            "<b>/force_unban</b> - Принудительный разбан\n"
+            "<b>/gban</b> - Бан во всех управляемых чатах\n\n"
             "⚙️ <b>Лимиты и настройки:</b>\n"
             "<b>/setlimits</b> - Просмотр лимитов\n"
             "<b>/setlimit</b> - Изменить лимит\n"
@@ -559,6 +569,11 @@ def _get_bans_help(self) -> str:
             "• Принудительно разблокирует в Telegram API\n"
             "• Обновляет статус в базе данных\n"
             "• Показывает статус после разбана\n\n"
+            "<b>🌐 /gban</b>\n"
+            "Глобальный бан во всех управляемых чатах:\n"
+            "• /gban &lt;user_id&gt; [причина] - бан в нативных каналах и группах комментариев\n"
+            "• Баны выполняются параллельно с ограничением нагрузки на Telegram API\n"
+            "• Прогресс и итог показываются в одном сообщении\n\n"
             "<b>🔍 /find_chat</b>\n"
             "Поиск ID чата по invite ссылке или username:\n"
             "• /find_chat https://t.me/+invite_link - по invite ссылке\n"
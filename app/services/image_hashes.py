@@ -0,0 +1,230 @@
+"""
+Image Hashes - поиск пережатых копий удаленных спам-картинок.
+
+Отпечаток file_unique_id (MediaFingerprintStore) ловит только тот же файл;
+пережатая или масштабированная картинка получает новый file_unique_id.
+Здесь для фото считается перцептивный хэш (dHash) самого маленького
+размера: превью скачивается через файловый endpoint Bot API, хэш
+считается в пуле процессов. Фото, удаленные за спам, пополняют индекс
+известных хэшей (MultiIndexHash); новое фото с хэшем в пределах
+IMAGE_HASH_MAX_DISTANCE бит от известного удаляется.
+
+Проверка идет в фоне, после основной обработки сообщения: обработка
+текста ее не ждет. Одновременно работает не больше IMAGE_HASH_WORKERS
+проверок, в очереди - не больше IMAGE_HASH_QUEUE_SIZE, остальные фото
+пропускаются. Хэши запоминаются по file_unique_id, так что одно фото
+скачивается и хэшируется один раз.
+
+Известные хэши живут только в памяти. Модуль включается настройкой
+IMAGE_HASH_ENABLED и требует numpy и Pillow.
+"""
+
+import asyncio
+import io
+import logging
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from aiogram import Bot
+from aiogram.types import Message, PhotoSize
+
+from app.constants import (
+    IMAGE_HASH_CACHE_SIZE,
+    IMAGE_HASH_DOWNLOAD_TIMEOUT,
+    IMAGE_HASH_MAX_DISTANCE,
+    IMAGE_HASH_MAX_FILE_SIZE,
+    IMAGE_HASH_MAX_KNOWN,
+    IMAGE_HASH_QUEUE_SIZE,
+    IMAGE_HASH_WORKERS,
+)
+from app.utils.image_hash import IMAGE_HASH_AVAILABLE, MultiIndexHash, dhash
+
+logger = logging.getLogger(__name__)
+
+# Вызывается при совпадении: (расстояние, file_unique_id известной спам-картинки)
+MatchCallback = Callable[[int, str], Awaitable[None]]
+
+_NOT_CACHED = object()
+
+
+class ImageHashService:
+    """Перцептивные хэши фото и поиск похожих на удаленный спам."""
+
+    def __init__(
+        self,
+        workers: int = IMAGE_HASH_WORKERS,
+        queue_size: int = IMAGE_HASH_QUEUE_SIZE,
+        max_distance: int = IMAGE_HASH_MAX_DISTANCE,
+        cache_size: int = IMAGE_HASH_CACHE_SIZE,
+        max_known: int = IMAGE_HASH_MAX_KNOWN,
+        hasher: Callable[[bytes], int] = dhash,
+        executor: Optional[Executor] = None,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cache_size = cache_size
+        self.max_known = max_known
+        self.enabled = False
+        self._hasher = hasher
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._semaphore = asyncio.Semaphore(workers)
+        self._queued = 0
+        self._pending: Set[asyncio.Task] = set()
+        # file_unique_id -> хэш (None - файл не картинка)
+        self._cache: "OrderedDict[str, Optional[int]]" = OrderedDict()
+        # хэши удаленных спам-картинок в порядке добавления; индекс хранит их file_unique_id
+        self._known: "OrderedDict[int, None]" = OrderedDict()
+        self._index: MultiIndexHash[str] = MultiIndexHash(max_distance)
+        self._stats = {"hashed": 0, "cache_hits": 0, "dropped": 0, "matches": 0, "learned": 0, "errors": 0}
+
+    def start(self) -> bool:
+        """Включить проверку фото (если доступен хэшер)."""
+        if self._hasher is dhash and not IMAGE_HASH_AVAILABLE:
+            logger.warning("Поиск похожих спам-картинок выключен: не установлены numpy и Pillow")
+            return False
+        self.enabled = True
+        logger.info(f"Поиск похожих спам-картинок включен: {self.workers} процессов")
+        return True
+
+    async def stop(self) -> None:
+        """Дождаться текущих проверок и остановить пул процессов."""
+        self.enabled = False
+        await self.drain()
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def check(self, bot: Bot, message: Message, on_match: MatchCallback) -> bool:
+        """Поставить фото в очередь проверки; on_match вызывается для похожих на спам.
+
+        Возвращает False, если проверка не нужна или очередь полна.
+        """
+        if not self.enabled or not message.photo or not self._known:
+            return False
+        return self._submit(self._check(bot, message.photo[0], on_match))
+
+    def learn(self, bot: Bot, message: Message) -> bool:
+        """Запомнить хэш фото, удаленного за спам."""
+        if not self.enabled or not message.photo:
+            return False
+        return self._submit(self._learn(bot, message.photo[0]))
+
+    def find(self, value: int) -> Optional[Tuple[int, str]]:
+        """Ближайшая известная спам-картинка: (расстояние, file_unique_id)."""
+        return self._index.find(value)
+
+    def add_known(self, value: int, file_unique_id: str) -> None:
+        """Добавить хэш спам-картинки; сверх лимита старые вытесняются."""
+        if value in self._known:
+            self._known.move_to_end(value)
+            return
+        self._known[value] = None
+        self._index.add(value, file_unique_id)
+        self._stats["learned"] += 1
+
+        while len(self._known) > self.max_known:
+            oldest, _ = self._known.popitem(last=False)
+            self._index.remove(oldest)
+
+    async def hash_photo(self, bot: Bot, photo: PhotoSize) -> Optional[int]:
+        """Хэш фото: из кэша по file_unique_id или скачать и посчитать."""
+        cached = self._cache.get(photo.file_unique_id, _NOT_CACHED)
+        if cached is not _NOT_CACHED:
+            self._cache.move_to_end(photo.file_unique_id)
+            self._stats["cache_hits"] += 1
+            return cached
+
+        if photo.file_size and photo.file_size > IMAGE_HASH_MAX_FILE_SIZE:
+            return None
+
+        # Ошибки скачивания не кэшируются: они бывают временными
+        data = await bot.download(photo.file_id, destination=io.BytesIO(), timeout=IMAGE_HASH_DOWNLOAD_TIMEOUT)
+
+        try:
+            value = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), self._hasher, data.getvalue()
+            )
+            self._stats["hashed"] += 1
+        except Exception as e:
+            logger.warning(f"Не удалось посчитать хэш фото {photo.file_unique_id}: {e}")
+            value = None
+
+        self._cache[photo.file_unique_id] = value
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    async def _check(self, bot: Bot, photo: PhotoSize, on_match: MatchCallback) -> None:
+        value = await self.hash_photo(bot, photo)
+        if value is None:
+            return
+        match = self.find(value)
+        if match is not None:
+            distance, known_id = match
+            self._stats["matches"] += 1
+            logger.warning(f"Фото {photo.file_unique_id} похоже на спам-картинку {known_id}: {distance} бит")
+            await on_match(distance, known_id)
+
+    async def _learn(self, bot: Bot, photo: PhotoSize) -> None:
+        value = await self.hash_photo(bot, photo)
+        if value is not None:
+            self.add_known(value, photo.file_unique_id)
+
+    def _submit(self, coro) -> bool:
+        """Ограниченная очередь: сверх queue_size задачи отбрасываются."""
+        if self._queued >= self.queue_size:
+            coro.close()
+            self._stats["dropped"] += 1
+            return False
+
+        self._queued += 1
+        task = asyncio.create_task(self._run(coro))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return True
+
+    async def _run(self, coro) -> None:
+        try:
+            async with self._semaphore:
+                await coro
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Ошибка проверки фото: {e}")
+        finally:
+            self._queued -= 1
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def drain(self) -> None:
+        """Дождаться фоновых проверок."""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def clear(self) -> None:
+        """Забыть хэши (пул процессов не останавливается)."""
+        self._cache.clear()
+        self._known.clear()
+        self._index = MultiIndexHash(self._index.max_distance)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика проверок."""
+        return {**self._stats, "queued": self._queued, "cached": len(self._cache), "known": len(self._known)}
+
+
+# Глобальный сервис хэшей картинок
+_image_hashes: Optional[ImageHashService] = None
+
+
+def get_image_hashes() -> ImageHashService:
+    """Получить глобальный сервис хэшей картинок."""
+    global _image_hashes
+
+    if _image_hashes is None:
+        _image_hashes = ImageHashService()
+
+    return _image_hashes
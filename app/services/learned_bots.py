@@ -0,0 +1,234 @@
+"""
+Learned Bots - username ботов, выученные из подтвержденных удалений.
+
+Когда handle_bot_link_detection удаляет сообщение и банит автора за ссылки
+на ботов, username этих ботов записываются в таблицу learned_bots со
+счетчиком обнаружений. Выучиваются только username, признанные ботами:
+одно ошибочное удаление не должно навсегда пометить канал или человека,
+на которого в сообщении была ссылка. Копия таблицы хранится в памяти
+(dict по username), поэтому следующие упоминания тех же ботов получают
+вердикт одним lookup, без дальнейшего анализа.
+
+Записи устаревают: срок жизни - LEARNED_BOT_TTL с последнего обнаружения,
+умноженный на число обнаружений (не больше LEARNED_BOT_TTL_MAX_FACTOR),
+так что повторяющиеся волны держатся в списке дольше разовых.
+
+Администратор снимает вердикт командой /forget_bot: запись помечается
+is_overridden, и username больше не выучивается. Whitelist ботов
+проверяется раньше и всегда имеет приоритет.
+
+Память обновляется сразу, запись в БД идет в фоне отдельной сессией.
+Индекс прогревается из БД при старте.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import LEARNED_BOT_TTL, LEARNED_BOT_TTL_MAX_FACTOR
+from app.models.learned_bot import LearnedBot
+from app.utils.background import BackgroundTasks
+
+logger = logging.getLogger(__name__)
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    """Unix time -> naive UTC datetime (как datetime.utcnow в моделях)."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+@dataclass
+class LearnedBotEntry:
+    """Выученный username (время - unix time)."""
+
+    username: str
+    detections: int
+    first_seen: float
+    last_seen: float
+    expires_at: float
+    is_overridden: bool = False
+    overridden_by: Optional[int] = None
+
+
+class LearnedBotIndex:
+    """In-memory индекс таблицы learned_bots."""
+
+    def __init__(
+        self,
+        ttl: float = LEARNED_BOT_TTL,
+        max_factor: int = LEARNED_BOT_TTL_MAX_FACTOR,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self.ttl = ttl
+        self.max_factor = max_factor
+        self._session_factory = session_factory
+        self._entries: Dict[str, LearnedBotEntry] = {}
+        self._background = BackgroundTasks()
+        self._stats = {"hits": 0, "detections": 0, "expired": 0, "overrides": 0}
+
+    async def warm(self, session: AsyncSession) -> int:
+        """Загрузить действующие записи и снятые администратором вердикты."""
+        result = await session.execute(
+            select(LearnedBot).where(or_(LearnedBot.expires_at > datetime.utcnow(), LearnedBot.is_overridden.is_(True)))
+        )
+
+        for row in result.scalars().all():
+            self._entries[row.username] = LearnedBotEntry(
+                username=row.username,
+                detections=row.detections,
+                first_seen=_to_timestamp(row.first_seen),
+                last_seen=_to_timestamp(row.last_seen),
+                expires_at=_to_timestamp(row.expires_at),
+                is_overridden=row.is_overridden,
+                overridden_by=row.overridden_by,
+            )
+
+        logger.info(f"Выученные боты загружены: {len(self._entries)} записей")
+        return len(self._entries)
+
+    def expiry(self, detections: int, now: float) -> float:
+        """Срок действия записи после detections обнаружений."""
+        return now + self.ttl * min(max(detections, 1), self.max_factor)
+
+    def is_known_bot(self, username: str) -> bool:
+        """Выучен ли username как бот (без снятого вердикта и не устаревший)."""
+        username = username.lower()
+        entry = self._entries.get(username)
+        if entry is None or entry.is_overridden:
+            return False
+        if entry.expires_at <= time.time():
+            del self._entries[username]
+            self._stats["expired"] += 1
+            return False
+        self._stats["hits"] += 1
+        return True
+
+    def get(self, username: str) -> Optional[LearnedBotEntry]:
+        return self._entries.get(username.lower().lstrip("@"))
+
+    def record(self, usernames: Iterable[str], now: Optional[float] = None) -> List[LearnedBotEntry]:
+        """Учесть обнаружение ботов; запись в БД - в фоне."""
+        now = time.time() if now is None else now
+        learned = []
+        for username in dict.fromkeys(username.lower() for username in usernames):
+            entry = self._entries.get(username)
+            if entry is not None and entry.is_overridden:
+                continue
+            if entry is None or entry.expires_at <= now:
+                # Устаревшая запись начинает счет заново
+                entry = LearnedBotEntry(username=username, detections=0, first_seen=now, last_seen=now, expires_at=now)
+                self._entries[username] = entry
+
+            entry.detections += 1
+            entry.last_seen = now
+            entry.expires_at = self.expiry(entry.detections, now)
+            learned.append(entry)
+
+        if learned:
+            self._stats["detections"] += len(learned)
+            self._background.run(self._persist(learned))
+        return learned
+
+    async def override(self, username: str, admin_id: int) -> LearnedBotEntry:
+        """Снять вердикт с username и больше его не выучивать."""
+        username = username.lower().lstrip("@")
+        entry = self._entries.get(username)
+        if entry is None:
+            now = time.time()
+            entry = LearnedBotEntry(username=username, detections=0, first_seen=now, last_seen=now, expires_at=now)
+            self._entries[username] = entry
+
+        entry.is_overridden = True
+        entry.overridden_by = admin_id
+        self._stats["overrides"] += 1
+        await self._persist([entry])
+        return entry
+
+    def top(self, limit: int = 20) -> List[LearnedBotEntry]:
+        """Действующие записи, больше всего обнаружений сначала."""
+        now = time.time()
+        active = [entry for entry in self._entries.values() if not entry.is_overridden and entry.expires_at > now]
+        return sorted(active, key=lambda entry: (-entry.detections, -entry.last_seen))[:limit]
+
+    async def _persist(self, entries: List[LearnedBotEntry]) -> None:
+        """Записать состояние записей (upsert по username)."""
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.database import SessionLocal
+
+            session_factory = SessionLocal
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "username": entry.username,
+                "detections": entry.detections,
+                "first_seen": _to_datetime(entry.first_seen),
+                "last_seen": _to_datetime(entry.last_seen),
+                "expires_at": _to_datetime(entry.expires_at),
+                "is_overridden": entry.is_overridden,
+                "overridden_by": entry.overridden_by,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for entry in entries
+        ]
+        statement = insert(LearnedBot).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LearnedBot.username],
+            set_={
+                column: statement.excluded[column]
+                for column in (
+                    "detections",
+                    "first_seen",
+                    "last_seen",
+                    "expires_at",
+                    "is_overridden",
+                    "overridden_by",
+                    "updated_at",
+                )
+            },
+        )
+
+        try:
+            async with session_factory() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Ошибка сохранения выученных ботов: {e}")
+
+    async def drain(self) -> None:
+        """Дождаться фоновых записей в БД."""
+        await self._background.drain()
+
+    def clear(self) -> None:
+        """Очистить индекс (БД не меняется)."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика индекса."""
+        return {**self._stats, "entries": len(self._entries)}
+
+
+# Глобальный индекс выученных ботов
+_learned_bots: Optional[LearnedBotIndex] = None
+
+
+def get_learned_bots() -> LearnedBotIndex:
+    """Получить глобальный индекс выученных ботов."""
+    global _learned_bots
+
+    if _learned_bots is None:
+        _learned_bots = LearnedBotIndex()
+
+    return _learned_bots
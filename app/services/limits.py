@@ -1,31 +1,115 @@
-"""Сервис для управления лимитами системы."""
+"""Сервис для управления лимитами системы.
+
+Текущие лимиты хранятся в неизменяемом снимке (MappingProxyType), который
+атомарно заменяется при изменении limits.json (LimitsHotReload), команде
+/setlimit или сообщении от другой реплики. Чтение лимитов не обращается
+к файловой системе.
+"""
 
 import json
 import logging
-import os
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 
-from app.config import load_config
+from app.config import get_config
+from app.constants import LIMITS_FILE
+from app.services.shared_cache import LIMITS_NAMESPACE, MISSING, get_shared_cache
+from app.utils.keyword_engine import load_keyword_sets, validate_keyword_sets
 
 logger = logging.getLogger(__name__)
 
+# Ключ текущих лимитов в общем кэше
+LIMITS_CACHE_KEY = "current"
+
+# Текущий снимок лимитов процесса
+_limits_snapshot: Optional[Mapping[str, Any]] = None
+
+
+def validate_limits(limits: Any) -> bool:
+    """Валидация лимитов."""
+    if not isinstance(limits, Mapping):
+        logger.error("Лимиты должны быть JSON объектом")
+        return False
+
+    required_keys = [
+        "max_messages_per_minute",
+        "max_links_per_message",
+        "ban_duration_hours",
+        "suspicion_threshold",
+    ]
+
+    # Проверяем наличие всех ключей
+    if not all(key in limits for key in required_keys):
+        logger.error("Отсутствуют обязательные ключи в limits.json")
+        return False
+
+    # Проверяем типы и значения
+    try:
+        if not isinstance(limits["max_messages_per_minute"], int) or limits["max_messages_per_minute"] <= 0:
+            return False
+        if not isinstance(limits["max_links_per_message"], int) or limits["max_links_per_message"] <= 0:
+            return False
+        if not isinstance(limits["ban_duration_hours"], int) or limits["ban_duration_hours"] <= 0:
+            return False
+        if not isinstance(limits["suspicion_threshold"], (int, float)) or not (0 <= limits["suspicion_threshold"] <= 1):
+            return False
+    except (TypeError, ValueError):
+        return False
+
+    # Необязательные списки ключевых слов: {категория: [слова]}
+    if "keyword_sets" in limits and not validate_keyword_sets(limits["keyword_sets"]):
+        logger.error("keyword_sets в limits.json должен быть объектом {категория: [строки]}")
+        return False
+
+    return True
+
+
+def publish_limits(limits: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Атомарно заменить снимок лимитов процесса (и движок ключевых слов)."""
+    global _limits_snapshot
+
+    snapshot = MappingProxyType(dict(limits))
+    load_keyword_sets(snapshot.get("keyword_sets"))
+    _limits_snapshot = snapshot
+    return snapshot
+
+
+def _on_remote_limits(key: Optional[str], value: Any) -> None:
+    """Лимиты, измененные на другой реплике."""
+    if key == LIMITS_CACHE_KEY and value is not MISSING and validate_limits(value):
+        publish_limits(value)
+        logger.info("Лимиты обновлены другой репликой")
+
+
+get_shared_cache().add_listener(LIMITS_NAMESPACE, _on_remote_limits)
+
 
 class LimitsService:
     """Сервис для управления лимитами системы."""
 
     def __init__(self):
-        self.config = load_config()
-        self.limits_file = "limits.json"
-        self._cached_limits = None
-        self._last_file_mtime = 0
-
-    def get_current_limits(self) -> Dict[str, Any]:
-        """Получить текущие лимиты с поддержкой hot-reload."""
-        # Проверяем, нужно ли обновить кэш
-        if self._should_reload_limits():
-            self._cached_limits = self._load_limits()
-
-        return self._cached_limits or {
+        self.config = get_config().settings
+        self.limits_file = LIMITS_FILE
+        self.cache = get_shared_cache()
+
+    def get_current_limits(self) -> Mapping[str, Any]:
+        """Получить текущие лимиты (неизменяемый снимок)."""
+        snapshot = _limits_snapshot
+        if snapshot is None:
+            # Первое обращение в процессе - единственное чтение файла вне watcher
+            snapshot = self._load_initial_limits()
+        return snapshot
+
+    def _load_initial_limits(self) -> Mapping[str, Any]:
+        """Загрузить лимиты из файла, при ошибке - значения из конфигурации."""
+        limits = self._read_limits_file()
+        if limits is not None and self.apply_limits(limits):
+            return _limits_snapshot
+        return publish_limits(self._get_default_limits())
+
+    def _get_default_limits(self) -> Dict[str, Any]:
+        """Значения лимитов из конфигурации."""
+        return {
             "max_messages_per_minute": getattr(self.config, "max_messages_per_minute", 10),
             "max_links_per_message": getattr(self.config, "max_links_per_message", 3),
             "ban_duration_hours": getattr(self.config, "ban_duration_hours", 24),
@@ -36,17 +120,36 @@ def get_current_limits(self) -> Dict[str, Any]:
             "max_document_size_suspicious": getattr(self.config, "max_document_size_suspicious", 1000000),
         }
 
+    def apply_limits(self, limits: Mapping[str, Any]) -> bool:
+        """Проверить и опубликовать новые лимиты.
+
+        Отсутствующие ключи берутся из конфигурации. Невалидные лимиты
+        отклоняются, текущий снимок не меняется.
+        """
+        merged = {**self._get_default_limits(), **limits}
+        if not validate_limits(merged):
+            logger.error("Новые лимиты не прошли валидацию, действуют прежние")
+            return False
+
+        publish_limits(merged)
+        return True
+
     def update_limit(self, limit_name: str, value: Any) -> bool:
         """Обновить лимит."""
         try:
-            # Загружаем текущие лимиты
-            limits = self._load_limits()
-
-            # Обновляем лимит
+            limits = dict(self.get_current_limits())
             limits[limit_name] = value
 
+            if not validate_limits(limits):
+                logger.error(f"Invalid value for limit {limit_name}: {value}")
+                return False
+
             # Сохраняем в файл
             self._save_limits(limits)
+            publish_limits(limits)
+
+            # Остальные реплики получают новое значение сразу
+            self.cache.publish_nowait(LIMITS_NAMESPACE, LIMITS_CACHE_KEY, limits)
 
             logger.info(f"Limit {limit_name} updated to {value}")
             return True
@@ -55,17 +158,16 @@ def update_limit(self, limit_name: str, value: Any) -> bool:
             logger.error(f"Error updating limit {limit_name}: {e}")
             return False
 
-    def _load_limits(self) -> Dict[str, Any]:
-        """Загрузить лимиты из файла."""
+    def _read_limits_file(self) -> Optional[Dict[str, Any]]:
+        """Прочитать limits.json; None, если файла нет или он поврежден."""
         try:
             with open(self.limits_file, "r", encoding="utf-8") as f:
                 return json.load(f)
         except FileNotFoundError:
-            # Если файл не существует, создаем с дефолтными значениями
-            return self.get_current_limits()
+            return None
         except Exception as e:
             logger.error(f"Error loading limits: {e}")
-            return self.get_current_limits()
+            return None
 
     def _save_limits(self, limits: Dict[str, Any]) -> None:
         """Сохранить лимиты в файл."""
@@ -76,31 +178,16 @@ def _save_limits(self, limits: Dict[str, Any]) -> None:
             logger.error(f"Error saving limits: {e}")
             raise
 
-    def _should_reload_limits(self) -> bool:
-        """Проверить, нужно ли перезагрузить лимиты."""
-        try:
-            if not os.path.exists(self.limits_file):
-                return False
-
-            current_mtime = os.path.getmtime(self.limits_file)
-            if current_mtime > self._last_file_mtime:
-                self._last_file_mtime = current_mtime
-                return True
-        except Exception as e:
-            logger.error(f"Ошибка проверки времени модификации файла: {e}")
-
-        return False
-
     def reload_limits(self) -> bool:
         """Принудительно перезагрузить лимиты из файла."""
-        try:
-            self._cached_limits = self._load_limits()
-            logger.info("Лимиты перезагружены из файла")
-            return True
-        except Exception as e:
-            logger.error(f"Ошибка перезагрузки лимитов: {e}")
+        limits = self._read_limits_file()
+        if limits is None or not self.apply_limits(limits):
+            logger.error("Ошибка перезагрузки лимитов: файл отсутствует или некорректен")
             return False
 
+        logger.info("Лимиты перезагружены из файла")
+        return True
+
     def get_limits_display(self) -> str:
         """Получить отображение лимитов для пользователя."""
         limits = self.get_current_limits()
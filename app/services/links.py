@@ -1,23 +1,45 @@
 """Link checking service for bot detection."""
 
 import logging
-import re
 from typing import List, Optional, Tuple
 
 from aiogram import Bot
 from aiogram.types import Message
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from app.auth.authorization import require_admin, safe_user_operation
+from app.constants import SPAM_CLASSIFIER_THRESHOLD
 from app.models.bot import Bot as BotModel
+from app.services.blocklist import get_blocklist
+from app.services.image_hashes import get_image_hashes
+from app.services.learned_bots import get_learned_bots
 from app.services.limits import LimitsService
+from app.services.media_fingerprints import Fingerprint, get_media_fingerprints
+from app.services.media_groups import get_media_groups
 from app.services.moderation import ModerationService
+from app.services.qr_codes import get_qr_codes
+from app.services.shared_cache import BOT_WHITELIST_NAMESPACE, MISSING, get_shared_cache
+from app.services.source_reputation import ALLOW, DENY, get_source_reputation
+from app.services.spam_classifier import CLASSIFIER_FLAG, get_spam_classifier
+from app.services.spam_waves import get_spam_waves
+from app.utils.keyword_engine import get_keyword_engine
+from app.utils.message_features import MessageFeatures, describe_media, extract_features
 from app.utils.pii_protection import secure_logger
 from app.utils.security import safe_format_message, sanitize_for_logging
+from app.utils.telegram_links import BOT_LINK, INVITE_LINK, USERNAME_MENTION, LinkCandidate, find_link_candidates
+from app.utils.text_normalization import normalize
 
 logger = logging.getLogger(__name__)
 
+# Media flags raised by heuristics (configuration, caption keywords like "канал"), not by the content itself
+MEDIA_HEURISTIC_FLAGS = frozenset(
+    {"suspicious_media", "forwarded_media", "document_without_caption", "video_without_caption", "photo_without_caption"}
+)
+
+# Model verdicts: acted on, but not learned from, so the bot does not train on its own output
+MODEL_FLAGS = frozenset({CLASSIFIER_FLAG})
+
 
 class LinkService:
     """Service for checking links and detecting bots."""
@@ -27,9 +49,20 @@ def __init__(self, bot: Bot, db_session: AsyncSession):
         self.db = db_session
         self.moderation_service = ModerationService(bot, db_session)
         self.limits_service = LimitsService()
-
-    async def check_message_for_bot_links(self, message: Message) -> List[Tuple[str, bool]]:
-        """Check message for bot links and return list of (username, is_bot) tuples."""
+        self.cache = get_shared_cache()
+
+    async def check_message_for_bot_links(
+        self, message: Message, features: Optional[MessageFeatures] = None, record_source: bool = True
+    ) -> List[Tuple[str, bool]]:
+        """Check message for bot links and return list of (username, is_bot) tuples.
+
+        features are the precomputed MessageFeatures of this message; they are
+        extracted here when the caller has none (e.g. for reply_to_message).
+        record_source feeds the verdict into the forward source reputation
+        and the message into the spam wave index; it is False for the
+        replied-to message, which is judged by its links only: model and
+        known-media verdicts about it are not held against the replier.
+        """
         results = []
 
         # Skip bot link checking for messages from channels (sender_chat)
@@ -37,32 +70,61 @@ async def check_message_for_bot_links(self, message: Message) -> List[Tuple[str,
             logger.info(f"Skipping bot link check for message from channel: {message.sender_chat.title}")
             return results
 
+        if features is None:
+            features = extract_features(message)
+
+        # Media already deleted as spam: no caption or document analysis
+        known_media = self._check_known_spam_media(message, features) if record_source else []
+        if known_media:
+            return known_media
+
         # Check text content
-        if message.text:
-            text_matches = await self._extract_bot_links_from_text(message.text)
+        if features.text:
+            text_matches = await self._check_link_candidates(features.text_links)
             results.extend(text_matches)
 
         # Check caption for photos, videos, documents, etc.
-        if message.caption:
-            caption_matches = await self._extract_bot_links_from_text(message.caption)
+        if features.caption:
+            caption_matches = await self._check_link_candidates(features.caption_links)
             results.extend(caption_matches)
 
+        # Check URLs (url and text_link entities) against the domain blocklist
+        results.extend(self._check_blocked_domains(features.urls))
+
+        # Near-duplicate copies posted by several users across chats (not for the replied-to message)
+        if record_source:
+            results.extend(self._check_spam_wave(message, features))
+
+        # Statistical text classifier: only when no explicit evidence was found
+        if record_source and not self._has_spam_evidence(results):
+            results.extend(await self._check_spam_classifier(features))
+
         # Check forwarded message content
         if message.forward_from_chat or message.forward_from:
             # Check if forwarded message contains bot links
-            if hasattr(message, "text") and message.text:
-                forwarded_matches = await self._extract_bot_links_from_text(message.text)
+            if features.text:
+                forwarded_matches = await self._check_link_candidates(features.text_links)
                 results.extend(forwarded_matches)
 
+        # Evidence found in this message itself (not in the message it replies to)
+        is_spam = self._has_spam_evidence(results)
+
         # Check reply to message content
         if message.reply_to_message:
-            reply_matches = await self.check_message_for_bot_links(message.reply_to_message)
-            results.extend(reply_matches)
+            reply_matches = await self.check_message_for_bot_links(message.reply_to_message, record_source=False)
+            results.extend(
+                (kind, is_bot) for kind, is_bot in reply_matches if kind not in MODEL_FLAGS and kind != "known_spam_media"
+            )
 
         # Check for media with potential QR codes or embedded links
         if message.photo or message.video or message.document:
-            media_matches = await self._check_media_for_suspicious_content(message)
+            media_matches = await self._check_media_for_suspicious_content(message, features)
             results.extend(media_matches)
+            is_spam = is_spam or self._has_spam_evidence(media_matches)
+
+        # Forward sources earn reputation from the content of what is forwarded from them
+        if record_source and message.forward_from_chat:
+            get_source_reputation().record(message.forward_from_chat.id, is_spam, message.forward_from_chat.title)
 
         # Безопасное логирование для анализа спама
         if results:
@@ -70,6 +132,7 @@ async def check_message_for_bot_links(self, message: Message) -> List[Tuple[str,
                 "bot_links_count": len([r for r in results if r[1]]),
                 "total_suspicious": len([r for r in results if r[1]]),
                 "check_types": [r[0] for r in results],
+                "message_id": message.message_id,
             }
 
             secure_logger.log_spam_analysis(
@@ -81,39 +144,44 @@ async def check_message_for_bot_links(self, message: Message) -> List[Tuple[str,
 
         return results
 
-    async def _check_media_for_suspicious_content(self, message: Message) -> List[Tuple[str, bool]]:
+    async def _check_media_for_suspicious_content(
+        self, message: Message, features: Optional[MessageFeatures] = None
+    ) -> List[Tuple[str, bool]]:
         """Check media messages for suspicious content like QR codes."""
+        # Known spam media first: instant verdict
+        known_media = self._check_known_spam_media(message, features)
+        if known_media:
+            return known_media
+
         results = []
 
         # Check if media has suspicious captions
         if message.caption:
-            caption_lower = message.caption.lower()
-            suspicious_keywords = [
-                "bot",
-                "бот",
-                "telegram",
-                "телеграм",
-                "канал",
-                "channel",
-                "подписка",
-                "subscribe",
-                "ссылка",
-                "link",
-                "qr",
-                "код",
-            ]
+            if features is not None:
+                caption_hits = features.caption_keyword_hits
+            else:
+                caption_hits = get_keyword_engine().scan(message.caption, ("media_caption",))
 
-            if any(keyword in caption_lower for keyword in suspicious_keywords):
+            if "media_caption" in caption_hits:
                 logger.warning(f"Suspicious media caption detected: {message.caption}")
                 # Flag as potentially containing bot links
                 results.append(("suspicious_media", True))
 
         # Check for forwarded media from suspicious sources
         if message.forward_from_chat:
-            if message.forward_from_chat.type in ["channel", "supergroup"]:
-                logger.info(f"Media forwarded from {message.forward_from_chat.type}: {message.forward_from_chat.title}")
-                # Flag forwarded media as potentially suspicious
-                results.append(("forwarded_media", True))
+            source = message.forward_from_chat
+            if source.type in ["channel", "supergroup"]:
+                verdict = get_source_reputation().verdict(source.id)
+                if verdict == ALLOW:
+                    logger.info(f"Media forwarded from trusted {source.type}: {source.title}")
+                elif verdict == DENY:
+                    logger.warning(f"Media forwarded from spam {source.type}: {source.title}")
+                    # Denied source: no need to decode or inspect the media
+                    results.append(("forwarded_media", True))
+                    return results
+                else:
+                    # Unknown source: the content checks below decide
+                    logger.info(f"Media forwarded from {source.type}: {source.title}")
 
         # Check for media without text but with potential QR codes
         # Only check if enabled in config
@@ -124,10 +192,17 @@ async def _check_media_for_suspicious_content(self, message: Message) -> List[Tu
             and not message.caption
             and not message.text
         ):
+            # Decode QR codes and check their content like text
+            qr_texts = await self._decode_qr_codes(message)
+            if qr_texts:
+                results.extend(await self._check_qr_texts(qr_texts))
+
             # Check if it's a document (potential QR code)
             if message.document:
+                if qr_texts is not None:
+                    logger.info("Image document decoded - QR code content checked instead of guessing")
                 # Check document size and type for suspicious patterns
-                if await self._is_document_suspicious(message.document):
+                elif await self._is_document_suspicious(message.document):
                     logger.info("Suspicious document without caption detected - potential QR code")
                     results.append(("document_without_caption", True))
                 else:
@@ -151,6 +226,67 @@ async def _check_media_for_suspicious_content(self, message: Message) -> List[Tu
 
         return results
 
+    def _check_spam_wave(self, message: Message, features: MessageFeatures) -> List[Tuple[str, bool]]:
+        """Flag near-duplicates of a text many users have recently posted across chats."""
+        # Channel forwards are judged by the source reputation: a popular post is forwarded widely
+        if not message.from_user or message.forward_from_chat:
+            return []
+        text = "\n".join(part for part in (features.skeleton, features.caption_skeleton) if part)
+        if get_spam_waves().observe(text, message.from_user.id, message.chat.id):
+            return [("spam_wave", True)]
+        return []
+
+    async def _check_spam_classifier(self, features: MessageFeatures) -> List[Tuple[str, bool]]:
+        """Flag text the spam classifier is confident about."""
+        text = "\n".join(part for part in (features.skeleton, features.caption_skeleton) if part)
+        probability = await get_spam_classifier().score(text)
+        if probability is not None and probability >= SPAM_CLASSIFIER_THRESHOLD:
+            logger.warning(f"Spam classifier: probability {probability:.3f}")
+            return [(CLASSIFIER_FLAG, True)]
+        return []
+
+    @staticmethod
+    def _has_spam_evidence(results: List[Tuple[str, bool]]) -> bool:
+        """Positive findings in the content itself, not configuration heuristics, the forward source or a model."""
+        return any(is_bot and kind not in MEDIA_HEURISTIC_FLAGS and kind not in MODEL_FLAGS for kind, is_bot in results)
+
+    @staticmethod
+    def _media_fingerprints(message: Message, features: Optional[MessageFeatures] = None) -> List[Fingerprint]:
+        """file_unique_id of the message media and of the other parts of its album."""
+        media = features.media if features is not None else describe_media(message)
+        fingerprints = [(media.file_unique_id, media.kind)] if media and media.file_unique_id else []
+        fingerprints.extend(get_media_groups().fingerprints(message.chat.id, message.media_group_id))
+        return fingerprints
+
+    def _check_known_spam_media(self, message: Message, features: Optional[MessageFeatures] = None) -> List[Tuple[str, bool]]:
+        """Flag media whose file_unique_id was already deleted as spam."""
+        if not (message.photo or message.video or message.document):
+            return []
+        fingerprints = self._media_fingerprints(message, features)
+        known = get_media_fingerprints().find(file_unique_id for file_unique_id, _ in fingerprints)
+        if known:
+            logger.warning(f"Known spam media: {sanitize_for_logging(known)}")
+            return [("known_spam_media", True)]
+        return []
+
+    async def _decode_qr_codes(self, message: Message) -> Optional[Tuple[str, ...]]:
+        """QR code contents of the photo or image document; None when not decoded."""
+        qr_codes = get_qr_codes()
+        media = qr_codes.select_media(message)
+        if media is None:
+            return None
+        return await qr_codes.decode(self.bot, media)
+
+    async def _check_qr_texts(self, texts: Tuple[str, ...]) -> List[Tuple[str, bool]]:
+        """Bot links and blocklisted domains in QR code contents."""
+        results = []
+        for text in texts:
+            results.extend(await self._extract_bot_links_from_text(text))
+            results.extend(self._check_blocked_domains(token for token in text.split() if "." in token))
+        if results:
+            logger.warning(f"QR code content: {sanitize_for_logging(texts)}")
+        return [(f"qr_{kind}", is_bot) for kind, is_bot in results]
+
     async def _is_document_suspicious(self, document) -> bool:
         """Check if document is suspicious (potential QR code)."""
         try:
@@ -173,9 +309,7 @@ async def _is_document_suspicious(self, document) -> bool:
 
             # Check file name for suspicious patterns
             if document.file_name:
-                file_name_lower = document.file_name.lower()
-                suspicious_patterns = ["qr", "код", "code", "scan", "сканировать", "bot", "бот", "telegram", "телеграм"]
-                if any(pattern in file_name_lower for pattern in suspicious_patterns):
+                if "document_name" in get_keyword_engine().scan(document.file_name, ("document_name",)):
                     logger.info(f"Suspicious document name: {document.file_name}")
                     return True
 
@@ -190,35 +324,25 @@ async def _extract_bot_links_from_text(self, text: str) -> List[Tuple[str, bool]
         if not text:
             return []
 
-        results = []
-
-        # Find all t.me/username patterns
-        t_me_pattern = r"t\.me/([a-zA-Z0-9_]+)"
-        t_me_matches = re.findall(t_me_pattern, text, re.IGNORECASE)
-
-        # Find all @username mentions
-        mention_pattern = r"@([a-zA-Z0-9_]+)"
-        mention_matches = re.findall(mention_pattern, text, re.IGNORECASE)
-
-        # Find telegram.me links (alternative format)
-        telegram_me_pattern = r"telegram\.me/([a-zA-Z0-9_]+)"
-        telegram_me_matches = re.findall(telegram_me_pattern, text, re.IGNORECASE)
+        return await self._check_link_candidates(find_link_candidates(normalize(text).folded))
 
-        # Process t.me links
-        for username in t_me_matches:
-            is_bot = await self._check_if_username_is_bot(username)
-            results.append(("bot_link", is_bot))
-
-        # Process @username mentions
-        for username in mention_matches:
-            is_bot = await self._check_if_username_is_bot(username)
-            results.append(("username_mention", is_bot))
-
-        # Process telegram.me links
-        for username in telegram_me_matches:
-            is_bot = await self._check_if_username_is_bot(username)
-            results.append(("bot_link", is_bot))
+    async def _check_link_candidates(self, candidates: Tuple[LinkCandidate, ...]) -> List[Tuple[str, bool]]:
+        """Resolve (kind, value) candidates: t.me links, @mentions, invite links."""
+        results = []
+        for kind, value in candidates:
+            # Invite hashes are not usernames: reported, but not judged by name
+            is_bot = False if kind == INVITE_LINK else await self._check_if_username_is_bot(value)
+            results.append((kind, is_bot))
+        return results
 
+    def _check_blocked_domains(self, urls) -> List[Tuple[str, bool]]:
+        """Flag URLs whose domain (or parent domain) is blocklisted."""
+        blocklist = get_blocklist()
+        results = []
+        for url in urls:
+            if blocklist.is_url_blocked(url):
+                logger.info(f"Blocklisted domain: {sanitize_for_logging(url)}")
+                results.append(("blocked_domain", True))
         return results
 
     async def _check_if_username_is_bot(self, username: str) -> bool:
@@ -228,6 +352,16 @@ async def _check_if_username_is_bot(self, username: str) -> bool:
             if await self._is_bot_whitelisted(username):
                 return False  # Whitelisted bots are allowed
 
+            # Bots learned from earlier takedowns: instant verdict
+            if get_learned_bots().is_known_bot(username):
+                logger.info(f"Learned bot: @{username}")
+                return True
+
+            # Known spam usernames from the blocklist
+            if get_blocklist().is_username_blocked(username):
+                logger.info(f"Blocklisted username: @{username}")
+                return True
+
             # Simple pattern: if username contains 'bot' anywhere, it's a bot
             if "bot" in username.lower():
                 logger.info(f"Bot detected by pattern: @{username}")
@@ -246,10 +380,21 @@ async def _check_if_username_is_bot(self, username: str) -> bool:
             return False
 
     async def _is_bot_whitelisted(self, username: str) -> bool:
-        """Check if bot is in whitelist."""
-        result = await self.db.execute(select(BotModel.is_whitelisted).where(BotModel.username == username))
-        is_whitelisted = result.scalar_one_or_none()
-        return is_whitelisted is True
+        """Check if bot is in whitelist (usernames are case-insensitive)."""
+        username = username.lower()
+        # Negative answers are cached too: most checked usernames are not whitelisted
+        cached = await self.cache.get(BOT_WHITELIST_NAMESPACE, username)
+        if cached is not MISSING:
+            return cached is True
+
+        result = await self.db.execute(
+            select(BotModel.is_whitelisted)
+            .where(func.lower(BotModel.username) == username, BotModel.is_whitelisted.is_(True))
+            .limit(1)
+        )
+        is_whitelisted = result.scalar_one_or_none() is True
+        await self.cache.set(BOT_WHITELIST_NAMESPACE, username, is_whitelisted)
+        return is_whitelisted
 
     async def handle_bot_link_detection(self, message: Message, bot_links: List[Tuple[str, bool]]) -> bool:
         """Handle detection of bot links in message."""
@@ -265,6 +410,8 @@ async def handle_bot_link_detection(self, message: Message, bot_links: List[Tupl
             for link_type, is_suspicious in bot_links
             if link_type
             in [
+                "known_spam_media",
+                "similar_spam_image",
                 "suspicious_media",
                 "forwarded_media",
                 "document_without_caption",
@@ -276,27 +423,43 @@ async def handle_bot_link_detection(self, message: Message, bot_links: List[Tupl
 
         # Take action if there are bot links or suspicious media
         if non_whitelisted_bots or suspicious_media:
-            # Delete message and ban user
-            await self.moderation_service.delete_message(
-                chat_id=message.chat.id, message_id=message.message_id, admin_id=0  # System action
+            # bot_links carry link kinds only; resolve the bot usernames themselves
+            bot_usernames = await self._find_bot_usernames(message) if non_whitelisted_bots else []
+
+            # Create detailed reason; link findings are named by their usernames when those resolve
+            reason_parts = []
+            if bot_usernames:
+                reason_parts.append(f"Posted bot links: {', '.join(f'@{username}' for username in bot_usernames)}")
+            findings = [
+                kind
+                for kind in dict.fromkeys(non_whitelisted_bots)
+                if kind not in suspicious_media and not (bot_usernames and kind in (BOT_LINK, USERNAME_MENTION))
+            ]
+            if findings:
+                reason_parts.append(f"Spam findings: {', '.join(findings)}")
+            if suspicious_media:
+                reason_parts.append(f"Suspicious media: {', '.join(suspicious_media)}")
+
+            # Delete message and ban user concurrently, DB logging off the critical path
+            await self.moderation_service.takedown(
+                chat_id=message.chat.id,
+                message_id=message.message_id,
+                user_id=message.from_user.id if message.from_user else None,
+                reason="; ".join(reason_parts),
+                admin_id=0,  # System action
+                album_message_ids=get_media_groups().parts(message.chat.id, message.media_group_id),
             )
 
-            if message.from_user:
-                # Create detailed reason
-                reason_parts = []
-                if non_whitelisted_bots:
-                    reason_parts.append(f"Posted bot links: {', '.join(non_whitelisted_bots)}")
-                if suspicious_media:
-                    reason_parts.append(f"Suspicious media: {', '.join(suspicious_media)}")
-
-                reason = "; ".join(reason_parts)
-
-                await self.moderation_service.ban_user(
-                    user_id=message.from_user.id,
-                    chat_id=message.chat.id,
-                    admin_id=0,  # System action
-                    reason=reason,
-                )
+            # Repeated waves with the same bots get an instant verdict; only usernames judged to be bots are learned
+            if bot_usernames:
+                get_learned_bots().record(bot_usernames)
+
+            # Media deleted for its content is removed on sight when reposted
+            if self._has_spam_evidence(bot_links):
+                get_media_fingerprints().record(self._media_fingerprints(message))
+                # Re-encoded copies too; a near-duplicate is not learned, so matches cannot drift
+                if not any(kind == "similar_spam_image" for kind, _ in bot_links):
+                    get_image_hashes().learn(self.bot, message)
 
             logger.info(
                 safe_format_message(
@@ -309,6 +472,27 @@ async def handle_bot_link_detection(self, message: Message, bot_links: List[Tupl
 
         return False
 
+    def check_similar_images(self, message: Message) -> bool:
+        """Queue a background check of the photo against deleted spam images.
+
+        Called for messages that passed the other checks; the takedown
+        happens when the perceptual hash is close to a known spam image.
+        """
+
+        async def on_match(distance: int, known_id: str) -> None:
+            await self.handle_bot_link_detection(message, [("similar_spam_image", True)])
+
+        return get_image_hashes().check(self.bot, message, on_match)
+
+    async def _find_bot_usernames(self, message: Message) -> List[str]:
+        """Usernames from the message text and caption that were judged to be bots."""
+        features = extract_features(message)
+        usernames = []
+        for kind, value in features.text_links + features.caption_links:
+            if kind != INVITE_LINK and value not in usernames and await self._check_if_username_is_bot(value):
+                usernames.append(value)
+        return usernames
+
     async def add_bot_to_whitelist(self, username: str, admin_id: int, telegram_id: Optional[int] = None) -> bool:
         """Add bot to whitelist."""
         try:
@@ -326,6 +510,7 @@ async def add_bot_to_whitelist(self, username: str, admin_id: int, telegram_id:
                 self.db.add(new_bot)
 
             await self.db.commit()
+            await self.cache.invalidate(BOT_WHITELIST_NAMESPACE, username.lower())
             logger.info(
                 safe_format_message(
                     "Bot {username} added to whitelist by admin {admin_id}",
@@ -354,6 +539,7 @@ async def remove_bot_from_whitelist(self, username: str, admin_id: int) -> bool:
             if bot:
                 bot.is_whitelisted = False
                 await self.db.commit()
+                await self.cache.invalidate(BOT_WHITELIST_NAMESPACE, username.lower())
                 logger.info(
                     safe_format_message(
                         "Bot {username} removed from whitelist by admin {admin_id}",
@@ -0,0 +1,201 @@
+"""
+Media Fingerprints - отпечатки вложений, удаленных как спам.
+
+Спам-картинки и видео перепостят без изменений, а Telegram дает каждому
+файлу постоянный file_unique_id (у фото - у каждого размера свой, берется
+самый большой, как в MessageFeatures). Когда сообщение с вложением
+удаляется по содержательным признакам спама, его file_unique_id (и всех
+частей альбома) запоминается. Следующие сообщения с тем же файлом
+удаляются сразу, без анализа подписи и документа.
+
+Хранилище ограничено: в памяти последние MEDIA_FINGERPRINT_MAX_ENTRIES
+отпечатков (LRU, попадание продлевает жизнь записи). Новые отпечатки
+пишутся в таблицу media_fingerprints в фоне, при старте загружаются
+самые свежие. Если подключен Redis, новые отпечатки рассылаются остальным
+репликам через SharedCache (только pub/sub: копии в кэше не хранятся).
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import MEDIA_FINGERPRINT_MAX_ENTRIES
+from app.models.media_fingerprint import MediaFingerprint
+from app.services.shared_cache import MEDIA_FINGERPRINT_NAMESPACE, MISSING, SharedCache
+from app.utils.background import BackgroundTasks
+
+logger = logging.getLogger(__name__)
+
+# (file_unique_id, вид вложения)
+Fingerprint = Tuple[str, Optional[str]]
+
+
+@dataclass
+class MediaFingerprintEntry:
+    """Отпечаток спам-вложения (время - unix time)."""
+
+    file_unique_id: str
+    kind: Optional[str]
+    detections: int
+    first_seen: float
+    last_seen: float
+
+
+class MediaFingerprintStore:
+    """Ограниченное LRU-множество отпечатков спам-вложений."""
+
+    def __init__(
+        self,
+        max_entries: int = MEDIA_FINGERPRINT_MAX_ENTRIES,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self.max_entries = max_entries
+        self._session_factory = session_factory
+        self._entries: "OrderedDict[str, MediaFingerprintEntry]" = OrderedDict()
+        self._shared_cache: Optional[SharedCache] = None
+        self._background = BackgroundTasks()
+        self._stats = {"hits": 0, "recorded": 0, "remote": 0, "evicted": 0}
+
+    def find(self, file_unique_ids: Iterable[Optional[str]]) -> Optional[str]:
+        """Первый известный отпечаток из file_unique_ids."""
+        entries = self._entries
+        for file_unique_id in file_unique_ids:
+            if file_unique_id and file_unique_id in entries:
+                entries.move_to_end(file_unique_id)
+                self._stats["hits"] += 1
+                return file_unique_id
+        return None
+
+    def __contains__(self, file_unique_id: str) -> bool:
+        return file_unique_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, fingerprints: Iterable[Fingerprint], now: Optional[float] = None) -> List[MediaFingerprintEntry]:
+        """Запомнить отпечатки удаленного спама; запись в БД и рассылка - в фоне."""
+        now = time.time() if now is None else now
+        recorded = []
+        for file_unique_id, kind in dict(fingerprints).items():
+            if not file_unique_id:
+                continue
+            entry = self._add(file_unique_id, kind, now)
+            entry.detections += 1
+            recorded.append(entry)
+
+        if recorded:
+            self._stats["recorded"] += len(recorded)
+            self._background.run(self._persist(recorded))
+            if self._shared_cache is not None:
+                for entry in recorded:
+                    self._shared_cache.broadcast_nowait(MEDIA_FINGERPRINT_NAMESPACE, entry.file_unique_id, entry.kind)
+        return recorded
+
+    def _add(self, file_unique_id: str, kind: Optional[str], now: float) -> MediaFingerprintEntry:
+        """Добавить или освежить запись, вытеснив самые старые сверх лимита."""
+        entry = self._entries.get(file_unique_id)
+        if entry is None:
+            entry = self._entries[file_unique_id] = MediaFingerprintEntry(file_unique_id, kind, 0, now, now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evicted"] += 1
+        else:
+            self._entries.move_to_end(file_unique_id)
+            entry.last_seen = now
+        return entry
+
+    def subscribe(self, shared_cache: SharedCache) -> None:
+        """Рассылать новые отпечатки через SharedCache и принимать их от других реплик."""
+        self._shared_cache = shared_cache
+        shared_cache.add_listener(MEDIA_FINGERPRINT_NAMESPACE, self._on_remote)
+
+    def _on_remote(self, file_unique_id: Optional[str], kind) -> None:
+        if file_unique_id and kind is not MISSING:
+            self._add(file_unique_id, kind, time.time())
+            self._stats["remote"] += 1
+
+    async def warm(self, session: AsyncSession) -> int:
+        """Загрузить самые свежие отпечатки."""
+        result = await session.execute(
+            select(MediaFingerprint).order_by(MediaFingerprint.last_seen.desc()).limit(self.max_entries)
+        )
+
+        # От старых к новым: в конце OrderedDict - самые свежие
+        for row in reversed(result.scalars().all()):
+            self._entries[row.file_unique_id] = MediaFingerprintEntry(
+                file_unique_id=row.file_unique_id,
+                kind=row.kind,
+                detections=row.detections,
+                first_seen=row.first_seen.replace(tzinfo=timezone.utc).timestamp(),
+                last_seen=row.last_seen.replace(tzinfo=timezone.utc).timestamp(),
+            )
+
+        logger.info(f"Отпечатки спам-вложений загружены: {len(self._entries)} записей")
+        return len(self._entries)
+
+    async def _persist(self, entries: List[MediaFingerprintEntry]) -> None:
+        """Записать отпечатки (upsert по file_unique_id)."""
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.database import SessionLocal
+
+            session_factory = SessionLocal
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "file_unique_id": entry.file_unique_id,
+                "kind": entry.kind,
+                "detections": entry.detections,
+                "first_seen": datetime.fromtimestamp(entry.first_seen, timezone.utc).replace(tzinfo=None),
+                "last_seen": datetime.fromtimestamp(entry.last_seen, timezone.utc).replace(tzinfo=None),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for entry in entries
+        ]
+        statement = insert(MediaFingerprint).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[MediaFingerprint.file_unique_id],
+            set_={column: statement.excluded[column] for column in ("kind", "detections", "last_seen", "updated_at")},
+        )
+
+        try:
+            async with session_factory() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Ошибка сохранения отпечатков спам-вложений: {e}")
+
+    async def drain(self) -> None:
+        """Дождаться фоновых записей в БД."""
+        await self._background.drain()
+
+    def clear(self) -> None:
+        """Очистить отпечатки в памяти (БД не меняется)."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика хранилища."""
+        return {**self._stats, "entries": len(self._entries)}
+
+
+# Глобальное хранилище отпечатков
+_media_fingerprints: Optional[MediaFingerprintStore] = None
+
+
+def get_media_fingerprints() -> MediaFingerprintStore:
+    """Получить глобальное хранилище отпечатков спам-вложений."""
+    global _media_fingerprints
+
+    if _media_fingerprints is None:
+        _media_fingerprints = MediaFingerprintStore()
+
+    return _media_fingerprints
@@ -0,0 +1,175 @@
+"""
+Media Groups - сборка альбомов перед проверкой.
+
+Альбом из 10 фото приходит 10 отдельными сообщениями с общим
+media_group_id. Без сборки каждая часть проходит валидацию, rate limit,
+проверку ссылок и профиля, а спам-альбом - 10 удалений и 10 попыток бана.
+
+MediaGroupCollector держит части альбома, пока они приходят (до
+MEDIA_GROUP_LATENCY после последней части, но не дольше
+MEDIA_GROUP_MAX_WAIT с первой). Дальше по цепочке идет одно сообщение:
+первая подписанная часть с подписями всех частей. ID всех частей
+и их вложений запоминаются, чтобы решение применить ко всему альбому
+и удалить его одним вызовом deleteMessages.
+
+Части, пришедшие после сборки альбома, проверяются отдельно, но их ID
+добавляются к уже известным частям альбома.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.types import Message
+
+from app.constants import MEDIA_GROUP_LATENCY, MEDIA_GROUP_MAX_WAIT, MEDIA_GROUP_PARTS_TTL
+from app.services.media_fingerprints import Fingerprint
+from app.utils.message_features import describe_media
+
+logger = logging.getLogger(__name__)
+
+MediaGroupKey = Tuple[int, str]
+
+
+@dataclass
+class PendingMediaGroup:
+    """Альбом, части которого еще приходят."""
+
+    messages: List[Message]
+    updated: float = field(default_factory=time.monotonic)
+
+
+def _utf16_length(text: str) -> int:
+    """Длина в UTF-16 code units (в них считаются offset сущностей Telegram)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def combine_album(messages: List[Message]) -> Message:
+    """Одно сообщение для проверки альбома: подписи всех частей в подписи первой подписанной."""
+    captioned = [message for message in messages if message.caption]
+    if len(captioned) <= 1:
+        return captioned[0] if captioned else messages[0]
+
+    lead = captioned[0]
+    caption = ""
+    entities = []
+    for message in captioned:
+        if caption:
+            caption += "\n"
+        shift = _utf16_length(caption)
+        entities.extend(
+            entity.model_copy(update={"offset": entity.offset + shift}) for entity in message.caption_entities or ()
+        )
+        caption += message.caption
+
+    return lead.model_copy(update={"caption": caption, "caption_entities": entities or None})
+
+
+class MediaGroupCollector:
+    """Сборщик частей альбомов."""
+
+    def __init__(
+        self,
+        latency: float = MEDIA_GROUP_LATENCY,
+        max_wait: float = MEDIA_GROUP_MAX_WAIT,
+        parts_ttl: float = MEDIA_GROUP_PARTS_TTL,
+    ):
+        self.latency = latency
+        self.max_wait = max_wait
+        self.parts_ttl = parts_ttl
+        self._pending: Dict[MediaGroupKey, PendingMediaGroup] = {}
+        # (chat_id, media_group_id) -> (когда собран, ID частей, отпечатки вложений); в порядке сборки
+        self._parts: "OrderedDict[MediaGroupKey, Tuple[float, Tuple[int, ...], Tuple[Fingerprint, ...]]]" = OrderedDict()
+        self._stats = {"albums": 0, "parts": 0, "folded_parts": 0}
+
+    async def collect(self, message: Message) -> Optional[List[Message]]:
+        """Добавить часть альбома.
+
+        Первая часть ждет остальные и возвращает весь альбом (по message_id);
+        для остальных частей возвращается None - они обработаны вместе с первой.
+        """
+        key = (message.chat.id, message.media_group_id)
+        self._stats["parts"] += 1
+
+        group = self._pending.get(key)
+        if group is not None:
+            group.messages.append(message)
+            group.updated = time.monotonic()
+            self._stats["folded_parts"] += 1
+            return None
+
+        group = self._pending[key] = PendingMediaGroup([message])
+        deadline = group.updated + self.max_wait
+        try:
+            while True:
+                wait = min(group.updated + self.latency, deadline) - time.monotonic()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            del self._pending[key]
+
+        messages = sorted(group.messages, key=lambda part: part.message_id)
+        media = [describe_media(part) for part in messages]
+        self._remember(
+            key,
+            [part.message_id for part in messages],
+            [(descriptor.file_unique_id, descriptor.kind) for descriptor in media if descriptor and descriptor.file_unique_id],
+        )
+        self._stats["albums"] += 1
+        logger.info(f"Альбом {message.media_group_id} в чате {message.chat.id} собран: {len(messages)} частей")
+        return messages
+
+    def parts(self, chat_id: int, media_group_id: Optional[str]) -> Tuple[int, ...]:
+        """ID всех известных частей альбома."""
+        if not media_group_id:
+            return ()
+        entry = self._parts.get((chat_id, media_group_id))
+        return entry[1] if entry else ()
+
+    def fingerprints(self, chat_id: int, media_group_id: Optional[str]) -> Tuple[Fingerprint, ...]:
+        """Отпечатки вложений всех известных частей альбома."""
+        if not media_group_id:
+            return ()
+        entry = self._parts.get((chat_id, media_group_id))
+        return entry[2] if entry else ()
+
+    def _remember(self, key: MediaGroupKey, message_ids: List[int], fingerprints: List[Fingerprint] = ()) -> None:
+        now = time.monotonic()
+        while self._parts:
+            oldest_key, (collected_at, _, _) = next(iter(self._parts.items()))
+            if now - collected_at < self.parts_ttl:
+                break
+            del self._parts[oldest_key]
+
+        _, known_ids, known_fingerprints = self._parts.pop(key, (now, (), ()))
+        self._parts[key] = (
+            now,
+            tuple(sorted({*known_ids, *message_ids})),
+            tuple(dict.fromkeys((*known_fingerprints, *fingerprints))),
+        )
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._parts.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика сборки: сколько частей не пошло дальше по цепочке."""
+        return {**self._stats, "pending": len(self._pending), "remembered": len(self._parts)}
+
+
+# Глобальный сборщик альбомов
+_media_groups: Optional[MediaGroupCollector] = None
+
+
+def get_media_groups() -> MediaGroupCollector:
+    """Получить глобальный сборщик альбомов."""
+    global _media_groups
+
+    if _media_groups is None:
+        _media_groups = MediaGroupCollector()
+
+    return _media_groups
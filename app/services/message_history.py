@@ -0,0 +1,100 @@
+"""
+Message History - недавние ID сообщений пользователей по чатам.
+
+Для каждой пары (chat_id, user_id) хранится кольцевой буфер на
+array('q') фиксированного размера; число пар ограничено, давно
+не писавшие пользователи вытесняются первыми (LRU). Используется
+для очистки сообщений спамера при бане.
+"""
+
+import logging
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.constants import RECENT_MESSAGES_MAX_USERS, RECENT_MESSAGES_PER_USER
+
+logger = logging.getLogger(__name__)
+
+
+class MessageIdRing:
+    """Кольцевой буфер ID сообщений фиксированной емкости."""
+
+    __slots__ = ("_ids", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        self._ids = array("q", [0]) * capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, message_id: int) -> None:
+        """Добавить ID, вытесняя самый старый при переполнении."""
+        capacity = len(self._ids)
+        self._ids[(self._start + self._size) % capacity] = message_id
+        if self._size < capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % capacity
+
+    def drain(self) -> List[int]:
+        """Забрать все ID (от старых к новым) и очистить буфер."""
+        capacity = len(self._ids)
+        message_ids = [self._ids[(self._start + i) % capacity] for i in range(self._size)]
+        self._start = 0
+        self._size = 0
+        return message_ids
+
+
+class RecentMessageIndex:
+    """Недавние сообщения по (chat_id, user_id) с ограничением памяти."""
+
+    def __init__(self, per_user: int = RECENT_MESSAGES_PER_USER, max_users: int = RECENT_MESSAGES_MAX_USERS):
+        self.per_user = per_user
+        self.max_users = max_users
+        self._rings: "OrderedDict[Tuple[int, int], MessageIdRing]" = OrderedDict()
+        self._evicted = 0
+
+    def record(self, chat_id: int, user_id: int, message_id: int) -> None:
+        """Запомнить сообщение пользователя."""
+        key = (chat_id, user_id)
+        ring = self._rings.get(key)
+        if ring is None:
+            if len(self._rings) >= self.max_users:
+                self._rings.popitem(last=False)
+                self._evicted += 1
+            ring = MessageIdRing(self.per_user)
+            self._rings[key] = ring
+        else:
+            self._rings.move_to_end(key)
+        ring.append(message_id)
+
+    def pop(self, chat_id: int, user_id: int) -> List[int]:
+        """Забрать и забыть недавние сообщения пользователя в чате."""
+        ring = self._rings.pop((chat_id, user_id), None)
+        return ring.drain() if ring is not None else []
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика индекса."""
+        return {
+            "users": len(self._rings),
+            "messages": sum(len(ring) for ring in self._rings.values()),
+            "evicted_users": self._evicted,
+            "id_buffer_bytes": len(self._rings) * self.per_user * array("q").itemsize,
+        }
+
+
+# Глобальный индекс недавних сообщений
+_recent_messages: Optional[RecentMessageIndex] = None
+
+
+def get_recent_messages() -> RecentMessageIndex:
+    """Получить глобальный индекс недавних сообщений."""
+    global _recent_messages
+
+    if _recent_messages is None:
+        _recent_messages = RecentMessageIndex()
+
+    return _recent_messages
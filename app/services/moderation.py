@@ -1,7 +1,10 @@
 """Moderation service for user management."""
 
+import asyncio
 import logging
-from typing import Optional
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
 
 from aiogram import Bot
 
@@ -10,26 +13,352 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from app.auth.authorization import require_admin, safe_user_operation
+from app.constants import DELETE_MESSAGES_BATCH_SIZE, GLOBAL_BAN_CONCURRENCY, MODERATION_DEDUP_TTL
 from app.models.moderation_log import ModerationAction, ModerationLog
 from app.models.user import User as UserModel
+from app.monitoring.metrics import get_metrics_collector
+from app.services.message_history import get_recent_messages
+from app.utils.background import BackgroundTasks
 from app.utils.security import safe_format_message, sanitize_for_logging
+from app.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Process-wide registry of in-flight/recent moderation actions keyed by (action, chat_id, user_id)
+_moderation_flights = SingleFlight(ttl=MODERATION_DEDUP_TTL)
+
+
+def get_moderation_flights() -> SingleFlight:
+    """Get moderation action deduplication registry."""
+    return _moderation_flights
+
+
+# Background work scheduled by takedown() (DB writes, purges)
+_side_effects = BackgroundTasks()
+
+
+def _run_in_background(coro) -> None:
+    """Schedule side effect off the critical path."""
+    _side_effects.run(coro)
+
+
+async def drain_side_effects() -> None:
+    """Wait for background moderation DB writes to finish."""
+    await _side_effects.drain()
+
+
+@dataclass
+class TakedownResult:
+    """Outcome of a takedown."""
+
+    deleted: bool
+    banned: bool
+    latency: float
+
+
+@dataclass
+class GlobalBanResult:
+    """Outcome of a global ban."""
+
+    user_id: int
+    banned: List[int] = field(default_factory=list)
+    failed: Dict[int, str] = field(default_factory=dict)
+    latency: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.banned) + len(self.failed)
+
 
 class ModerationService:
     """Service for user moderation operations."""
 
-    def __init__(self, bot: Bot, db_session: AsyncSession):
+    def __init__(self, bot: Bot, db_session: AsyncSession, session_factory: Optional[Callable[[], AsyncSession]] = None):
         self.bot = bot
         self.db = db_session
+        self._session_factory = session_factory
+
+    async def takedown(
+        self,
+        chat_id: int,
+        message_id: int,
+        user_id: Optional[int] = None,
+        reason: Optional[str] = None,
+        admin_id: int = 0,
+        album_message_ids: Iterable[int] = (),
+    ) -> TakedownResult:
+        """Delete spam message and ban its author as fast as possible.
+
+        Telegram delete and ban calls run concurrently; user status and
+        moderation log are written in background with a separate session.
+        album_message_ids are the other parts of the message's media group:
+        the whole album is deleted with one deleteMessages call.
+        """
+        started = time.monotonic()
+
+        # Every message is deleted, but a burst from one user results in a single ban
+        ban_executed = False
+
+        async def ban_call() -> bool:
+            nonlocal ban_executed
+            ban_executed = True
+            await self.bot.ban_chat_member(chat_id=chat_id, user_id=user_id)
+            return True
+
+        message_ids = [message_id, *(mid for mid in album_message_ids if mid != message_id)]
+        if len(message_ids) == 1:
+            calls = [self.bot.delete_message(chat_id=chat_id, message_id=message_id)]
+        else:
+            calls = [self.bot.delete_messages(chat_id=chat_id, message_ids=message_ids[:DELETE_MESSAGES_BATCH_SIZE])]
+        if user_id is not None:
+            calls.append(_moderation_flights.do((ModerationAction.BAN.value, chat_id, user_id), ban_call))
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        deleted = not isinstance(results[0], BaseException)
+        banned = user_id is not None and not isinstance(results[1], BaseException)
+        if banned and not ban_executed:
+            self._count_deduplicated(ModerationAction.BAN)
+
+        latency = time.monotonic() - started
+        get_metrics_collector().record_timing("takedown_latency", latency, {"banned": str(banned).lower()})
+
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(
+                    safe_format_message(
+                        "Takedown error in chat {chat_id}: {error}",
+                        chat_id=sanitize_for_logging(chat_id),
+                        error=sanitize_for_logging(result),
+                    )
+                )
+
+        if deleted or ban_executed:
+            _run_in_background(
+                self._record_takedown(chat_id, message_id, user_id, reason, admin_id, deleted, banned and ban_executed)
+            )
+
+        if banned and ban_executed:
+            # Remove the rest of the spammer's recent messages
+            _run_in_background(self.purge_user_messages(chat_id, user_id, exclude=message_ids))
+
+        logger.info(
+            safe_format_message(
+                "Takedown in chat {chat_id}: deleted={deleted}, banned={banned}, {latency}s",
+                chat_id=sanitize_for_logging(chat_id),
+                deleted=deleted,
+                banned=banned,
+                latency=round(latency, 3),
+            )
+        )
+        return TakedownResult(deleted=deleted, banned=banned, latency=latency)
+
+    async def global_ban(
+        self,
+        user_id: int,
+        chat_ids: Iterable[int],
+        admin_id: int,
+        reason: Optional[str] = None,
+        progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+        concurrency: int = GLOBAL_BAN_CONCURRENCY,
+    ) -> GlobalBanResult:
+        """Ban user in every given chat concurrently.
+
+        Telegram calls are bounded by a semaphore (and by the outbound scheduler);
+        moderation log rows are written in one bulk insert at the end.
+        progress(done, total) is awaited after each chat.
+        """
+        started = time.monotonic()
+        targets = list(dict.fromkeys(chat_ids))
+        result = GlobalBanResult(user_id=user_id)
+        semaphore = asyncio.Semaphore(concurrency)
+        executed_in: Set[int] = set()
+
+        async def ban_in_chat(chat_id: int) -> None:
+            async def ban_call() -> bool:
+                executed_in.add(chat_id)
+                await self.bot.ban_chat_member(chat_id=chat_id, user_id=user_id)
+                return True
+
+            async with semaphore:
+                try:
+                    await _moderation_flights.do((ModerationAction.BAN.value, chat_id, user_id), ban_call)
+                    result.banned.append(chat_id)
+                except Exception as e:
+                    result.failed[chat_id] = str(e)
+
+            if progress is not None:
+                try:
+                    await progress(result.total, len(targets))
+                except Exception as e:
+                    logger.warning(f"Global ban progress callback failed: {e}")
+
+        await asyncio.gather(*[ban_in_chat(chat_id) for chat_id in targets])
+
+        logged_chats = [chat_id for chat_id in result.banned if chat_id in executed_in]
+        if logged_chats:
+            try:
+                await self.db.execute(
+                    update(UserModel).where(UserModel.telegram_id == user_id).values(is_banned=True, ban_reason=reason)
+                )
+                self.db.add_all(
+                    [
+                        ModerationLog(
+                            action=ModerationAction.BAN,
+                            user_id=user_id,
+                            admin_telegram_id=admin_id,
+                            reason=reason,
+                            chat_id=chat_id,
+                        )
+                        for chat_id in logged_chats
+                    ]
+                )
+                await self.db.commit()
+            except Exception as e:
+                logger.error(f"Error recording global ban of user {user_id}: {e}")
+                await self.db.rollback()
+
+        result.latency = time.monotonic() - started
+        get_metrics_collector().record_timing("global_ban_latency", result.latency)
+        logger.info(
+            safe_format_message(
+                "Global ban of user {user_id} by admin {admin_id}: {banned}/{total} chats in {latency}s",
+                user_id=sanitize_for_logging(user_id),
+                admin_id=sanitize_for_logging(admin_id),
+                banned=len(result.banned),
+                total=len(targets),
+                latency=round(result.latency, 2),
+            )
+        )
+        return result
+
+    async def purge_user_messages(self, chat_id: int, user_id: int, exclude: Iterable[int] = ()) -> int:
+        """Delete user's recent messages in chat with batched deleteMessages calls."""
+        excluded = set(exclude)
+        message_ids = [mid for mid in get_recent_messages().pop(chat_id, user_id) if mid not in excluded]
+        if not message_ids:
+            return 0
+
+        batches = [
+            message_ids[i : i + DELETE_MESSAGES_BATCH_SIZE] for i in range(0, len(message_ids), DELETE_MESSAGES_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(
+            *[self.bot.delete_messages(chat_id=chat_id, message_ids=batch) for batch in batches],
+            return_exceptions=True,
+        )
+
+        purged = 0
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    safe_format_message(
+                        "Error purging {count} messages in chat {chat_id}: {error}",
+                        count=len(batch),
+                        chat_id=sanitize_for_logging(chat_id),
+                        error=sanitize_for_logging(result),
+                    )
+                )
+            else:
+                purged += len(batch)
+
+        get_metrics_collector().increment_counter("purged_messages_total", purged)
+        logger.info(
+            safe_format_message(
+                "Purged {purged} recent messages of user {user_id} in chat {chat_id} ({batches} calls)",
+                purged=purged,
+                user_id=sanitize_for_logging(user_id),
+                chat_id=sanitize_for_logging(chat_id),
+                batches=len(batches),
+            )
+        )
+        return purged
+
+    async def _record_takedown(
+        self,
+        chat_id: int,
+        message_id: int,
+        user_id: Optional[int],
+        reason: Optional[str],
+        admin_id: int,
+        deleted: bool,
+        banned: bool,
+    ) -> None:
+        """Persist takedown side effects in one transaction."""
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.database import SessionLocal
+
+            session_factory = SessionLocal
+
+        try:
+            async with session_factory() as session:
+                if banned:
+                    await session.execute(
+                        update(UserModel)
+                        .where(UserModel.telegram_id == user_id)
+                        .values(is_banned=True, ban_reason=reason)
+                    )
+                    session.add(
+                        ModerationLog(
+                            action=ModerationAction.BAN,
+                            user_id=user_id,
+                            admin_telegram_id=admin_id,
+                            reason=reason,
+                            chat_id=chat_id,
+                        )
+                    )
+                if deleted:
+                    session.add(
+                        ModerationLog(
+                            action=ModerationAction.DELETE_MESSAGE,
+                            admin_telegram_id=admin_id,
+                            message_id=message_id,
+                            chat_id=chat_id,
+                        )
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error(
+                safe_format_message(
+                    "Error recording takedown in chat {chat_id}: {error}",
+                    chat_id=sanitize_for_logging(chat_id),
+                    error=sanitize_for_logging(e),
+                )
+            )
 
     async def ban_user(self, user_id: int, chat_id: int, admin_id: int, reason: Optional[str] = None) -> bool:
-        """Ban user from chat."""
+        """Ban user from chat.
+
+        Concurrent and recently repeated bans of the same user in the same chat
+        share one result instead of hitting Telegram and the database again.
+        """
+        executed = False
+
+        async def ban_call() -> bool:
+            nonlocal executed
+            executed = True
+            return await self._ban_user(user_id, chat_id, admin_id, reason)
+
+        result = await _moderation_flights.do((ModerationAction.BAN.value, chat_id, user_id), ban_call, cache_if=bool)
+        if not executed:
+            self._count_deduplicated(ModerationAction.BAN)
+        return result
+
+    def _count_deduplicated(self, action: ModerationAction) -> None:
+        """Count moderation action skipped by deduplication."""
+        get_metrics_collector().increment_counter("moderation_deduplicated_total", labels={"action": action.value})
+
+    async def _ban_user(self, user_id: int, chat_id: int, admin_id: int, reason: Optional[str] = None) -> bool:
+        """Ban user in Telegram and record it."""
         try:
             # Ban user in Telegram
             await self.bot.ban_chat_member(chat_id=chat_id, user_id=user_id)
 
+            # Clean up what the user posted before the ban
+            try:
+                await self.purge_user_messages(chat_id, user_id)
+            except Exception as purge_error:
+                logger.warning(f"Could not purge messages of user {user_id} in chat {chat_id}: {purge_error}")
+
             # Update user status in database
             await self._update_user_status(user_id, is_banned=True, ban_reason=reason)
 
@@ -66,6 +395,9 @@ async def unban_user(self, user_id: int, chat_id: int, admin_id: int) -> bool:
         try:
             logger.info(f"Starting unban process for user {user_id} in chat {chat_id}")
 
+            # A later ban must not be swallowed as a duplicate of the old one
+            _moderation_flights.forget((ModerationAction.BAN.value, chat_id, user_id))
+
             # Unban user in Telegram
             try:
                 await self.bot.unban_chat_member(chat_id=chat_id, user_id=user_id)
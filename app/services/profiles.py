@@ -13,6 +13,7 @@
 # from app.models.moderation_log import ModerationAction, ModerationLog
 from app.models.suspicious_profile import SuspiciousProfile
 from app.services.moderation import ModerationService
+from app.utils.keyword_engine import get_keyword_engine
 from app.utils.pii_protection import secure_logger
 from app.utils.security import safe_format_message, sanitize_for_logging
 
@@ -232,15 +233,14 @@ async def _detect_suspicious_patterns(self, user: User) -> list:
             patterns.append("no_last_name")
 
         # Check for suspicious username patterns
+        keywords = get_keyword_engine()
         if username and isinstance(username, str):
-            username_lower = username.lower()
-            if any(pattern in username_lower for pattern in ["bot", "gpt", "ai", "assistant"]):
+            if "bot_like_username" in keywords.scan(username, ("bot_like_username",)):
                 patterns.append("bot_like_username")
 
         # Check for suspicious first name patterns
         if first_name and isinstance(first_name, str):
-            first_name_lower = first_name.lower()
-            if any(pattern in first_name_lower for pattern in ["bot", "gpt", "ai", "test", "user"]):
+            if "bot_like_first_name" in keywords.scan(first_name, ("bot_like_first_name",)):
                 patterns.append("bot_like_first_name")
 
         return patterns
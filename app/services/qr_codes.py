@@ -0,0 +1,194 @@
+"""
+QR Codes - распознавание QR-кодов на медиа без подписи.
+
+Раньше "возможный QR-код" угадывался по размеру, MIME-типу и имени
+документа: мелкие безобидные файлы помечались, крупные картинки с QR -
+нет. Теперь фото и картинки-документы без подписи скачиваются через
+файловый endpoint Bot API и распознаются в пуле процессов; содержимое
+QR-кодов проверяется как текст - ссылки на ботов и блок-лист доменов.
+
+Ограничения: файлы больше QR_DECODE_MAX_FILE_SIZE не скачиваются,
+на картинку - не больше QR_DECODE_TIMEOUT, одновременно работает
+QR_DECODE_WORKERS проверок, в очереди - не больше QR_DECODE_QUEUE_SIZE.
+Если картинку распознать не удалось (очередь полна, таймаут, ошибка),
+decode возвращает None, и проверка идет по-старому. После таймаута
+процесс дорабатывает картинку, и место в очереди освобождается только
+по ее завершении, так что зависшие картинки не копятся сверх очереди.
+Результаты запоминаются по file_unique_id.
+
+Модуль включается настройкой QR_DECODE_ENABLED и требует zxing-cpp и Pillow.
+"""
+
+import asyncio
+import io
+import logging
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.types import Document, Message, PhotoSize
+
+from app.constants import (
+    QR_DECODE_CACHE_SIZE,
+    QR_DECODE_MAX_FILE_SIZE,
+    QR_DECODE_QUEUE_SIZE,
+    QR_DECODE_TIMEOUT,
+    QR_DECODE_WORKERS,
+)
+from app.utils.qr_codes import QR_DECODE_AVAILABLE, decode_qr
+
+logger = logging.getLogger(__name__)
+
+DecodableMedia = Union[PhotoSize, Document]
+
+
+class QrCodeService:
+    """Распознавание QR-кодов в ограниченном пуле процессов."""
+
+    def __init__(
+        self,
+        workers: int = QR_DECODE_WORKERS,
+        queue_size: int = QR_DECODE_QUEUE_SIZE,
+        timeout: float = QR_DECODE_TIMEOUT,
+        max_file_size: int = QR_DECODE_MAX_FILE_SIZE,
+        cache_size: int = QR_DECODE_CACHE_SIZE,
+        decoder: Callable[[bytes], Tuple[str, ...]] = decode_qr,
+        executor: Optional[Executor] = None,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_file_size = max_file_size
+        self.cache_size = cache_size
+        self.enabled = False
+        self._decoder = decoder
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._semaphore = asyncio.Semaphore(workers)
+        self._queued = 0
+        # file_unique_id -> содержимое QR-кодов (пустой кортеж - кодов нет)
+        self._cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._stats = {"decoded": 0, "found": 0, "cache_hits": 0, "dropped": 0, "timeouts": 0, "errors": 0}
+
+    def start(self) -> bool:
+        """Включить распознавание (если доступен декодер)."""
+        if self._decoder is decode_qr and not QR_DECODE_AVAILABLE:
+            logger.warning("Распознавание QR-кодов выключено: не установлены zxing-cpp и Pillow")
+            return False
+        self.enabled = True
+        logger.info(f"Распознавание QR-кодов включено: {self.workers} процессов")
+        return True
+
+    async def stop(self) -> None:
+        """Остановить пул процессов."""
+        self.enabled = False
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def select_media(self, message: Message) -> Optional[DecodableMedia]:
+        """Что распознавать: самое крупное фото в пределах лимита или картинка-документ."""
+        if not self.enabled:
+            return None
+        if message.photo:
+            for photo in reversed(message.photo):
+                if not photo.file_size or photo.file_size <= self.max_file_size:
+                    return photo
+            return None
+        document = message.document
+        if document and (document.mime_type or "").startswith("image/"):
+            if not document.file_size or document.file_size <= self.max_file_size:
+                return document
+        return None
+
+    async def decode(self, bot: Bot, media: DecodableMedia) -> Optional[Tuple[str, ...]]:
+        """Содержимое QR-кодов; None - распознать не удалось."""
+        cached = self._cache.get(media.file_unique_id)
+        if cached is not None:
+            self._cache.move_to_end(media.file_unique_id)
+            self._stats["cache_hits"] += 1
+            return cached
+
+        if self._queued >= self.queue_size:
+            self._stats["dropped"] += 1
+            return None
+
+        self._queued += 1
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            self._queued -= 1
+            raise
+        # Задание в пуле; слот освобождается, когда оно действительно завершится
+        jobs: List["Future[Tuple[str, ...]]"] = []
+        try:
+            texts = await asyncio.wait_for(self._download_and_decode(bot, media, jobs), self.timeout)
+        except asyncio.TimeoutError:
+            # Процесс дорабатывает картинку сам, результат отбрасывается
+            self._stats["timeouts"] += 1
+            logger.warning(f"Распознавание QR-кода {media.file_unique_id} не уложилось в {self.timeout} с")
+            return None
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Не удалось распознать QR-код {media.file_unique_id}: {e}")
+            return None
+        finally:
+            if not jobs or jobs[0].done():
+                self._release()
+            else:
+                loop = asyncio.get_running_loop()
+                jobs[0].add_done_callback(lambda _: self._release_from_pool(loop))
+
+        self._stats["decoded"] += 1
+        if texts:
+            self._stats["found"] += 1
+        self._cache[media.file_unique_id] = texts
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return texts
+
+    async def _download_and_decode(self, bot: Bot, media: DecodableMedia, jobs: List[Future]) -> Tuple[str, ...]:
+        data = await bot.download(media.file_id, destination=io.BytesIO())
+        jobs.append(self._get_executor().submit(self._decoder, data.getvalue()))
+        return tuple(await asyncio.wrap_future(jobs[0]))
+
+    def _release(self) -> None:
+        """Освободить место в очереди и процесс пула."""
+        self._queued -= 1
+        self._semaphore.release()
+
+    def _release_from_pool(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Освободить слот из потока пула, когда задание завершилось."""
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Event loop уже закрыт (остановка бота) - освобождать некому
+            pass
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def clear(self) -> None:
+        """Забыть результаты распознавания."""
+        self._cache.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика распознавания."""
+        return {**self._stats, "queued": self._queued, "cached": len(self._cache)}
+
+
+# Глобальный сервис распознавания QR-кодов
+_qr_codes: Optional[QrCodeService] = None
+
+
+def get_qr_codes() -> QrCodeService:
+    """Получить глобальный сервис распознавания QR-кодов."""
+    global _qr_codes
+
+    if _qr_codes is None:
+        _qr_codes = QrCodeService()
+
+    return _qr_codes
@@ -262,9 +262,9 @@ async def get_redis_service() -> RedisService:
         if not AIOREDIS_AVAILABLE:
             raise RuntimeError("Redis не доступен. Установите: pip install redis>=5.0.0")
 
-        from app.config import load_config
+        from app.config import get_config
 
-        config = load_config()
+        config = get_config().settings
 
         redis_url = getattr(config, "redis_url", "redis://localhost:6379/0")
         _redis_service = RedisService(redis_url)
@@ -0,0 +1,428 @@
+"""
+Shared Cache - двухуровневый кэш для нескольких реплик бота.
+
+Уровни:
+1. Локальный (in-process LRU) - попадание стоит один dict lookup;
+   в каждом пространстве имен не больше SHARED_CACHE_LOCAL_MAX_ENTRIES
+   ключей (ключи бывают от пользователей, например username)
+2. Redis (опционально) - общий для всех реплик; каждый ключ - отдельная
+   запись со своим TTL (SET EX), так что записи истекают независимо
+
+Изменения (allow/block канала, whitelist ботов, лимиты) рассылаются
+остальным репликам через Redis pub/sub. Локальный TTL ограничивает
+рассинхронизацию сверху, даже если сообщение инвалидации потеряно,
+а задержка доставки инвалидаций пишется в метрику
+``shared_cache_invalidation_lag``.
+
+RESP3 client-side caching не используется: пул RedisService работает
+по RESP2, поэтому инвалидации идут через обычный pub/sub канал.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.constants import (
+    SHARED_CACHE_INVALIDATION_CHANNEL,
+    SHARED_CACHE_KEY_PREFIX,
+    SHARED_CACHE_LOCAL_MAX_ENTRIES,
+    SHARED_CACHE_LOCAL_TTL,
+    SHARED_CACHE_REDIS_TTL,
+)
+from app.monitoring.metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+# Маркер отсутствия значения (None - допустимое закэшированное значение)
+MISSING: Any = object()
+
+# Пространства имен, используемые сервисами
+CHANNEL_STATUS_NAMESPACE = "channel_status"
+CHANNEL_CAPABILITIES_NAMESPACE = "channel_capabilities"
+BOT_WHITELIST_NAMESPACE = "bot_whitelist"
+LIMITS_NAMESPACE = "limits"
+MEDIA_FINGERPRINT_NAMESPACE = "media_fingerprints"
+
+
+class SharedCache:
+    """Двухуровневый кэш: локальный dict + Redis с pub/sub инвалидацией."""
+
+    def __init__(
+        self,
+        local_ttl: float = SHARED_CACHE_LOCAL_TTL,
+        redis_ttl: int = SHARED_CACHE_REDIS_TTL,
+        channel: str = SHARED_CACHE_INVALIDATION_CHANNEL,
+        key_prefix: str = SHARED_CACHE_KEY_PREFIX,
+        local_max_entries: int = SHARED_CACHE_LOCAL_MAX_ENTRIES,
+    ):
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self.redis_ttl = redis_ttl
+        self.channel = channel
+        self.key_prefix = key_prefix
+        self.instance_id = uuid.uuid4().hex[:12]
+
+        # namespace -> key -> (expires_at, value), в порядке последнего обращения
+        self._local: Dict[str, "OrderedDict[str, Tuple[float, Any]]"] = {}
+        self._redis_service = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._pending_tasks: Set[asyncio.Task] = set()
+        self._listeners: Dict[str, List[Callable[[Optional[str], Any], None]]] = {}
+
+        self._stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "invalidations_sent": 0,
+            "invalidations_received": 0,
+            "local_evictions": 0,
+        }
+
+    @property
+    def redis_enabled(self) -> bool:
+        """Подключен ли Redis уровень."""
+        return self._redis_service is not None
+
+    # ------------------------------------------------------------------
+    # Локальный уровень
+    # ------------------------------------------------------------------
+
+    def get_local(self, namespace: str, key: str, default: Any = MISSING) -> Any:
+        """Получить значение только из локального уровня (без await)."""
+        value = self._lookup_local(namespace, key)
+        if value is MISSING:
+            self._stats["misses"] += 1
+            return default
+
+        self._stats["local_hits"] += 1
+        return value
+
+    def _lookup_local(self, namespace: str, key: str) -> Any:
+        """Значение локального уровня или MISSING (без учета в статистике)."""
+        entries = self._local.get(namespace)
+        entry = entries.get(key) if entries is not None else None
+        if entry is None:
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at and expires_at < time.monotonic():
+            entries.pop(key, None)
+            return MISSING
+
+        entries.move_to_end(key)
+        return value
+
+    def set_local(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Сохранить значение в локальном уровне.
+
+        ttl=None - локальный TTL по умолчанию, ttl=0 - без истечения.
+        """
+        ttl = self.local_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        entries = self._local.setdefault(namespace, OrderedDict())
+        entries[key] = (expires_at, value)
+        entries.move_to_end(key)
+        while len(entries) > self.local_max_entries:
+            entries.popitem(last=False)
+            self._stats["local_evictions"] += 1
+
+    def drop_local(self, namespace: str, key: Optional[str] = None) -> None:
+        """Удалить ключ (или все пространство имен) из локального уровня."""
+        if key is None:
+            self._local.pop(namespace, None)
+        else:
+            self._local.get(namespace, {}).pop(key, None)
+
+    def clear_local(self) -> None:
+        """Полностью очистить локальный уровень."""
+        self._local.clear()
+
+    def add_listener(self, namespace: str, callback: Callable[[Optional[str], Any], None]) -> None:
+        """Подписаться на изменения пространства имен от других реплик.
+
+        callback(key, value) получает новое значение или MISSING при инвалидации.
+        """
+        self._listeners.setdefault(namespace, []).append(callback)
+
+    # ------------------------------------------------------------------
+    # Оба уровня
+    # ------------------------------------------------------------------
+
+    async def get(self, namespace: str, key: str, default: Any = MISSING) -> Any:
+        """Получить значение: локальный уровень, затем Redis (промах - когда нет ни там, ни там)."""
+        value = self._lookup_local(namespace, key)
+        if value is not MISSING:
+            self._stats["local_hits"] += 1
+            return value
+
+        value = await self._redis_read(namespace, key)
+        if value is MISSING:
+            self._stats["misses"] += 1
+            return default
+
+        self._stats["redis_hits"] += 1
+        self.set_local(namespace, key, value)
+        return value
+
+    async def _redis_read(self, namespace: str, key: str) -> Any:
+        """Значение из Redis или MISSING."""
+        if not self._redis_service:
+            return MISSING
+
+        try:
+            raw = await self._redis_service.redis.get(self._redis_key(namespace, key))
+        except Exception as e:
+            logger.warning(f"Ошибка чтения общего кэша {namespace}:{key}: {e}")
+            return MISSING
+
+        if raw is None:
+            return MISSING
+
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning(f"Некорректное значение в общем кэше {namespace}:{key}")
+            return MISSING
+
+    async def set(self, namespace: str, key: str, value: Any) -> None:
+        """Сохранить значение в обоих уровнях без рассылки инвалидации.
+
+        Используется для заполнения кэша после чтения из БД, когда
+        значение совпадает с тем, что видят остальные реплики.
+        """
+        self.set_local(namespace, key, value)
+        await self._redis_write(namespace, key, value)
+
+    async def invalidate(self, namespace: str, key: Optional[str] = None) -> None:
+        """Инвалидировать ключ (или пространство имен) во всех репликах."""
+        self.drop_local(namespace, key)
+
+        if not self._redis_service:
+            return
+
+        try:
+            if key is None:
+                await self._redis_delete_namespace(namespace)
+            else:
+                await self._redis_service.redis.delete(self._redis_key(namespace, key))
+        except Exception as e:
+            logger.warning(f"Ошибка удаления из общего кэша {namespace}:{key}: {e}")
+
+        await self._broadcast({"ns": namespace, "key": key})
+
+    async def publish(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Записать новое значение и разослать его остальным репликам.
+
+        В отличие от invalidate() значение передается прямо в сообщении,
+        поэтому получатели обновляют локальный уровень без похода в Redis.
+        """
+        self.set_local(namespace, key, value, ttl=ttl)
+        await self._publish_remote(namespace, key, value, ttl)
+
+    def publish_nowait(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Синхронный вариант publish() для кода без await.
+
+        Локальный уровень обновляется сразу, рассылка планируется
+        в текущем event loop (если он запущен и Redis подключен).
+        """
+        self.set_local(namespace, key, value, ttl=ttl)
+        if self._redis_service:
+            self._schedule(self._publish_remote(namespace, key, value, ttl))
+
+    def broadcast_nowait(self, namespace: str, key: str, value: Any) -> None:
+        """Разослать значение слушателям других реплик, не сохраняя его.
+
+        Для пространств имен, данные которых держит сам сервис (add_listener):
+        ни локальный уровень, ни Redis второй копии не хранят, получатели
+        тоже только вызывают слушателей.
+        """
+        if self._redis_service:
+            self._schedule(self._broadcast({"ns": namespace, "key": key, "value": value, "notify": True}))
+
+    def _schedule(self, coro) -> None:
+        """Запустить рассылку в текущем event loop (если он запущен)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            coro.close()
+            return
+
+        task = loop.create_task(coro)
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+
+    async def _publish_remote(self, namespace: str, key: str, value: Any, ttl: Optional[float]) -> None:
+        """Записать значение в Redis и разослать его остальным репликам."""
+        await self._redis_write(namespace, key, value)
+        await self._broadcast({"ns": namespace, "key": key, "value": value, "ttl": ttl})
+
+    # ------------------------------------------------------------------
+    # Redis уровень и pub/sub
+    # ------------------------------------------------------------------
+
+    async def attach_redis(self, redis_service) -> None:
+        """Подключить Redis уровень и запустить прием инвалидаций."""
+        self._redis_service = redis_service
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen())
+        logger.info(f"Общий кэш подключен к Redis (instance={self.instance_id})")
+
+    async def close(self) -> None:
+        """Остановить прием инвалидаций и отключить Redis уровень."""
+        if self._listener_task:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+        if self._pending_tasks:
+            await asyncio.gather(*self._pending_tasks, return_exceptions=True)
+        self._redis_service = None
+
+    async def _listen(self) -> None:
+        """Цикл приема сообщений инвалидации с переподключением."""
+        while self._redis_service is not None:
+            pubsub = None
+            try:
+                pubsub = self._redis_service.redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                logger.info(f"Подписка на инвалидации общего кэша: {self.channel}")
+
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.handle_invalidation(message.get("data"))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Инвалидации могли быть потеряны - сбрасываем локальный уровень
+                logger.error(f"Ошибка подписки на инвалидации кэша: {e}")
+                self.clear_local()
+                await asyncio.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.unsubscribe(self.channel)
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    def handle_invalidation(self, raw: Any) -> None:
+        """Применить сообщение инвалидации от другой реплики."""
+        try:
+            if isinstance(raw, bytes):
+                raw = raw.decode("utf-8")
+            payload = json.loads(raw)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            logger.warning("Некорректное сообщение инвалидации общего кэша")
+            return
+
+        if payload.get("origin") == self.instance_id:
+            return
+
+        namespace = payload.get("ns")
+        if not namespace:
+            return
+
+        key = payload.get("key")
+        if payload.get("notify"):
+            pass  # Только для слушателей
+        elif "value" in payload and key is not None:
+            self.set_local(namespace, key, payload["value"], ttl=payload.get("ttl"))
+        else:
+            self.drop_local(namespace, key)
+
+        for listener in self._listeners.get(namespace, ()):
+            try:
+                listener(key, payload.get("value", MISSING))
+            except Exception as e:
+                logger.error(f"Ошибка обработчика изменений общего кэша {namespace}: {e}")
+
+        self._stats["invalidations_received"] += 1
+
+        sent_at = payload.get("ts")
+        if isinstance(sent_at, (int, float)):
+            lag = max(0.0, time.time() - sent_at)
+            get_metrics_collector().record_timing("shared_cache_invalidation_lag", lag, {"namespace": namespace})
+
+    async def _broadcast(self, payload: Dict[str, Any]) -> None:
+        """Отправить сообщение инвалидации остальным репликам."""
+        if not self._redis_service:
+            return
+
+        payload["origin"] = self.instance_id
+        payload["ts"] = time.time()
+        try:
+            await self._redis_service.redis.publish(self.channel, json.dumps(payload, ensure_ascii=False))
+            self._stats["invalidations_sent"] += 1
+        except Exception as e:
+            logger.warning(f"Ошибка рассылки инвалидации {payload.get('ns')}:{payload.get('key')}: {e}")
+
+    async def _redis_write(self, namespace: str, key: str, value: Any) -> None:
+        """Записать значение в Redis уровень."""
+        if not self._redis_service:
+            return
+
+        try:
+            await self._redis_service.redis.set(
+                self._redis_key(namespace, key), json.dumps(value, ensure_ascii=False), ex=self.redis_ttl
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка записи в общий кэш {namespace}:{key}: {e}")
+
+    async def _redis_delete_namespace(self, namespace: str) -> None:
+        """Удалить все ключи пространства имен из Redis."""
+        redis = self._redis_service.redis
+        batch = []
+        async for redis_key in redis.scan_iter(match=f"{self._redis_key(namespace, '')}*", count=500):
+            batch.append(redis_key)
+            if len(batch) >= 500:
+                await redis.delete(*batch)
+                batch = []
+        if batch:
+            await redis.delete(*batch)
+
+    def _redis_key(self, namespace: str, key: str) -> str:
+        """Ключ Redis для значения из пространства имен."""
+        return f"{self.key_prefix}:{namespace}:{key}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика попаданий и инвалидаций."""
+        lookups = self._stats["local_hits"] + self._stats["redis_hits"] + self._stats["misses"]
+        hits = self._stats["local_hits"] + self._stats["redis_hits"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local_entries": sum(len(entries) for entries in self._local.values()),
+            "redis_enabled": self.redis_enabled,
+            "instance_id": self.instance_id,
+        }
+
+
+# Глобальный экземпляр общего кэша
+_shared_cache: Optional[SharedCache] = None
+
+
+def get_shared_cache() -> SharedCache:
+    """Получить глобальный экземпляр общего кэша."""
+    global _shared_cache
+
+    if _shared_cache is None:
+        _shared_cache = SharedCache()
+
+    return _shared_cache
+
+
+async def close_shared_cache() -> None:
+    """Остановить глобальный общий кэш."""
+    global _shared_cache
+
+    if _shared_cache:
+        await _shared_cache.close()
+        _shared_cache = None
@@ -0,0 +1,265 @@
+"""
+Source Reputation - репутация каналов, из которых пересылают сообщения.
+
+Для каждого forward_from_chat.id хранятся два счетчика: сколько
+пересланных из него сообщений содержали признаки спама и сколько были
+чистыми. Счетчики затухают экспоненциально (период полураспада
+SOURCE_REPUTATION_HALF_LIFE), поэтому старые вердикты постепенно
+перестают влиять, а источник может как испортиться, так и исправиться.
+
+Решение по источнику:
+- ALLOW - вердиктов достаточно и доля спама не больше ALLOW_RATIO;
+- DENY - вердиктов достаточно и доля спама не меньше DENY_RATIO;
+- UNKNOWN - иначе, нужна полная проверка.
+
+Доля спама от затухания не зависит (оба счетчика умножаются на один
+множитель), затухание нужно только для порога количества вердиктов,
+поэтому проверка - один dict lookup и одно возведение в степень.
+
+Счетчики живут в памяти; измененные записи пишутся в БД раз в
+SOURCE_REPUTATION_FLUSH_INTERVAL и при остановке бота.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import (
+    SOURCE_REPUTATION_ALLOW_RATIO,
+    SOURCE_REPUTATION_DENY_RATIO,
+    SOURCE_REPUTATION_FLUSH_INTERVAL,
+    SOURCE_REPUTATION_HALF_LIFE,
+    SOURCE_REPUTATION_MIN_EVIDENCE,
+    SOURCE_REPUTATION_PRUNE_EVIDENCE,
+)
+from app.models.source_reputation import SourceReputation
+
+logger = logging.getLogger(__name__)
+
+# Решения по источнику
+ALLOW = "allow"
+DENY = "deny"
+UNKNOWN = "unknown"
+
+# Допуск при сравнении с порогом: вердикты с разницей в доли секунды уже чуть затухли
+EVIDENCE_TOLERANCE = 1e-6
+
+
+@dataclass
+class SourceScore:
+    """Счетчики вердиктов источника, затухшие к моменту scored_at (unix time)."""
+
+    spam: float
+    clean: float
+    scored_at: float
+    title: Optional[str] = None
+
+    @property
+    def total(self) -> float:
+        return self.spam + self.clean
+
+
+class SourceReputationStore:
+    """Репутация источников пересылок в памяти с периодической записью в БД."""
+
+    def __init__(
+        self,
+        half_life: float = SOURCE_REPUTATION_HALF_LIFE,
+        min_evidence: float = SOURCE_REPUTATION_MIN_EVIDENCE,
+        allow_ratio: float = SOURCE_REPUTATION_ALLOW_RATIO,
+        deny_ratio: float = SOURCE_REPUTATION_DENY_RATIO,
+        flush_interval: float = SOURCE_REPUTATION_FLUSH_INTERVAL,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self.half_life = half_life
+        self.min_evidence = min_evidence
+        self.allow_ratio = allow_ratio
+        self.deny_ratio = deny_ratio
+        self.flush_interval = flush_interval
+        self._session_factory = session_factory
+        self._scores: Dict[int, SourceScore] = {}
+        self._dirty: Set[int] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._stats = {ALLOW: 0, DENY: 0, UNKNOWN: 0, "spam_verdicts": 0, "clean_verdicts": 0, "flushes": 0}
+
+    def _decay(self, elapsed: float) -> float:
+        """Множитель затухания за elapsed секунд."""
+        return 0.5 ** (elapsed / self.half_life) if elapsed > 0 else 1.0
+
+    def verdict(self, chat_id: int, now: Optional[float] = None) -> str:
+        """ALLOW, DENY или UNKNOWN для источника."""
+        decision = UNKNOWN
+        score = self._scores.get(chat_id)
+        if score is not None:
+            total = score.total
+            now = time.time() if now is None else now
+            if total * self._decay(now - score.scored_at) >= self.min_evidence - EVIDENCE_TOLERANCE:
+                ratio = score.spam / total
+                if ratio <= self.allow_ratio:
+                    decision = ALLOW
+                elif ratio >= self.deny_ratio:
+                    decision = DENY
+
+        self._stats[decision] += 1
+        return decision
+
+    def record(self, chat_id: int, is_spam: bool, title: Optional[str] = None, now: Optional[float] = None) -> SourceScore:
+        """Учесть вердикт по сообщению, пересланному из источника."""
+        now = time.time() if now is None else now
+        score = self._scores.get(chat_id)
+        if score is None:
+            score = self._scores[chat_id] = SourceScore(spam=0.0, clean=0.0, scored_at=now)
+        else:
+            factor = self._decay(now - score.scored_at)
+            score.spam *= factor
+            score.clean *= factor
+            score.scored_at = now
+
+        if is_spam:
+            score.spam += 1.0
+            self._stats["spam_verdicts"] += 1
+        else:
+            score.clean += 1.0
+            self._stats["clean_verdicts"] += 1
+        score.title = title or score.title
+        self._dirty.add(chat_id)
+        return score
+
+    def get(self, chat_id: int) -> Optional[SourceScore]:
+        return self._scores.get(chat_id)
+
+    async def warm(self, session: AsyncSession) -> int:
+        """Загрузить репутацию из БД (почти забытые источники пропускаются)."""
+        result = await session.execute(select(SourceReputation))
+
+        now = time.time()
+        for row in result.scalars().all():
+            score = SourceScore(
+                spam=row.spam_score,
+                clean=row.clean_score,
+                scored_at=row.scored_at.replace(tzinfo=timezone.utc).timestamp(),
+                title=row.title,
+            )
+            if score.total * self._decay(now - score.scored_at) >= SOURCE_REPUTATION_PRUNE_EVIDENCE:
+                self._scores[row.chat_id] = score
+
+        logger.info(f"Репутация источников загружена: {len(self._scores)} записей")
+        return len(self._scores)
+
+    async def flush(self) -> int:
+        """Записать измененные источники в БД; возвращает число записей."""
+        now = time.time()
+        self._prune(now)
+        if not self._dirty:
+            return 0
+
+        dirty, self._dirty = self._dirty, set()
+        updated_at = datetime.utcnow()
+        rows = []
+        for chat_id in dirty:
+            score = self._scores.get(chat_id)
+            if score is None:
+                continue
+            rows.append(
+                {
+                    "chat_id": chat_id,
+                    "title": score.title,
+                    "spam_score": score.spam,
+                    "clean_score": score.clean,
+                    "scored_at": datetime.fromtimestamp(score.scored_at, timezone.utc).replace(tzinfo=None),
+                    "created_at": updated_at,
+                    "updated_at": updated_at,
+                }
+            )
+        if not rows:
+            return 0
+
+        statement = insert(SourceReputation).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[SourceReputation.chat_id],
+            set_={
+                column: statement.excluded[column]
+                for column in ("title", "spam_score", "clean_score", "scored_at", "updated_at")
+            },
+        )
+
+        session_factory = self._session_factory
+        if session_factory is None:
+            from app.database import SessionLocal
+
+            session_factory = SessionLocal
+
+        try:
+            async with session_factory() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            # Повторим при следующей записи
+            self._dirty |= dirty
+            logger.error(f"Ошибка сохранения репутации источников: {e}")
+            return 0
+
+        self._stats["flushes"] += 1
+        return len(rows)
+
+    def _prune(self, now: float) -> None:
+        """Забыть источники, чьи вердикты почти полностью затухли."""
+        forgotten = [
+            chat_id
+            for chat_id, score in self._scores.items()
+            if score.total * self._decay(now - score.scored_at) < SOURCE_REPUTATION_PRUNE_EVIDENCE
+        ]
+        for chat_id in forgotten:
+            del self._scores[chat_id]
+            self._dirty.discard(chat_id)
+
+    async def start(self) -> None:
+        """Запустить периодическую запись в БД."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Остановить периодическую запись и сохранить оставшиеся изменения."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def clear(self) -> None:
+        """Очистить репутацию в памяти (БД не меняется)."""
+        self._scores.clear()
+        self._dirty.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика решений и записей."""
+        return {**self._stats, "sources": len(self._scores), "dirty": len(self._dirty)}
+
+
+# Глобальное хранилище репутации источников
+_source_reputation: Optional[SourceReputationStore] = None
+
+
+def get_source_reputation() -> SourceReputationStore:
+    """Получить глобальное хранилище репутации источников."""
+    global _source_reputation
+
+    if _source_reputation is None:
+        _source_reputation = SourceReputationStore()
+
+    return _source_reputation
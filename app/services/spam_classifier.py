@@ -0,0 +1,172 @@
+"""
+Spam Classifier - оценка сообщений статистической моделью.
+
+Модель (app/utils/text_classifier.py) оценивает батч текстов одной
+матричной операцией, а сообщения приходят по одному. SpamClassifierService
+копит тексты SPAM_CLASSIFIER_BATCH_WINDOW секунд (или до
+SPAM_CLASSIFIER_MAX_BATCH текстов) и оценивает их вместе; каждый вызов
+score получает свою вероятность.
+
+Модель обучается офлайн (scripts/train_spam_classifier.py) на
+зашифрованном корпусе анализа спама (secure_logger.log_spam_analysis)
+и moderation_logs: сообщение - спам, если в нем нашлись ссылки на ботов
+или его вручную удалил администратор. Собственные вердикты классификатора
+(CLASSIFIER_FLAG) и удаления по ним метками не считаются, иначе модель
+училась бы на своих же ответах. load_training_corpus собирает такие примеры.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.constants import SPAM_CLASSIFIER_BATCH_WINDOW, SPAM_CLASSIFIER_MAX_BATCH
+from app.models.moderation_log import ModerationAction, ModerationLog
+from app.utils.pii_protection import PIIProtector
+from app.utils.text_classifier import CLASSIFIER_AVAILABLE, SpamClassifier
+
+logger = logging.getLogger(__name__)
+
+# Находка классификатора в результатах проверки сообщения
+CLASSIFIER_FLAG = "spam_classifier"
+
+# (текст, спам ли)
+Sample = Tuple[str, bool]
+
+
+class SpamClassifierService:
+    """Оценка текстов микро-батчами."""
+
+    def __init__(self, window: float = SPAM_CLASSIFIER_BATCH_WINDOW, max_batch: int = SPAM_CLASSIFIER_MAX_BATCH):
+        self.window = window
+        self.max_batch = max_batch
+        self.model: Optional[SpamClassifier] = None
+        self._batch: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._stats = {"batches": 0, "scored": 0, "errors": 0}
+        self._load_seconds = 0.0
+
+    def load(self, path: str) -> bool:
+        """Загрузить модель; False - модель недоступна."""
+        if not CLASSIFIER_AVAILABLE:
+            logger.warning("Классификатор спама выключен: не установлен numpy")
+            return False
+        started = time.perf_counter()
+        try:
+            self.model = SpamClassifier.load(path)
+        except Exception as e:
+            logger.error(f"Не удалось загрузить модель классификатора {path}: {e}")
+            return False
+        self._load_seconds = time.perf_counter() - started
+        logger.info(
+            f"Классификатор спама загружен за {self._load_seconds * 1000:.0f} мс: {self.model}, "
+            f"{self.model.memory_bytes // 1024} КБ"
+        )
+        return True
+
+    async def score(self, text: str) -> Optional[float]:
+        """Вероятность спама; None - модели нет или текст пустой."""
+        if self.model is None or not text:
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((text, future))
+        if len(self._batch) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Оценить накопленный батч."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        try:
+            probabilities = self.model.predict_proba([text for text, _ in batch])
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Ошибка классификатора спама: {e}")
+            probabilities = [None] * len(batch)
+
+        self._stats["batches"] += 1
+        self._stats["scored"] += len(batch)
+        for (_, future), probability in zip(batch, probabilities):
+            if not future.done():
+                future.set_result(None if probability is None else float(probability))
+
+    def get_stats(self) -> Dict[str, float]:
+        """Статистика: размер батчей, время загрузки и память модели."""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "mean_batch": self._stats["scored"] / batches if batches else 0.0,
+            "load_ms": round(self._load_seconds * 1000, 1),
+            "memory_bytes": self.model.memory_bytes if self.model is not None else 0,
+        }
+
+
+async def load_training_corpus(session: AsyncSession, log_file: Path, protector: PIIProtector) -> List[Sample]:
+    """Примеры из зашифрованного корпуса анализа спама с метками из moderation_logs."""
+    # Только ручные удаления: системные (admin_telegram_id=0) включают удаления по вердикту классификатора
+    result = await session.execute(
+        select(ModerationLog.chat_id, ModerationLog.message_id).where(
+            ModerationLog.action == ModerationAction.DELETE_MESSAGE,
+            ModerationLog.message_id.is_not(None),
+            ModerationLog.admin_telegram_id != 0,
+        )
+    )
+    deleted: Set[Tuple[int, int]] = {(chat_id, message_id) for chat_id, message_id in result.all()}
+
+    samples = []
+    if not log_file.exists():
+        return samples
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if "ENCRYPTED_DATA:" not in line:
+                continue
+            entry = protector.decrypt_log_entry(line.split("ENCRYPTED_DATA: ")[1].strip())
+            additional = entry.get("additional_data", {})
+            text = entry.get("original_message")
+            if additional.get("log_type") != "spam_analysis" or not text:
+                continue
+            analysis = additional.get("analysis_result", {})
+            findings = analysis.get("bot_links_count", 0) - analysis.get("check_types", []).count(CLASSIFIER_FLAG)
+            is_spam = findings > 0 or (entry.get("chat_id"), analysis.get("message_id")) in deleted
+            samples.append((text, is_spam))
+    return samples
+
+
+def load_labeled_samples(path: Path) -> List[Sample]:
+    """Размеченные примеры из JSONL: {"text": ..., "spam": true/false} на строку."""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                samples.append((record["text"], bool(record["spam"])))
+    return samples
+
+
+# Глобальный классификатор спама
+_spam_classifier: Optional[SpamClassifierService] = None
+
+
+def get_spam_classifier() -> SpamClassifierService:
+    """Получить глобальный классификатор спама."""
+    global _spam_classifier
+
+    if _spam_classifier is None:
+        _spam_classifier = SpamClassifierService()
+
+    return _spam_classifier
@@ -0,0 +1,218 @@
+"""
+Spam Waves - волны почти одинакового спама в разных чатах.
+
+Спам рассылается волнами: один текст за несколько минут приходит во все
+чаты от разных аккаунтов, и в каждой копии другое эмодзи или сумма, так
+что точное сравнение текстов их не связывает. SpamWaveIndex держит
+MinHash-сигнатуры (app/utils/minhash.py) последних сообщений всех чатов
+и собирает похожие в кластеры. Сообщение - волна, когда в его кластере
+за SPAM_WAVE_WINDOW набралось SPAM_WAVE_MIN_COPIES копий от
+SPAM_WAVE_MIN_USERS разных пользователей в SPAM_WAVE_MIN_CHATS разных
+чатах: когда участники одного чата повторяют одну фразу (поздравления,
+флешмоб, ответы на опрос), это не рассылка.
+
+Поиск кластера - MINHASH_BANDS обращений к LSH-индексу полос и сравнение
+сигнатуры с найденными представителями кластеров, от размера индекса не
+зависит. Окно - кольцо из SPAM_WAVE_BUCKETS корзин по времени: корзина
+помнит, сколько копий каких кластеров от каких пользователей в каких
+чатах в нее попало, и при выходе из окна эти копии вычитаются, а опустевшие кластеры
+удаляются. Кластеров не больше SPAM_WAVE_MAX_CLUSTERS: при переполнении
+вытесняется тот, копий которого дольше всего не было.
+
+Индекс живет в памяти процесса.
+"""
+
+import logging
+import time
+from array import array
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.constants import (
+    SPAM_WAVE_BUCKETS,
+    SPAM_WAVE_MAX_CLUSTERS,
+    SPAM_WAVE_MIN_CHATS,
+    SPAM_WAVE_MIN_COPIES,
+    SPAM_WAVE_MIN_USERS,
+    SPAM_WAVE_MIN_WORDS,
+    SPAM_WAVE_SIMILARITY,
+    SPAM_WAVE_WINDOW,
+)
+from app.utils.minhash import MINHASH_BANDS, band_keys, minhash, similarity
+
+logger = logging.getLogger(__name__)
+
+# Корзина окна: кластер -> (пользователь, чат) -> копий
+Bucket = Dict[int, Dict[Tuple[int, int], int]]
+
+
+class WaveCluster:
+    """Похожие сообщения в окне."""
+
+    __slots__ = ("id", "signature", "copies", "users", "chats", "flagged")
+
+    def __init__(self, cluster_id: int, signature: array):
+        self.id = cluster_id
+        self.signature = signature
+        self.copies = 0
+        self.users: Dict[int, int] = {}
+        self.chats: Dict[int, int] = {}
+        self.flagged = False
+
+
+class SpamWaveIndex:
+    """Кластеры почти одинаковых сообщений за окно времени."""
+
+    def __init__(
+        self,
+        window: float = SPAM_WAVE_WINDOW,
+        buckets: int = SPAM_WAVE_BUCKETS,
+        min_copies: int = SPAM_WAVE_MIN_COPIES,
+        min_users: int = SPAM_WAVE_MIN_USERS,
+        min_chats: int = SPAM_WAVE_MIN_CHATS,
+        min_words: int = SPAM_WAVE_MIN_WORDS,
+        min_similarity: float = SPAM_WAVE_SIMILARITY,
+        max_clusters: int = SPAM_WAVE_MAX_CLUSTERS,
+    ):
+        self.bucket_seconds = window / buckets
+        self.buckets = buckets
+        self.min_copies = min_copies
+        self.min_users = min_users
+        self.min_chats = min_chats
+        self.min_words = min_words
+        self.min_similarity = min_similarity
+        self.max_clusters = max_clusters
+        # Кластеры в порядке последней копии (для вытеснения)
+        self._clusters: "OrderedDict[int, WaveCluster]" = OrderedDict()
+        # Полоса -> ключ полосы -> кластер; при совпадении ключей остается первый кластер
+        self._bands: List[Dict[int, int]] = [{} for _ in range(MINHASH_BANDS)]
+        self._ring: Deque[Tuple[int, Bucket]] = deque()
+        self._next_id = 0
+        self._stats = {"observed": 0, "flagged": 0, "waves": 0, "evicted": 0}
+
+    def observe(self, text: str, user_id: int, chat_id: int, now: Optional[float] = None) -> bool:
+        """Учесть сообщение; True - оно часть волны."""
+        signature = minhash(text, self.min_words)
+        if signature is None:
+            return False
+
+        now = time.monotonic() if now is None else now
+        bucket = self._rotate(now)
+        self._stats["observed"] += 1
+
+        keys = band_keys(signature)
+        cluster = self._find(signature, keys)
+        if cluster is None:
+            cluster = self._create(signature, keys)
+        else:
+            self._clusters.move_to_end(cluster.id)
+
+        cluster.copies += 1
+        cluster.users[user_id] = cluster.users.get(user_id, 0) + 1
+        cluster.chats[chat_id] = cluster.chats.get(chat_id, 0) + 1
+        copies = bucket.setdefault(cluster.id, {})
+        copies[user_id, chat_id] = copies.get((user_id, chat_id), 0) + 1
+
+        if (
+            cluster.copies < self.min_copies
+            or len(cluster.users) < self.min_users
+            or len(cluster.chats) < self.min_chats
+        ):
+            return False
+        if not cluster.flagged:
+            cluster.flagged = True
+            self._stats["waves"] += 1
+            logger.warning(
+                f"Spam wave: {cluster.copies} copies from {len(cluster.users)} users in {len(cluster.chats)} chats"
+            )
+        self._stats["flagged"] += 1
+        return True
+
+    def _find(self, signature: array, keys: Tuple[int, ...]) -> Optional[WaveCluster]:
+        """Кластер, на представителя которого похожа сигнатура."""
+        checked = set()
+        for band, key in enumerate(keys):
+            cluster_id = self._bands[band].get(key)
+            if cluster_id is None or cluster_id in checked:
+                continue
+            checked.add(cluster_id)
+            cluster = self._clusters[cluster_id]
+            if similarity(signature, cluster.signature) >= self.min_similarity:
+                return cluster
+        return None
+
+    def _create(self, signature: array, keys: Tuple[int, ...]) -> WaveCluster:
+        if len(self._clusters) >= self.max_clusters:
+            _, oldest = self._clusters.popitem(last=False)
+            self._unindex(oldest)
+            for _, bucket in self._ring:
+                bucket.pop(oldest.id, None)
+            self._stats["evicted"] += 1
+
+        cluster = WaveCluster(self._next_id, signature)
+        self._next_id += 1
+        self._clusters[cluster.id] = cluster
+        for band, key in enumerate(keys):
+            self._bands[band].setdefault(key, cluster.id)
+        return cluster
+
+    def _unindex(self, cluster: WaveCluster) -> None:
+        for band, key in enumerate(band_keys(cluster.signature)):
+            if self._bands[band].get(key) == cluster.id:
+                del self._bands[band][key]
+
+    def _rotate(self, now: float) -> Bucket:
+        """Корзина для момента now; корзины вне окна вычитаются."""
+        sequence = int(now // self.bucket_seconds)
+        if not self._ring or self._ring[-1][0] < sequence:
+            self._ring.append((sequence, {}))
+        while self._ring[0][0] <= sequence - self.buckets:
+            _, expired = self._ring.popleft()
+            self._expire(expired)
+        return self._ring[-1][1]
+
+    def _expire(self, bucket: Bucket) -> None:
+        for cluster_id, copies in bucket.items():
+            cluster = self._clusters.get(cluster_id)
+            if cluster is None:
+                continue
+            for (user_id, chat_id), count in copies.items():
+                cluster.copies -= count
+                self._subtract(cluster.users, user_id, count)
+                self._subtract(cluster.chats, chat_id, count)
+            if cluster.copies <= 0:
+                del self._clusters[cluster_id]
+                self._unindex(cluster)
+
+    @staticmethod
+    def _subtract(counts: Dict[int, int], key: int, count: int) -> None:
+        remaining = counts[key] - count
+        if remaining > 0:
+            counts[key] = remaining
+        else:
+            del counts[key]
+
+    def clear(self) -> None:
+        """Забыть все сообщения."""
+        self._clusters.clear()
+        for band in self._bands:
+            band.clear()
+        self._ring.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика индекса."""
+        return {**self._stats, "clusters": len(self._clusters), "buckets": len(self._ring)}
+
+
+# Глобальный индекс волн спама
+_spam_waves: Optional[SpamWaveIndex] = None
+
+
+def get_spam_waves() -> SpamWaveIndex:
+    """Получить глобальный индекс волн спама."""
+    global _spam_waves
+
+    if _spam_waves is None:
+        _spam_waves = SpamWaveIndex()
+
+    return _spam_waves
@@ -0,0 +1,370 @@
+"""
+Telegram Limiter - распределенный лимитер исходящих запросов к Bot API.
+
+Telegram ограничивает бота глобально (~30 сообщений/с) и по группам
+(~20 сообщений/мин), причем лимит общий для всех реплик. Лимитер держит
+token bucket'ы в Redis (атомарно через Lua), а при недоступности Redis
+переключается на локальные bucket'ы.
+
+Приоритеты:
+- удаление и бан могут занимать токены у будущего пополнения;
+- уведомления и lookup-запросы не трогают резерв bucket'а.
+
+retry_after из ответа 429 записывается в общий ключ, поэтому паузу
+соблюдают все реплики, а не только получившая ошибку.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.constants import (
+    TELEGRAM_CHAT_RATE_PER_MINUTE,
+    TELEGRAM_GLOBAL_BURST,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_LIMITER_KEY_PREFIX,
+    TELEGRAM_PRIORITY_RESERVE,
+    TELEGRAM_TAKEDOWN_BORROW,
+)
+from app.monitoring.metrics import get_metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+class CallPriority(IntEnum):
+    """Приоритет исходящего запроса (меньше - важнее)."""
+
+    TAKEDOWN = 0
+    MODERATION = 1
+    LOOKUP = 2
+    NOTIFICATION = 3
+
+
+# Методы, останавливающие спам прямо сейчас
+TAKEDOWN_METHODS = frozenset({"deleteMessage", "deleteMessages", "banChatMember", "banChatSenderChat"})
+
+MODERATION_METHODS = frozenset(
+    {
+        "restrictChatMember",
+        "unbanChatMember",
+        "unbanChatSenderChat",
+        "approveChatJoinRequest",
+        "declineChatJoinRequest",
+        "leaveChat",
+    }
+)
+
+LOOKUP_METHODS = frozenset(
+    {
+        "getChat",
+        "getChatMember",
+        "getChatAdministrators",
+        "getChatMemberCount",
+        "getMe",
+        "getFile",
+        "getUserProfilePhotos",
+        "getMyCommands",
+    }
+)
+
+# Служебные методы, которые не лимитируются (long polling и т.п.)
+EXEMPT_METHODS = frozenset({"getUpdates", "setWebhook", "deleteWebhook", "getWebhookInfo", "close", "logOut"})
+
+# Методы, попадающие под лимит "сообщений в группу"
+CHAT_LIMITED_METHODS = frozenset(
+    {
+        "sendMessage",
+        "sendPhoto",
+        "sendVideo",
+        "sendAnimation",
+        "sendDocument",
+        "sendAudio",
+        "sendVoice",
+        "sendSticker",
+        "sendMediaGroup",
+        "forwardMessage",
+        "forwardMessages",
+        "copyMessage",
+        "copyMessages",
+    }
+)
+
+
+def get_method_name(method: Any) -> str:
+    """Имя метода Bot API (например, ``deleteMessage``)."""
+    return getattr(method, "__api_method__", None) or type(method).__name__
+
+
+def classify_method(method: Any) -> Optional[CallPriority]:
+    """Определить приоритет запроса. None - запрос не лимитируется."""
+    name = get_method_name(method)
+    if name in EXEMPT_METHODS:
+        return None
+    if name in TAKEDOWN_METHODS:
+        return CallPriority.TAKEDOWN
+    if name in MODERATION_METHODS:
+        return CallPriority.MODERATION
+    if name in LOOKUP_METHODS:
+        return CallPriority.LOOKUP
+    return CallPriority.NOTIFICATION
+
+
+def get_limited_chat_id(method: Any) -> Optional[int]:
+    """ID группы, если запрос попадает под лимит сообщений в группу."""
+    if get_method_name(method) not in CHAT_LIMITED_METHODS:
+        return None
+    chat_id = getattr(method, "chat_id", None)
+    if isinstance(chat_id, int) and chat_id < 0:
+        return chat_id
+    return None
+
+
+@dataclass(frozen=True)
+class BucketSpec:
+    """Параметры token bucket'а."""
+
+    rate: float  # токенов в секунду
+    capacity: float
+
+
+# Атомарное списание из нескольких bucket'ов + проверка общего retry_after.
+# KEYS: bucket'ы..., ключ retry_after (последний)
+# ARGV: (rate, capacity, floor) на каждый bucket, затем cost
+# Возвращает строку: "0" - токены списаны, иначе сколько секунд ждать.
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local retry_ttl = redis.call('PTTL', KEYS[#KEYS])
+if retry_ttl > 0 then
+    return tostring(retry_ttl / 1000)
+end
+local cost = tonumber(ARGV[#ARGV])
+local n = #KEYS - 1
+local levels = {}
+local wait = 0
+for i = 1, n do
+    local rate = tonumber(ARGV[(i - 1) * 3 + 1])
+    local capacity = tonumber(ARGV[(i - 1) * 3 + 2])
+    local floor = tonumber(ARGV[(i - 1) * 3 + 3])
+    local data = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    local deficit = floor + cost - tokens
+    if deficit > 0 then
+        wait = math.max(wait, deficit / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i = 1, n do
+    local rate = tonumber(ARGV[(i - 1) * 3 + 1])
+    local capacity = tonumber(ARGV[(i - 1) * 3 + 2])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate) + 1)
+end
+return "0"
+"""
+
+
+class LocalTokenBucket:
+    """Локальный token bucket (fallback без Redis)."""
+
+    __slots__ = ("spec", "tokens", "updated_at")
+
+    def __init__(self, spec: BucketSpec):
+        self.spec = spec
+        self.tokens = spec.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Пополнить bucket на момент now."""
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.spec.capacity, self.tokens + elapsed * self.spec.rate)
+            self.updated_at = now
+
+    def wait_time(self, cost: float, floor: float) -> float:
+        """Сколько ждать, чтобы списать cost, не опускаясь ниже floor."""
+        deficit = floor + cost - self.tokens
+        return deficit / self.spec.rate if deficit > 0 else 0.0
+
+
+class TelegramLimiter:
+    """Глобальный (межрепликовый) лимитер запросов к Telegram Bot API."""
+
+    # Не храним больше локальных bucket'ов групп: при переполнении вытесняется давно не использованный
+    MAX_LOCAL_CHAT_BUCKETS = 10000
+
+    def __init__(
+        self,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        global_burst: float = TELEGRAM_GLOBAL_BURST,
+        chat_rate_per_minute: float = TELEGRAM_CHAT_RATE_PER_MINUTE,
+        reserve: float = TELEGRAM_PRIORITY_RESERVE,
+        takedown_borrow: float = TELEGRAM_TAKEDOWN_BORROW,
+        key_prefix: str = TELEGRAM_LIMITER_KEY_PREFIX,
+    ):
+        self.global_spec = BucketSpec(rate=global_rate, capacity=global_burst)
+        self.chat_spec = BucketSpec(rate=chat_rate_per_minute / 60.0, capacity=chat_rate_per_minute)
+        self.key_prefix = key_prefix
+
+        # Нижняя граница уровня bucket'а для каждого приоритета
+        self.floors: Dict[CallPriority, float] = {
+            CallPriority.TAKEDOWN: -takedown_borrow,
+            CallPriority.MODERATION: 0.0,
+            CallPriority.LOOKUP: reserve,
+            CallPriority.NOTIFICATION: reserve,
+        }
+
+        self._redis_service = None
+        self._script = None
+        self._global_bucket = LocalTokenBucket(self.global_spec)
+        # Bucket'ы групп в порядке последнего использования (LRU)
+        self._chat_buckets: "OrderedDict[int, LocalTokenBucket]" = OrderedDict()
+        self._blocked_until = 0.0
+
+        self._stats = {"acquired": 0, "throttled": 0, "retry_after_events": 0, "redis_errors": 0}
+
+    @property
+    def retry_after_key(self) -> str:
+        """Общий ключ паузы после 429."""
+        return f"{self.key_prefix}:retry_after"
+
+    def attach_redis(self, redis_service) -> None:
+        """Подключить Redis для координации между репликами."""
+        self._redis_service = redis_service
+        self._script = redis_service.redis.register_script(TOKEN_BUCKET_SCRIPT)
+        logger.info("Telegram limiter использует Redis")
+
+    def detach_redis(self) -> None:
+        """Вернуться к локальным bucket'ам."""
+        self._redis_service = None
+        self._script = None
+
+    async def acquire(self, priority: CallPriority, chat_id: Optional[int] = None) -> float:
+        """Дождаться разрешения на запрос. Возвращает время ожидания."""
+        started = time.monotonic()
+        floor = self.floors[priority]
+
+        while True:
+            wait = await self._try_acquire(floor, chat_id)
+            if wait <= 0:
+                break
+            self._stats["throttled"] += 1
+            await asyncio.sleep(wait)
+
+        self._stats["acquired"] += 1
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            get_metrics_collector().record_timing("telegram_rate_limit_wait", waited, {"priority": priority.name.lower()})
+        return waited
+
+    async def report_retry_after(self, retry_after: float) -> None:
+        """Сообщить о 429: пауза применяется ко всем репликам."""
+        self._stats["retry_after_events"] += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        get_metrics_collector().increment_counter("telegram_retry_after_total")
+
+        if not self._redis_service:
+            return
+
+        try:
+            current_ttl = await self._redis_service.redis.pttl(self.retry_after_key)
+            retry_ms = int(retry_after * 1000)
+            if current_ttl is None or current_ttl < retry_ms:
+                await self._redis_service.redis.set(self.retry_after_key, "1", px=retry_ms)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            logger.warning(f"Не удалось сохранить retry_after в Redis: {e}")
+
+    async def _try_acquire(self, floor: float, chat_id: Optional[int]) -> float:
+        """Одна попытка списать токены. Возвращает время до следующей попытки."""
+        blocked_for = self._blocked_until - time.monotonic()
+        if blocked_for > 0:
+            return blocked_for
+
+        if self._script is not None:
+            try:
+                return await self._try_acquire_redis(floor, chat_id)
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                logger.warning(f"Redis недоступен для Telegram limiter, локальный режим: {e}")
+
+        return self._try_acquire_local(floor, chat_id)
+
+    async def _try_acquire_redis(self, floor: float, chat_id: Optional[int]) -> float:
+        """Списание через Lua-скрипт в Redis."""
+        buckets: List[Tuple[str, BucketSpec, float]] = [(f"{self.key_prefix}:global", self.global_spec, floor)]
+        if chat_id is not None:
+            buckets.append((f"{self.key_prefix}:chat:{chat_id}", self.chat_spec, 0.0))
+
+        keys = [key for key, _, _ in buckets] + [self.retry_after_key]
+        args: List[Any] = []
+        for _, spec, bucket_floor in buckets:
+            args.extend([spec.rate, spec.capacity, bucket_floor])
+        args.append(1)
+
+        result = await self._script(keys=keys, args=args)
+        if isinstance(result, bytes):
+            result = result.decode()
+        return float(result)
+
+    def _try_acquire_local(self, floor: float, chat_id: Optional[int]) -> float:
+        """Списание из локальных bucket'ов."""
+        now = time.monotonic()
+        buckets: List[Tuple[LocalTokenBucket, float]] = [(self._global_bucket, floor)]
+        if chat_id is not None:
+            buckets.append((self._get_chat_bucket(chat_id), 0.0))
+
+        wait = 0.0
+        for bucket, bucket_floor in buckets:
+            bucket.refill(now)
+            wait = max(wait, bucket.wait_time(1, bucket_floor))
+        if wait > 0:
+            return wait
+
+        for bucket, _ in buckets:
+            bucket.tokens -= 1
+        return 0.0
+
+    def _get_chat_bucket(self, chat_id: int) -> LocalTokenBucket:
+        """Локальный bucket группы (не больше MAX_LOCAL_CHAT_BUCKETS, LRU)."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is not None:
+            self._chat_buckets.move_to_end(chat_id)
+            return bucket
+
+        while len(self._chat_buckets) >= self.MAX_LOCAL_CHAT_BUCKETS:
+            self._chat_buckets.popitem(last=False)
+        bucket = self._chat_buckets[chat_id] = LocalTokenBucket(self.chat_spec)
+        return bucket
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика лимитера."""
+        return {
+            **self._stats,
+            "redis_enabled": self._script is not None,
+            "local_chat_buckets": len(self._chat_buckets),
+            "blocked_for": max(0.0, self._blocked_until - time.monotonic()),
+        }
+
+
+# Глобальный экземпляр лимитера
+_telegram_limiter: Optional[TelegramLimiter] = None
+
+
+def get_telegram_limiter() -> TelegramLimiter:
+    """Получить глобальный экземпляр Telegram limiter."""
+    global _telegram_limiter
+
+    if _telegram_limiter is None:
+        _telegram_limiter = TelegramLimiter()
+
+    return _telegram_limiter
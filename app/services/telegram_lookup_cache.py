@@ -0,0 +1,189 @@
+"""
+Telegram Lookup Cache - кэш справочных запросов к Bot API.
+
+- getChat / getChatMember / getChatMemberCount и т.п. кэшируются
+  с TTL по методу, размер ограничен (LRU вытеснение);
+- "chat not found" и подобные ответы кэшируются на короткий
+  отрицательный TTL, чтобы повторные /find_chat не ходили в API;
+- одновременные одинаковые запросы объединяются через SingleFlight;
+- модерационные действия (бан, ограничения, выход из чата)
+  сбрасывают записи затронутого чата.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from aiogram.exceptions import TelegramBadRequest
+
+from app.constants import (
+    TELEGRAM_LOOKUP_CACHE_MAX_ENTRIES,
+    TELEGRAM_LOOKUP_CACHE_TTLS,
+    TELEGRAM_LOOKUP_NEGATIVE_TTL,
+)
+from app.monitoring.metrics import get_metrics_collector
+from app.services.telegram_limiter import get_method_name
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Методы, после которых данные чата в кэше устаревают
+INVALIDATING_METHODS = frozenset(
+    {
+        "banChatMember",
+        "unbanChatMember",
+        "restrictChatMember",
+        "promoteChatMember",
+        "banChatSenderChat",
+        "unbanChatSenderChat",
+        "setChatTitle",
+        "setChatDescription",
+        "setChatPermissions",
+        "leaveChat",
+    }
+)
+
+# Ответы "объект не существует", которые имеет смысл кэшировать
+NEGATIVE_ERRORS = ("chat not found", "user not found", "member not found", "participant_id_invalid")
+
+
+class TelegramLookupCache:
+    """LRU кэш результатов справочных методов Bot API."""
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        negative_ttl: float = TELEGRAM_LOOKUP_NEGATIVE_TTL,
+        max_entries: int = TELEGRAM_LOOKUP_CACHE_MAX_ENTRIES,
+    ):
+        self.ttls = dict(TELEGRAM_LOOKUP_CACHE_TTLS if ttls is None else ttls)
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        # key -> (expires_at, value, error_message); error_message задан для отрицательных записей
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        self._by_chat: Dict[Any, Set[Hashable]] = {}
+        self._flights = SingleFlight(ttl=0)
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0}
+
+    def is_cacheable(self, method: Any) -> bool:
+        """Кэшируется ли метод."""
+        return get_method_name(method) in self.ttls
+
+    def is_invalidating(self, method: Any) -> bool:
+        """Сбрасывает ли метод записи своего чата."""
+        return get_method_name(method) in INVALIDATING_METHODS
+
+    @staticmethod
+    def make_key(bot_id: int, method: Any) -> Tuple[int, str, str]:
+        """Ключ кэша: бот, метод и его параметры."""
+        params = json.dumps(method.model_dump(exclude_none=True), sort_keys=True, default=str)
+        return bot_id, get_method_name(method), params
+
+    async def fetch(self, bot_id: int, method: Any, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Вернуть результат из кэша или выполнить запрос один раз."""
+        name = get_method_name(method)
+        key = self.make_key(bot_id, method)
+
+        entry = self._lookup(key)
+        if entry is not None:
+            _, value, error_message = entry
+            if error_message is not None:
+                self._count(name, "negative_hits")
+                raise TelegramBadRequest(method=method, message=error_message)
+            self._count(name, "hits")
+            return value
+
+        self._count(name, "misses")
+        chat_id = getattr(method, "chat_id", None)
+
+        async def load() -> Any:
+            try:
+                value = await call()
+            except TelegramBadRequest as e:
+                if any(error in e.message.lower() for error in NEGATIVE_ERRORS):
+                    self._store(key, chat_id, self.negative_ttl, None, e.message)
+                raise
+            self._store(key, chat_id, self.ttls[name], value, None)
+            return value
+
+        # Результат хранится в LRU, SingleFlight только объединяет одновременные запросы
+        return await self._flights.do(key, load, cache_if=lambda _: False)
+
+    def invalidate_chat(self, chat_id: Any) -> None:
+        """Сбросить все записи чата."""
+        for key in self._by_chat.pop(chat_id, ()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        self._entries.clear()
+        self._by_chat.clear()
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[float, Any, Optional[str]]]:
+        """Найти живую запись и отметить ее как недавно использованную."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            self._discard_chat_key(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Hashable, chat_id: Any, ttl: float, value: Any, error_message: Optional[str]) -> None:
+        """Сохранить запись с вытеснением самых старых."""
+        self._entries[key] = (time.monotonic() + ttl, value, error_message)
+        self._entries.move_to_end(key)
+        if chat_id is not None:
+            self._by_chat.setdefault(chat_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+            self._discard_chat_key(evicted_key)
+
+    def _discard_chat_key(self, key: Hashable) -> None:
+        """Убрать ключ из индекса по чатам."""
+        chat_id = json.loads(key[2]).get("chat_id")
+        keys = self._by_chat.get(chat_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_chat[chat_id]
+
+    def _count(self, method_name: str, result: str) -> None:
+        """Учесть обращение к кэшу (hits, negative_hits или misses)."""
+        self._stats[result] += 1
+        get_metrics_collector().increment_counter(
+            "telegram_lookup_cache_total", labels={"method": method_name, "result": result}
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика попаданий."""
+        hits = self._stats["hits"] + self._stats["negative_hits"]
+        lookups = hits + self._stats["misses"]
+        flights = self._flights.get_stats()
+        return {
+            **self._stats,
+            "coalesced": flights["deduplicated_in_flight"],
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+# Глобальный экземпляр кэша
+_telegram_lookup_cache: Optional[TelegramLookupCache] = None
+
+
+def get_telegram_lookup_cache() -> TelegramLookupCache:
+    """Получить глобальный кэш справочных запросов."""
+    global _telegram_lookup_cache
+
+    if _telegram_lookup_cache is None:
+        _telegram_lookup_cache = TelegramLookupCache()
+
+    return _telegram_lookup_cache
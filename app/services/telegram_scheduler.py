@@ -0,0 +1,234 @@
+"""
+Telegram Scheduler - приоритетный планировщик исходящих запросов к Bot API.
+
+- Запросы ждут свободный слот в порядке приоритета
+  (takedown > moderation > lookup > notification), поэтому пачка
+  уведомлений админам не задерживает удаление спама.
+- Токены берутся из TelegramLimiter (глобальный и групповые bucket'ы)
+  до занятия слота, чтобы ожидание токенов не блокировало слоты.
+- TelegramRetryAfter обрабатывается автоматически: пауза
+  распространяется через лимитер, повтор выполняется с jitter.
+- Лимит конкурентности подстраивается по AIMD: растет на 1/limit при
+  нормальной задержке, уменьшается при росте задержки и вдвое при 429.
+  Задержка сравнивается с базовой своего метода Bot API: getMe и
+  banChatMember отвечают за разное время. Базовая - минимум, который
+  медленно подтягивается к новым ответам, так что один случайно быстрый
+  ответ не держит лимит внизу.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.constants import (
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_RETRY_JITTER,
+    TELEGRAM_SCHEDULER_INITIAL_CONCURRENCY,
+    TELEGRAM_SCHEDULER_LATENCY_TOLERANCE,
+    TELEGRAM_SCHEDULER_MAX_CONCURRENCY,
+    TELEGRAM_SCHEDULER_MIN_CONCURRENCY,
+)
+from app.monitoring.metrics import get_metrics_collector
+from app.services.telegram_limiter import CallPriority, TelegramLimiter, get_telegram_limiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Минимальный интервал между снижениями лимита из-за задержки
+DECREASE_COOLDOWN = 1.0
+# Коэффициенты уменьшения лимита
+LATENCY_BACKOFF = 0.9
+RETRY_AFTER_BACKOFF = 0.5
+# Доля, на которую базовая задержка метода подтягивается к более медленному ответу
+BASELINE_RISE = 0.05
+
+
+class TelegramScheduler:
+    """Приоритетная очередь запросов с адаптивным лимитом конкурентности."""
+
+    def __init__(
+        self,
+        limiter: Optional[TelegramLimiter] = None,
+        initial_concurrency: int = TELEGRAM_SCHEDULER_INITIAL_CONCURRENCY,
+        min_concurrency: int = TELEGRAM_SCHEDULER_MIN_CONCURRENCY,
+        max_concurrency: int = TELEGRAM_SCHEDULER_MAX_CONCURRENCY,
+        latency_tolerance: float = TELEGRAM_SCHEDULER_LATENCY_TOLERANCE,
+        max_retries: int = TELEGRAM_MAX_RETRIES,
+        retry_jitter: float = TELEGRAM_RETRY_JITTER,
+    ):
+        self.limiter = limiter or get_telegram_limiter()
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_tolerance = latency_tolerance
+        self.max_retries = max_retries
+        self.retry_jitter = retry_jitter
+
+        self._limit = float(initial_concurrency)
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        self._baselines: Dict[str, float] = {}
+        self._last_decrease = 0.0
+
+        self._stats: Dict[str, Dict[str, float]] = {
+            priority.name.lower(): {"calls": 0, "queue_wait_total": 0.0, "queue_wait_max": 0.0, "retries": 0}
+            for priority in CallPriority
+        }
+
+    @property
+    def concurrency_limit(self) -> int:
+        """Текущий лимит одновременных запросов."""
+        return int(self._limit)
+
+    async def run(
+        self,
+        priority: CallPriority,
+        call: Callable[[], Awaitable[T]],
+        chat_id: Optional[int] = None,
+        method: str = "",
+    ) -> T:
+        """Выполнить запрос с учетом приоритета, лимитов и 429 (method - имя метода Bot API)."""
+        stats = self._stats[priority.name.lower()]
+        attempt = 0
+
+        while True:
+            queued_at = time.monotonic()
+            await self.limiter.acquire(priority, chat_id)
+            await self._acquire_slot(priority)
+            self._record_queue_wait(priority, stats, time.monotonic() - queued_at)
+
+            started = time.monotonic()
+            try:
+                result = await call()
+            except TelegramRetryAfter as e:
+                self._release_slot()
+                self._on_retry_after()
+                await self.limiter.report_retry_after(e.retry_after)
+
+                attempt += 1
+                if attempt > self.max_retries:
+                    logger.warning(f"Telegram 429: исчерпаны повторы ({priority.name}), retry_after={e.retry_after}s")
+                    raise
+
+                stats["retries"] += 1
+                # Лимитер подождет retry_after, jitter разводит реплики во времени
+                await asyncio.sleep(random.uniform(0, self.retry_jitter))
+                continue
+            except BaseException:
+                self._release_slot()
+                raise
+
+            self._release_slot()
+            self._on_success(time.monotonic() - started, method)
+            return result
+
+    async def _acquire_slot(self, priority: CallPriority) -> None:
+        """Дождаться свободного слота в порядке приоритета."""
+        if self._in_flight < self.concurrency_limit and not self._waiters:
+            self._in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        # Очередь могла состоять из отмененных ожиданий при свободных слотах
+        self._wake_waiters()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Слот уже выдан, но ожидающий отменен - возвращаем его
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self) -> None:
+        """Освободить слот и разбудить следующих по приоритету."""
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """Выдать свободные слоты ожидающим запросам."""
+        while self._waiters and self._in_flight < self.concurrency_limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    def _on_success(self, latency: float, method: str = "") -> None:
+        """Аддитивное увеличение или снижение лимита по задержке."""
+        baseline = self._baselines.get(method)
+        if baseline is None or latency < baseline:
+            baseline = self._baselines[method] = latency
+        else:
+            self._baselines[method] = baseline + (latency - baseline) * BASELINE_RISE
+
+        if latency > baseline * self.latency_tolerance:
+            now = time.monotonic()
+            if now - self._last_decrease >= DECREASE_COOLDOWN:
+                self._last_decrease = now
+                self._set_limit(self._limit * LATENCY_BACKOFF)
+        else:
+            self._set_limit(self._limit + 1.0 / max(self._limit, 1.0))
+
+    def _on_retry_after(self) -> None:
+        """Мультипликативное уменьшение лимита при 429."""
+        self._last_decrease = time.monotonic()
+        self._set_limit(self._limit * RETRY_AFTER_BACKOFF)
+
+    def _set_limit(self, value: float) -> None:
+        """Установить лимит в пределах [min, max]."""
+        old_limit = self.concurrency_limit
+        self._limit = min(float(self.max_concurrency), max(float(self.min_concurrency), value))
+
+        if self.concurrency_limit != old_limit:
+            get_metrics_collector().set_gauge("telegram_concurrency_limit", self.concurrency_limit)
+            self._wake_waiters()
+
+    def _record_queue_wait(self, priority: CallPriority, stats: Dict[str, float], waited: float) -> None:
+        """Метрика ожидания в очереди по классу приоритета."""
+        stats["calls"] += 1
+        stats["queue_wait_total"] += waited
+        stats["queue_wait_max"] = max(stats["queue_wait_max"], waited)
+        get_metrics_collector().record_timing("telegram_queue_wait", waited, {"priority": priority.name.lower()})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика планировщика."""
+        per_priority = {}
+        for name, stats in self._stats.items():
+            calls = stats["calls"]
+            per_priority[name] = {
+                "calls": int(calls),
+                "retries": int(stats["retries"]),
+                "avg_queue_wait": round(stats["queue_wait_total"] / calls, 4) if calls else 0.0,
+                "max_queue_wait": round(stats["queue_wait_max"], 4),
+            }
+
+        return {
+            "concurrency_limit": self.concurrency_limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "latency_baselines": {method: round(baseline, 4) for method, baseline in self._baselines.items()},
+            "priorities": per_priority,
+        }
+
+
+# Глобальный экземпляр планировщика
+_telegram_scheduler: Optional[TelegramScheduler] = None
+
+
+def get_telegram_scheduler() -> TelegramScheduler:
+    """Получить глобальный экземпляр планировщика запросов."""
+    global _telegram_scheduler
+
+    if _telegram_scheduler is None:
+        _telegram_scheduler = TelegramScheduler()
+
+    return _telegram_scheduler
@@ -9,7 +9,7 @@
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional
 
-from app.config import load_config
+from app.config import get_config
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +42,7 @@ def __init__(self):
         self.alerts: List[Alert] = []
         self.alert_handlers: List[Callable[[Alert], None]] = []
         self.rate_limits: Dict[str, datetime] = {}
-        self.config = load_config()
+        self.config = get_config().settings
 
     def add_handler(self, handler: Callable[[Alert], None]):
         """Добавляет обработчик алертов."""
@@ -217,9 +217,9 @@ async def telegram_alert_handler(alert: Alert):
     try:
         from aiogram import Bot
 
-        from app.config import load_config
+        from app.config import get_config
 
-        config = load_config()
+        config = get_config().settings
         bot = Bot(token=config.bot_token)
 
         # Формируем сообщение
@@ -0,0 +1,32 @@
+"""
+Фоновые задачи вне критического пути
+"""
+
+import asyncio
+from typing import Coroutine, Set
+
+
+class BackgroundTasks:
+    """Задачи, запущенные без ожидания (записи в БД, очистка).
+
+    Event loop держит на задачи только слабые ссылки, поэтому они хранятся
+    здесь до завершения; drain() ждет их при остановке бота.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    def run(self, coro: Coroutine) -> asyncio.Task:
+        """Запустить корутину в фоне."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def drain(self) -> None:
+        """Дождаться всех запущенных задач."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
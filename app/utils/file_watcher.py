@@ -0,0 +1,210 @@
+"""
+File Watcher - уведомления об изменении файла.
+
+На Linux используется inotify (через ctypes, без зависимостей): следим
+за каталогом файла, чтобы замечать и запись на месте, и атомарную
+замену через rename. На остальных платформах, или если inotify
+недоступен, используется опрос stat() с заданным интервалом.
+
+Серия событий (редактор пишет файл в несколько приемов) схлопывается
+в один вызов callback через debounce.
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Флаги inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+ChangeCallback = Callable[[Path], Awaitable[None]]
+
+
+def _load_inotify():
+    """libc с функциями inotify или None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class FileWatcher:
+    """Следит за одним файлом и вызывает callback после изменений."""
+
+    def __init__(
+        self,
+        path: str,
+        on_change: ChangeCallback,
+        debounce: float = 0.2,
+        poll_interval: float = 1.0,
+        use_inotify: bool = True,
+    ):
+        self.path = Path(path).absolute()
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+
+        self.backend: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self._debounce_handle: Optional[asyncio.TimerHandle] = None
+        self._callback_task: Optional[asyncio.Task] = None
+        self._pending = False
+        self._last_stat: Optional[Tuple[int, int]] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self.backend is not None
+
+    async def start(self) -> None:
+        """Запустить наблюдение (inotify или опрос)."""
+        if self.is_running:
+            return
+
+        self._last_stat = self._stat()
+        if not (self.use_inotify and self._start_inotify()):
+            self.backend = "polling"
+            self._poll_task = asyncio.create_task(self._poll_loop())
+
+        logger.info(f"Наблюдение за {self.path} запущено ({self.backend})")
+
+    async def stop(self) -> None:
+        """Остановить наблюдение и дождаться текущего callback."""
+        if self._debounce_handle:
+            self._debounce_handle.cancel()
+            self._debounce_handle = None
+
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+
+        if self._poll_task:
+            self._poll_task.cancel()
+            try:
+                await self._poll_task
+            except asyncio.CancelledError:
+                pass
+            self._poll_task = None
+
+        if self._callback_task:
+            await asyncio.gather(self._callback_task, return_exceptions=True)
+            self._callback_task = None
+
+        self.backend = None
+
+    def _start_inotify(self) -> bool:
+        """Подписаться на события каталога через inotify."""
+        libc = _load_inotify()
+        if libc is None:
+            return False
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.warning(f"inotify_init1 недоступен (errno {ctypes.get_errno()}), используем опрос")
+            return False
+
+        if libc.inotify_add_watch(fd, os.fsencode(self.path.parent), WATCH_MASK) < 0:
+            logger.warning(f"inotify_add_watch: errno {ctypes.get_errno()}, используем опрос")
+            os.close(fd)
+            return False
+
+        try:
+            asyncio.get_running_loop().add_reader(fd, self._read_events)
+        except NotImplementedError:
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        self.backend = "inotify"
+        return True
+
+    def _read_events(self) -> None:
+        """Прочитать накопившиеся события inotify."""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(f"Ошибка чтения inotify: {e}")
+            return
+
+        name = os.fsencode(self.path.name)
+        offset = 0
+        changed = False
+        while offset + EVENT_HEADER.size <= len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            event_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW or event_name == name:
+                changed = True
+
+        if changed:
+            self._schedule()
+
+    async def _poll_loop(self) -> None:
+        """Резервный режим: сравнение mtime и размера файла."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = self._stat()
+            if current != self._last_stat:
+                self._last_stat = current
+                self._schedule()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) файла или None, если его нет."""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _schedule(self) -> None:
+        """Отложить callback до окончания серии событий."""
+        if self._debounce_handle:
+            self._debounce_handle.cancel()
+        self._debounce_handle = asyncio.get_running_loop().call_later(self.debounce, self._fire)
+
+    def _fire(self) -> None:
+        """Запустить callback; изменения во время его работы дадут еще один вызов."""
+        self._debounce_handle = None
+        if self._callback_task and not self._callback_task.done():
+            self._pending = True
+            return
+        self._callback_task = asyncio.create_task(self._run_callback())
+
+    async def _run_callback(self) -> None:
+        """Вызывать callback, пока есть необработанные изменения."""
+        while True:
+            self._pending = False
+            try:
+                await self.on_change(self.path)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика изменений {self.path}: {e}")
+            if not self._pending:
+                return
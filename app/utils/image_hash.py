@@ -0,0 +1,118 @@
+"""
+Image Hash - перцептивные хэши картинок и поиск похожих.
+
+Спам-картинку пережимают, масштабируют и чуть подкрашивают: file_unique_id
+меняется, а картинка выглядит так же. dHash (разностный хэш) сводит
+картинку к 64 битам: уменьшенная до 9x8 в оттенках серого, бит на каждую
+пару соседних пикселей - ярче ли правый. Похожие картинки дают хэши,
+различающиеся в нескольких битах (расстояние Хэмминга).
+
+MultiIndexHash ищет хэши в пределах расстояния без перебора всех
+известных: сравниваются только хэши, совпадающие с искомым хотя бы
+в одном куске.
+
+Для хэширования нужны numpy и Pillow (extra "images"); без них
+IMAGE_HASH_AVAILABLE = False, а MultiIndexHash и hamming_distance работают.
+"""
+
+import io
+from typing import Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+try:
+    import numpy as np
+    from PIL import Image
+
+    IMAGE_HASH_AVAILABLE = True
+except ImportError:
+    np = None
+    Image = None
+    IMAGE_HASH_AVAILABLE = False
+
+HASH_SIZE = 8  # Сторона хэша: 8x8 = 64 бита
+
+T = TypeVar("T")
+
+
+def dhash(data: bytes, hash_size: int = HASH_SIZE) -> int:
+    """Разностный хэш картинки (hash_size * hash_size бит).
+
+    Выполняется в пуле процессов: функция модульного уровня и работает
+    только с байтами.
+    """
+    if not IMAGE_HASH_AVAILABLE:
+        raise RuntimeError("Для хэширования картинок нужны numpy и Pillow")
+
+    with Image.open(io.BytesIO(data)) as image:
+        small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Число различающихся бит."""
+    return (a ^ b).bit_count()
+
+
+class MultiIndexHash(Generic[T]):
+    """Индекс хэшей для поиска в пределах max_distance бит.
+
+    Хэш делится на max_distance + 1 кусков, по каждому куску - своя таблица.
+    Хэши, различающиеся не больше чем в max_distance битах, совпадают
+    хотя бы в одном куске (принцип Дирихле), так что расстояние считается
+    только до хэшей из тех же корзин, а не до всех известных.
+    """
+
+    def __init__(self, max_distance: int, bits: int = HASH_SIZE * HASH_SIZE):
+        self.max_distance = max_distance
+        parts = max_distance + 1
+        self._chunks: List[Tuple[int, int]] = []
+        start = 0
+        for i in range(parts):
+            width = bits // parts + (1 if i < bits % parts else 0)
+            self._chunks.append((start, (1 << width) - 1))
+            start += width
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in self._chunks]
+        self._items: Dict[int, T] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, value: int) -> bool:
+        return value in self._items
+
+    def add(self, value: int, item: T) -> None:
+        """Добавить хэш; для уже известного хэша значение заменяется."""
+        if value not in self._items:
+            for table, (shift, mask) in zip(self._tables, self._chunks):
+                table.setdefault((value >> shift) & mask, set()).add(value)
+        self._items[value] = item
+
+    def remove(self, value: int) -> None:
+        """Удалить хэш."""
+        if value not in self._items:
+            return
+        del self._items[value]
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            key = (value >> shift) & mask
+            bucket = table[key]
+            bucket.discard(value)
+            if not bucket:
+                del table[key]
+
+    def find(self, value: int) -> Optional[Tuple[int, T]]:
+        """Ближайший хэш не дальше max_distance: (расстояние, значение)."""
+        if value in self._items:
+            return 0, self._items[value]
+
+        best: Optional[Tuple[int, int]] = None
+        seen: Set[int] = set()
+        for table, (shift, mask) in zip(self._tables, self._chunks):
+            for candidate in table.get((value >> shift) & mask, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = hamming_distance(value, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, candidate)
+        return (best[0], self._items[best[1]]) if best else None
@@ -0,0 +1,308 @@
+"""
+Keyword Engine - все проверки по ключевым словам за один проход.
+
+Списки слов и подозрительные паттерны (спам-слова, подписи медиа,
+имена файлов, имена профилей, инъекции из InputValidator) собраны
+в категории. KeywordEngine компилирует их в одно регулярное выражение
+и возвращает множество сработавших категорий.
+
+Текст и правила сравниваются в виде skeleton (app.utils.text_normalization):
+NFKC, без невидимых символов, двойники кириллицы и греческого свернуты
+в латиницу, casefold. "bоt" с кириллической "о" совпадает с "bot".
+
+Правила категории:
+- строка - подстрока без учета регистра ("реклама");
+- строка с " ... " - упорядоченная последовательность подстрок
+  ("select ... from"), заменяет шаблоны вида SELECT.*FROM;
+- re.Pattern - короткий фрагмент регулярного выражения (только в коде,
+  из limits.json принимаются лишь строки).
+
+Подстроки собираются в префиксное дерево, поэтому regex проверяет
+позицию по первому символу, а не перебирает все слова. Время линейно
+по длине текста: в выражении нет конструкций вида .* с возвратами,
+продолжение последовательности ищется один раз с места первого
+вхождения ее начала, позиция поиска только растет. В каждой найденной
+позиции проверяются все правила, начинающиеся в ней, поэтому
+совпадения разных категорий в одной позиции не теряются.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Pattern, Sequence, Tuple, Union
+
+from app.utils.text_normalization import skeleton
+
+logger = logging.getLogger(__name__)
+
+Rule = Union[str, Pattern]
+
+SEQUENCE_SEPARATOR = " ... "
+REGEX_SPECIAL = frozenset("\\.^$*+?{}[]|()")
+MAX_COMPILED_SUBSETS = 256
+REBUILD_AFTER_IDLE_HITS = 16
+
+DEFAULT_KEYWORD_SETS: Dict[str, Tuple[Rule, ...]] = {
+    # ValidationMiddleware._is_suspicious_message
+    "link_markers": ("http", "www."),
+    "spam_words": ("реклама", "заработок", "быстро", "легко", "без вложений", "кликни", "перейди"),
+    # LinkService: подписи медиа и имена документов
+    "media_caption": (
+        "bot",
+        "бот",
+        "telegram",
+        "телеграм",
+        "канал",
+        "channel",
+        "подписка",
+        "subscribe",
+        "ссылка",
+        "link",
+        "qr",
+        "код",
+    ),
+    "document_name": ("qr", "код", "code", "scan", "сканировать", "bot", "бот", "telegram", "телеграм"),
+    # ProfileService._detect_suspicious_patterns
+    "bot_like_username": ("bot", "gpt", "ai", "assistant"),
+    "bot_like_first_name": ("bot", "gpt", "ai", "test", "user"),
+    # InputValidator: коды ошибок совпадают с именами категорий
+    "javascript_injection": ("<script ... > ... </script>",),
+    "javascript_url": ("javascript:",),
+    "eval_function": (re.compile(r"eval\s*\("),),
+    "path_traversal": ("../",),
+    "sql_injection": ("select ... from",),
+    "sql_union_injection": ("union ... select",),
+    "sql_drop": (re.compile(r"drop\s+table"),),
+    "sql_insert": (re.compile(r"insert\s+into"),),
+    "sql_update": (re.compile(r"update\s+set"),),
+    "sql_delete": (re.compile(r"delete\s+from"),),
+    "iframe_injection": ("<iframe ... >",),
+    "event_handler": (re.compile(r"on\w{1,64}\s*="),),
+    "data_url_html": ("data:text/html",),
+    "vbscript_url": ("vbscript:",),
+    "file_url": ("file://",),
+    "ftp_url": ("ftp://",),
+    "hex_encoding": (re.compile(r"\\x[0-9a-f]{2}"),),
+    "url_encoding": (re.compile(r"%[0-9a-f]{2}"),),
+    "unicode_encoding": (re.compile(r"\\u[0-9a-f]{4}"),),
+    # ValidationMiddleware / CommandValidationMiddleware
+    "alert_function": (re.compile(r"alert\s*\("),),
+    "confirm_function": (re.compile(r"confirm\s*\("),),
+    "prompt_function": (re.compile(r"prompt\s*\("),),
+    "path_traversal_windows": ("..\\",),
+    "sql_statement": ("select ... from", "insert ... into", "update ... set", "delete ... from", "drop ... table"),
+    "script_tag": ("<script",),
+    "sql_keyword": ("select", "insert", "update", "delete", "drop"),
+}
+
+
+@dataclass(frozen=True)
+class KeywordRule:
+    """Правило категории: начало (подстрока или фрагмент) и продолжения последовательности."""
+
+    index: int
+    category: str
+    head: str
+    fragment: Optional[Pattern] = None
+    tail: Tuple[str, ...] = ()
+
+    @property
+    def first_char(self) -> Optional[str]:
+        """Первый символ совпадения, если он известен заранее."""
+        if self.fragment is None:
+            return self.head[0]
+        first = self.head[0]
+        if first == "\\" and len(self.head) > 1 and not self.head[1].isalnum():
+            return self.head[1]
+        return None if first in REGEX_SPECIAL else first
+
+    def match_at(self, text: str, pos: int) -> int:
+        """Конец совпадения начала правила в позиции pos или -1."""
+        if self.fragment is None:
+            return pos + len(self.head) if text.startswith(self.head, pos) else -1
+        match = self.fragment.match(text, pos)
+        return match.end() if match else -1
+
+    def matches_after(self, text: str, pos: int) -> bool:
+        """Есть ли продолжения последовательности после pos (по порядку)."""
+        for part in self.tail:
+            found = text.find(part, pos)
+            if found < 0:
+                return False
+            pos = found + len(part)
+        return True
+
+
+def validate_keyword_sets(keyword_sets: object) -> bool:
+    """Формат keyword_sets из limits.json: {категория: [непустые строки]}."""
+    if not isinstance(keyword_sets, Mapping):
+        return False
+    for category, words in keyword_sets.items():
+        if not isinstance(category, str) or not isinstance(words, (list, tuple)):
+            return False
+        if not all(isinstance(word, str) and word.strip() for word in words):
+            return False
+    return True
+
+
+def _trie_pattern(words: Iterable[str]) -> List[str]:
+    """Альтернативы для набора подстрок в виде префиксного дерева.
+
+    Достаточно найти позицию, где начинается хотя бы одна подстрока,
+    поэтому ветви дерева обрезаются на самой короткой подстроке.
+    """
+    trie: Dict[str, dict] = {}
+    for word in sorted(set(words), key=len):
+        node = trie
+        for char in word:
+            if "" in node:
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        if "" in node:
+            return ""
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return [re.escape(char) + emit(child) for char, child in sorted(trie.items())]
+
+
+class KeywordEngine:
+    """Проверка текста по всем категориям ключевых слов за один проход."""
+
+    def __init__(self, keyword_sets: Mapping[str, Sequence[Rule]]):
+        self._rules: Tuple[KeywordRule, ...] = tuple(self._compile_rules(keyword_sets))
+        self._by_category: Dict[str, FrozenSet[int]] = {}
+        self._by_first_char: Dict[str, List[KeywordRule]] = {}
+        self._any_position: List[KeywordRule] = []
+        for rule in self._rules:
+            self._by_category[rule.category] = self._by_category.get(rule.category, frozenset()) | {rule.index}
+            first = rule.first_char
+            if first is None:
+                self._any_position.append(rule)
+            else:
+                self._by_first_char.setdefault(first, []).append(rule)
+
+        self.categories: FrozenSet[str] = frozenset(self._by_category)
+        self._all_rules = frozenset(rule.index for rule in self._rules)
+        self._compiled: Dict[FrozenSet[int], Pattern] = {}
+
+    @staticmethod
+    def _compile_rules(keyword_sets: Mapping[str, Sequence[Rule]]) -> Iterable[KeywordRule]:
+        index = 0
+        for category, rules in keyword_sets.items():
+            for rule in rules:
+                if isinstance(rule, re.Pattern):
+                    yield KeywordRule(index=index, category=category, head=rule.pattern, fragment=rule)
+                else:
+                    parts = [skeleton(part) for part in rule.split(SEQUENCE_SEPARATOR) if part]
+                    if not parts:
+                        continue
+                    yield KeywordRule(index=index, category=category, head=parts[0], tail=tuple(parts[1:]))
+                index += 1
+
+    def scan(self, text: Optional[str], categories: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+        """Категории, правила которых встречаются в тексте.
+
+        categories ограничивает проверку нужными категориями.
+        """
+        return self.scan_skeleton(skeleton(text), categories)
+
+    def scan_skeleton(self, text: str, categories: Optional[Iterable[str]] = None) -> FrozenSet[str]:
+        """То же, что scan(), для уже нормализованного текста (MessageFeatures.skeleton)."""
+        if not text:
+            return frozenset()
+
+        remaining = self._all_rules if categories is None else self._rules_for(categories)
+        pattern = self._pattern(remaining)
+        found = set()
+        pos = 0
+        idle_hits = 0
+        while remaining:
+            match = pattern.search(text, pos)
+            if match is None:
+                break
+
+            start = match.start()
+            pos = start + 1
+            before = len(remaining)
+            # Все правила, которые начинаются в этой позиции
+            for rule in self._by_first_char.get(text[start], []) + self._any_position:
+                if rule.index not in remaining:
+                    continue
+                end = rule.match_at(text, start)
+                if end < 0:
+                    continue
+                if rule.matches_after(text, end):
+                    found.add(rule.category)
+                    remaining = remaining - self._by_category[rule.category]
+                else:
+                    # Продолжения нет после первого начала - не будет и после следующих
+                    remaining = remaining - {rule.index}
+
+            # Выражение срабатывает на уже найденные категории - собираем его без них
+            idle_hits = idle_hits + 1 if len(remaining) == before else 0
+            if idle_hits >= REBUILD_AFTER_IDLE_HITS and remaining:
+                pattern = self._pattern(remaining)
+                idle_hits = 0
+
+        return frozenset(found)
+
+    def _rules_for(self, categories: Iterable[str]) -> FrozenSet[int]:
+        """Правила перечисленных категорий."""
+        rules = frozenset()
+        for category in categories:
+            rules |= self._by_category.get(category, frozenset())
+        return rules
+
+    def _pattern(self, rules: FrozenSet[int]) -> Pattern:
+        """Общее выражение для набора правил (с кэшем)."""
+        pattern = self._compiled.get(rules)
+        if pattern is None:
+            if len(self._compiled) >= MAX_COMPILED_SUBSETS:
+                self._compiled.clear()
+            selected = [self._rules[index] for index in sorted(rules)]
+            branches = _trie_pattern(rule.head for rule in selected if rule.fragment is None)
+            branches.extend(rule.head for rule in selected if rule.fragment is not None)
+            pattern = re.compile("|".join(branches) or "(?!)")
+            self._compiled[rules] = pattern
+        return pattern
+
+
+def build_keyword_engine(overrides: Optional[Mapping[str, Sequence[str]]] = None) -> KeywordEngine:
+    """Движок по умолчанию; категории из overrides заменяют стандартные."""
+    keyword_sets: Dict[str, Sequence[Rule]] = dict(DEFAULT_KEYWORD_SETS)
+    keyword_sets.update(overrides or {})
+    return KeywordEngine(keyword_sets)
+
+
+# Глобальный движок и keyword_sets, из которых он собран
+_keyword_engine: Optional[KeywordEngine] = None
+_keyword_sets_source: Optional[Mapping[str, Sequence[str]]] = None
+
+
+def get_keyword_engine() -> KeywordEngine:
+    """Получить текущий движок ключевых слов."""
+    global _keyword_engine
+
+    if _keyword_engine is None:
+        _keyword_engine = build_keyword_engine(_keyword_sets_source)
+
+    return _keyword_engine
+
+
+def load_keyword_sets(keyword_sets: Optional[Mapping[str, Sequence[str]]]) -> KeywordEngine:
+    """Заменить движок, если keyword_sets изменились (hot reload limits.json)."""
+    global _keyword_engine, _keyword_sets_source
+
+    if _keyword_engine is not None and keyword_sets == _keyword_sets_source:
+        return _keyword_engine
+
+    engine = build_keyword_engine(keyword_sets)
+    _keyword_engine, _keyword_sets_source = engine, keyword_sets
+    logger.info(f"Ключевые слова обновлены: {len(engine.categories)} категорий")
+    return engine
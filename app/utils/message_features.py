@@ -0,0 +1,221 @@
+"""
+Message Features - признаки сообщения, вычисляемые один раз на update.
+
+Валидация, антиспам и проверка ссылок раньше каждый заново делали
+lower(), искали ссылки и ключевые слова регулярками и считали символы
+(text.count(c) для каждого символа - квадратично). MessageFeaturesMiddleware строит
+MessageFeatures один раз в начале цепочки и кладет в data, дальше
+все потребители читают готовые поля.
+
+Текст нормализуется один раз (app.utils.text_normalization): ссылки
+(app.utils.telegram_links) ищутся в тексте со свернутыми двойниками,
+ключевые слова - в его skeleton.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable, Optional, Sequence, Tuple
+
+from aiogram.types import Message, MessageEntity
+
+from app.utils.keyword_engine import get_keyword_engine
+from app.utils.telegram_links import USERNAME_MENTION, LinkCandidate, find_link_candidates
+from app.utils.text_normalization import normalize
+
+# Ключ в data, под которым middleware сохраняет признаки
+MESSAGE_FEATURES_KEY = "message_features"
+
+CHAR_RUN_PATTERN = re.compile(r"(.)\1+", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class CharStats:
+    """Счетчики символов текста."""
+
+    length: int = 0
+    upper: int = 0
+    letters: int = 0
+    digits: int = 0
+    spaces: int = 0
+    max_char_frequency: int = 0
+    max_char_run: int = 0
+
+    @property
+    def other(self) -> int:
+        """Пунктуация, эмодзи и прочие символы."""
+        return self.length - self.letters - self.digits - self.spaces
+
+    def ratio(self, count: int) -> float:
+        """Доля символов класса в тексте."""
+        return count / self.length if self.length else 0.0
+
+    @property
+    def upper_ratio(self) -> float:
+        return self.ratio(self.upper)
+
+    @property
+    def letter_ratio(self) -> float:
+        return self.ratio(self.letters)
+
+    @property
+    def digit_ratio(self) -> float:
+        return self.ratio(self.digits)
+
+    @property
+    def space_ratio(self) -> float:
+        return self.ratio(self.spaces)
+
+    @property
+    def other_ratio(self) -> float:
+        return self.ratio(self.other)
+
+
+@dataclass(frozen=True)
+class MediaDescriptor:
+    """Описание вложения сообщения."""
+
+    kind: str
+    file_unique_id: Optional[str] = None
+    file_size: Optional[int] = None
+    mime_type: Optional[str] = None
+    file_name: Optional[str] = None
+    media_group_id: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class MessageFeatures:
+    """Признаки текста, подписи и вложения сообщения."""
+
+    text: str
+    caption: str
+    normalized: str
+    skeleton: str
+    caption_skeleton: str
+    entities: Tuple[MessageEntity, ...]
+    urls: FrozenSet[str]
+    mentions: FrozenSet[str]
+    text_links: Tuple[LinkCandidate, ...]
+    caption_links: Tuple[LinkCandidate, ...]
+    keyword_hits: FrozenSet[str]
+    caption_keyword_hits: FrozenSet[str]
+    chars: CharStats
+    media: Optional[MediaDescriptor] = None
+
+    @property
+    def has_media(self) -> bool:
+        return self.media is not None
+
+    @property
+    def is_media_without_caption(self) -> bool:
+        return self.media is not None and self.media.kind in ("photo", "video", "document") and not self.caption
+
+
+def compute_char_stats(text: str) -> CharStats:
+    """Классы символов и повторы за один проход по тексту.
+
+    Counter считает символы на C, классификация выполняется
+    только для различных символов с весом по количеству.
+    """
+    if not text:
+        return CharStats()
+
+    counts = Counter(text)
+    upper = letters = digits = spaces = 0
+    for char, count in counts.items():
+        if char.isalpha():
+            letters += count
+            if char.isupper():
+                upper += count
+        elif char.isdigit():
+            digits += count
+        elif char.isspace():
+            spaces += count
+
+    runs = [len(match.group()) for match in CHAR_RUN_PATTERN.finditer(text)]
+    return CharStats(
+        length=len(text),
+        upper=upper,
+        letters=letters,
+        digits=digits,
+        spaces=spaces,
+        max_char_frequency=max(counts.values()),
+        max_char_run=max(runs, default=1),
+    )
+
+
+def _entity_urls_and_mentions(
+    text: str, entities: Optional[Sequence[MessageEntity]]
+) -> Tuple[Iterable[str], Iterable[str]]:
+    """URL и @упоминания из сущностей Telegram."""
+    urls, mentions = [], []
+    for entity in entities or ():
+        if entity.type == "text_link" and entity.url:
+            urls.append(entity.url)
+        elif entity.type == "url":
+            urls.append(entity.extract_from(text))
+        elif entity.type == "mention":
+            mentions.append(entity.extract_from(text).lstrip("@").lower())
+    return urls, mentions
+
+
+def describe_media(message: Message) -> Optional[MediaDescriptor]:
+    """Вложение сообщения (фото - самый большой размер)."""
+    if message.photo:
+        largest = max(message.photo, key=lambda p: p.file_size or 0)
+        return MediaDescriptor(
+            kind="photo",
+            file_unique_id=largest.file_unique_id,
+            file_size=largest.file_size,
+            media_group_id=message.media_group_id,
+        )
+
+    for kind in ("video", "document", "animation", "audio", "voice", "video_note", "sticker"):
+        media = getattr(message, kind, None)
+        if media is not None:
+            return MediaDescriptor(
+                kind=kind,
+                file_unique_id=media.file_unique_id,
+                file_size=media.file_size,
+                mime_type=getattr(media, "mime_type", None),
+                file_name=getattr(media, "file_name", None),
+                media_group_id=message.media_group_id,
+            )
+
+    return None
+
+
+def extract_features(message: Message) -> MessageFeatures:
+    """Вычислить признаки сообщения."""
+    text = message.text or ""
+    caption = message.caption or ""
+    normalized = normalize(text)
+    normalized_caption = normalize(caption)
+
+    text_links = find_link_candidates(normalized.folded)
+    caption_links = find_link_candidates(normalized_caption.folded)
+
+    text_urls, text_mentions = _entity_urls_and_mentions(text, message.entities)
+    caption_urls, caption_mentions = _entity_urls_and_mentions(caption, message.caption_entities)
+    mentions = {
+        username for kind, username in text_links + caption_links if kind == USERNAME_MENTION
+    }
+    mentions.update(text_mentions, caption_mentions)
+    keywords = get_keyword_engine()
+
+    return MessageFeatures(
+        text=text,
+        caption=caption,
+        normalized=normalized.normalized,
+        skeleton=normalized.skeleton,
+        caption_skeleton=normalized_caption.skeleton,
+        entities=tuple(message.entities or ()) + tuple(message.caption_entities or ()),
+        urls=frozenset([*text_urls, *caption_urls]),
+        mentions=frozenset(mentions),
+        text_links=text_links,
+        caption_links=caption_links,
+        keyword_hits=keywords.scan_skeleton(normalized.skeleton),
+        caption_keyword_hits=keywords.scan_skeleton(normalized_caption.skeleton),
+        chars=compute_char_stats(text),
+        media=describe_media(message),
+    )
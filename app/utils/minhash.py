@@ -0,0 +1,83 @@
+"""
+MinHash - сигнатуры текстов для поиска почти-дубликатов.
+
+Признаки текста (skeleton из text_normalization) - пары и тройки идущих
+подряд слов: отдельные слова есть в любом длинном тексте, а тройки
+отличают тексты из одних и тех же слов. Числа сводятся к "0", а эмодзи
+и пунктуация в слова не попадают, так что копии с другой суммой или
+случайным эмодзи дают то же множество.
+Похожесть двух текстов - доля общих признаков (Jaccard), ее оценивает
+доля совпавших позиций MinHash-сигнатуры.
+
+Сигнатура строится одной перестановкой (one permutation hashing): хэш
+каждого признака попадает в одну из MINHASH_BINS корзин по старшим битам,
+в корзине остается минимум младших 32 бит. Пустые корзины заполняются из
+ближайшей непустой справа со сдвигом (densification). Один хэш на признак
+вместо MINHASH_BINS.
+
+Для LSH сигнатура делится на MINHASH_BANDS полос по MINHASH_ROWS значений;
+тексты с похожестью 0.9 совпадают хотя бы в одной полосе почти всегда,
+с похожестью 0.3 - в 6% случаев.
+
+Признаки хэшируются встроенным hash(), поэтому сигнатуры сравнимы только
+внутри одного процесса.
+"""
+
+import re
+from array import array
+from typing import Optional, Tuple
+
+MINHASH_BINS = 32
+MINHASH_BANDS = 8
+MINHASH_ROWS = MINHASH_BINS // MINHASH_BANDS
+MAX_TEXT_LENGTH = 2000  # Длиннее текст обрезается
+
+WORD_PATTERN = re.compile(r"\w+")
+NUMBER_PATTERN = re.compile(r"\d+")
+
+_HASH_MASK = (1 << 64) - 1
+_VALUE_MASK = 0xFFFFFFFF
+_BIN_SHIFT = 64 - (MINHASH_BINS.bit_length() - 1)
+_EMPTY = _VALUE_MASK + 1
+_ROTATION = 0x9E3779B1  # Сдвиг значений, занятых из соседней корзины
+
+
+def minhash(text: str, min_words: int = 1) -> Optional[array]:
+    """Сигнатура текста; None, если в нем меньше min_words слов."""
+    words = WORD_PATTERN.findall(NUMBER_PATTERN.sub("0", text[:MAX_TEXT_LENGTH]))
+    if len(words) < max(min_words, 2):
+        return None
+
+    features = set(zip(words, words[1:]))
+    features.update(zip(words, words[1:], words[2:]))
+
+    bins = [_EMPTY] * MINHASH_BINS
+    for feature in features:
+        h = hash(feature) & _HASH_MASK
+        index = h >> _BIN_SHIFT
+        value = h & _VALUE_MASK
+        if value < bins[index]:
+            bins[index] = value
+
+    # Densification: пустая корзина берет значение ближайшей непустой справа
+    for index in range(MINHASH_BINS):
+        if bins[index] != _EMPTY:
+            continue
+        for distance in range(1, MINHASH_BINS):
+            value = bins[(index + distance) % MINHASH_BINS]
+            if value != _EMPTY and value <= _VALUE_MASK:
+                bins[index] = _EMPTY + ((value + distance * _ROTATION) & _VALUE_MASK)
+                break
+    return array("I", [value & _VALUE_MASK for value in bins])
+
+
+def band_keys(signature: array) -> Tuple[int, ...]:
+    """Ключи LSH-полос сигнатуры."""
+    return tuple(
+        hash((band, tuple(signature[band * MINHASH_ROWS : (band + 1) * MINHASH_ROWS]))) for band in range(MINHASH_BANDS)
+    )
+
+
+def similarity(first: array, second: array) -> float:
+    """Оценка похожести (Jaccard) по доле совпавших значений."""
+    return sum(1 for a, b in zip(first, second) if a == b) / MINHASH_BINS
@@ -17,6 +17,8 @@
 
 from cryptography.fernet import Fernet
 
+from app.config import get_config
+
 logger = logging.getLogger(__name__)
 
 
@@ -291,8 +293,8 @@ def cleanup_old_logs(self, days: int = 90):
             logger.error(f"Ошибка очистки логов: {e}")
 
 
-# Глобальный экземпляр защитника ПД
-pii_protector = PIIProtector()
+# Глобальный экземпляр защитника ПД (с постоянным ключом корпус можно расшифровать офлайн)
+pii_protector = PIIProtector(get_config().settings.pii_encryption_key or None)
 
 # Глобальный безопасный логгер
 secure_logger = SecureLogger(
@@ -0,0 +1,41 @@
+"""
+QR Codes - распознавание QR-кодов на картинках.
+
+Спамеры прячут ссылку на бота в QR-код на фото без подписи: текст
+сообщения пустой, проверять нечего. decode_qr находит QR-коды на картинке
+и возвращает их содержимое; дальше оно проверяется как обычный текст.
+
+Функция выполняется в пуле процессов (модульного уровня, работает только
+с байтами). Для распознавания нужны zxing-cpp и Pillow (extra "images");
+без них QR_DECODE_AVAILABLE = False.
+"""
+
+import io
+from typing import Tuple
+
+try:
+    import zxingcpp
+    from PIL import Image
+
+    QR_DECODE_AVAILABLE = True
+except ImportError:
+    zxingcpp = None
+    Image = None
+    QR_DECODE_AVAILABLE = False
+
+QR_MAX_PIXELS = 8_000_000  # Картинки больше не распознаются (защита от "бомб" распаковки)
+QR_DECODE_SIDE = 2048  # JPEG крупнее декодируется сразу в уменьшенном виде
+
+
+def decode_qr(data: bytes) -> Tuple[str, ...]:
+    """Содержимое всех QR-кодов на картинке."""
+    if not QR_DECODE_AVAILABLE:
+        raise RuntimeError("Для распознавания QR-кодов нужны zxing-cpp и Pillow")
+
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        if width * height > QR_MAX_PIXELS:
+            return ()
+        image.draft("L", (QR_DECODE_SIDE, QR_DECODE_SIDE))
+        barcodes = zxingcpp.read_barcodes(image.convert("L"), formats=zxingcpp.BarcodeFormat.QRCode)
+    return tuple(barcode.text for barcode in barcodes if barcode.text)
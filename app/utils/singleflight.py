@@ -0,0 +1,103 @@
+"""
+Single-flight дедупликация асинхронных операций
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Реестр выполняемых и недавно выполненных операций.
+
+    - одновременные вызовы с одним ключом ждут один и тот же future;
+    - повтор в течение ttl после успешного выполнения возвращает
+      сохраненный результат без повторного вызова.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._recent: Dict[Hashable, Tuple[float, Any]] = {}
+        self._stats = {"executed": 0, "deduplicated_in_flight": 0, "deduplicated_recent": 0}
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        cache_if: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        """Выполнить fn один раз для ключа.
+
+        cache_if решает, запоминать ли результат на ttl (по умолчанию -
+        любой результат без исключения).
+        """
+        while True:
+            recent = self._recent.get(key)
+            if recent is not None:
+                expires_at, value = recent
+                if expires_at > time.monotonic():
+                    self._stats["deduplicated_recent"] += 1
+                    return value
+                del self._recent[key]
+
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+
+            self._stats["deduplicated_in_flight"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменен ведущий вызов - пробуем выполнить сами
+                if future.cancelled():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._stats["executed"] += 1
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение уже получит ведущий вызов, ожидающих может не быть
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if cache_if is None or cache_if(result):
+                self._remember(key, result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def forget(self, key: Hashable) -> None:
+        """Забыть недавний результат (например, после отмены действия)."""
+        self._recent.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистить недавние результаты."""
+        self._recent.clear()
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        """Сохранить результат с ограничением размера реестра."""
+        if len(self._recent) >= self.max_entries:
+            now = time.monotonic()
+            for stale_key in [k for k, (expires_at, _) in self._recent.items() if expires_at <= now]:
+                del self._recent[stale_key]
+            while len(self._recent) >= self.max_entries:
+                del self._recent[next(iter(self._recent))]
+
+        self._recent[key] = (time.monotonic() + self.ttl, value)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика дедупликации."""
+        return {**self._stats, "in_flight": len(self._in_flight), "recent": len(self._recent)}
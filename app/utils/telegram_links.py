@@ -0,0 +1,85 @@
+"""
+Telegram Links - распознавание ссылок на Telegram, в том числе замаскированных.
+
+Спамеры пишут ссылки так, чтобы их не находили простые регулярки:
+"t . me/x", "t[.]me/x", "t dot me/x", "t me/x", "telegram.dog/x",
+"tg://resolve?domain=x", URL-кодирование ("t.me%2Fx"), приглашения
+"joinchat/HASH" и "t.me/+HASH".
+
+Все варианты собраны в одно регулярное выражение без вложенных и
+неограниченных повторов: разделители ограничены несколькими пробелами,
+username и хэш приглашения - 64 символами, поэтому проверка каждой
+позиции занимает ограниченное время и весь поиск линеен по длине текста.
+Выражение начинается с класса [@hHwWtT] без флага IGNORECASE (он
+включен только внутри группы), поэтому sre пропускает остальные позиции
+быстрым сканированием, не запуская сопоставление на каждом символе.
+Какая буква стояла первой, дальше проверяется lookbehind-ами.
+
+Ссылка или упоминание должны начинаться с границы слова: "nett.me/x"
+и e-mail "user@example.com" кандидатами не считаются.
+
+Результат - канонические значения для whitelist и blocklist:
+username в нижнем регистре без "@" и домена, хэш приглашения как есть
+(он чувствителен к регистру).
+
+Ожидается текст после app.utils.text_normalization (без невидимых
+символов, двойники свернуты в латиницу).
+"""
+
+import re
+from typing import Tuple
+from urllib.parse import unquote
+
+from app.utils.text_normalization import fold_confusables
+
+# Виды кандидатов (совпадают с типами результатов LinkService)
+BOT_LINK = "bot_link"
+USERNAME_MENTION = "username_mention"
+INVITE_LINK = "invite_link"
+
+LinkCandidate = Tuple[str, str]
+
+# Точка между "t" и "me": обычная, в скобках, словом, иероглифическая или просто пробелы
+_DOT = r"(?:[ \t]{0,3}(?:\.|。|\[\.\]|\(\.\)|\{\.\}|\[dot\]|\(dot\)|dot)[ \t]{0,3}|[ \t]{1,3})"
+_SLASH = r"[ \t]{0,3}/[ \t]{0,3}"
+_USERNAME = r"[a-z0-9_]{1,64}"
+_INVITE_HASH = r"[a-z0-9_-]{8,64}"
+
+LINK_PATTERN = re.compile(
+    rf"""
+    [@hHwWtT](?<![a-zA-Z0-9_.].)
+    (?i:
+        (?<=@)(?P<mention>{_USERNAME})
+      | (?:(?<=h)ttps?:/{{0,2}}(?:www\.)?t|(?<=w)ww\.t|(?<=t))
+        (?:{_DOT}me|elegram{_DOT}(?:me|dog))
+        {_SLASH}
+        (?:
+            (?:joinchat{_SLASH}|\+)(?P<invite>{_INVITE_HASH})
+          | (?:s/)?(?P<username>{_USERNAME})
+        )
+      | (?<=t)g:/{{0,2}}(?:resolve\?domain=(?P<resolve>{_USERNAME})|join\?invite=(?P<tg_invite>{_INVITE_HASH}))
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+def find_link_candidates(text: str) -> Tuple[LinkCandidate, ...]:
+    """Ссылки на Telegram в порядке появления: (вид, каноническое значение)."""
+    if not text:
+        return ()
+
+    if "%" in text:
+        # t.me%2Fx, t%2Eme/x; раскодированный текст может содержать двойники
+        text = fold_confusables(unquote(text))
+
+    candidates = []
+    for match in LINK_PATTERN.finditer(text):
+        invite = match["invite"] or match["tg_invite"]
+        if invite:
+            candidates.append((INVITE_LINK, invite))
+        elif match["mention"]:
+            candidates.append((USERNAME_MENTION, match["mention"].lower()))
+        else:
+            candidates.append((BOT_LINK, (match["username"] or match["resolve"]).lower()))
+    return tuple(candidates)
@@ -0,0 +1,186 @@
+"""
+Text Classifier - статистический классификатор спам-текстов.
+
+Текст (skeleton из text_normalization: двойники свернуты, casefold) режется
+на n-граммы: слова, пары слов и символьные 3- и 4-граммы слов. N-граммы
+хэшируются (crc32, одинаковый во всех процессах) в разреженный вектор
+из 2^bits признаков с логарифмическими весами и L2-нормировкой.
+
+Модель - логистическая регрессия: вероятность спама = sigmoid(w·x + b).
+Обучается офлайн (scripts/train_spam_classifier.py) полным градиентным
+спуском с Adam и балансировкой классов. Батч текстов оценивается
+одной разреженной операцией: веса признаков собираются по индексам,
+суммы по строкам считает np.bincount.
+
+Модель хранится в .npz: веса float32 (2^18 признаков - 1 МБ) и параметры.
+Для модели нужен numpy (extra "classifier"); без него
+CLASSIFIER_AVAILABLE = False, а hashed_ngrams работает.
+"""
+
+import math
+import re
+import zlib
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+
+    CLASSIFIER_AVAILABLE = True
+except ImportError:
+    np = None
+    CLASSIFIER_AVAILABLE = False
+
+FEATURE_BITS = 18  # 2^18 признаков
+MAX_TEXT_LENGTH = 2000  # Длиннее текст обрезается: спам виден по началу
+MAX_WORD_LENGTH = 32  # Символьные n-граммы только для слов не длиннее
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def hashed_ngrams(text: str, bits: int = FEATURE_BITS) -> Tuple[List[int], List[float]]:
+    """Разреженный вектор текста: (индексы признаков, веса)."""
+    words = WORD_PATTERN.findall(text[:MAX_TEXT_LENGTH])
+    grams = Counter(f"w {word}" for word in words)
+    grams.update(f"b {first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        if len(word) > MAX_WORD_LENGTH:
+            continue
+        padded = f" {word} "
+        for n in (3, 4):
+            grams.update(f"c{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+
+    mask = (1 << bits) - 1
+    features: Counter = Counter()
+    for gram, count in grams.items():
+        features[zlib.crc32(gram.encode()) & mask] += count
+    if not features:
+        return [], []
+
+    indices = list(features)
+    weights = [1.0 + math.log(features[index]) for index in indices]
+    norm = math.sqrt(sum(weight * weight for weight in weights))
+    return indices, [weight / norm for weight in weights]
+
+
+def vectorize(texts: Sequence[str], bits: int = FEATURE_BITS):
+    """Батч текстов в CSR-виде: (indptr, indices, data)."""
+    indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    all_indices: List[int] = []
+    all_weights: List[float] = []
+    for row, text in enumerate(texts):
+        indices, weights = hashed_ngrams(text, bits)
+        all_indices.extend(indices)
+        all_weights.extend(weights)
+        indptr[row + 1] = len(all_indices)
+    return indptr, np.asarray(all_indices, dtype=np.int64), np.asarray(all_weights, dtype=np.float32)
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+class SpamClassifier:
+    """Логистическая регрессия на хэшированных n-граммах."""
+
+    def __init__(self, weights, bias: float, bits: int = FEATURE_BITS, trained_on: int = 0):
+        if not CLASSIFIER_AVAILABLE:
+            raise RuntimeError("Для классификатора нужен numpy")
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = float(bias)
+        self.bits = bits
+        self.trained_on = trained_on
+
+    def predict_proba(self, texts: Sequence[str]):
+        """Вероятности спама для батча текстов."""
+        indptr, indices, data = vectorize(texts, self.bits)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        scores = np.bincount(rows, weights=data * self.weights[indices], minlength=len(texts))
+        return _sigmoid(scores + self.bias)
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[bool],
+        bits: int = FEATURE_BITS,
+        epochs: int = 100,
+        learning_rate: float = 0.1,
+        l2: float = 1e-6,
+    ) -> "SpamClassifier":
+        """Обучить модель; классы взвешиваются обратно их частоте."""
+        if not CLASSIFIER_AVAILABLE:
+            raise RuntimeError("Для классификатора нужен numpy")
+        y = np.asarray(labels, dtype=np.float64)
+        positives = int(y.sum())
+        negatives = len(y) - positives
+        if not positives or not negatives:
+            raise ValueError("Нужны примеры и спама, и не спама")
+
+        indptr, indices, data = vectorize(texts, bits)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        sample_weights = np.where(y > 0, len(y) / (2 * positives), len(y) / (2 * negatives)) / len(y)
+
+        size = 1 << bits
+        weights = np.zeros(size)
+        bias = 0.0
+        # Adam
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        m_weights, v_weights = np.zeros(size), np.zeros(size)
+        m_bias = v_bias = 0.0
+        for step in range(1, epochs + 1):
+            scores = np.bincount(rows, weights=data * weights[indices], minlength=len(y)) + bias
+            errors = (_sigmoid(scores) - y) * sample_weights
+            grad_weights = np.bincount(indices, weights=data * errors[rows], minlength=size) + l2 * weights
+            grad_bias = errors.sum()
+
+            m_weights = beta1 * m_weights + (1 - beta1) * grad_weights
+            v_weights = beta2 * v_weights + (1 - beta2) * grad_weights**2
+            m_bias = beta1 * m_bias + (1 - beta1) * grad_bias
+            v_bias = beta2 * v_bias + (1 - beta2) * grad_bias**2
+            correction1, correction2 = 1 - beta1**step, 1 - beta2**step
+            weights -= learning_rate * (m_weights / correction1) / (np.sqrt(v_weights / correction2) + eps)
+            bias -= learning_rate * (m_bias / correction1) / (math.sqrt(v_bias / correction2) + eps)
+
+        return cls(weights, bias, bits, trained_on=len(y))
+
+    def save(self, path: str) -> None:
+        np.savez(path, weights=self.weights, bias=self.bias, bits=self.bits, trained_on=self.trained_on)
+
+    @classmethod
+    def load(cls, path: str) -> "SpamClassifier":
+        if not CLASSIFIER_AVAILABLE:
+            raise RuntimeError("Для классификатора нужен numpy")
+        with np.load(path) as model:
+            return cls(model["weights"], float(model["bias"]), int(model["bits"]), int(model["trained_on"]))
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.weights.nbytes
+
+    def __repr__(self) -> str:
+        return f"<SpamClassifier bits={self.bits} trained_on={self.trained_on}>"
+
+
+def evaluate(model: SpamClassifier, texts: Sequence[str], labels: Sequence[bool], threshold: float) -> dict:
+    """Точность и полнота на отложенной выборке."""
+    predicted = model.predict_proba(texts) >= threshold
+    actual = np.asarray(labels, dtype=bool)
+    true_positives = int((predicted & actual).sum())
+    return {
+        "samples": len(actual),
+        "precision": true_positives / max(1, int(predicted.sum())),
+        "recall": true_positives / max(1, int(actual.sum())),
+        "false_positive_rate": int((predicted & ~actual).sum()) / max(1, int((~actual).sum())),
+    }
+
+
+def split_holdout(
+    samples: Sequence[Tuple[str, bool]], fraction: float, seed: Optional[int] = 0
+) -> Tuple[List[Tuple[str, bool]], List[Tuple[str, bool]]]:
+    """Разделить примеры на обучающие и отложенные."""
+    if not CLASSIFIER_AVAILABLE:
+        raise RuntimeError("Для классификатора нужен numpy")
+    order = np.random.default_rng(seed).permutation(len(samples))
+    cut = int(len(samples) * (1 - fraction))
+    return [samples[i] for i in order[:cut]], [samples[i] for i in order[cut:]]
@@ -6,10 +6,12 @@
 import re
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union
+from typing import AbstractSet, Any, Dict, List, Optional, Union
 
 from aiogram.types import CallbackQuery, Chat, Message, User
 
+from app.utils.keyword_engine import get_keyword_engine
+
 logger = logging.getLogger(__name__)
 
 
@@ -50,33 +52,28 @@ class InputValidator:
     PHONE_PATTERN = re.compile(r"^\+?[1-9]\d{1,14}$")
     EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
 
-    # Подозрительные паттерны
-    SUSPICIOUS_PATTERNS = [
-        (r"<script[^>]*>.*?</script>", "javascript_injection"),
-        (r"javascript:", "javascript_url"),
-        (r"eval\s*\(", "eval_function"),
-        (r"\.\./", "path_traversal"),
-        (r"SELECT.*FROM", "sql_injection"),
-        (r"UNION.*SELECT", "sql_union_injection"),
-        (r"DROP\s+TABLE", "sql_drop"),
-        (r"INSERT\s+INTO", "sql_insert"),
-        (r"UPDATE\s+SET", "sql_update"),
-        (r"DELETE\s+FROM", "sql_delete"),
-        (r"<iframe[^>]*>", "iframe_injection"),
-        (r"on\w+\s*=", "event_handler"),
-        (r"data:text/html", "data_url_html"),
-        (r"vbscript:", "vbscript_url"),
-        (r"file://", "file_url"),
-        (r"ftp://", "ftp_url"),
-        (r"\\x[0-9a-fA-F]{2}", "hex_encoding"),
-        (r"%[0-9a-fA-F]{2}", "url_encoding"),
-        (r"\\u[0-9a-fA-F]{4}", "unicode_encoding"),
-    ]
-
-    def __init__(self):
-        self.compiled_patterns = [
-            (re.compile(pattern, re.IGNORECASE | re.DOTALL), code) for pattern, code in self.SUSPICIOUS_PATTERNS
-        ]
+    # Подозрительные паттерны: категории KeywordEngine, имя категории - код ошибки
+    SUSPICIOUS_CATEGORIES = (
+        "javascript_injection",
+        "javascript_url",
+        "eval_function",
+        "path_traversal",
+        "sql_injection",
+        "sql_union_injection",
+        "sql_drop",
+        "sql_insert",
+        "sql_update",
+        "sql_delete",
+        "iframe_injection",
+        "event_handler",
+        "data_url_html",
+        "vbscript_url",
+        "file_url",
+        "ftp_url",
+        "hex_encoding",
+        "url_encoding",
+        "unicode_encoding",
+    )
 
     def validate_message(self, message: Message) -> List[ValidationError]:
         """Валидирует сообщение Telegram"""
@@ -231,8 +228,14 @@ def _validate_basic_message_fields(self, message: Message) -> List[ValidationErr
 
         return errors
 
-    def _validate_text_content(self, text: str, field_name: str) -> List[ValidationError]:
-        """Валидирует текстовое содержимое"""
+    def _validate_text_content(
+        self, text: str, field_name: str, keyword_hits: Optional[AbstractSet[str]] = None
+    ) -> List[ValidationError]:
+        """Валидирует текстовое содержимое
+
+        keyword_hits - уже найденные категории KeywordEngine для этого
+        текста (MessageFeatures), чтобы не сканировать его повторно.
+        """
         errors = []
 
         # Проверяем, что текст не None
@@ -268,9 +271,11 @@ def _validate_text_content(self, text: str, field_name: str) -> List[ValidationE
                 )
             )
 
-        # Проверка на подозрительные паттерны
-        for pattern, code in self.compiled_patterns:
-            if pattern.search(text):
+        # Проверка на подозрительные паттерны (один проход по тексту)
+        if keyword_hits is None:
+            keyword_hits = get_keyword_engine().scan(text, self.SUSPICIOUS_CATEGORIES)
+        for code in self.SUSPICIOUS_CATEGORIES:
+            if code in keyword_hits:
                 errors.append(
                     ValidationError(
                         field=field_name,
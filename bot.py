@@ -6,21 +6,38 @@
 
 import asyncio
 import logging
+import signal
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from app.config import load_config
-from app.database import create_tables
+from app.config import get_config, reload_config
+from app.database import SessionLocal, create_tables
 from app.middlewares.di_middleware import DIMiddleware
 from app.middlewares.logging import LoggingMiddleware
+from app.middlewares.media_group import MediaGroupMiddleware
+from app.middlewares.message_features import MessageFeaturesMiddleware
 from app.middlewares.ratelimit import RateLimitMiddleware
+from app.middlewares.recent_messages import RecentMessagesMiddleware
 from app.middlewares.redis_rate_limit import RedisRateLimitMiddleware
 from app.middlewares.suspicious_profile import SuspiciousProfileMiddleware
+from app.middlewares.telegram_lookup_cache import TelegramLookupCacheMiddleware
+from app.middlewares.telegram_scheduler import TelegramSchedulerMiddleware
 from app.middlewares.validation import CommandValidationMiddleware, ValidationMiddleware
+from app.services.blocklist import BlocklistHotReload
+from app.services.channel_registry import get_channel_registry
 from app.services.config_watcher import LimitsHotReload
+from app.services.image_hashes import get_image_hashes
+from app.services.learned_bots import get_learned_bots
 from app.services.limits import LimitsService
+from app.services.media_fingerprints import get_media_fingerprints
+from app.services.moderation import drain_side_effects
+from app.services.qr_codes import get_qr_codes
+from app.services.shared_cache import close_shared_cache, get_shared_cache
+from app.services.source_reputation import get_source_reputation
+from app.services.spam_classifier import get_spam_classifier
+from app.services.telegram_limiter import get_telegram_limiter
 from app.utils.graceful_shutdown import create_graceful_shutdown
 
 # Configure logging
@@ -32,6 +49,14 @@
 logger = logging.getLogger(__name__)
 
 
+def reload_config_on_signal() -> None:
+    """Перечитать конфигурацию по SIGHUP без перезапуска бота."""
+    try:
+        reload_config()
+    except ValueError as e:
+        logger.error(f"Конфигурация не перезагружена, используется текущая: {e}")
+
+
 async def main():
     """Main function to start the simplified bot with graceful shutdown."""
     bot = None
@@ -40,7 +65,7 @@ async def main():
 
     try:
         # 1. Load configuration
-        config = load_config()
+        config = get_config().settings
         logger.info("Configuration loaded successfully")
         logger.info(f"Bot token: {config.bot_token[:10]}...")
         logger.info(f"Admin IDs: {config.admin_ids_list}")
@@ -50,15 +75,35 @@ async def main():
         await create_tables()
         logger.info("Database tables created successfully")
 
+        # Channel registry: save_channel_info writes only on change;
+        # learned bot usernames, forward source reputation and spam media fingerprints give instant verdicts
+        async with SessionLocal() as session:
+            await get_channel_registry().warm(session)
+            await get_learned_bots().warm(session)
+            await get_source_reputation().warm(session)
+            await get_media_fingerprints().warm(session)
+
         # 3. Create bot
         bot = Bot(token=config.bot_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
+        # Outbound Telegram API: lookup cache first, so hits skip the scheduler;
+        # then priority scheduling, shared rate limits, 429 retries
+        bot.session.middleware(TelegramLookupCacheMiddleware())
+        bot.session.middleware(TelegramSchedulerMiddleware())
+
         # 4. Create dispatcher
         dp = Dispatcher()
 
         # 5. Setup graceful shutdown
         shutdown_manager = await create_graceful_shutdown(bot, dp, config.admin_ids_list)
 
+        # Config snapshot is swapped atomically on SIGHUP (Unix only)
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_config_on_signal)
+
+        # Spam media fingerprints are shared between replicas via the shared cache
+        get_media_fingerprints().subscribe(get_shared_cache())
+
         # 6. Initialize Redis (if enabled)
         redis_available = False
         if config.redis_enabled:
@@ -68,14 +113,23 @@ async def main():
                 redis_service = await get_redis_service()
                 redis_available = True
                 logger.info("Redis подключен успешно")
+
+                # Общий кэш между репликами (pub/sub инвалидация)
+                await get_shared_cache().attach_redis(redis_service)
+                get_telegram_limiter().attach_redis(redis_service)
             except Exception as e:
                 logger.error(f"Ошибка подключения к Redis: {e}")
                 logger.warning("Продолжаем работу без Redis rate limiting")
-                config.redis_enabled = False
                 redis_available = False
 
         # 7. Register middlewares (order matters!)
-        # Validation -> Logging -> RateLimit -> DI -> SuspiciousProfile
+        # RecentMessages -> MediaGroup -> Features -> Validation -> Logging -> RateLimit -> DI -> SuspiciousProfile
+        # Recent message IDs first, so messages dropped later can still be purged on ban
+        dp.message.middleware(RecentMessagesMiddleware())
+        # Album parts are collected and passed on as one message
+        dp.message.middleware(MediaGroupMiddleware())
+        # Text/media features computed once and shared via data["message_features"]
+        dp.message.middleware(MessageFeaturesMiddleware())
         dp.message.middleware(ValidationMiddleware())
         dp.message.middleware(CommandValidationMiddleware())
         dp.message.middleware(LoggingMiddleware())
@@ -120,7 +174,7 @@ async def add_dependencies_middleware(handler, event, data):
             # Добавляем bot, db_session и config в data
             data["bot"] = bot
             data["db_session"] = None  # Будет создан в DIMiddleware
-            data["config"] = config
+            data["config"] = get_config().settings
             # admin_id будет установлен в DIMiddleware
             return await handler(event, data)
 
@@ -152,6 +206,7 @@ async def suspicious_profile_middleware(handler, event, data):
             dp.edited_message,
             dp.edited_channel_post,
         ]:
+            update_type.middleware(MessageFeaturesMiddleware())
             update_type.middleware(ValidationMiddleware())
             update_type.middleware(LoggingMiddleware())
             update_type.middleware(add_dependencies_middleware)
@@ -231,6 +286,37 @@ async def suspicious_profile_middleware(handler, event, data):
         # 9. Register hot-reload shutdown callback
         shutdown_manager.add_shutdown_callback(hot_reload.stop)
 
+        # Domain and username blocklists: mmap'd indexes, rebuilt when the lists change
+        blocklist_reload = BlocklistHotReload()
+        await blocklist_reload.start()
+        shutdown_manager.add_shutdown_callback(blocklist_reload.stop)
+
+        # Forward source reputation lives in memory, flushed to the DB periodically
+        source_reputation = get_source_reputation()
+        await source_reputation.start()
+        shutdown_manager.add_shutdown_callback(source_reputation.stop)
+
+        # Near-duplicate spam images: perceptual hashes in a process pool (optional)
+        if config.image_hash_enabled:
+            image_hashes = get_image_hashes()
+            if image_hashes.start():
+                shutdown_manager.add_shutdown_callback(image_hashes.stop)
+
+        # QR codes on captionless photos and image documents (optional)
+        if config.qr_decode_enabled:
+            qr_codes = get_qr_codes()
+            if qr_codes.start():
+                shutdown_manager.add_shutdown_callback(qr_codes.stop)
+
+        # Spam text classifier trained offline (optional)
+        if config.spam_classifier_model:
+            get_spam_classifier().load(config.spam_classifier_model)
+
+        # Let background moderation logging finish before exit
+        shutdown_manager.add_shutdown_callback(drain_side_effects)
+        shutdown_manager.add_shutdown_callback(get_learned_bots().drain)
+        shutdown_manager.add_shutdown_callback(get_media_fingerprints().drain)
+
         # 10. Startup notification will be sent by hot-reload
 
         logger.info("Starting bot...")
@@ -252,6 +338,11 @@ async def suspicious_profile_middleware(handler, event, data):
 
         # 13. Close Redis connection (only if it was initialized)
         if redis_available:
+            try:
+                await close_shared_cache()
+            except Exception as e:
+                logger.error(f"Error closing shared cache: {e}")
+
             try:
                 from app.services.redis import close_redis_service
 
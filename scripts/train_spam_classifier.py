@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Обучение классификатора спам-текстов.
+
+Примеры берутся из зашифрованного корпуса анализа спама (нужен ключ, с которым
+бот писал логи: PII_ENCRYPTION_KEY) с метками из moderation_logs и из
+размеченных JSONL-файлов ({"text": ..., "spam": true/false} на строку).
+
+    python scripts/train_spam_classifier.py --db db.sqlite3 --labeled ham.jsonl --output models/spam_classifier.npz
+
+Путь к модели задается в SPAM_CLASSIFIER_MODEL.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import get_config
+from app.constants import SPAM_CLASSIFIER_THRESHOLD
+from app.services.spam_classifier import load_labeled_samples, load_training_corpus
+from app.utils.pii_protection import PIIProtector
+from app.utils.text_classifier import FEATURE_BITS, SpamClassifier, evaluate, split_holdout
+from app.utils.text_normalization import skeleton
+
+
+async def load_corpus(db_path: str, log_file: Path, key: str):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            return await load_training_corpus(session, log_file, PIIProtector(key))
+    finally:
+        await engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Обучение классификатора спам-текстов")
+    parser.add_argument("--db", default=os.getenv("DB_PATH", "db.sqlite3"), help="База бота (moderation_logs)")
+    parser.add_argument("--logs", default="logs/encrypted/full_encrypted.log", help="Зашифрованный корпус анализа спама")
+    parser.add_argument("--key", default=get_config().settings.pii_encryption_key, help="Ключ шифрования корпуса")
+    parser.add_argument("--labeled", action="append", default=[], help="Размеченный JSONL (можно несколько)")
+    parser.add_argument("--output", default="models/spam_classifier.npz", help="Куда сохранить модель")
+    parser.add_argument("--bits", type=int, default=FEATURE_BITS, help="log2 числа признаков")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--holdout", type=float, default=0.1, help="Доля примеров для проверки")
+    args = parser.parse_args()
+
+    samples = []
+    if args.key:
+        samples.extend(asyncio.run(load_corpus(args.db, Path(args.logs), args.key)))
+        print(f"Корпус анализа спама: {len(samples)} примеров")
+    else:
+        print("PII_ENCRYPTION_KEY не задан: корпус анализа спама пропущен")
+    for path in args.labeled:
+        labeled = load_labeled_samples(Path(path))
+        print(f"{path}: {len(labeled)} примеров")
+        samples.extend(labeled)
+
+    samples = [(skeleton(text), is_spam) for text, is_spam in samples]
+    spam = sum(1 for _, is_spam in samples if is_spam)
+    print(f"Всего: {len(samples)} примеров, спам: {spam}")
+    if not spam or spam == len(samples):
+        print("Нужны примеры и спама, и не спама")
+        return 1
+
+    train, holdout = split_holdout(samples, args.holdout)
+    started = time.perf_counter()
+    model = SpamClassifier.train([text for text, _ in train], [label for _, label in train], args.bits, args.epochs)
+    print(f"Обучено за {time.perf_counter() - started:.1f} с на {len(train)} примерах")
+
+    if holdout:
+        metrics = evaluate(model, [text for text, _ in holdout], [label for _, label in holdout], SPAM_CLASSIFIER_THRESHOLD)
+        print(
+            f"Проверка на {metrics['samples']} примерах (порог {SPAM_CLASSIFIER_THRESHOLD}): "
+            f"точность {metrics['precision']:.3f}, полнота {metrics['recall']:.3f}, "
+            f"ложные срабатывания {metrics['false_positive_rate']:.3%}"
+        )
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    model.save(args.output)
+    print(f"Модель сохранена: {args.output} ({model.memory_bytes // 1024} КБ)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
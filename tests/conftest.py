@@ -4,10 +4,13 @@
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+import pytest_asyncio
 from aiogram import Bot, Dispatcher
 from aiogram.types import Chat, Message, User
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import Settings
+from app.database import Base
 
 
 @pytest.fixture(scope="session")
@@ -18,6 +21,91 @@ def event_loop():
     loop.close()
 
 
+def _reset_process_state():
+    """Drop process-wide caches, dedup registries and service singletons."""
+    import app.services.blocklist as blocklist_module
+    import app.services.image_hashes as image_hashes_module
+    import app.services.learned_bots as learned_bots_module
+    import app.services.limits as limits_module
+    import app.services.media_fingerprints as media_fingerprints_module
+    import app.services.media_groups as media_groups_module
+    import app.services.qr_codes as qr_codes_module
+    import app.services.source_reputation as source_reputation_module
+    import app.services.spam_classifier as spam_classifier_module
+    import app.services.spam_waves as spam_waves_module
+    import app.utils.keyword_engine as keyword_engine_module
+    from app.services.channel_registry import get_channel_registry
+    from app.services.moderation import get_moderation_flights
+    from app.services.shared_cache import get_shared_cache
+    from app.services.telegram_lookup_cache import get_telegram_lookup_cache
+
+    get_shared_cache().clear_local()
+    get_moderation_flights().clear()
+    get_channel_registry().clear()
+    get_telegram_lookup_cache().clear()
+    limits_module._limits_snapshot = None
+    keyword_engine_module._keyword_engine = None
+    keyword_engine_module._keyword_sets_source = None
+    blocklist_module._blocklist = None
+    learned_bots_module._learned_bots = None
+    source_reputation_module._source_reputation = None
+    media_groups_module._media_groups = None
+    media_fingerprints_module._media_fingerprints = None
+    image_hashes_module._image_hashes = None
+    qr_codes_module._qr_codes = None
+    spam_classifier_module._spam_classifier = None
+    spam_waves_module._spam_waves = None
+
+
+@pytest.fixture(autouse=True)
+def reset_process_state():
+    """Isolate process-wide caches and dedup registries between tests."""
+    _reset_process_state()
+    yield
+    _reset_process_state()
+
+
+@pytest_asyncio.fixture
+async def db_engine():
+    """In-memory database with all tables."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield engine
+
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_session(db_engine):
+    """In-memory database session."""
+    async with AsyncSession(db_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    """In-memory database session factory (for services that write in the background)."""
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def make_link_service():
+    """LinkService over a mocked DB session: no bot is whitelisted unless asked, takedowns are mocked."""
+
+    def factory(bot=None, whitelisted=False):
+        from app.services.links import LinkService
+
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=True if whitelisted else None))
+        service = LinkService(bot or MagicMock(), db)
+        service.moderation_service.takedown = AsyncMock()
+        return service
+
+    return factory
+
+
 @pytest.fixture
 def test_settings():
     """Test settings."""
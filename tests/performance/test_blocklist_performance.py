@@ -0,0 +1,62 @@
+"""
+Blocklist lookups against 100k-entry mmap'd indexes
+"""
+
+import random
+import string
+import time
+import timeit
+
+import pytest
+
+from app.services.blocklist import build_blocklist
+
+ENTRIES = 100_000
+
+
+@pytest.fixture(scope="module")
+def blocklist(tmp_path_factory):
+    rng = random.Random(1)
+    names = ["".join(rng.choice(string.ascii_lowercase + "_") for _ in range(12)) for _ in range(ENTRIES)]
+    directory = tmp_path_factory.mktemp("blocklists")
+    (directory / "domains.txt").write_text("\n".join(f"{name}.com" for name in names), encoding="utf-8")
+    (directory / "usernames.txt").write_text("\n".join(names), encoding="utf-8")
+    blocklist = build_blocklist(str(directory / "domains.txt"), str(directory / "usernames.txt"))
+    blocklist.sample = names
+    blocklist.directory = directory
+    return blocklist
+
+
+def per_call_ns(func, number=20000):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+class TestBlocklistPerformance:
+    """Lookup cost per username and per URL"""
+
+    @pytest.mark.benchmark(group="blocklist")
+    def test_username_miss(self, benchmark, blocklist):
+        assert benchmark(blocklist.is_username_blocked, "not_listed_user") is False
+
+    @pytest.mark.benchmark(group="blocklist")
+    def test_username_hit(self, benchmark, blocklist):
+        assert benchmark(blocklist.is_username_blocked, blocklist.sample[0]) is True
+
+    @pytest.mark.benchmark(group="blocklist")
+    def test_url_miss(self, benchmark, blocklist):
+        assert benchmark(blocklist.is_url_blocked, "https://www.example.org/path") is False
+
+    def test_lookups_stay_in_microseconds(self, blocklist):
+        # ~0.2 us per missing username on a typical machine; bound leaves room for slow CI
+        assert per_call_ns(lambda: blocklist.is_username_blocked("not_listed_user")) < 3000
+        assert per_call_ns(lambda: blocklist.is_domain_blocked("www.example.org")) < 10000
+
+    def test_reopening_does_not_rebuild(self, blocklist):
+        directory = blocklist.directory
+        started = time.perf_counter()
+        reopened = build_blocklist(str(directory / "domains.txt"), str(directory / "usernames.txt"))
+        elapsed = time.perf_counter() - started
+
+        assert reopened.is_username_blocked(blocklist.sample[1])
+        # mmap of the existing index, not a 100k-line rebuild
+        assert elapsed < 0.05
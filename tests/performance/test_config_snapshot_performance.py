@@ -0,0 +1,72 @@
+"""
+Admin filter microbenchmark: load_config() per update vs config snapshot
+"""
+
+import asyncio
+import datetime
+import timeit
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.config import get_config, load_config
+from app.filters.is_admin_or_silent import IsAdminOrSilentFilter
+
+UPDATES = 200
+
+
+def make_messages():
+    chat = Chat(id=1, type="private")
+    return [
+        Message(
+            message_id=i,
+            date=datetime.datetime.now(),
+            chat=chat,
+            from_user=User(id=100000000 + i, is_bot=False, first_name="User"),
+            text="/status",
+        )
+        for i in range(UPDATES)
+    ]
+
+
+async def legacy_filter(message: Message) -> bool:
+    """Previous behaviour: fresh Settings and list lookup on every update."""
+    return message.from_user.id in load_config().admin_ids_list
+
+
+def run_filter(check, messages):
+    loop = asyncio.new_event_loop()
+    try:
+
+        async def run_all():
+            return [await check(message) for message in messages]
+
+        return loop.run_until_complete(run_all())
+    finally:
+        loop.close()
+
+
+class TestAdminFilterPerformance:
+    """IsAdminOrSilentFilter before and after the config snapshot"""
+
+    @pytest.mark.benchmark(group="admin_filter")
+    def test_load_config_per_update(self, benchmark):
+        messages = make_messages()
+        results = benchmark(run_filter, legacy_filter, messages)
+        assert len(results) == UPDATES
+
+    @pytest.mark.benchmark(group="admin_filter")
+    def test_config_snapshot(self, benchmark):
+        messages = make_messages()
+        results = benchmark(run_filter, IsAdminOrSilentFilter(), messages)
+        assert len(results) == UPDATES
+
+    def test_snapshot_is_faster(self):
+        messages = make_messages()
+        admin_filter = IsAdminOrSilentFilter()
+        get_config()
+
+        before = min(timeit.repeat(lambda: run_filter(legacy_filter, messages), number=1, repeat=3))
+        after = min(timeit.repeat(lambda: run_filter(admin_filter, messages), number=1, repeat=3))
+
+        assert after * 5 < before
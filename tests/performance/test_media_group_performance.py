@@ -0,0 +1,95 @@
+"""
+Spam album cost: handler invocations and Bot API calls per 10-photo album, part by part vs collected
+"""
+
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, PhotoSize, User
+
+from app.middlewares.media_group import MediaGroupMiddleware
+from app.services.links import LinkService
+from app.services.media_groups import get_media_groups
+from app.services.moderation import get_moderation_flights
+
+ALBUM_SIZE = 10
+CHAT_ID = -1001234567890
+
+
+def make_album():
+    return [
+        Message(
+            message_id=100 + i,
+            date=datetime.datetime.now(),
+            chat=Chat(id=CHAT_ID, type="supergroup"),
+            from_user=User(id=42, is_bot=False, first_name="User"),
+            photo=[PhotoSize(file_id=f"file{i}", file_unique_id=f"unique{i}", width=100, height=100)],
+            media_group_id="album",
+            caption=f"Бесплатные сигналы {i + 1}/{ALBUM_SIZE} t.me/free_signals_bot",
+        )
+        for i in range(ALBUM_SIZE)
+    ]
+
+
+def make_bot():
+    bot = MagicMock()
+    bot.delete_message = AsyncMock()
+    bot.delete_messages = AsyncMock()
+    bot.ban_chat_member = AsyncMock()
+    return bot
+
+
+def api_calls(bot) -> int:
+    return bot.delete_message.await_count + bot.delete_messages.await_count + bot.ban_chat_member.await_count
+
+
+async def run_album(middleware=None):
+    """Feed an album through the antispam path; returns (handler invocations, Bot API calls)."""
+    bot = make_bot()
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+    invocations = 0
+
+    async def handler(message, data):
+        nonlocal invocations
+        invocations += 1
+        service = LinkService(bot, db)
+        service.moderation_service._record_takedown = AsyncMock()
+        service.moderation_service.purge_user_messages = AsyncMock()
+        results = await service.check_message_for_bot_links(message)
+        if results:
+            await service.handle_bot_link_detection(message, results)
+
+    album = make_album()
+    if middleware is None:
+        await asyncio.gather(*[handler(part, {}) for part in album])
+    else:
+        await asyncio.gather(*[middleware(handler, part, {}) for part in album])
+    assert bot.delete_messages.await_count <= 1
+    return invocations, api_calls(bot)
+
+
+class TestMediaGroupPerformance:
+    """One analysis and one takedown per album"""
+
+    @pytest.mark.asyncio
+    async def test_album_work_reduction(self):
+        part_invocations, part_calls = await run_album()
+        get_moderation_flights().clear()
+        collector = get_media_groups()
+        collector.latency = 0.01
+        album_invocations, album_calls = await run_album(MediaGroupMiddleware())
+
+        print(
+            f"\n{ALBUM_SIZE}-photo spam album: handler invocations {part_invocations} -> {album_invocations}, "
+            f"Bot API calls {part_calls} -> {album_calls}"
+        )
+        # Part by part: every part is analyzed and deleted separately; the bans are deduplicated
+        assert part_invocations == ALBUM_SIZE
+        assert part_calls == ALBUM_SIZE + 1
+        # Collected: one analysis, one deleteMessages for all parts, one ban
+        assert album_invocations == 1
+        assert album_calls == 2
+        assert collector.get_stats()["folded_parts"] == ALBUM_SIZE - 1
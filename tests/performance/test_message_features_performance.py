@@ -0,0 +1,173 @@
+"""
+Message pipeline benchmark on 4096-char messages: per-consumer text scans vs shared MessageFeatures
+"""
+
+import asyncio
+import datetime
+import random
+import re
+import timeit
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.middlewares.message_features import MessageFeaturesMiddleware
+from app.middlewares.validation import ValidationMiddleware
+from app.services.links import LinkService
+from app.utils.message_features import MESSAGE_FEATURES_KEY
+from app.utils.pii_protection import secure_logger
+
+MESSAGES = 20
+TEXT_LENGTH = 4096
+WORDS = "привет как дела сегодня новости канал подписка hello world today news update t.me/news_channel".split()
+
+
+def natural_text(seed: int) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(TEXT_LENGTH))[:TEXT_LENGTH]
+
+
+def distinct_chars_text(seed: int) -> str:
+    """Many distinct characters, each repeated at most 4 times: worst case for text.count(c)."""
+    return "".join(chr(0x4E00 + seed * 1024 + i // 4) for i in range(TEXT_LENGTH))
+
+
+def make_messages(make_text):
+    chat = Chat(id=-1001234567890, type="supergroup")
+    return [
+        Message(
+            message_id=i,
+            date=datetime.datetime.now(),
+            chat=chat,
+            from_user=User(id=100000000 + i, is_bot=False, first_name="User"),
+            text=make_text(i),
+        )
+        for i in range(MESSAGES)
+    ]
+
+
+SPAM_WORDS = ["реклама", "заработок", "быстро", "легко", "без вложений", "кликни", "перейди"]
+
+
+class LegacyValidationMiddleware(ValidationMiddleware):
+    """Previous _is_suspicious_message: repeated lower() and text.count(c) per distinct char."""
+
+    def _is_suspicious_message(self, message, features=None):
+        if message.text:
+            if "http" in message.text.lower() or "www." in message.text.lower():
+                return True
+            if any(word in message.text.lower() for word in SPAM_WORDS):
+                return True
+            if len([c for c in message.text if c.isupper()]) > len(message.text) * 0.7:
+                return True
+            if any(message.text.count(c) > 5 for c in set(message.text)):
+                return True
+        if (message.photo or message.video or message.document) and not message.caption:
+            return True
+        return False
+
+
+class LegacyLinkService(LinkService):
+    """Previous link checks: three regex scans per text."""
+
+    async def check_message_for_bot_links(self, message, features=None):
+        results = []
+        if message.text:
+            results.extend(await self._legacy_extract(message.text))
+        if message.caption:
+            results.extend(await self._legacy_extract(message.caption))
+        if results:
+            secure_logger.log_spam_analysis(
+                message=message.text or message.caption or "",
+                user_id=message.from_user.id if message.from_user else None,
+                chat_id=message.chat.id,
+                analysis_result={"bot_links_count": len([r for r in results if r[1]])},
+            )
+        return results
+
+    async def _legacy_extract(self, text):
+        results = []
+        for pattern, kind in (
+            (r"t\.me/([a-zA-Z0-9_]+)", "bot_link"),
+            (r"@([a-zA-Z0-9_]+)", "username_mention"),
+            (r"telegram\.me/([a-zA-Z0-9_]+)", "bot_link"),
+        ):
+            for username in re.findall(pattern, text, re.IGNORECASE):
+                results.append((kind, await self._check_if_username_is_bot(username)))
+        return results
+
+
+def make_link_service(service_class):
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+    return service_class(MagicMock(), db)
+
+
+def make_chain(middlewares, link_service):
+    """Dispatcher-like chain: middlewares in order, then the antispam handler."""
+
+    async def handler(event, data):
+        return await link_service.check_message_for_bot_links(event, data.get(MESSAGE_FEATURES_KEY))
+
+    chain = handler
+    for middleware in reversed(middlewares):
+        chain = (lambda mw, nxt: lambda event, data: mw(nxt, event, data))(middleware, chain)
+    return chain
+
+
+def legacy_chain():
+    return make_chain([LegacyValidationMiddleware()], make_link_service(LegacyLinkService))
+
+
+def features_chain():
+    return make_chain([MessageFeaturesMiddleware(), ValidationMiddleware()], make_link_service(LinkService))
+
+
+def run_chain(chain, messages):
+    loop = asyncio.new_event_loop()
+    try:
+
+        async def run_all():
+            return [await chain(message, {}) for message in messages]
+
+        return loop.run_until_complete(run_all())
+    finally:
+        loop.close()
+
+
+class TestMessagePipelinePerformance:
+    """Validation + link checks on 4096-char messages"""
+
+    @pytest.mark.benchmark(group="message_pipeline")
+    def test_legacy_natural_text(self, benchmark):
+        results = benchmark(run_chain, legacy_chain(), make_messages(natural_text))
+        assert len(results) == MESSAGES
+
+    @pytest.mark.benchmark(group="message_pipeline")
+    def test_features_natural_text(self, benchmark):
+        results = benchmark(run_chain, features_chain(), make_messages(natural_text))
+        assert len(results) == MESSAGES
+
+    @pytest.mark.benchmark(group="message_pipeline")
+    def test_legacy_distinct_chars(self, benchmark):
+        results = benchmark(run_chain, legacy_chain(), make_messages(distinct_chars_text))
+        assert len(results) == MESSAGES
+
+    @pytest.mark.benchmark(group="message_pipeline")
+    def test_features_distinct_chars(self, benchmark):
+        results = benchmark(run_chain, features_chain(), make_messages(distinct_chars_text))
+        assert len(results) == MESSAGES
+
+    def test_same_link_results(self):
+        messages = make_messages(natural_text)
+        assert run_chain(features_chain(), messages) == run_chain(legacy_chain(), messages)
+
+    def test_features_faster_on_distinct_chars(self):
+        messages = make_messages(distinct_chars_text)
+        legacy, features = legacy_chain(), features_chain()
+
+        before = min(timeit.repeat(lambda: run_chain(legacy, messages), number=1, repeat=3))
+        after = min(timeit.repeat(lambda: run_chain(features, messages), number=1, repeat=3))
+
+        assert after < before
@@ -0,0 +1,116 @@
+"""
+QR decoding throughput, tail latency and event loop responsiveness
+
+The synthetic corpus uses a CPU-bound stand-in decoder, so the pool itself is measured
+everywhere. Set QR_BENCHMARK_CORPUS to a directory of images to benchmark the real
+decoder (needs zxing-cpp and Pillow).
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import statistics
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram.types import PhotoSize
+
+from app.services.qr_codes import QrCodeService
+from app.utils.qr_codes import QR_DECODE_AVAILABLE
+
+CORPUS_SIZE = 48
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def busy_decoder(data: bytes):
+    """Stand-in for decoding: ~10 ms of CPU per image."""
+    digest = data
+    deadline = time.process_time() + 0.01
+    while time.process_time() < deadline:
+        digest = hashlib.sha256(digest).digest()
+    return ()
+
+
+def make_bot(corpus):
+    bot = MagicMock()
+
+    async def download(file_id, destination=None, **kwargs):
+        return io.BytesIO(corpus[file_id])
+
+    bot.download = download
+    return bot
+
+
+async def run_corpus(service, corpus):
+    """Decode the corpus concurrently; returns (seconds, per-image latencies, max event loop lag)."""
+    bot = make_bot(corpus)
+    latencies = []
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started - 0.005)
+
+    async def decode(file_id):
+        started = time.perf_counter()
+        await service.decode(bot, PhotoSize(file_id=file_id, file_unique_id=file_id, width=1, height=1))
+        latencies.append(time.perf_counter() - started)
+
+    ticking = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*[decode(file_id) for file_id in corpus])
+    elapsed = time.perf_counter() - started
+    done = True
+    await ticking
+    return elapsed, latencies, lag
+
+
+def report(name, corpus, elapsed, latencies, lag):
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"\n{name}: {len(corpus)} images in {elapsed:.2f} s ({len(corpus) / elapsed:.0f}/s), "
+        f"latency p50 {quantiles[49] * 1000:.0f} ms, p95 {quantiles[94] * 1000:.0f} ms, "
+        f"p99 {quantiles[98] * 1000:.0f} ms, max event loop lag {lag * 1000:.0f} ms"
+    )
+
+
+class TestQrDecodePerformance:
+    """Decoding runs off the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_synthetic_corpus(self):
+        corpus = {f"image-{i}": os.urandom(64 * 1024) for i in range(CORPUS_SIZE)}
+        service = QrCodeService(decoder=busy_decoder, workers=2, queue_size=CORPUS_SIZE, timeout=30)
+        service.start()
+        try:
+            elapsed, latencies, lag = await run_corpus(service, corpus)
+        finally:
+            await service.stop()
+
+        report("Synthetic corpus, stand-in decoder", corpus, elapsed, latencies, lag)
+        assert service.get_stats()["decoded"] == CORPUS_SIZE
+        # Inline decoding would stall the loop for the whole corpus (~0.5 s of CPU)
+        assert lag < 0.25
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not QR_DECODE_AVAILABLE, reason="zxing-cpp and Pillow are not installed")
+    @pytest.mark.skipif(not os.environ.get("QR_BENCHMARK_CORPUS"), reason="QR_BENCHMARK_CORPUS is not set")
+    async def test_local_image_corpus(self):
+        paths = [path for path in Path(os.environ["QR_BENCHMARK_CORPUS"]).iterdir() if path.suffix.lower() in IMAGE_SUFFIXES]
+        corpus = {path.name: path.read_bytes() for path in paths}
+        service = QrCodeService(queue_size=len(corpus), timeout=30)
+        service.start()
+        try:
+            elapsed, latencies, lag = await run_corpus(service, corpus)
+        finally:
+            await service.stop()
+
+        report(f"Local corpus ({service.get_stats()['found']} with QR codes)", corpus, elapsed, latencies, lag)
+        assert service.get_stats()["decoded"] == len(corpus)
@@ -0,0 +1,72 @@
+"""
+Spam classifier load time, memory and per-message cost of batched scoring
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+from app.services.spam_classifier import SpamClassifierService
+from app.utils.text_classifier import CLASSIFIER_AVAILABLE, FEATURE_BITS
+
+pytestmark = pytest.mark.skipif(not CLASSIFIER_AVAILABLE, reason="numpy is not installed")
+
+WORDS = "заработок работа доход бесплатно сигналы команда встреча созвон доклад версия обновление ссылка".split()
+MESSAGES = 2000
+
+
+def make_texts(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))) for _ in range(count)]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    from app.utils.text_classifier import SpamClassifier
+
+    texts = make_texts(2000)
+    labels = [i % 2 == 0 for i in range(len(texts))]
+    path = tmp_path_factory.mktemp("model") / "spam_classifier.npz"
+    SpamClassifier.train(texts, labels, FEATURE_BITS, epochs=20).save(str(path))
+    return str(path)
+
+
+class TestSpamClassifierPerformance:
+    """Load cost and batching of concurrent scoring requests"""
+
+    def test_load_time_and_memory(self, model_path):
+        service = SpamClassifierService()
+        assert service.load(model_path)
+
+        stats = service.get_stats()
+        print(f"\nModel load {stats['load_ms']} ms, weights {stats['memory_bytes'] // 1024} KB")
+        assert stats["load_ms"] < 500
+        assert stats["memory_bytes"] == (1 << FEATURE_BITS) * 4
+
+    @pytest.mark.asyncio
+    async def test_batched_vs_single_scoring(self, model_path):
+        texts = make_texts(MESSAGES, seed=1)
+
+        single = SpamClassifierService(window=0, max_batch=1)
+        single.load(model_path)
+        started = time.perf_counter()
+        for text in texts:
+            await single.score(text)
+        single_seconds = time.perf_counter() - started
+
+        batched = SpamClassifierService()
+        batched.load(model_path)
+        started = time.perf_counter()
+        await asyncio.gather(*[batched.score(text) for text in texts])
+        batched_seconds = time.perf_counter() - started
+
+        stats = batched.get_stats()
+        print(
+            f"\n{MESSAGES} messages: one at a time {single_seconds / MESSAGES * 1e6:.0f} us/message, "
+            f"batched {batched_seconds / MESSAGES * 1e6:.0f} us/message (mean batch {stats['mean_batch']:.0f})"
+        )
+        # Timings are informational: hashing dominates, so a batch is not reliably faster on a loaded machine
+        assert stats["mean_batch"] > 1
+        assert stats["batches"] < MESSAGES
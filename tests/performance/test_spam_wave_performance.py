@@ -0,0 +1,76 @@
+"""
+Spam wave index at 1k messages/s: per-message cost, lookup scaling and bounded memory
+"""
+
+import random
+import time
+import tracemalloc
+
+from app.services.spam_waves import SpamWaveIndex
+from app.utils.text_normalization import skeleton
+
+RATE = 1000  # messages per second
+DURATION = 30  # simulated seconds
+WAVE = "Набираю людей в команду, доход от {n} рублей в день, без вложений и опыта, пиши в лс {emoji}"
+LETTERS = "абвгдежзиклмнопрстуфхцчшэюя"
+
+
+def make_stream(seed=0):
+    """Traffic of 500 chats with a spam wave every 20th message, timestamps at RATE per second."""
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    stream = []
+    for i in range(RATE * DURATION):
+        if i % 20 == 0:
+            text = WAVE.format(n=rng.randint(1000, 9999), emoji=rng.choice("💰🚀✅🔥💎"))
+        else:
+            text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(6, 40)))
+        stream.append((skeleton(text), rng.randint(1, 100_000), rng.randint(1, 500), i / RATE))
+    return stream
+
+
+class TestSpamWavePerformance:
+    """Lookups are O(bands), memory is bounded by the cluster cap"""
+
+    def test_sustained_rate(self):
+        stream = make_stream()
+        index = SpamWaveIndex()
+        started = time.perf_counter()
+        flagged = sum(index.observe(text, user_id, chat_id, now) for text, user_id, chat_id, now in stream)
+        elapsed = time.perf_counter() - started
+
+        # Memory in a second pass: tracing slows every allocation down
+        tracemalloc.start()
+        traced = SpamWaveIndex()
+        for text, user_id, chat_id, now in stream:
+            traced.observe(text, user_id, chat_id, now)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = index.get_stats()
+        per_message = elapsed / len(stream)
+        print(
+            f"\n{len(stream)} messages ({DURATION} s at {RATE}/s): {per_message * 1e6:.0f} us/message "
+            f"({per_message * RATE:.1%} of one core), {flagged} flagged, {stats['clusters']} clusters, "
+            f"{stats['evicted']} evicted, peak {peak / 2**20:.1f} MB"
+        )
+        assert per_message * RATE < 0.5
+        assert stats["clusters"] <= index.max_clusters
+        assert peak < 64 * 2**20
+        assert flagged >= len(stream) // 20 - index.min_copies
+
+    def test_lookup_cost_does_not_grow_with_the_index(self):
+        stream = make_stream(seed=1)
+        timings = {}
+        for size in (1000, 20000):
+            index = SpamWaveIndex(max_clusters=size)
+            for text, user_id, chat_id, now in stream[:size]:
+                index.observe(text, user_id, chat_id, now)
+            probes = stream[size : size + 2000]
+            started = time.perf_counter()
+            for text, user_id, chat_id, now in probes:
+                index.observe(text, user_id, chat_id, now)
+            timings[size] = (time.perf_counter() - started) / len(probes)
+
+        print(f"\nPer-message cost: {', '.join(f'{size} clusters {t * 1e6:.0f} us' for size, t in timings.items())}")
+        assert timings[20000] < timings[1000] * 3
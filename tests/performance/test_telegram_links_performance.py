@@ -0,0 +1,63 @@
+"""
+Telegram link recognizer throughput: per-message cost on typical and long texts
+"""
+
+import random
+import re
+import timeit
+
+import pytest
+
+from app.utils.telegram_links import find_link_candidates
+
+WORDS = "привет как дела сегодня новости канал подписка hello world today news update the best way".split()
+LINKS = ["t.me/news_channel", "t . me/spam_bot", "@friend", "tg://resolve?domain=x_bot", "t.me/+AbCdEf123456"]
+
+# Previous LinkService patterns, for reference
+LEGACY_PATTERNS = [
+    re.compile(r"t\.me/([a-zA-Z0-9_]+)", re.IGNORECASE),
+    re.compile(r"@([a-zA-Z0-9_]+)", re.IGNORECASE),
+    re.compile(r"telegram\.me/([a-zA-Z0-9_]+)", re.IGNORECASE),
+]
+
+
+def make_text(length: int, seed: int = 1, links: bool = True) -> str:
+    rng = random.Random(seed)
+    pool = WORDS + LINKS if links else WORDS
+    return " ".join(rng.choice(pool) for _ in range(length))[:length]
+
+
+def legacy_find(text):
+    return [username for pattern in LEGACY_PATTERNS for username in pattern.findall(text)]
+
+
+def per_call_us(func, text, number=200):
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=5)) / number * 1e6
+
+
+class TestTelegramLinksPerformance:
+    """find_link_candidates() throughput"""
+
+    @pytest.mark.benchmark(group="telegram_links")
+    def test_typical_message(self, benchmark):
+        text = make_text(300)
+        assert benchmark(find_link_candidates, text)
+
+    @pytest.mark.benchmark(group="telegram_links")
+    def test_long_message(self, benchmark):
+        text = make_text(4096)
+        assert benchmark(find_link_candidates, text)
+
+    @pytest.mark.benchmark(group="telegram_links")
+    def test_legacy_long_message(self, benchmark):
+        text = make_text(4096)
+        assert benchmark(legacy_find, text)
+
+    def test_typical_message_in_microseconds(self):
+        # ~10 us on a 300-char message; generous bound for slow CI machines
+        assert per_call_us(find_link_candidates, make_text(300)) < 100
+
+    def test_linear_in_text_length(self):
+        small = per_call_us(find_link_candidates, make_text(4096, links=False), number=20)
+        large = per_call_us(find_link_candidates, make_text(16384, links=False), number=20)
+        assert large < small * 8
@@ -0,0 +1,66 @@
+"""
+Text normalization cost on 4096-char messages
+"""
+
+import random
+import timeit
+import unicodedata
+
+import pytest
+
+from app.utils.text_normalization import CONFUSABLES, STRIPPED_CHARACTERS, normalize
+
+TEXT_LENGTH = 4096
+WORDS = "привет как дела сегодня новости канал подписка hello world today news update t.me/news_channel 😀".split()
+
+STRIP_TABLE = dict.fromkeys(map(ord, STRIPPED_CHARACTERS))
+CONFUSABLES_TABLE = str.maketrans(CONFUSABLES)
+
+
+def mixed_text(seed: int = 1) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(TEXT_LENGTH))[:TEXT_LENGTH]
+
+
+def ascii_text(seed: int = 1) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(["hello", "world", "t.me/news", "update"]) for _ in range(TEXT_LENGTH))[:TEXT_LENGTH]
+
+
+def translate_normalize(text: str):
+    """Same result with str.translate tables: per-character dict lookups."""
+    normalized = unicodedata.normalize("NFKC", text).translate(STRIP_TABLE)
+    folded = normalized.translate(CONFUSABLES_TABLE)
+    return normalized, folded, folded.casefold()
+
+
+class TestTextNormalizationPerformance:
+    """normalize() on long texts"""
+
+    @pytest.mark.benchmark(group="text_normalization")
+    def test_normalize_mixed_text(self, benchmark):
+        text = mixed_text()
+        assert benchmark(normalize, text).skeleton
+
+    @pytest.mark.benchmark(group="text_normalization")
+    def test_translate_mixed_text(self, benchmark):
+        text = mixed_text()
+        assert benchmark(translate_normalize, text)
+
+    @pytest.mark.benchmark(group="text_normalization")
+    def test_normalize_ascii_text(self, benchmark):
+        text = ascii_text()
+        assert benchmark(normalize, text).skeleton
+
+    def test_same_result_as_translate(self):
+        text = mixed_text() + " Ｔ．ＭＥ/b​оt b̶o̶t"
+        result = normalize(text)
+        assert (result.normalized, result.folded, result.skeleton) == translate_normalize(text)
+
+    def test_faster_than_translate(self):
+        text = mixed_text()
+
+        translate = min(timeit.repeat(lambda: translate_normalize(text), number=20, repeat=3))
+        ours = min(timeit.repeat(lambda: normalize(text), number=20, repeat=3))
+
+        assert ours < translate
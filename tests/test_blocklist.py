@@ -0,0 +1,154 @@
+"""
+Tests for the mmap'd domain and username blocklists
+"""
+
+import datetime
+import os
+
+import pytest
+from aiogram.types import Chat, Message, MessageEntity, User
+
+from app.services.blocklist import (
+    INDEX_SUFFIX,
+    Blocklist,
+    BlocklistHotReload,
+    HashIndex,
+    build_blocklist,
+    canonical_username,
+    get_blocklist,
+    open_list,
+    publish_blocklist,
+)
+
+
+def write_lists(tmp_path, domains=(), usernames=()):
+    domains_path = tmp_path / "domains.txt"
+    usernames_path = tmp_path / "usernames.txt"
+    domains_path.write_text("\n".join(domains) + "\n", encoding="utf-8")
+    usernames_path.write_text("\n".join(usernames) + "\n", encoding="utf-8")
+    return str(domains_path), str(usernames_path)
+
+
+def make_message(text, entities=None):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        text=text,
+        entities=entities,
+    )
+
+
+@pytest.mark.unit
+class TestHashIndex:
+    """HashIndex build/open/lookup"""
+
+    def test_roundtrip(self, tmp_path):
+        path = tmp_path / "list.idx"
+        keys = [f"user_{i}" for i in range(1000)]
+
+        assert HashIndex.build(keys + keys[:10], path) == 1000
+
+        index = HashIndex.open(path)
+        assert len(index) == 1000
+        assert all(key in index for key in keys)
+        assert not any(f"other_{i}" in index for i in range(1000))
+
+    def test_empty_index(self, tmp_path):
+        path = tmp_path / "empty.idx"
+        HashIndex.build([], path)
+        assert "anything" not in HashIndex.open(path)
+
+    def test_corrupted_index_is_rebuilt(self, tmp_path):
+        source = tmp_path / "usernames.txt"
+        source.write_text("spammer\n", encoding="utf-8")
+        (tmp_path / ("usernames.txt" + INDEX_SUFFIX)).write_bytes(b"garbage")
+
+        assert "spammer" in open_list(source, canonical_username)
+
+    def test_fresh_index_is_reused(self, tmp_path):
+        source = tmp_path / "usernames.txt"
+        source.write_text("spammer\n", encoding="utf-8")
+        index_path = tmp_path / ("usernames.txt" + INDEX_SUFFIX)
+
+        open_list(source, canonical_username)
+        built_at = index_path.stat().st_mtime_ns
+        os.utime(index_path, ns=(built_at - 10**9, built_at - 10**9))
+
+        assert "spammer" in open_list(source, canonical_username)
+        assert index_path.stat().st_mtime_ns == built_at - 10**9
+
+
+@pytest.mark.unit
+class TestBlocklist:
+    """Blocklist lookups"""
+
+    def test_domain_suffix_matching(self, tmp_path):
+        blocklist = build_blocklist(*write_lists(tmp_path, domains=["scam.com", "*.evil.org", "https://Phish.NET/path"]))
+
+        assert blocklist.is_domain_blocked("scam.com")
+        assert blocklist.is_domain_blocked("www.SCAM.com.")
+        assert blocklist.is_domain_blocked("a.b.evil.org")
+        assert blocklist.is_domain_blocked("phish.net")
+        assert not blocklist.is_domain_blocked("notscam.com")
+        assert not blocklist.is_domain_blocked("com")
+        assert blocklist.is_url_blocked("https://login.scam.com/x?y=1")
+        assert blocklist.is_url_blocked("scam.com/free")
+        assert not blocklist.is_url_blocked("https://example.com/scam.com")
+
+    def test_usernames(self, tmp_path):
+        blocklist = build_blocklist(*write_lists(tmp_path, usernames=["@Spam_Channel", "# comment", "", "other  # note"]))
+
+        assert blocklist.is_username_blocked("spam_channel")
+        assert blocklist.is_username_blocked("@SPAM_CHANNEL")
+        assert blocklist.is_username_blocked("other")
+        assert not blocklist.is_username_blocked("comment")
+
+    def test_missing_files(self, tmp_path):
+        blocklist = build_blocklist(str(tmp_path / "none.txt"), str(tmp_path / "none2.txt"))
+        assert not blocklist.is_domain_blocked("scam.com")
+        assert not blocklist.is_username_blocked("spam")
+
+    @pytest.mark.asyncio
+    async def test_hot_reload_swaps_snapshot(self, tmp_path):
+        domains_path, usernames_path = write_lists(tmp_path, usernames=["first_spammer"])
+        reload = BlocklistHotReload(domains_path, usernames_path)
+
+        await reload.reload()
+        old = get_blocklist()
+        assert old.is_username_blocked("first_spammer")
+
+        write_lists(tmp_path, usernames=["second_spammer"])
+        await reload.reload()
+
+        assert get_blocklist() is not old
+        assert get_blocklist().is_username_blocked("second_spammer")
+        assert not get_blocklist().is_username_blocked("first_spammer")
+        # The previous snapshot keeps answering from its own mapping
+        assert old.is_username_blocked("first_spammer")
+
+
+@pytest.mark.unit
+class TestLinkServiceBlocklist:
+    """LinkService consults the blocklists"""
+
+    @pytest.mark.asyncio
+    async def test_blocklisted_username_without_bot_in_name(self, make_link_service, tmp_path):
+        publish_blocklist(build_blocklist(*write_lists(tmp_path, usernames=["crypto_signals"])))
+        service = make_link_service()
+
+        results = await service.check_message_for_bot_links(make_message("join t.me/Crypto_Signals and @friend"))
+
+        assert results == [("bot_link", True), ("username_mention", False)]
+
+    @pytest.mark.asyncio
+    async def test_blocklisted_domain_in_entities(self, make_link_service, tmp_path):
+        publish_blocklist(build_blocklist(*write_lists(tmp_path, domains=["scam.com"])))
+        service = make_link_service()
+        text = "free money https://win.scam.com/now"
+        message = make_message(text, entities=[MessageEntity(type="url", offset=11, length=24)])
+
+        assert await service.check_message_for_bot_links(message) == [("blocked_domain", True)]
+        assert await service.check_message_for_bot_links(make_message("nothing here")) == []
+        assert isinstance(get_blocklist(), Blocklist)
@@ -0,0 +1,149 @@
+"""
+Tests for cached bot capabilities in channels
+"""
+
+import asyncio
+import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.channel import Channel, ChannelStatus
+from app.services.channels import ChannelService
+from app.services.shared_cache import get_shared_cache
+
+CHECKED = datetime.datetime(2026, 1, 1)
+
+
+def member(status, **rights):
+    return SimpleNamespace(status=status, **rights)
+
+
+def make_bot(statuses):
+    """Bot whose get_chat_member answers from a chat_id -> status map."""
+    bot = MagicMock()
+    bot.id = 777
+    bot.state = {"active": 0, "peak": 0}
+
+    async def get_chat_member(chat_id, user_id):
+        bot.state["active"] += 1
+        bot.state["peak"] = max(bot.state["peak"], bot.state["active"])
+        await asyncio.sleep(0.01)
+        bot.state["active"] -= 1
+        return member(statuses[chat_id], can_delete_messages=True, can_restrict_members=False)
+
+    bot.get_chat_member = AsyncMock(side_effect=get_chat_member)
+    return bot
+
+
+@pytest.mark.unit
+class TestChannelCapabilities:
+    """ChannelService capability cache."""
+
+    @pytest.mark.asyncio
+    async def test_known_channel_uses_persisted_flag(self, db_session):
+        db_session.add(
+            Channel(telegram_id=-1, title="native", status=ChannelStatus.ALLOWED, is_native=True, native_checked_at=CHECKED)
+        )
+        await db_session.commit()
+        bot = make_bot({})
+        service = ChannelService(bot, db_session)
+
+        assert await service.is_native_channel(-1) is True
+        bot.get_chat_member.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unknown_channel_asks_api_once(self, db_session):
+        bot = make_bot({-2: "administrator"})
+        service = ChannelService(bot, db_session)
+
+        assert await service.is_native_channel(-2) is True
+        assert await service.is_native_channel(-2) is True
+        # Another service instance (per-request DI) shares the cache
+        assert await ChannelService(bot, db_session).is_native_channel(-2) is True
+
+        assert bot.get_chat_member.await_count == 1
+        capabilities = await service.get_channel_capabilities(-2)
+        assert capabilities.can_delete_messages is True
+        assert capabilities.can_restrict_members is False
+
+    @pytest.mark.asyncio
+    async def test_never_checked_row_asks_api_and_persists(self, db_session):
+        # Rows written before is_native was maintained hold a placeholder False
+        db_session.add(Channel(telegram_id=-4, title="legacy", status=ChannelStatus.ALLOWED, is_native=False))
+        await db_session.commit()
+        bot = make_bot({-4: "administrator"})
+        service = ChannelService(bot, db_session)
+
+        assert await service.is_native_channel(-4) is True
+        channel = await service._get_channel_by_id(-4)
+        assert channel.is_native is True and channel.native_checked_at is not None
+
+        get_shared_cache().clear_local()
+        assert await service.is_native_channel(-4) is True
+        assert bot.get_chat_member.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_is_cached(self, db_session):
+        bot = make_bot({})
+        service = ChannelService(bot, db_session)
+
+        assert await service.get_channel_capabilities(-5) is None
+        assert await service.is_native_channel(-5) is False
+        assert bot.get_chat_member.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_new_channel_row_keeps_the_lookup_verdict(self, db_session):
+        bot = make_bot({-6: "administrator"})
+        service = ChannelService(bot, db_session)
+
+        await service.save_channel_info(SimpleNamespace(id=-1), SimpleNamespace(id=-6, title="new", username=None))
+        channel = await service._get_channel_by_id(-6)
+        assert channel.is_native is True and channel.native_checked_at is not None
+
+        # Neither the fast path nor a later request asks again
+        get_shared_cache().clear_local()
+        assert await service.is_native_channel(-6) is True
+        assert bot.get_chat_member.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_new_channel_row_after_failed_lookup_stays_unchecked(self, db_session):
+        bot = make_bot({})
+        service = ChannelService(bot, db_session)
+
+        await service.save_channel_info(SimpleNamespace(id=-1), SimpleNamespace(id=-7, title="new", username=None))
+        channel = await service._get_channel_by_id(-7)
+        assert channel.is_native is False and channel.native_checked_at is None
+
+    @pytest.mark.asyncio
+    async def test_my_chat_member_update_overrides_cache(self, db_session):
+        db_session.add(
+            Channel(telegram_id=-3, title="demoted", status=ChannelStatus.ALLOWED, is_native=True, native_checked_at=CHECKED)
+        )
+        await db_session.commit()
+        bot = make_bot({})
+        service = ChannelService(bot, db_session)
+        assert await service.is_native_channel(-3) is True
+
+        await service.update_channel_capabilities(-3, member("member"))
+
+        assert await service.is_native_channel(-3) is False
+        assert (await service._get_channel_by_id(-3)).is_native is False
+        bot.get_chat_member.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_sync_all_refreshes_concurrently(self, db_session):
+        statuses = {-100 - i: ("administrator" if i % 2 else "member") for i in range(8)}
+        db_session.add_all(
+            [Channel(telegram_id=chat_id, title=str(chat_id), status=ChannelStatus.ALLOWED) for chat_id in statuses]
+        )
+        await db_session.commit()
+        bot = make_bot(statuses)
+        service = ChannelService(bot, db_session)
+
+        assert await service.sync_all_channels_native_status() == 4
+        assert bot.state["peak"] > 1
+        for chat_id, status in statuses.items():
+            assert await service.is_native_channel(chat_id) is (status == "administrator")
+        assert bot.get_chat_member.await_count == len(statuses)
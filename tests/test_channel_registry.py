@@ -0,0 +1,91 @@
+"""
+Tests for write-on-change channel registry
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.models.channel import Channel, ChannelStatus
+from app.services.channel_registry import get_channel_registry
+from app.services.channels import ChannelService
+
+
+def chat(chat_id, title, username=None):
+    return SimpleNamespace(id=chat_id, title=title, username=username)
+
+
+def make_service(db_session, linked_chat_id=None):
+    bot = MagicMock()
+    bot.id = 777
+    bot.get_chat = AsyncMock(return_value=SimpleNamespace(linked_chat_id=linked_chat_id))
+    bot.get_chat_member = AsyncMock(return_value=SimpleNamespace(status="member"))
+    service = ChannelService(bot, db_session)
+    db_session.commit = AsyncMock(wraps=db_session.commit)
+    return service
+
+
+@pytest.mark.unit
+class TestChannelRegistry:
+    """ChannelService.save_channel_info with the registry."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_messages_do_not_write(self, db_session):
+        service = make_service(db_session)
+
+        for _ in range(5):
+            await service.save_channel_info(chat(-1, "group"), chat(-10, "channel", "chan"))
+
+        assert db_session.commit.await_count == 1
+        channel = await service._get_channel_by_id(-10)
+        assert (channel.title, channel.username, channel.is_comment_group) == ("channel", "chan", False)
+
+    @pytest.mark.asyncio
+    async def test_changed_title_is_written(self, db_session):
+        service = make_service(db_session)
+
+        await service.save_channel_info(chat(-1, "group"), chat(-10, "old"))
+        await service.save_channel_info(chat(-1, "group"), chat(-10, "new"))
+        await service.save_channel_info(chat(-1, "group"), chat(-10, "new"))
+
+        assert db_session.commit.await_count == 2
+        assert (await service._get_channel_by_id(-10)).title == "new"
+
+    @pytest.mark.asyncio
+    async def test_linked_chat_resolved_once_per_ttl(self, db_session, monkeypatch):
+        service = make_service(db_session, linked_chat_id=-10)
+
+        for _ in range(3):
+            await service.save_channel_info(chat(-1, "comments"))
+
+        service.bot.get_chat.assert_awaited_once_with(-1)
+        assert db_session.commit.await_count == 1
+        channel = await service._get_channel_by_id(-1)
+        assert channel.is_comment_group is True
+        assert channel.linked_chat_id == -10
+
+        monkeypatch.setattr(service.registry, "linked_chat_ttl", 0)
+        await service.save_channel_info(chat(-1, "comments"))
+        assert service.bot.get_chat.await_count == 2
+        assert db_session.commit.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_warm_registry_skips_first_write(self, db_session):
+        db_session.add(
+            Channel(
+                telegram_id=-1,
+                title="comments",
+                status=ChannelStatus.ALLOWED,
+                is_comment_group=True,
+                linked_chat_id=-10,
+            )
+        )
+        await db_session.commit()
+        assert await get_channel_registry().warm(db_session) == 1
+
+        service = make_service(db_session)
+        await service.save_channel_info(chat(-1, "comments"))
+
+        service.bot.get_chat.assert_not_called()
+        db_session.commit.assert_not_called()
@@ -0,0 +1,93 @@
+"""
+Tests for immutable config snapshot
+"""
+
+import datetime
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+import app.config as config_module
+from app.config import get_config, reload_config
+from app.filters.is_admin_or_silent import IsAdminOrSilentFilter
+
+
+@pytest.fixture
+def fresh_snapshot(monkeypatch):
+    """Start from an unloaded snapshot and restore it afterwards."""
+    monkeypatch.setattr(config_module, "_snapshot", None)
+    monkeypatch.setenv("BOT_TOKEN", "123456789:test_token_123456789")
+    monkeypatch.setenv("ADMIN_IDS", "123456789,987654321")
+
+
+def message_from(user_id):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=1, type="private"),
+        from_user=User(id=user_id, is_bot=False, first_name="User"),
+        text="/status",
+    )
+
+
+@pytest.mark.unit
+class TestConfigSnapshot:
+    """get_config / reload_config."""
+
+    def test_snapshot_is_loaded_once(self, fresh_snapshot):
+        snapshot = get_config()
+
+        assert get_config() is snapshot
+        assert snapshot.admin_ids == frozenset({123456789, 987654321})
+        assert snapshot.primary_admin_id == 123456789
+        assert snapshot.is_admin(987654321)
+        assert not snapshot.is_admin(555)
+        assert not snapshot.is_admin(None)
+
+    def test_snapshot_is_immutable(self, fresh_snapshot):
+        snapshot = get_config()
+
+        with pytest.raises(Exception):
+            snapshot.settings.redis_enabled = True
+        with pytest.raises(Exception):
+            snapshot.admin_ids = frozenset()
+
+    def test_reload_swaps_snapshot(self, fresh_snapshot, monkeypatch):
+        old = get_config()
+        monkeypatch.setenv("ADMIN_IDS", "555555555")
+
+        new = reload_config()
+
+        assert get_config() is new
+        assert new.version == old.version + 1
+        assert new.admin_ids == frozenset({555555555})
+        assert old.admin_ids == frozenset({123456789, 987654321})
+
+    def test_invalid_reload_keeps_current_snapshot(self, fresh_snapshot, monkeypatch):
+        old = get_config()
+        monkeypatch.setenv("ADMIN_IDS", "not-an-id")
+
+        with pytest.raises(ValueError):
+            reload_config()
+
+        assert get_config() is old
+
+    def test_pii_key_is_read_from_env_file(self, fresh_snapshot, monkeypatch, tmp_path):
+        # .env values are not exported to os.environ, the key must come from Settings
+        (tmp_path / ".env").write_text("PII_ENCRYPTION_KEY=fixed-key\n", encoding="utf-8")
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv("PII_ENCRYPTION_KEY", raising=False)
+
+        assert get_config().settings.pii_encryption_key == "fixed-key"
+
+    @pytest.mark.asyncio
+    async def test_filter_follows_reload(self, fresh_snapshot, monkeypatch):
+        admin_filter = IsAdminOrSilentFilter()
+        assert await admin_filter(message_from(123456789)) is True
+        assert await admin_filter(message_from(555555555)) is False
+
+        monkeypatch.setenv("ADMIN_IDS", "555555555")
+        reload_config()
+
+        assert await admin_filter(message_from(555555555)) is True
+        assert await admin_filter(message_from(123456789)) is False
@@ -0,0 +1,78 @@
+"""
+Tests for cross-chat ban propagation
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+
+from app.models.channel import Channel, ChannelStatus
+from app.models.moderation_log import ModerationAction, ModerationLog
+from app.services.channels import ChannelService
+from app.services.moderation import ModerationService
+
+
+def tracking_bot(fail_chats=()):
+    """Bot that records peak concurrency of ban_chat_member calls."""
+    bot = MagicMock()
+    bot.state = {"active": 0, "peak": 0}
+
+    async def ban_chat_member(chat_id, user_id):
+        bot.state["active"] += 1
+        bot.state["peak"] = max(bot.state["peak"], bot.state["active"])
+        await asyncio.sleep(0.01)
+        bot.state["active"] -= 1
+        if chat_id in fail_chats:
+            raise RuntimeError("not enough rights")
+        return True
+
+    bot.ban_chat_member = AsyncMock(side_effect=ban_chat_member)
+    return bot
+
+
+@pytest.mark.unit
+class TestGlobalBan:
+    """ModerationService.global_ban."""
+
+    @pytest.mark.asyncio
+    async def test_bans_everywhere_with_bounded_concurrency(self, db_session):
+        bot = tracking_bot(fail_chats={-105})
+        service = ModerationService(bot, db_session)
+        chat_ids = [-100 - i for i in range(12)]
+        progress = AsyncMock()
+
+        result = await service.global_ban(42, chat_ids, admin_id=1, reason="spam wave", progress=progress, concurrency=4)
+
+        assert sorted(result.banned) == sorted(c for c in chat_ids if c != -105)
+        assert list(result.failed) == [-105]
+        assert bot.state["peak"] == 4
+        assert progress.await_count == 12
+        progress.assert_awaited_with(12, 12)
+
+    @pytest.mark.asyncio
+    async def test_logs_written_in_one_bulk_insert(self, db_session):
+        service = ModerationService(tracking_bot(), db_session)
+        db_session.commit = AsyncMock(wraps=db_session.commit)
+
+        await service.global_ban(42, [-100, -200, -300, -100], admin_id=1, reason="spam wave")
+
+        assert db_session.commit.await_count == 1
+        logs = (await db_session.execute(select(ModerationLog))).scalars().all()
+        assert sorted(log.chat_id for log in logs) == [-300, -200, -100]
+        assert all(log.action == ModerationAction.BAN and log.user_id == 42 for log in logs)
+
+    @pytest.mark.asyncio
+    async def test_managed_chats(self, db_session):
+        db_session.add_all(
+            [
+                Channel(telegram_id=-1, title="native", status=ChannelStatus.ALLOWED, is_native=True),
+                Channel(telegram_id=-2, title="comments", status=ChannelStatus.ALLOWED, is_comment_group=True),
+                Channel(telegram_id=-3, title="foreign", status=ChannelStatus.ALLOWED, is_native=False),
+            ]
+        )
+        await db_session.commit()
+
+        service = ChannelService(MagicMock(), db_session, native_channel_ids=[-1, -9])
+        assert sorted(await service.get_managed_chat_ids()) == [-9, -2, -1]
@@ -0,0 +1,260 @@
+"""
+Tests for near-duplicate spam image detection
+"""
+
+import asyncio
+import datetime
+import io
+import random
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Chat, Message, PhotoSize, User
+from aiohttp import web
+
+from app.services.image_hashes import ImageHashService, get_image_hashes
+from app.services.links import LinkService
+from app.utils.image_hash import IMAGE_HASH_AVAILABLE, MultiIndexHash, dhash, hamming_distance
+
+TOKEN = "123456789:test_token_123456789"
+
+SPAM_HASH = 0xF0F0_F0F0_0F0F_0F0F
+REENCODED_HASH = SPAM_HASH ^ 0b101  # 2 bits differ
+OTHER_HASH = ~SPAM_HASH & 0xFFFF_FFFF_FFFF_FFFF
+
+
+def hex_hasher(data: bytes) -> int:
+    """Stand-in hasher: test "images" are their hash in hex."""
+    return int(data, 16)
+
+
+class StandInBotAPI:
+    """Local Bot API server: getFile and the file endpoint."""
+
+    def __init__(self):
+        self.files = {}
+        self.downloads = 0
+
+    async def get_file(self, request):
+        data = await request.post()
+        file_id = data["file_id"]
+        return web.json_response(
+            {"ok": True, "result": {"file_id": file_id, "file_unique_id": f"u-{file_id}", "file_path": f"photos/{file_id}"}}
+        )
+
+    async def download(self, request):
+        self.downloads += 1
+        return web.Response(body=self.files[request.match_info["name"]])
+
+
+@pytest_asyncio.fixture
+async def api():
+    stand_in = StandInBotAPI()
+    app = web.Application()
+    app.router.add_post(f"/bot{TOKEN}/getFile", stand_in.get_file)
+    app.router.add_get(f"/file/bot{TOKEN}/photos/{{name}}", stand_in.download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}")))
+    stand_in.bot = bot
+    yield stand_in
+
+    await bot.session.close()
+    await runner.cleanup()
+
+
+def make_photo_message(file_id, message_id=1):
+    return Message(
+        message_id=message_id,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        photo=[
+            PhotoSize(file_id=file_id, file_unique_id=f"u-{file_id}", width=90, height=90, file_size=100),
+            PhotoSize(file_id=f"{file_id}-large", file_unique_id=f"u-{file_id}-large", width=800, height=800),
+        ],
+    )
+
+
+def make_service(**kwargs):
+    service = ImageHashService(hasher=hex_hasher, executor=ThreadPoolExecutor(max_workers=1), **kwargs)
+    assert service.start()
+    return service
+
+
+@pytest.mark.unit
+class TestMultiIndexHash:
+    """Hamming-distance lookups"""
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        index = MultiIndexHash(max_distance=6)
+        hashes = [rng.getrandbits(64) for _ in range(2000)]
+        for value in hashes:
+            index.add(value, value)
+
+        for _ in range(200):
+            query = rng.choice(hashes)
+            for bit in rng.sample(range(64), rng.randint(0, 6)):
+                query ^= 1 << bit
+            best = min(hamming_distance(query, value) for value in hashes)
+            found = index.find(query)
+            assert found is not None and found[0] == best
+            assert hamming_distance(query, found[1]) == best
+
+        assert len(index) == len(set(hashes))
+
+    def test_remove(self):
+        index = MultiIndexHash(max_distance=6)
+        index.add(SPAM_HASH, "spam")
+        index.add(OTHER_HASH, "other")
+
+        index.remove(SPAM_HASH)
+        index.remove(SPAM_HASH)
+
+        assert index.find(REENCODED_HASH) is None
+        assert index.find(OTHER_HASH) == (0, "other")
+        assert len(index) == 1
+
+    @pytest.mark.skipif(not IMAGE_HASH_AVAILABLE, reason="numpy and Pillow are not installed")
+    def test_dhash_survives_reencoding(self):
+        from PIL import Image, ImageDraw
+
+        image = Image.new("RGB", (400, 300), "white")
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((40, 40, 200, 160), fill="red")
+        draw.ellipse((220, 120, 380, 280), fill="blue")
+
+        def encode(picture, quality):
+            buffer = io.BytesIO()
+            picture.save(buffer, "JPEG", quality=quality)
+            return buffer.getvalue()
+
+        original = dhash(encode(image, 95))
+        reencoded = dhash(encode(image.resize((200, 150)), 40))
+        different = dhash(encode(image.transpose(Image.Transpose.FLIP_LEFT_RIGHT), 95))
+
+        assert hamming_distance(original, reencoded) <= 6
+        assert hamming_distance(original, different) > 6
+
+
+@pytest.mark.unit
+class TestImageHashService:
+    """Background photo checks"""
+
+    @pytest.mark.asyncio
+    async def test_reencoded_copy_matches_learned_spam(self, api):
+        api.files.update({"spam": b"%x" % SPAM_HASH, "copy": b"%x" % REENCODED_HASH, "cat": b"%x" % OTHER_HASH})
+        service = make_service()
+        on_match = AsyncMock()
+
+        assert service.learn(api.bot, make_photo_message("spam"))
+        await service.drain()
+        assert service.check(api.bot, make_photo_message("copy"), on_match)
+        assert service.check(api.bot, make_photo_message("cat"), on_match)
+        await service.drain()
+
+        on_match.assert_awaited_once_with(2, "u-spam")
+        assert service.get_stats()["matches"] == 1
+        await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_hash_is_cached_per_file_unique_id(self, api):
+        api.files.update({"spam": b"%x" % SPAM_HASH, "copy": b"%x" % REENCODED_HASH})
+        service = make_service()
+        service.learn(api.bot, make_photo_message("spam"))
+        await service.drain()
+
+        for message_id in range(3):
+            service.check(api.bot, make_photo_message("copy", message_id), AsyncMock())
+            await service.drain()
+
+        assert api.downloads == 2
+        assert service.get_stats()["cache_hits"] == 2
+        await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_nothing_is_downloaded_without_known_spam(self, api):
+        service = make_service()
+
+        assert not service.check(api.bot, make_photo_message("copy"), AsyncMock())
+        assert api.downloads == 0
+        await service.stop()
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        service = make_service(workers=1, queue_size=2)
+        service.add_known(SPAM_HASH, "u-spam")
+        release = asyncio.Event()
+
+        async def slow_hash(bot, photo):
+            await release.wait()
+            return None
+
+        service.hash_photo = slow_hash
+        accepted = [service.check(MagicMock(), make_photo_message(f"p{i}"), AsyncMock()) for i in range(4)]
+        release.set()
+        await service.drain()
+
+        assert accepted == [True, True, False, False]
+        assert service.get_stats()["dropped"] == 2
+        assert service.get_stats()["queued"] == 0
+        await service.stop()
+
+    def test_known_hashes_are_bounded(self):
+        rng = random.Random(3)
+        hashes = [rng.getrandbits(64) for _ in range(11)]
+        service = ImageHashService(max_known=10, hasher=hex_hasher)
+        for i, value in enumerate(hashes):
+            service.add_known(value, f"u-{i}")
+
+        assert service.get_stats()["known"] == 10
+        assert service.find(hashes[-1]) == (0, "u-10")
+        assert service.find(hashes[1]) == (0, "u-1")
+        assert service.find(hashes[0]) is None
+
+    def test_disabled_without_image_libraries(self):
+        service = ImageHashService()
+
+        assert service.start() is IMAGE_HASH_AVAILABLE
+        if not IMAGE_HASH_AVAILABLE:
+            assert not service.learn(MagicMock(), make_photo_message("spam"))
+
+
+@pytest.mark.unit
+class TestLinkServiceSimilarImages:
+    """Spam takedowns teach the detector; near-duplicates are taken down"""
+
+    @pytest.mark.asyncio
+    async def test_reencoded_spam_photo_is_taken_down(self, api):
+        api.files.update({"spam": b"%x" % SPAM_HASH, "copy": b"%x" % REENCODED_HASH})
+        service = get_image_hashes()
+        service._hasher = hex_hasher
+        service._executor = ThreadPoolExecutor(max_workers=1)
+        service.start()
+        link_service = LinkService(api.bot, AsyncMock())
+        link_service.moderation_service.takedown = AsyncMock()
+
+        assert await link_service.handle_bot_link_detection(make_photo_message("spam"), [("blocked_domain", True)])
+        await service.drain()
+        assert service.get_stats()["known"] == 1
+
+        assert link_service.check_similar_images(make_photo_message("copy", message_id=2))
+        await service.drain()
+
+        assert link_service.moderation_service.takedown.await_count == 2
+        takedown = link_service.moderation_service.takedown.call_args.kwargs
+        assert takedown["message_id"] == 2
+        assert "similar_spam_image" in takedown["reason"]
+        # The near-duplicate itself is not learned
+        assert service.get_stats()["known"] == 1
+        await service.stop()
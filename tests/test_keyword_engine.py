@@ -0,0 +1,152 @@
+"""
+Tests for the shared keyword engine
+"""
+
+import datetime
+import re
+import timeit
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.middlewares.validation import ValidationMiddleware
+from app.services.limits import LimitsService
+from app.utils.keyword_engine import KeywordEngine, get_keyword_engine
+from app.utils.validation import InputValidator
+
+# Previous InputValidator.SUSPICIOUS_PATTERNS (compiled with IGNORECASE | DOTALL)
+LEGACY_PATTERNS = {
+    "javascript_injection": r"<script[^>]*>.*?</script>",
+    "javascript_url": r"javascript:",
+    "eval_function": r"eval\s*\(",
+    "path_traversal": r"\.\./",
+    "sql_injection": r"SELECT.*FROM",
+    "sql_union_injection": r"UNION.*SELECT",
+    "sql_drop": r"DROP\s+TABLE",
+    "sql_insert": r"INSERT\s+INTO",
+    "sql_update": r"UPDATE\s+SET",
+    "sql_delete": r"DELETE\s+FROM",
+    "iframe_injection": r"<iframe[^>]*>",
+    "event_handler": r"on\w+\s*=",
+    "data_url_html": r"data:text/html",
+    "vbscript_url": r"vbscript:",
+    "file_url": r"file://",
+    "ftp_url": r"ftp://",
+    "hex_encoding": r"\\x[0-9a-fA-F]{2}",
+    "url_encoding": r"%[0-9a-fA-F]{2}",
+    "unicode_encoding": r"\\u[0-9a-fA-F]{4}",
+}
+
+CORPUS = [
+    "<script>alert('xss')</script>",
+    "<SCRIPT src=x>\n</script>",
+    "<script</script>",
+    "javascript:void(0)",
+    "eval ('x')",
+    "../../etc/passwd",
+    "SELECT name\nFROM users",
+    "from x select y",
+    "union all select 1",
+    "DROP   TABLE users",
+    "insert into t",
+    "update set",
+    "Settings updated successfully",
+    "delete from t",
+    "<iframe src=x>",
+    "<iframe",
+    '<img onerror = "x">',
+    "data:text/html;base64",
+    "vbscript:msgbox",
+    "file:///etc/passwd",
+    "ftp://host",
+    "\\x41\\u0041 %2F",
+    "обычное сообщение без всего",
+    "Hello world",
+]
+
+
+def is_suspicious_message(text):
+    message = Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        text=text,
+    )
+    return ValidationMiddleware()._is_suspicious_message(message)
+
+
+@pytest.mark.unit
+class TestKeywordEngine:
+    """KeywordEngine.scan()"""
+
+    @pytest.mark.parametrize("text", CORPUS)
+    def test_matches_previous_validator_patterns(self, text):
+        expected = {
+            code for code, pattern in LEGACY_PATTERNS.items() if re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        }
+        assert get_keyword_engine().scan(text, InputValidator.SUSPICIOUS_CATEGORIES) == expected
+
+    def test_every_category_at_same_position(self):
+        engine = KeywordEngine(
+            {
+                "word": ["update"],
+                "statement": [re.compile(r"update\s+set")],
+                "sequence": ["update ... where"],
+                "missing": ["update ... never"],
+            }
+        )
+        assert engine.scan("UPDATE set x WHERE y") == {"word", "statement", "sequence"}
+
+    def test_category_filter(self):
+        engine = get_keyword_engine()
+        assert engine.scan("SpamBot", ("bot_like_username",)) == {"bot_like_username"}
+        assert engine.scan("SpamBot", ("spam_words",)) == frozenset()
+        assert engine.scan("", None) == frozenset()
+
+    def test_validator_reports_codes_in_order(self):
+        errors = InputValidator()._validate_text_content("<iframe> javascript:x", "message_text")
+        assert [error.code for error in errors] == ["javascript_url", "iframe_injection"]
+
+    @pytest.mark.parametrize(
+        "make_text",
+        [
+            lambda n: "select " * (n // 7),
+            lambda n: "<script" * (n // 7),
+            lambda n: "<iframe" * (n // 7),
+            lambda n: "on" * (n // 2),
+            lambda n: "ai" * (n // 2),
+            lambda n: "a" * n,
+        ],
+    )
+    def test_linear_time_on_adversarial_input(self, make_text):
+        engine = get_keyword_engine()
+        small, large = make_text(16384), make_text(65536)
+
+        small_time = min(timeit.repeat(lambda: engine.scan(small), number=3, repeat=3))
+        large_time = min(timeit.repeat(lambda: engine.scan(large), number=3, repeat=3))
+
+        # 4x input: linear ~4x, the old .* patterns were quadratic (16x)
+        assert large_time < small_time * 8
+
+
+@pytest.mark.unit
+class TestKeywordSetsHotSwap:
+    """keyword_sets from limits.json replace the default categories."""
+
+    def test_limits_replace_spam_words(self):
+        assert is_suspicious_message("реклама") is True
+
+        assert LimitsService().apply_limits({"keyword_sets": {"spam_words": ["казино"]}})
+
+        assert is_suspicious_message("реклама") is False
+        assert is_suspicious_message("Лучшее КАЗИНО") is True
+        # Other categories keep their defaults
+        assert get_keyword_engine().scan("SELECT 1 FROM t", ("sql_injection",)) == {"sql_injection"}
+
+    def test_invalid_keyword_sets_are_rejected(self):
+        engine = get_keyword_engine()
+
+        assert not LimitsService().apply_limits({"keyword_sets": {"spam_words": "казино"}})
+        assert not LimitsService().apply_limits({"keyword_sets": {"spam_words": [""]}})
+        assert get_keyword_engine() is engine
@@ -0,0 +1,183 @@
+"""
+Tests for bot usernames learned from confirmed takedowns
+"""
+
+import datetime
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.types import Chat, Message, User
+from sqlalchemy import select
+
+import app.services.learned_bots as learned_bots_module
+from app.handlers.admin.bots import handle_learned_bots_command
+from app.models.learned_bot import LearnedBot
+from app.services.learned_bots import LearnedBotIndex, get_learned_bots
+
+DAY = 24 * 3600
+
+
+def make_message(text):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        text=text,
+    )
+
+
+@pytest.mark.unit
+class TestLearnedBotIndex:
+    """LearnedBotIndex verdicts, decay and overrides"""
+
+    @pytest.mark.asyncio
+    async def test_detections_extend_expiry_up_to_cap(self):
+        index = LearnedBotIndex(ttl=DAY, max_factor=3)
+        index._persist = AsyncMock()
+        now = time.time()
+
+        assert not index.is_known_bot("spam_bot")
+        index.record(["Spam_Bot", "spam_bot"], now=now)
+        entry = index.get("@spam_bot")
+        assert entry.detections == 1
+        assert entry.expires_at == now + DAY
+        assert index.is_known_bot("SPAM_BOT")
+
+        for _ in range(5):
+            index.record(["spam_bot"], now=now)
+        assert entry.detections == 6
+        assert entry.expires_at == now + 3 * DAY
+        assert index.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_forgotten_and_restarts(self):
+        index = LearnedBotIndex(ttl=DAY)
+        index._persist = AsyncMock()
+        past = time.time() - 10 * DAY
+
+        index.record(["old_bot", "old_bot"], now=past)
+        index.record(["old_bot"], now=past)
+        assert not index.is_known_bot("old_bot")
+        assert index.get("old_bot") is None
+
+        index.record(["old_bot"], now=past)
+        index.record(["old_bot"])
+        assert index.get("old_bot").detections == 1
+        assert index.is_known_bot("old_bot")
+
+    @pytest.mark.asyncio
+    async def test_override_removes_verdict_and_stops_learning(self):
+        index = LearnedBotIndex()
+        index._persist = AsyncMock()
+
+        index.record(["friendly_bot"])
+        entry = await index.override("@Friendly_Bot", admin_id=7)
+
+        assert entry.is_overridden and entry.overridden_by == 7
+        assert not index.is_known_bot("friendly_bot")
+        assert index.record(["friendly_bot"]) == []
+        assert index.top() == []
+
+    @pytest.mark.asyncio
+    async def test_persist_and_warm_roundtrip(self, session_factory):
+        index = LearnedBotIndex(session_factory=session_factory)
+        index.record(["a_bot", "b_bot"])
+        index.record(["a_bot"])
+        await index.drain()
+        await index.override("c_bot", admin_id=1)
+
+        async with session_factory() as session:
+            rows = {row.username: row for row in (await session.execute(select(LearnedBot))).scalars()}
+        assert rows["a_bot"].detections == 2
+        assert rows["c_bot"].is_overridden
+
+        warmed = LearnedBotIndex(session_factory=session_factory)
+        async with session_factory() as session:
+            assert await warmed.warm(session) == 3
+        assert warmed.is_known_bot("a_bot") and warmed.is_known_bot("b_bot")
+        assert not warmed.is_known_bot("c_bot")
+        assert [entry.username for entry in warmed.top()] == ["a_bot", "b_bot"]
+
+
+@pytest.mark.unit
+class TestLinkServiceLearning:
+    """LinkService records takedowns and uses learned verdicts"""
+
+    @pytest.mark.asyncio
+    async def test_takedown_records_bot_usernames(self, make_link_service, session_factory):
+        learned_bots_module._learned_bots = LearnedBotIndex(session_factory=session_factory)
+        service = make_link_service()
+        message = make_message("join t.me/free_money_bot and say hi to @friend")
+
+        results = await service.check_message_for_bot_links(message)
+        assert await service.handle_bot_link_detection(message, results)
+
+        reason = service.moderation_service.takedown.call_args.kwargs["reason"]
+        assert reason == "Posted bot links: @free_money_bot"
+        assert get_learned_bots().get("free_money_bot").detections == 1
+        assert get_learned_bots().get("friend") is None
+        await get_learned_bots().drain()
+
+    @pytest.mark.asyncio
+    async def test_link_targets_not_judged_bots_are_not_learned(self, make_link_service):
+        get_learned_bots()._persist = AsyncMock()
+        service = make_link_service()
+        message = make_message("t.me/free_money_bot, then join t.me/earn_daily")
+
+        results = await service.check_message_for_bot_links(message)
+        assert await service.handle_bot_link_detection(message, results)
+
+        # One takedown must not mark a channel or person linked next to the bot
+        assert get_learned_bots().is_known_bot("free_money_bot")
+        assert get_learned_bots().get("earn_daily") is None
+        assert await service.check_message_for_bot_links(make_message("t.me/earn_daily")) == [("bot_link", False)]
+
+    @pytest.mark.asyncio
+    async def test_reason_names_findings_without_usernames(self, make_link_service):
+        service = make_link_service()
+        message = make_message("Набираю людей в команду, пиши в лс")
+
+        assert await service.handle_bot_link_detection(message, [("spam_wave", True)])
+        assert service.moderation_service.takedown.call_args.kwargs["reason"] == "Spam findings: spam_wave"
+
+        assert await service.handle_bot_link_detection(message, [("known_spam_media", True)])
+        assert service.moderation_service.takedown.call_args.kwargs["reason"] == "Suspicious media: known_spam_media"
+        assert get_learned_bots().get_stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_learned_username_gets_instant_verdict(self, make_link_service):
+        get_learned_bots()._persist = AsyncMock()
+        get_learned_bots().record(["crypto_signals"])
+        service = make_link_service()
+
+        results = await service.check_message_for_bot_links(make_message("t.me/Crypto_Signals"))
+
+        assert results == [("bot_link", True)]
+        assert get_learned_bots().get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_whitelist_wins_over_learned_verdict(self, make_link_service):
+        get_learned_bots()._persist = AsyncMock()
+        get_learned_bots().record(["crypto_signals"])
+        service = make_link_service(whitelisted=True)
+
+        assert await service.check_message_for_bot_links(make_message("t.me/crypto_signals")) == [("bot_link", False)]
+
+
+@pytest.mark.unit
+class TestLearnedBotsCommand:
+    """/learned_bots listing"""
+
+    @pytest.mark.asyncio
+    async def test_listing_escapes_usernames(self):
+        get_learned_bots()._persist = AsyncMock()
+        get_learned_bots().record(["x<b>_bot"])
+
+        with patch("app.handlers.admin.bots.send_silent_response") as send:
+            await handle_learned_bots_command(make_message("/learned_bots"))
+
+        text = send.call_args.args[1]
+        assert "@x&lt;b&gt;_bot" in text
+        assert "<b>_bot" not in text
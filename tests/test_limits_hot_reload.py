@@ -0,0 +1,145 @@
+"""
+Tests for push-based limits hot reload
+"""
+
+import asyncio
+import builtins
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.config_watcher import LimitsHotReload
+from app.services.limits import LimitsService
+from app.utils.file_watcher import FileWatcher
+
+VALID_LIMITS = {
+    "max_messages_per_minute": 10,
+    "max_links_per_message": 3,
+    "ban_duration_hours": 24,
+    "suspicion_threshold": 0.5,
+}
+
+
+def write_atomic(path, content):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+async def wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.unit
+class TestFileWatcher:
+    """FileWatcher backends and debounce."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    async def test_burst_of_writes_gives_one_callback(self, tmp_path, use_inotify):
+        path = tmp_path / "limits.json"
+        path.write_text("{}", encoding="utf-8")
+        changes = []
+
+        async def on_change(changed_path):
+            changes.append(changed_path.read_text(encoding="utf-8"))
+
+        watcher = FileWatcher(str(path), on_change, debounce=0.1, poll_interval=0.02, use_inotify=use_inotify)
+        await watcher.start()
+        try:
+            if use_inotify and os.name == "posix" and os.uname().sysname == "Linux":
+                assert watcher.backend == "inotify"
+            for i in range(5):
+                write_atomic(str(path), json.dumps({"version": i}))
+                await asyncio.sleep(0.01)
+            await wait_for(lambda: changes)
+            await asyncio.sleep(0.2)
+        finally:
+            await watcher.stop()
+
+        assert changes == [json.dumps({"version": 4})]
+
+    @pytest.mark.asyncio
+    async def test_unrelated_files_are_ignored(self, tmp_path):
+        path = tmp_path / "limits.json"
+        on_change = AsyncMock()
+        watcher = FileWatcher(str(path), on_change, debounce=0.05)
+        await watcher.start()
+        try:
+            (tmp_path / "other.json").write_text("{}", encoding="utf-8")
+            await asyncio.sleep(0.2)
+            on_change.assert_not_called()
+
+            path.write_text("{}", encoding="utf-8")
+            await wait_for(lambda: on_change.await_count == 1)
+        finally:
+            await watcher.stop()
+
+
+@pytest.mark.unit
+class TestLimitsSnapshot:
+    """LimitsService reads and LimitsHotReload swaps."""
+
+    def test_reads_do_not_touch_filesystem(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "limits.json").write_text(json.dumps({**VALID_LIMITS, "max_links_per_message": 7}), encoding="utf-8")
+
+        first = LimitsService().get_current_limits()
+        assert first["max_links_per_message"] == 7
+
+        monkeypatch.setattr(builtins, "open", MagicMock(side_effect=AssertionError("file access")))
+        monkeypatch.setattr(os, "stat", MagicMock(side_effect=AssertionError("stat")))
+        for _ in range(100):
+            assert LimitsService().get_current_limits() is first
+
+        with pytest.raises(TypeError):
+            first["max_links_per_message"] = 1
+
+    @pytest.mark.asyncio
+    async def test_hot_reload_swaps_valid_and_rejects_invalid(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        write_atomic("limits.json", json.dumps(VALID_LIMITS))
+        bot = MagicMock()
+        bot.send_message = AsyncMock()
+        service = LimitsService()
+        hot_reload = LimitsHotReload(service, bot, [1])
+        hot_reload.watcher.debounce = 0.05
+
+        await hot_reload.start()
+        try:
+            assert service.get_current_limits()["max_links_per_message"] == 3
+
+            write_atomic("limits.json", json.dumps({**VALID_LIMITS, "max_links_per_message": 5}))
+            await wait_for(lambda: service.get_current_limits()["max_links_per_message"] == 5)
+            live = service.get_current_limits()
+
+            sent = bot.send_message.await_count
+            write_atomic("limits.json", json.dumps({**VALID_LIMITS, "suspicion_threshold": 7}))
+            await wait_for(lambda: bot.send_message.await_count > sent)
+            assert service.get_current_limits() is live
+
+            sent = bot.send_message.await_count
+            write_atomic("limits.json", "{not json")
+            await wait_for(lambda: bot.send_message.await_count > sent)
+            assert service.get_current_limits() is live
+            assert "Ошибка" in bot.send_message.await_args.kwargs["text"]
+        finally:
+            await hot_reload.stop()
+
+    def test_update_limit_validates_and_persists(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        service = LimitsService()
+
+        assert service.update_limit("max_links_per_message", 9) is True
+        assert service.get_current_limits()["max_links_per_message"] == 9
+        assert json.loads((tmp_path / "limits.json").read_text(encoding="utf-8"))["max_links_per_message"] == 9
+
+        assert service.update_limit("suspicion_threshold", 3.0) is False
+        assert service.get_current_limits()["suspicion_threshold"] != 3.0
@@ -0,0 +1,195 @@
+"""
+Tests for the spam media fingerprint store
+"""
+
+import datetime
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from aiogram.types import Chat, Document, Message, PhotoSize, User
+
+from app.services.media_fingerprints import MediaFingerprintStore, get_media_fingerprints
+from app.services.media_groups import MediaGroupCollector, get_media_groups
+from app.services.shared_cache import MEDIA_FINGERPRINT_NAMESPACE, MISSING, SharedCache
+from app.services.source_reputation import get_source_reputation
+
+
+def make_photo(unique_id="spam-photo", caption=None, message_id=1, media_group_id=None, forward_from_chat=None):
+    return Message(
+        message_id=message_id,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        photo=[
+            PhotoSize(file_id="small", file_unique_id=f"{unique_id}-small", width=90, height=90, file_size=1000),
+            PhotoSize(file_id="large", file_unique_id=unique_id, width=800, height=800, file_size=90000),
+        ],
+        caption=caption,
+        media_group_id=media_group_id,
+        forward_from_chat=forward_from_chat,
+    )
+
+
+@pytest.mark.unit
+class TestMediaFingerprintStore:
+    """Bounded LRU of spam media"""
+
+    @pytest.mark.asyncio
+    async def test_record_and_find(self):
+        store = MediaFingerprintStore()
+        store._persist = AsyncMock()
+
+        store.record([("a", "photo"), ("a", "photo"), (None, "video")])
+
+        assert store.find(["x", None, "a"]) == "a"
+        assert store.find(["x"]) is None
+        assert len(store) == 1
+        assert store.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_least_recently_seen_is_evicted(self):
+        store = MediaFingerprintStore(max_entries=3)
+        store._persist = AsyncMock()
+
+        store.record([("a", "photo"), ("b", "photo"), ("c", "photo")])
+        assert store.find(["a"]) == "a"
+        store.record([("d", "photo")])
+
+        assert "a" in store and "d" in store
+        assert "b" not in store
+        assert store.get_stats()["evicted"] == 1
+
+    @pytest.mark.asyncio
+    async def test_persist_and_warm_most_recent(self, session_factory):
+        store = MediaFingerprintStore(session_factory=session_factory)
+        for i, unique_id in enumerate(["old", "mid", "new"]):
+            store.record([(unique_id, "photo")], now=1_700_000_000 + i)
+        store.record([("mid", "photo")], now=1_700_000_010)
+        await store.drain()
+
+        warmed = MediaFingerprintStore(max_entries=2, session_factory=session_factory)
+        async with session_factory() as session:
+            assert await warmed.warm(session) == 2
+        assert "mid" in warmed and "new" in warmed and "old" not in warmed
+        assert warmed._entries["mid"].detections == 2
+
+    @pytest.mark.asyncio
+    async def test_shared_between_replicas(self):
+        cache = SharedCache()
+        store = MediaFingerprintStore()
+        store._persist = AsyncMock()
+        store.subscribe(cache)
+
+        with patch.object(cache, "broadcast_nowait") as broadcast:
+            store.record([("local", "video")])
+        broadcast.assert_called_once_with(MEDIA_FINGERPRINT_NAMESPACE, "local", "video")
+
+        payload = {"ns": MEDIA_FINGERPRINT_NAMESPACE, "key": "remote", "value": "photo", "notify": True, "origin": "other"}
+        cache.handle_invalidation(json.dumps(payload))
+        assert store.find(["remote"]) == "remote"
+        assert store.get_stats()["remote"] == 1
+        # The store is the only copy
+        assert cache.get_local(MEDIA_FINGERPRINT_NAMESPACE, "remote") is MISSING
+
+
+@pytest.mark.unit
+class TestLinkServiceMediaFingerprints:
+    """Known spam media is removed without further analysis"""
+
+    @pytest.mark.asyncio
+    async def test_deleted_spam_media_is_recognized_when_reposted(self, make_link_service):
+        get_media_fingerprints()._persist = AsyncMock()
+        service = make_link_service()
+        spam = make_photo(caption="signals t.me/free_signals_bot")
+
+        assert await service.handle_bot_link_detection(spam, await service.check_message_for_bot_links(spam))
+        assert "spam-photo" in get_media_fingerprints()
+        assert "spam-photo-small" not in get_media_fingerprints()
+
+        repost = make_photo(caption="totally new caption")
+        with patch("app.services.links.get_keyword_engine") as keyword_engine:
+            results = await service.check_message_for_bot_links(repost)
+        keyword_engine.assert_not_called()
+        assert results == [("known_spam_media", True)]
+        assert await service.handle_bot_link_detection(repost, results)
+
+    @pytest.mark.asyncio
+    async def test_reply_to_known_spam_media_is_not_flagged(self, make_link_service):
+        get_media_fingerprints()._persist = AsyncMock()
+        get_media_fingerprints().record([("spam-photo", "photo")])
+        service = make_link_service()
+        reply = Message(
+            message_id=2,
+            date=datetime.datetime.now(),
+            chat=Chat(id=-100, type="supergroup"),
+            from_user=User(id=43, is_bot=False, first_name="Other"),
+            text="Опять этот спам",
+            reply_to_message=make_photo(),
+        )
+
+        assert await service.check_message_for_bot_links(reply) == []
+
+    @pytest.mark.asyncio
+    async def test_known_document_skips_document_analysis(self, make_link_service):
+        get_media_fingerprints()._persist = AsyncMock()
+        get_media_fingerprints().record([("spam-doc", "document")])
+        service = make_link_service()
+        service._is_document_suspicious = AsyncMock()
+        message = Message(
+            message_id=1,
+            date=datetime.datetime.now(),
+            chat=Chat(id=-100, type="supergroup"),
+            from_user=User(id=42, is_bot=False, first_name="User"),
+            document=Document(file_id="doc", file_unique_id="spam-doc", file_size=100),
+        )
+
+        assert await service._check_media_for_suspicious_content(message) == [("known_spam_media", True)]
+        service._is_document_suspicious.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_heuristic_only_takedown_is_not_learned(self, make_link_service):
+        get_media_fingerprints()._persist = AsyncMock()
+        service = make_link_service()
+        for _ in range(5):
+            get_source_reputation().record(-200, is_spam=True)
+        forwarded = make_photo(forward_from_chat=Chat(id=-200, type="channel", title="News"))
+
+        results = await service.check_message_for_bot_links(forwarded)
+        assert results == [("forwarded_media", True)]
+        assert await service.handle_bot_link_detection(forwarded, results)
+        assert len(get_media_fingerprints()) == 0
+
+    @pytest.mark.asyncio
+    async def test_caption_keyword_takedown_is_not_learned(self, make_link_service):
+        get_media_fingerprints()._persist = AsyncMock()
+        service = make_link_service()
+        forwarded = make_photo(caption="Подписывайтесь на наш канал", forward_from_chat=Chat(id=-300, type="channel"))
+
+        results = await service.check_message_for_bot_links(forwarded)
+        assert results == [("suspicious_media", True)]
+        with patch("app.services.links.get_image_hashes") as image_hashes:
+            assert await service.handle_bot_link_detection(forwarded, results)
+
+        image_hashes.return_value.learn.assert_not_called()
+        assert len(get_media_fingerprints()) == 0
+        score = get_source_reputation().get(-300)
+        assert score.spam == 0 and score.clean == 1
+
+    @pytest.mark.asyncio
+    async def test_album_parts_are_learned_and_matched(self, make_link_service):
+        get_media_fingerprints()._persist = AsyncMock()
+        collector = get_media_groups()
+        collector.latency = 0.01
+        await collector.collect(make_photo("part-1", caption="t.me/free_signals_bot", media_group_id="album"))
+        service = make_link_service()
+
+        lead = make_photo("part-1", caption="t.me/free_signals_bot", media_group_id="album")
+        # Parts of the album arrived while collecting
+        collector._remember((-100, "album"), [2], [("part-2", "photo")])
+        assert await service.handle_bot_link_detection(lead, await service.check_message_for_bot_links(lead))
+
+        assert "part-1" in get_media_fingerprints() and "part-2" in get_media_fingerprints()
+        other_album = MediaGroupCollector()
+        assert other_album.fingerprints(-100, "album") == ()
+        assert await service.check_message_for_bot_links(make_photo("part-2")) == [("known_spam_media", True)]
@@ -0,0 +1,142 @@
+"""
+Tests for album (media group) collection
+"""
+
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, MessageEntity, PhotoSize, User
+
+from app.middlewares.media_group import MEDIA_GROUP_KEY, MediaGroupMiddleware
+from app.services.links import LinkService
+from app.services.media_groups import MediaGroupCollector, combine_album, get_media_groups
+from app.services.moderation import ModerationService
+
+CHAT_ID = -100
+
+
+def make_part(message_id, media_group_id="album-1", caption=None, caption_entities=None):
+    return Message(
+        message_id=message_id,
+        date=datetime.datetime.now(),
+        chat=Chat(id=CHAT_ID, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        photo=[PhotoSize(file_id=f"file{message_id}", file_unique_id=f"unique{message_id}", width=100, height=100)],
+        media_group_id=media_group_id,
+        caption=caption,
+        caption_entities=caption_entities,
+    )
+
+
+@pytest.mark.unit
+class TestMediaGroupCollector:
+    """Collecting album parts"""
+
+    @pytest.mark.asyncio
+    async def test_first_part_returns_whole_album(self):
+        collector = MediaGroupCollector(latency=0.05)
+        parts = [make_part(message_id) for message_id in (5, 3, 4)]
+
+        results = await asyncio.gather(*[collector.collect(part) for part in parts])
+
+        assert [part.message_id for part in results[0]] == [3, 4, 5]
+        assert results[1:] == [None, None]
+        assert collector.parts(CHAT_ID, "album-1") == (3, 4, 5)
+        assert collector.get_stats()["folded_parts"] == 2
+
+    @pytest.mark.asyncio
+    async def test_late_part_is_checked_alone_but_remembered(self):
+        collector = MediaGroupCollector(latency=0.01)
+        await collector.collect(make_part(1))
+
+        assert [part.message_id for part in await collector.collect(make_part(2))] == [2]
+        assert collector.parts(CHAT_ID, "album-1") == (1, 2)
+        assert collector.parts(CHAT_ID, "other") == ()
+        assert collector.parts(CHAT_ID, None) == ()
+
+    @pytest.mark.asyncio
+    async def test_max_wait_bounds_latency(self):
+        collector = MediaGroupCollector(latency=0.05, max_wait=0.1)
+
+        async def trickle():
+            for message_id in range(2, 10):
+                await asyncio.sleep(0.03)
+                await collector.collect(make_part(message_id))
+
+        album, _ = await asyncio.gather(collector.collect(make_part(1)), trickle())
+        assert 2 <= len(album) < 9
+
+    def test_combine_album_merges_captions_with_utf16_offsets(self):
+        first = make_part(1, caption="Привет 👋 @a", caption_entities=[MessageEntity(type="mention", offset=10, length=2)])
+        second = make_part(2)
+        third = make_part(3, caption="t.me/x", caption_entities=[MessageEntity(type="url", offset=0, length=6)])
+
+        combined = combine_album([first, second, third])
+
+        assert combined.message_id == 1
+        assert combined.caption == "Привет 👋 @a\nt.me/x"
+        assert [(entity.offset, entity.length) for entity in combined.caption_entities] == [(10, 2), (13, 6)]
+        assert combine_album([second, third]) is third
+        assert combine_album([second]) is second
+
+
+@pytest.mark.unit
+class TestMediaGroupMiddleware:
+    """Handlers run once per album"""
+
+    @pytest.mark.asyncio
+    async def test_handler_called_once_per_album(self):
+        middleware = MediaGroupMiddleware(MediaGroupCollector(latency=0.05))
+        handler = AsyncMock(return_value="handled")
+        parts = [make_part(1), make_part(2, caption="spam"), make_part(3)]
+
+        results = await asyncio.gather(*[middleware(handler, part, {}) for part in parts])
+
+        assert results == ["handled", None, None]
+        handler.assert_awaited_once()
+        event, data = handler.call_args.args
+        assert event.message_id == 2 and event.caption == "spam"
+        assert [part.message_id for part in data[MEDIA_GROUP_KEY]] == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_single_messages_pass_through(self):
+        middleware = MediaGroupMiddleware(MediaGroupCollector(latency=10))
+        handler = AsyncMock(return_value="handled")
+
+        assert await middleware(handler, make_part(1, media_group_id=None), {}) == "handled"
+        handler.assert_awaited_once()
+
+
+@pytest.mark.unit
+class TestAlbumTakedown:
+    """A spam album is deleted with one call"""
+
+    @pytest.mark.asyncio
+    async def test_takedown_deletes_album_in_one_call(self):
+        bot = MagicMock()
+        bot.delete_message = AsyncMock()
+        bot.delete_messages = AsyncMock()
+        bot.ban_chat_member = AsyncMock()
+        service = ModerationService(bot, MagicMock())
+        service._record_takedown = AsyncMock()
+        service.purge_user_messages = AsyncMock()
+
+        result = await service.takedown(CHAT_ID, 2, user_id=42, album_message_ids=(1, 2, 3))
+
+        assert result.deleted and result.banned
+        bot.delete_message.assert_not_awaited()
+        bot.delete_messages.assert_awaited_once_with(chat_id=CHAT_ID, message_ids=[2, 1, 3])
+        await asyncio.sleep(0)
+        service.purge_user_messages.assert_awaited_once_with(CHAT_ID, 42, exclude=[2, 1, 3])
+
+    @pytest.mark.asyncio
+    async def test_link_service_passes_album_parts(self):
+        get_media_groups()._remember((CHAT_ID, "album-1"), [1, 2, 3])
+        service = LinkService(MagicMock(), AsyncMock())
+        service.moderation_service.takedown = AsyncMock()
+
+        assert await service.handle_bot_link_detection(make_part(1), [("suspicious_media", True)])
+
+        assert service.moderation_service.takedown.call_args.kwargs["album_message_ids"] == (1, 2, 3)
@@ -0,0 +1,182 @@
+"""
+Tests for one-pass message features
+"""
+
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Document, Message, MessageEntity, PhotoSize, User
+
+from app.middlewares.message_features import MessageFeaturesMiddleware
+from app.middlewares.validation import ValidationMiddleware
+from app.services.links import LinkService
+from app.utils.message_features import (
+    MESSAGE_FEATURES_KEY,
+    compute_char_stats,
+    extract_features,
+    find_link_candidates,
+)
+from app.utils.text_normalization import skeleton
+
+
+def make_message(text=None, chat_type="supergroup", **kwargs):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type=chat_type),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        text=text,
+        **kwargs,
+    )
+
+
+SPAM_WORDS = ["реклама", "заработок", "быстро", "легко", "без вложений", "кликни", "перейди"]
+
+
+def legacy_is_suspicious_text(text):
+    """Text part of the previous ValidationMiddleware._is_suspicious_message."""
+    lowered = text.lower()
+    return (
+        "http" in lowered
+        or "www." in lowered
+        or any(word in lowered for word in SPAM_WORDS)
+        or len([c for c in text if c.isupper()]) > len(text) * 0.7
+        or any(text.count(c) > 5 for c in set(text))
+    )
+
+
+@pytest.mark.unit
+class TestExtractFeatures:
+    """extract_features()"""
+
+    def test_char_stats_match_naive_counts(self):
+        text = "AAAbb  12!!!!!? Привет ЖЖЖЖ"
+        stats = compute_char_stats(text)
+
+        assert stats.length == len(text)
+        assert stats.upper == sum(c.isupper() for c in text)
+        assert stats.letters == sum(c.isalpha() for c in text)
+        assert stats.digits == sum(c.isdigit() for c in text)
+        assert stats.spaces == sum(c.isspace() for c in text)
+        assert stats.max_char_frequency == max(text.count(c) for c in set(text))
+        assert stats.max_char_run == 5
+        assert stats.other == 6
+        assert stats.upper_ratio == pytest.approx(stats.upper / len(text))
+
+    def test_empty_text(self):
+        stats = compute_char_stats("")
+        assert stats.length == 0
+        assert stats.upper_ratio == 0.0
+
+    def test_link_candidates_in_text_order(self):
+        text = "@First t.me/second_bot telegram.me/third @fourth"
+        assert find_link_candidates(text) == (
+            ("username_mention", "first"),
+            ("bot_link", "second_bot"),
+            ("bot_link", "third"),
+            ("username_mention", "fourth"),
+        )
+
+    def test_normalization_and_casefold(self):
+        features = extract_features(make_message("Ｔ．ＭＥ/SpamBot СТРАССЕ Straße"))
+
+        assert features.normalized.startswith("T.ME/SpamBot")
+        assert features.skeleton.endswith("strasse")
+        assert features.text_links == (("bot_link", "spambot"),)
+
+    def test_entities_urls_and_mentions(self):
+        text = "see https://example.com and @Someone"
+        message = make_message(
+            text,
+            entities=[
+                MessageEntity(type="url", offset=4, length=19),
+                MessageEntity(type="mention", offset=28, length=8),
+                MessageEntity(type="text_link", offset=0, length=3, url="https://hidden.example"),
+            ],
+        )
+        features = extract_features(message)
+
+        assert features.urls == {"https://example.com", "https://hidden.example"}
+        assert features.mentions == {"someone"}
+        assert len(features.entities) == 3
+
+    def test_media_descriptor(self):
+        photo = extract_features(
+            make_message(
+                photo=[
+                    PhotoSize(file_id="s", file_unique_id="small", width=90, height=90, file_size=100),
+                    PhotoSize(file_id="l", file_unique_id="large", width=900, height=900, file_size=9000),
+                ],
+                caption="Канал с БОТОМ",
+                media_group_id="album",
+            )
+        )
+        assert (photo.media.kind, photo.media.file_unique_id, photo.media.file_size) == ("photo", "large", 9000)
+        assert photo.media.media_group_id == "album"
+        assert photo.caption_skeleton == skeleton("канал с ботом")
+        assert not photo.is_media_without_caption
+
+        document = extract_features(
+            make_message(
+                document=Document(
+                    file_id="d", file_unique_id="doc", file_name="qr.png", mime_type="image/png", file_size=10
+                )
+            )
+        )
+        assert (document.media.kind, document.media.file_name, document.media.mime_type) == ("document", "qr.png", "image/png")
+        assert document.is_media_without_caption
+
+
+@pytest.mark.unit
+class TestFeatureConsumers:
+    """Middleware, validation and link checks reuse the shared features."""
+
+    @pytest.mark.asyncio
+    async def test_middleware_stores_features_once(self):
+        middleware = MessageFeaturesMiddleware()
+        message = make_message("hello")
+        data = {}
+        handler = AsyncMock(return_value="ok")
+
+        assert await middleware(handler, message, data) == "ok"
+        features = data[MESSAGE_FEATURES_KEY]
+        assert features.text == "hello"
+
+        await middleware(handler, message, data)
+        assert data[MESSAGE_FEATURES_KEY] is features
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "обычное сообщение",
+            "смотри http://example.com",
+            "Быстро и ЛЕГКО",
+            "ABCDEFGHIJ k",
+            "!!!!!! wow",
+            "abcdefabcdefabcdefabcdefabcdefabcdef",
+            "ok",
+        ],
+    )
+    def test_is_suspicious_matches_previous_rules(self, text):
+        middleware = ValidationMiddleware()
+        message = make_message(text)
+
+        assert middleware._is_suspicious_message(message, extract_features(message)) == legacy_is_suspicious_text(text)
+
+    @pytest.mark.asyncio
+    async def test_link_service_uses_precomputed_candidates(self):
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+        service = LinkService(MagicMock(), db)
+
+        message = make_message("join t.me/spam_bot or @friend")
+        features = extract_features(message)
+
+        assert await service.check_message_for_bot_links(message, features) == [
+            ("bot_link", True),
+            ("username_mention", False),
+        ]
+        assert await service.check_message_for_bot_links(message) == await service._extract_bot_links_from_text(
+            message.text
+        )
@@ -0,0 +1,114 @@
+"""
+Tests for recent-message ring buffer and batched purge
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.middlewares.recent_messages import RecentMessagesMiddleware
+from app.services import message_history
+from app.services.message_history import MessageIdRing, RecentMessageIndex
+from app.services.moderation import ModerationService, drain_side_effects
+
+
+@pytest.fixture
+def recent_index(monkeypatch):
+    """Fresh global recent-message index."""
+    index = RecentMessageIndex(per_user=250, max_users=100)
+    monkeypatch.setattr(message_history, "_recent_messages", index)
+    return index
+
+
+@pytest.mark.unit
+class TestMessageIdRing:
+    """Fixed-capacity ring buffer."""
+
+    def test_keeps_newest_ids_in_order(self):
+        ring = MessageIdRing(3)
+        for message_id in range(1, 6):
+            ring.append(message_id)
+
+        assert len(ring) == 3
+        assert ring.drain() == [3, 4, 5]
+        assert len(ring) == 0
+
+    def test_index_evicts_least_recent_user(self):
+        index = RecentMessageIndex(per_user=4, max_users=2)
+        index.record(-1, 1, 10)
+        index.record(-1, 2, 20)
+        index.record(-1, 1, 11)  # user 1 becomes most recent
+        index.record(-1, 3, 30)  # evicts user 2
+
+        assert index.pop(-1, 2) == []
+        assert index.pop(-1, 1) == [10, 11]
+        assert index.get_stats()["evicted_users"] == 1
+
+
+@pytest.mark.unit
+class TestPurge:
+    """ModerationService.purge_user_messages."""
+
+    @pytest.mark.asyncio
+    async def test_purge_uses_batches_of_100(self, recent_index):
+        for message_id in range(1, 251):
+            recent_index.record(-100, 42, message_id)
+
+        bot = MagicMock()
+        bot.delete_messages = AsyncMock(return_value=True)
+        service = ModerationService(bot, MagicMock())
+
+        purged = await service.purge_user_messages(-100, 42, exclude=(250,))
+
+        assert purged == 249
+        assert bot.delete_messages.await_count == 3
+        batch_sizes = sorted(len(call.kwargs["message_ids"]) for call in bot.delete_messages.await_args_list)
+        assert batch_sizes == [49, 100, 100]
+        assert recent_index.pop(-100, 42) == []
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_not_counted(self, recent_index):
+        for message_id in range(1, 151):
+            recent_index.record(-100, 42, message_id)
+
+        bot = MagicMock()
+        bot.delete_messages = AsyncMock(side_effect=[True, RuntimeError("message can't be deleted")])
+        service = ModerationService(bot, MagicMock())
+
+        assert await service.purge_user_messages(-100, 42) == 100
+
+    @pytest.mark.asyncio
+    async def test_takedown_purges_after_ban(self, recent_index):
+        for message_id in (1, 2, 3):
+            recent_index.record(-100, 42, message_id)
+
+        bot = MagicMock()
+        bot.delete_message = AsyncMock(return_value=True)
+        bot.ban_chat_member = AsyncMock(return_value=True)
+        bot.delete_messages = AsyncMock(return_value=True)
+        service = ModerationService(bot, MagicMock(), session_factory=MagicMock())
+        service._record_takedown = AsyncMock()
+
+        await service.takedown(-100, 3, user_id=42)
+        await drain_side_effects()
+
+        bot.delete_messages.assert_awaited_once_with(chat_id=-100, message_ids=[1, 2])
+
+    @pytest.mark.asyncio
+    async def test_middleware_records_group_messages_only(self, recent_index):
+        middleware = RecentMessagesMiddleware(recent_index)
+        handler = AsyncMock(return_value="handled")
+        user = User(id=42, is_bot=False, first_name="Spammer")
+
+        group_message = Message(
+            message_id=5, date=datetime.now(), chat=Chat(id=-100, type="supergroup"), from_user=user, text="spam"
+        )
+        private_message = Message(message_id=6, date=datetime.now(), chat=Chat(id=42, type="private"), from_user=user)
+
+        assert await middleware(handler, group_message, {}) == "handled"
+        await middleware(handler, private_message, {})
+
+        assert recent_index.pop(-100, 42) == [5]
+        assert recent_index.pop(42, 42) == []
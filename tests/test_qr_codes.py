@@ -0,0 +1,192 @@
+"""
+Tests for QR code decoding of captionless media
+"""
+
+import asyncio
+import datetime
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Document, Message, PhotoSize, User
+
+from app.services.blocklist import Blocklist
+from app.services.qr_codes import QrCodeService, get_qr_codes
+from app.utils.qr_codes import QR_DECODE_AVAILABLE
+
+
+def text_decoder(data: bytes):
+    """Stand-in decoder: test "images" hold the QR content, "-" for none."""
+    return () if data == b"-" else (data.decode(),)
+
+
+def slow_decoder(data: bytes):
+    time.sleep(0.2)
+    return ()
+
+
+def make_bot(files):
+    bot = MagicMock()
+
+    async def download(file_id, destination=None, **kwargs):
+        bot.downloads += 1
+        return io.BytesIO(files[file_id])
+
+    bot.downloads = 0
+    bot.download = download
+    return bot
+
+
+def make_service(decoder=text_decoder, **kwargs):
+    service = QrCodeService(decoder=decoder, executor=ThreadPoolExecutor(max_workers=2), **kwargs)
+    assert service.start()
+    return service
+
+
+def make_message(photo=None, document=None, caption=None):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        photo=photo,
+        document=document,
+        caption=caption,
+    )
+
+
+def photo_sizes(file_id, large_size=200_000):
+    return [
+        PhotoSize(file_id=f"{file_id}-s", file_unique_id=f"u-{file_id}-s", width=90, height=90, file_size=2_000),
+        PhotoSize(file_id=file_id, file_unique_id=f"u-{file_id}", width=1280, height=1280, file_size=large_size),
+    ]
+
+
+@pytest.mark.unit
+class TestQrCodeService:
+    """Bounded, cached decoding"""
+
+    def test_select_media(self):
+        service = make_service(max_file_size=100_000)
+
+        assert service.select_media(make_message(photo=photo_sizes("p", 50_000))).file_id == "p"
+        # The largest size over the cap: the next one that fits
+        assert service.select_media(make_message(photo=photo_sizes("p"))).file_id == "p-s"
+        image = Document(file_id="d", file_unique_id="u-d", mime_type="image/png", file_size=10_000)
+        assert service.select_media(make_message(document=image)) is image
+        pdf = Document(file_id="d", file_unique_id="u-d", mime_type="application/pdf", file_size=10_000)
+        assert service.select_media(make_message(document=pdf)) is None
+        assert QrCodeService().select_media(make_message(photo=photo_sizes("p", 50_000))) is None
+
+    @pytest.mark.asyncio
+    async def test_decode_is_cached_per_file_unique_id(self):
+        service = make_service()
+        bot = make_bot({"qr": b"https://t.me/free_signals_bot", "plain": b"-"})
+        qr = photo_sizes("qr")[1]
+        plain = photo_sizes("plain")[1]
+
+        assert await service.decode(bot, qr) == ("https://t.me/free_signals_bot",)
+        assert await service.decode(bot, qr) == ("https://t.me/free_signals_bot",)
+        assert await service.decode(bot, plain) == ()
+        assert await service.decode(bot, plain) == ()
+
+        assert bot.downloads == 2
+        assert service.get_stats()["cache_hits"] == 2
+        assert service.get_stats()["found"] == 1
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_errors_are_not_cached(self):
+        service = make_service(decoder=slow_decoder, timeout=0.05)
+        bot = make_bot({"qr": b"data"})
+
+        assert await service.decode(bot, photo_sizes("qr")[1]) is None
+        assert await service.decode(MagicMock(download=AsyncMock(side_effect=OSError("network"))), photo_sizes("x")[1]) is None
+
+        stats = service.get_stats()
+        assert stats["timeouts"] == 1 and stats["errors"] == 1 and stats["cached"] == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_is_bounded(self):
+        service = make_service(decoder=slow_decoder, workers=1, queue_size=2, timeout=5)
+        bot = make_bot({f"p{i}": b"data" for i in range(4)})
+
+        results = await asyncio.gather(*[service.decode(bot, photo_sizes(f"p{i}")[1]) for i in range(4)])
+
+        assert results == [(), (), None, None]
+        assert service.get_stats()["dropped"] == 2
+        assert service.get_stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_timed_out_jobs_keep_their_slots(self):
+        service = make_service(decoder=slow_decoder, workers=2, queue_size=4, timeout=0.05)
+        bot = make_bot({f"p{i}": b"data" for i in range(8)})
+
+        results = await asyncio.gather(*[service.decode(bot, photo_sizes(f"p{i}")[1]) for i in range(4)])
+
+        assert results == [None] * 4
+        # The last two decodes still run in the pool and keep their places in the queue
+        assert service.get_stats()["queued"] == 2
+        results = await asyncio.gather(*[service.decode(bot, photo_sizes(f"p{i}")[1]) for i in range(4, 8)])
+        assert results == [None] * 4
+        assert service.get_stats()["dropped"] == 2
+
+        await asyncio.sleep(0.5)
+        assert service.get_stats()["queued"] == 0
+
+    def test_disabled_without_decoder_libraries(self):
+        assert QrCodeService().start() is QR_DECODE_AVAILABLE
+
+
+@pytest.mark.unit
+class TestLinkServiceQrCodes:
+    """QR code content goes through the link and blocklist checks"""
+
+    def setup_link_service(self, make_link_service, files):
+        qr_codes = get_qr_codes()
+        qr_codes._decoder = text_decoder
+        qr_codes._executor = ThreadPoolExecutor(max_workers=1)
+        qr_codes.start()
+        return make_link_service(bot=make_bot(files))
+
+    @pytest.mark.asyncio
+    async def test_bot_link_in_qr_code(self, make_link_service):
+        service = self.setup_link_service(make_link_service, {"qr": b"https://t.me/free_signals_bot"})
+
+        results = await service.check_message_for_bot_links(make_message(photo=photo_sizes("qr")))
+
+        assert ("qr_bot_link", True) in results
+        assert service._has_spam_evidence(results)
+
+    @pytest.mark.asyncio
+    async def test_blocklisted_domain_in_qr_code(self, make_link_service, monkeypatch):
+        service = self.setup_link_service(make_link_service, {"qr": b"Scan me: https://casino.example/promo"})
+        blocklist = MagicMock(spec=Blocklist)
+        blocklist.is_url_blocked.side_effect = lambda url: "casino.example" in url
+        monkeypatch.setattr("app.services.links.get_blocklist", lambda: blocklist)
+
+        results = await service.check_message_for_bot_links(make_message(photo=photo_sizes("qr")))
+
+        assert results == [("qr_blocked_domain", True)]
+
+    @pytest.mark.asyncio
+    async def test_decoded_image_document_is_not_guessed(self, make_link_service):
+        service = self.setup_link_service(make_link_service, {"doc": b"-"})
+        small_png = Document(file_id="doc", file_unique_id="u-doc", mime_type="image/png", file_size=5_000)
+
+        assert await service.check_message_for_bot_links(make_message(document=small_png)) == []
+
+        # Not decoded (queue full): the size/MIME guess still applies
+        get_qr_codes().queue_size = 0
+        get_qr_codes().clear()
+        results = await service.check_message_for_bot_links(make_message(document=small_png))
+        assert results == [("document_without_caption", True)]
+
+    @pytest.mark.asyncio
+    async def test_captioned_media_is_not_decoded(self, make_link_service):
+        service = self.setup_link_service(make_link_service, {"qr": b"https://t.me/free_signals_bot"})
+
+        await service.check_message_for_bot_links(make_message(photo=photo_sizes("qr"), caption="holiday"))
+
+        assert service.bot.downloads == 0
@@ -0,0 +1,224 @@
+"""
+Tests for two-tier shared cache
+"""
+
+import fnmatch
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.bots import BotService
+from app.services.links import LinkService
+from app.services.shared_cache import MISSING, SharedCache
+
+
+@pytest.fixture
+def redis_service():
+    """Mocked RedisService with in-memory key storage."""
+    storage = {}
+
+    async def set_(name, value, ex=None):
+        storage[name] = (value, ex)
+        return True
+
+    async def get(name):
+        entry = storage.get(name)
+        return entry[0] if entry else None
+
+    async def delete(*names):
+        return sum(1 for name in names if storage.pop(name, None) is not None)
+
+    async def scan_iter(match, count=None):
+        for name in list(storage):
+            if fnmatch.fnmatchcase(name, match):
+                yield name
+
+    redis = MagicMock()
+    redis.set = AsyncMock(side_effect=set_)
+    redis.get = AsyncMock(side_effect=get)
+    redis.delete = AsyncMock(side_effect=delete)
+    redis.scan_iter = scan_iter
+    redis.publish = AsyncMock(return_value=1)
+
+    service = MagicMock()
+    service.redis = redis
+    service.storage = storage
+    return service
+
+
+@pytest.mark.unit
+class TestSharedCacheLocal:
+    """Local tier behaviour."""
+
+    def test_get_local_miss_and_hit(self):
+        cache = SharedCache()
+        assert cache.get_local("ns", "k") is MISSING
+
+        cache.set_local("ns", "k", False)
+        assert cache.get_local("ns", "k") is False
+
+        stats = cache.get_stats()
+        assert stats["local_hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_local_ttl_expiry(self):
+        cache = SharedCache(local_ttl=0.01)
+        cache.set_local("ns", "k", "v")
+        time.sleep(0.02)
+        assert cache.get_local("ns", "k") is MISSING
+
+    def test_zero_ttl_never_expires(self):
+        cache = SharedCache(local_ttl=0.01)
+        cache.set_local("ns", "k", "v", ttl=0)
+        time.sleep(0.02)
+        assert cache.get_local("ns", "k") == "v"
+
+    def test_local_tier_is_bounded_lru(self):
+        cache = SharedCache(local_max_entries=2)
+        cache.set_local("ns", "a", 1)
+        cache.set_local("ns", "b", 2)
+        assert cache.get_local("ns", "a") == 1
+
+        cache.set_local("ns", "c", 3)
+
+        assert cache.get_local("ns", "b") is MISSING
+        assert cache.get_local("ns", "a") == 1 and cache.get_local("ns", "c") == 3
+        assert cache.get_stats()["local_evictions"] == 1
+        assert cache.get_stats()["local_entries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_without_redis(self):
+        cache = SharedCache()
+        cache.set_local("ns", "a", 1)
+        cache.set_local("ns", "b", 2)
+
+        await cache.invalidate("ns", "a")
+        assert cache.get_local("ns", "a") is MISSING
+        assert cache.get_local("ns", "b") == 2
+
+        await cache.invalidate("ns")
+        assert cache.get_local("ns", "b") is MISSING
+
+
+@pytest.mark.unit
+class TestSharedCacheRedis:
+    """Redis tier and cross-replica invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_fills_local(self, redis_service):
+        writer = SharedCache()
+        reader = SharedCache()
+        writer._redis_service = redis_service
+        reader._redis_service = redis_service
+
+        await writer.set("channel_status", "-100", "blocked")
+        assert await reader.get("channel_status", "-100") == "blocked"
+        assert reader.get_stats()["redis_hits"] == 1
+        # A local miss served by Redis is not a miss
+        assert reader.get_stats()["misses"] == 0
+
+        # Second read is served locally
+        assert await reader.get("channel_status", "-100") == "blocked"
+        assert reader.get_stats()["local_hits"] == 1
+
+        assert await reader.get("channel_status", "-200") is MISSING
+        stats = reader.get_stats()
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == round(2 / 3, 4)
+
+    @pytest.mark.asyncio
+    async def test_redis_entries_expire_per_key(self, redis_service):
+        cache = SharedCache(redis_ttl=60)
+        cache._redis_service = redis_service
+
+        await cache.set("bot_whitelist", "a_bot", False)
+        await cache.set("bot_whitelist", "b_bot", True)
+        await cache.set("limits", "current", {})
+
+        assert redis_service.storage[f"{cache.key_prefix}:bot_whitelist:a_bot"] == ("false", 60)
+        await cache.invalidate("bot_whitelist", "a_bot")
+        assert f"{cache.key_prefix}:bot_whitelist:a_bot" not in redis_service.storage
+
+        await cache.invalidate("bot_whitelist")
+        assert list(redis_service.storage) == [f"{cache.key_prefix}:limits:current"]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_broadcasts_to_other_replica(self, redis_service):
+        sender = SharedCache()
+        receiver = SharedCache()
+        sender._redis_service = redis_service
+
+        receiver.set_local("bot_whitelist", "spam_bot", False)
+        await sender.invalidate("bot_whitelist", "spam_bot")
+
+        channel, raw = redis_service.redis.publish.call_args.args
+        assert channel == sender.channel
+        receiver.handle_invalidation(raw.encode("utf-8"))
+
+        assert receiver.get_local("bot_whitelist", "spam_bot") is MISSING
+        assert receiver.get_stats()["invalidations_received"] == 1
+
+    @pytest.mark.asyncio
+    async def test_publish_carries_value(self, redis_service):
+        sender = SharedCache()
+        receiver = SharedCache()
+        sender._redis_service = redis_service
+
+        await sender.publish("limits", "current", {"max_links_per_message": 5})
+        _, raw = redis_service.redis.publish.call_args.args
+        receiver.handle_invalidation(raw)
+
+        assert receiver.get_local("limits", "current") == {"max_links_per_message": 5}
+
+    @pytest.mark.asyncio
+    async def test_broadcast_only_reaches_listeners(self, redis_service):
+        sender = SharedCache()
+        receiver = SharedCache()
+        sender._redis_service = redis_service
+        received = []
+        receiver.add_listener("fingerprints", lambda key, value: received.append((key, value)))
+
+        sender.broadcast_nowait("fingerprints", "spam-photo", "photo")
+        await sender.close()
+        _, raw = redis_service.redis.publish.call_args.args
+        receiver.handle_invalidation(raw)
+
+        assert received == [("spam-photo", "photo")]
+        assert redis_service.storage == {}
+        assert sender.get_local("fingerprints", "spam-photo") is MISSING
+        assert receiver.get_local("fingerprints", "spam-photo") is MISSING
+
+    def test_own_messages_are_ignored(self):
+        cache = SharedCache()
+        cache.set_local("ns", "k", "v")
+        cache.handle_invalidation(json.dumps({"ns": "ns", "key": "k", "origin": cache.instance_id}))
+        assert cache.get_local("ns", "k") == "v"
+
+    def test_malformed_message_is_ignored(self):
+        cache = SharedCache()
+        cache.set_local("ns", "k", "v")
+        cache.handle_invalidation(b"not json")
+        assert cache.get_local("ns", "k") == "v"
+
+
+@pytest.mark.unit
+class TestBotWhitelistCache:
+    """BotService and LinkService share one whitelist cache key per username"""
+
+    @pytest.mark.asyncio
+    async def test_whitelist_is_case_insensitive_across_services(self, db_session):
+        bots = BotService(MagicMock(), db_session)
+        links = LinkService(MagicMock(), db_session)
+
+        # Negative answer cached under the lowercase key
+        assert not await links._is_bot_whitelisted("Signals_Bot")
+
+        assert await bots.add_bot_to_whitelist("Signals_Bot", admin_id=1)
+        assert await links._is_bot_whitelisted("signals_bot")
+        assert await bots.is_bot_whitelisted("SIGNALS_BOT")
+
+        assert await bots.remove_bot_from_whitelist("Signals_Bot", admin_id=1)
+        assert not await links._is_bot_whitelisted("Signals_bot")
+        assert not await bots.is_bot_whitelisted("signals_bot")
@@ -0,0 +1,133 @@
+"""
+Tests for single-flight deduplication of moderation actions
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.moderation import ModerationService, get_moderation_flights
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """SingleFlight registry."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight(ttl=60)
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "done"
+
+        results = await asyncio.gather(*[flights.do("key", work) for _ in range(20)])
+
+        assert results == ["done"] * 20
+        assert calls == 1
+        assert flights.get_stats()["deduplicated_in_flight"] == 19
+
+    @pytest.mark.asyncio
+    async def test_recent_result_reused_within_ttl(self):
+        flights = SingleFlight(ttl=60)
+        work = AsyncMock(return_value=True)
+
+        await flights.do("key", work)
+        await flights.do("key", work)
+        assert work.await_count == 1
+
+        flights.forget("key")
+        await flights.do("key", work)
+        assert work.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_expired_and_rejected_results_are_not_reused(self):
+        flights = SingleFlight(ttl=0)
+        work = AsyncMock(return_value=True)
+        await flights.do("key", work)
+        await flights.do("key", work)
+        assert work.await_count == 2
+
+        flights = SingleFlight(ttl=60)
+        work = AsyncMock(return_value=False)
+        await flights.do("key", work, cache_if=bool)
+        await flights.do("key", work, cache_if=bool)
+        assert work.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_waiters_and_is_not_cached(self):
+        flights = SingleFlight(ttl=60)
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*[flights.do("key", failing) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        assert await flights.do("key", AsyncMock(return_value="ok")) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_registry_size_is_bounded(self):
+        flights = SingleFlight(ttl=60, max_entries=10)
+        for i in range(50):
+            await flights.do(i, AsyncMock(return_value=i))
+        assert flights.get_stats()["recent"] <= 10
+
+
+@pytest.mark.unit
+class TestModerationDeduplication:
+    """ModerationService uses the registry for bans."""
+
+    @pytest.fixture
+    def service(self):
+        bot = MagicMock()
+
+        async def slow_ban(**kwargs):
+            await asyncio.sleep(0.01)
+            return True
+
+        bot.ban_chat_member = AsyncMock(side_effect=slow_ban)
+        bot.delete_message = AsyncMock(return_value=True)
+        bot.unban_chat_member = AsyncMock(return_value=True)
+        bot.get_chat_member = AsyncMock()
+        service = ModerationService(bot, MagicMock(), session_factory=MagicMock())
+        service._update_user_status = AsyncMock()
+        service._log_moderation_action = AsyncMock()
+        service._record_takedown = AsyncMock()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_burst_of_bans_hits_telegram_once(self, service):
+        results = await asyncio.gather(*[service.ban_user(42, -100, 0, "spam") for _ in range(20)])
+
+        assert all(results)
+        assert service.bot.ban_chat_member.await_count == 1
+        assert service._log_moderation_action.await_count == 1
+
+        # Recent duplicate is a no-op too
+        assert await service.ban_user(42, -100, 0, "spam") is True
+        assert service.bot.ban_chat_member.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_burst_takedown_deletes_every_message(self, service):
+        results = await asyncio.gather(*[service.takedown(-100, message_id, user_id=42) for message_id in range(20)])
+
+        assert all(r.deleted and r.banned for r in results)
+        assert service.bot.delete_message.await_count == 20
+        assert service.bot.ban_chat_member.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unban_allows_new_ban(self, service):
+        await service.ban_user(42, -100, 0)
+        service._deactivate_last_ban = AsyncMock()
+        await service.unban_user(42, -100, 0)
+        await service.ban_user(42, -100, 0)
+
+        assert service.bot.ban_chat_member.await_count == 2
+        assert get_moderation_flights().get_stats()["recent"] == 1
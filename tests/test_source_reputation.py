@@ -0,0 +1,149 @@
+"""
+Tests for the forward source reputation store
+"""
+
+import datetime
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, PhotoSize, User
+
+from app.services.source_reputation import ALLOW, DENY, UNKNOWN, SourceReputationStore, get_source_reputation
+
+DAY = 24 * 3600
+SOURCE_ID = -1001234
+
+
+def make_forwarded_photo(caption=None):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        photo=[PhotoSize(file_id="file", file_unique_id="unique", width=100, height=100)],
+        caption=caption,
+        forward_from_chat=Chat(id=SOURCE_ID, type="channel", title="News"),
+    )
+
+
+@pytest.mark.unit
+class TestSourceReputationStore:
+    """Verdicts, decay and persistence"""
+
+    def test_verdicts_need_enough_evidence(self):
+        store = SourceReputationStore(min_evidence=3)
+
+        store.record(1, is_spam=False)
+        store.record(1, is_spam=False)
+        assert store.verdict(1) == UNKNOWN
+        store.record(1, is_spam=False)
+        assert store.verdict(1) == ALLOW
+
+        for _ in range(3):
+            store.record(2, is_spam=True)
+        assert store.verdict(2) == DENY
+
+        for is_spam in (True, False, False, False):
+            store.record(3, is_spam=is_spam)
+        assert store.verdict(3) == UNKNOWN
+        assert store.verdict(4) == UNKNOWN
+
+    def test_old_verdicts_decay(self):
+        store = SourceReputationStore(half_life=DAY, min_evidence=3)
+        now = time.time()
+
+        for _ in range(4):
+            store.record(1, is_spam=True, now=now - 2 * DAY)
+        assert store.verdict(1, now=now - 2 * DAY) == DENY
+        assert store.verdict(1, now=now) == UNKNOWN
+
+        # New clean verdicts outweigh the decayed spam ones
+        for _ in range(6):
+            store.record(1, is_spam=False, now=now)
+        score = store.get(1)
+        assert score.spam == pytest.approx(1.0)
+        assert store.verdict(1, now=now) == UNKNOWN
+        for _ in range(4):
+            store.record(1, is_spam=False, now=now)
+        assert store.verdict(1, now=now) == ALLOW
+
+    @pytest.mark.asyncio
+    async def test_flush_and_warm_roundtrip(self, session_factory):
+        store = SourceReputationStore(session_factory=session_factory)
+        for _ in range(3):
+            store.record(SOURCE_ID, is_spam=True, title="Spam farm")
+        store.record(-1, is_spam=False)
+
+        assert await store.flush() == 2
+        assert await store.flush() == 0
+        store.record(-1, is_spam=False)
+        assert await store.flush() == 1
+
+        warmed = SourceReputationStore(session_factory=session_factory)
+        async with session_factory() as session:
+            assert await warmed.warm(session) == 2
+        assert warmed.verdict(SOURCE_ID) == DENY
+        assert warmed.get(SOURCE_ID).title == "Spam farm"
+        assert warmed.get(-1).clean == pytest.approx(2.0, rel=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, session_factory):
+        broken = MagicMock(side_effect=RuntimeError("db is down"))
+        store = SourceReputationStore(session_factory=broken)
+        store.record(1, is_spam=True)
+
+        assert await store.flush() == 0
+        assert store.get_stats()["dirty"] == 1
+
+        store._session_factory = session_factory
+        assert await store.flush() == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_and_forgets_decayed_sources(self, session_factory):
+        store = SourceReputationStore(half_life=DAY, session_factory=session_factory)
+        store.record(1, is_spam=False, now=time.time() - 30 * DAY)
+        store.record(2, is_spam=False)
+
+        await store.start()
+        await store.stop()
+
+        assert store.get(1) is None
+        assert store.get_stats()["dirty"] == 0
+        assert store.get_stats()["flushes"] == 1
+
+
+@pytest.mark.unit
+class TestLinkServiceSourceReputation:
+    """Forwarded media check consults and feeds the reputation"""
+
+    @pytest.mark.asyncio
+    async def test_unknown_source_is_not_flagged_and_learns_clean_verdict(self, make_link_service):
+        service = make_link_service()
+
+        assert await service.check_message_for_bot_links(make_forwarded_photo()) == []
+
+        score = get_source_reputation().get(SOURCE_ID)
+        assert (score.spam, score.clean, score.title) == (0.0, 1.0, "News")
+
+    @pytest.mark.asyncio
+    async def test_trusted_source_takes_allow_path(self, make_link_service):
+        service = make_link_service()
+        for _ in range(3):
+            await service.check_message_for_bot_links(make_forwarded_photo())
+
+        assert await service.check_message_for_bot_links(make_forwarded_photo()) == []
+        assert get_source_reputation().get_stats()[ALLOW] == 1
+
+    @pytest.mark.asyncio
+    async def test_spam_evidence_makes_source_denied(self, make_link_service):
+        service = make_link_service()
+        for _ in range(3):
+            results = await service.check_message_for_bot_links(make_forwarded_photo("free coins t.me/coins_bot"))
+            assert ("bot_link", True) in results
+
+        assert get_source_reputation().verdict(SOURCE_ID) == DENY
+        service._decode_qr_codes = AsyncMock()
+        assert await service.check_message_for_bot_links(make_forwarded_photo()) == [("forwarded_media", True)]
+        # Denied source: the media itself is not inspected
+        service._decode_qr_codes.assert_not_awaited()
@@ -0,0 +1,273 @@
+"""
+Tests for the batched spam text classifier
+"""
+
+import asyncio
+import datetime
+import json
+import random
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.models.moderation_log import ModerationAction, ModerationLog
+from app.services.media_fingerprints import get_media_fingerprints
+from app.services.spam_classifier import (
+    SpamClassifierService,
+    get_spam_classifier,
+    load_labeled_samples,
+    load_training_corpus,
+)
+from app.utils.pii_protection import PIIProtector
+from app.utils.text_classifier import CLASSIFIER_AVAILABLE, hashed_ngrams
+from app.utils.text_normalization import skeleton
+
+needs_numpy = pytest.mark.skipif(not CLASSIFIER_AVAILABLE, reason="numpy is not installed")
+
+SPAM_PHRASES = [
+    "заработок от {n} рублей в день без вложений",
+    "пиши в лс, научу зарабатывать {n}$ в неделю",
+    "набираю людей в команду, доход от {n} тысяч",
+    "бесплатные сигналы, прибыль {n}% за сутки",
+    "удаленная работа, оплата {n} рублей ежедневно",
+]
+HAM_PHRASES = [
+    "кто-нибудь знает, во сколько завтра встреча? уже {n} раз спрашиваю",
+    "спасибо за ссылку на доклад, посмотрю вечером",
+    "у меня тоже не работает после обновления до версии {n}",
+    "давайте перенесем созвон на {n} часов",
+    "отличная идея, поддерживаю",
+]
+
+
+def make_corpus(size, seed=0):
+    rng = random.Random(seed)
+    texts, labels = [], []
+    for i in range(size):
+        is_spam = i % 2 == 0
+        phrase = rng.choice(SPAM_PHRASES if is_spam else HAM_PHRASES)
+        texts.append(skeleton(phrase.format(n=rng.randint(2, 999))))
+        labels.append(is_spam)
+    return texts, labels
+
+
+def train_model():
+    from app.utils.text_classifier import SpamClassifier
+
+    texts, labels = make_corpus(400)
+    return SpamClassifier.train(texts, labels, bits=16, epochs=60)
+
+
+def test_hashed_ngrams_are_normalized_and_stable():
+    indices, weights = hashed_ngrams("заработок без вложений", bits=16)
+
+    assert indices and all(0 <= index < 1 << 16 for index in indices)
+    assert abs(sum(weight * weight for weight in weights) - 1.0) < 1e-9
+    assert hashed_ngrams("заработок без вложений", bits=16) == (indices, weights)
+    assert hashed_ngrams("", bits=16) == ([], [])
+
+
+@needs_numpy
+@pytest.mark.unit
+class TestSpamClassifier:
+    """Training, scoring and persistence"""
+
+    def test_separates_spam_from_ham(self):
+        model = train_model()
+        texts, labels = make_corpus(100, seed=1)
+
+        probabilities = model.predict_proba(texts)
+
+        assert all((p > 0.5) == label for p, label in zip(probabilities, labels))
+
+    def test_batch_matches_single_predictions(self):
+        model = train_model()
+        texts, _ = make_corpus(20, seed=2)
+
+        batch = model.predict_proba(texts)
+
+        for text, probability in zip(texts, batch):
+            assert abs(model.predict_proba([text])[0] - probability) < 1e-6
+
+    def test_save_and_load(self, tmp_path):
+        from app.utils.text_classifier import SpamClassifier
+
+        model = train_model()
+        path = tmp_path / "model.npz"
+        model.save(str(path))
+        loaded = SpamClassifier.load(str(path))
+        texts, _ = make_corpus(10, seed=3)
+
+        assert loaded.bits == 16 and loaded.trained_on == 400
+        assert list(loaded.predict_proba(texts)) == pytest.approx(list(model.predict_proba(texts)))
+
+    def test_training_needs_both_classes(self):
+        from app.utils.text_classifier import SpamClassifier
+
+        with pytest.raises(ValueError):
+            SpamClassifier.train(["a", "b"], [True, True], bits=8)
+
+
+@needs_numpy
+@pytest.mark.unit
+class TestSpamClassifierService:
+    """Micro-batching of concurrent scores"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_scores_share_a_batch(self):
+        service = SpamClassifierService(window=0.01)
+        service.model = train_model()
+        texts, labels = make_corpus(10, seed=4)
+
+        probabilities = await asyncio.gather(*[service.score(text) for text in texts])
+
+        assert all((p > 0.5) == label for p, label in zip(probabilities, labels))
+        assert service.get_stats()["batches"] == 1
+        assert service.get_stats()["mean_batch"] == 10
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_flushed_immediately(self):
+        service = SpamClassifierService(window=10, max_batch=4)
+        service.model = train_model()
+        texts, _ = make_corpus(8, seed=5)
+
+        await asyncio.wait_for(asyncio.gather(*[service.score(text) for text in texts]), timeout=1)
+
+        assert service.get_stats()["batches"] == 2
+
+    @pytest.mark.asyncio
+    async def test_no_model_or_empty_text(self):
+        service = SpamClassifierService()
+        assert await service.score("заработок") is None
+
+        service.model = train_model()
+        assert await service.score("") is None
+
+    def test_load_missing_model(self, tmp_path):
+        service = SpamClassifierService()
+
+        assert service.load(str(tmp_path / "missing.npz")) is False
+        assert service.model is None
+
+
+@pytest.mark.unit
+class TestTrainingCorpus:
+    """Labels come from the analysis itself and from moderation_logs"""
+
+    @pytest.mark.asyncio
+    async def test_load_training_corpus(self, db_session, tmp_path):
+        protector = PIIProtector()
+        log_file = tmp_path / "full_encrypted.log"
+        entries = [
+            ("пиши в лс", {"bot_links_count": 1, "message_id": 1}),
+            ("удалено админом", {"bot_links_count": 0, "message_id": 2}),
+            ("обычное сообщение", {"bot_links_count": 0, "message_id": 3}),
+            # Deleted by the bot on the classifier's verdict alone: not a label
+            ("заработок без вложений", {"bot_links_count": 1, "check_types": ["spam_classifier"], "message_id": 4}),
+        ]
+        with open(log_file, "w", encoding="utf-8") as f:
+            for text, analysis in entries:
+                entry = protector.create_secure_log_entry(
+                    text, user_id=42, chat_id=-100, additional_data={"analysis_result": analysis, "log_type": "spam_analysis"}
+                )
+                f.write(f"2026-01-01 - DEBUG - ENCRYPTED_DATA: {entry['encrypted_full_data']}\n")
+            f.write("2026-01-01 - INFO - unrelated line\n")
+        db_session.add_all(
+            [
+                ModerationLog(action=ModerationAction.DELETE_MESSAGE, admin_telegram_id=1, chat_id=-100, message_id=2),
+                ModerationLog(action=ModerationAction.DELETE_MESSAGE, admin_telegram_id=0, chat_id=-100, message_id=4),
+            ]
+        )
+        await db_session.commit()
+
+        samples = await load_training_corpus(db_session, log_file, protector)
+
+        assert samples == [
+            ("пиши в лс", True),
+            ("удалено админом", True),
+            ("обычное сообщение", False),
+            ("заработок без вложений", False),
+        ]
+
+    def test_load_labeled_samples(self, tmp_path):
+        path = tmp_path / "labeled.jsonl"
+        path.write_text(
+            json.dumps({"text": "спам", "spam": True}, ensure_ascii=False)
+            + "\n\n"
+            + json.dumps({"text": "привет", "spam": False}, ensure_ascii=False)
+            + "\n",
+            encoding="utf-8",
+        )
+
+        assert load_labeled_samples(path) == [("спам", True), ("привет", False)]
+
+
+@needs_numpy
+@pytest.mark.unit
+class TestLinkServiceSpamClassifier:
+    """Confident classifier scores are acted on but not learned from"""
+
+    def make_message(self, text, reply_to_message=None):
+        return Message(
+            message_id=1,
+            date=datetime.datetime.now(),
+            chat=Chat(id=-100, type="supergroup"),
+            from_user=User(id=42, is_bot=False, first_name="User"),
+            text=text,
+            reply_to_message=reply_to_message,
+        )
+
+    def make_service(self, make_link_service):
+        get_spam_classifier().model = train_model()
+        return make_link_service()
+
+    @pytest.mark.asyncio
+    async def test_spam_text_is_flagged(self, make_link_service):
+        service = self.make_service(make_link_service)
+
+        results = await service.check_message_for_bot_links(self.make_message("Заработок от 500 рублей в день без вложений"))
+
+        assert results == [("spam_classifier", True)]
+        assert not service._has_spam_evidence(results)
+
+    @pytest.mark.asyncio
+    async def test_classifier_takedown_is_not_learned(self, make_link_service):
+        service = self.make_service(make_link_service)
+        message = self.make_message("Заработок от 500 рублей в день без вложений")
+        get_media_fingerprints().record = MagicMock()
+
+        results = await service.check_message_for_bot_links(message)
+
+        assert await service.handle_bot_link_detection(message, results)
+        service.moderation_service.takedown.assert_awaited_once()
+        get_media_fingerprints().record.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_ham_text_is_not_flagged(self, make_link_service):
+        service = self.make_service(make_link_service)
+
+        results = await service.check_message_for_bot_links(self.make_message("Давайте перенесем созвон на 5 часов"))
+
+        assert results == []
+
+    @pytest.mark.asyncio
+    async def test_clean_reply_to_spam_is_not_taken_down(self, make_link_service):
+        service = self.make_service(make_link_service)
+        spam = self.make_message("Заработок от 500 рублей в день без вложений")
+        reply = self.make_message("Это спам, админы, удалите пожалуйста", reply_to_message=spam)
+
+        results = await service.check_message_for_bot_links(reply)
+
+        assert results == []
+        assert not await service.handle_bot_link_detection(reply, results)
+        service.moderation_service.takedown.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_classifier_is_skipped_with_explicit_evidence(self, make_link_service):
+        service = self.make_service(make_link_service)
+
+        results = await service.check_message_for_bot_links(self.make_message("Заработок без вложений: @free_signals_bot"))
+
+        assert ("spam_classifier", True) not in results
+        assert get_spam_classifier().get_stats()["scored"] == 0
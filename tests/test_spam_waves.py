@@ -0,0 +1,179 @@
+"""
+Tests for the cross-chat spam wave index
+"""
+
+import datetime
+import random
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.services.spam_waves import SpamWaveIndex, get_spam_waves
+from app.utils.minhash import MINHASH_BANDS, band_keys, minhash, similarity
+from app.utils.text_normalization import skeleton
+
+WAVE = "🔥 Набираю людей в команду, доход от {n} рублей в день, без вложений и опыта, пиши в лс {emoji}"
+EMOJI = "💰🚀✅🔥💎"
+
+
+def unique_text(seed):
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice("абвгдежзиклмнопрстуфхцчшэюя") for _ in range(6)) for _ in range(8))
+
+
+def copy(n):
+    return skeleton(WAVE.format(n=1000 + n * 500, emoji=EMOJI[n % len(EMOJI)]))
+
+
+@pytest.mark.unit
+class TestMinHash:
+    """Signatures of near-duplicates"""
+
+    def test_numbers_and_emoji_do_not_matter(self):
+        assert similarity(minhash(copy(0)), minhash(copy(1))) == 1.0
+        assert band_keys(minhash(copy(0))) == band_keys(minhash(copy(1)))
+
+    def test_unrelated_texts(self):
+        other = minhash(skeleton("Кто-нибудь знает, во сколько завтра начинается встреча по поводу релиза?"))
+
+        assert similarity(minhash(copy(0)), other) < 0.2
+        assert len(band_keys(other)) == MINHASH_BANDS
+
+    def test_short_texts_are_skipped(self):
+        assert minhash("спасибо", min_words=6) is None
+        assert minhash("", min_words=0) is None
+
+
+@pytest.mark.unit
+class TestSpamWaveIndex:
+    """Copies are counted per cluster over a sliding window"""
+
+    def test_wave_needs_copies_from_distinct_users(self):
+        index = SpamWaveIndex(min_copies=4, min_users=3)
+
+        # One user repeating the text is not a wave
+        assert not any(index.observe(copy(n), user_id=1, chat_id=1, now=0) for n in range(10))
+        assert not index.observe(copy(0), user_id=2, chat_id=2, now=1)
+        assert index.observe(copy(1), user_id=3, chat_id=3, now=2)
+        assert index.observe(copy(2), user_id=4, chat_id=4, now=3)
+
+        stats = index.get_stats()
+        assert stats["clusters"] == 1
+        assert stats["waves"] == 1 and stats["flagged"] == 2
+
+    def test_edited_copy_joins_the_cluster(self):
+        index = SpamWaveIndex(min_copies=3, min_users=3)
+        index.observe(copy(0), user_id=1, chat_id=1, now=0)
+        index.observe(copy(1), user_id=2, chat_id=2, now=0)
+
+        edited = skeleton(WAVE.format(n=9999, emoji="👍").replace("пиши в лс", "пиши в личку"))
+        assert index.observe(edited, user_id=3, chat_id=3, now=0)
+
+    def test_copies_expire_with_the_window(self):
+        index = SpamWaveIndex(window=60, buckets=6, min_copies=3, min_users=3)
+        index.observe(copy(0), user_id=1, chat_id=1, now=0)
+        index.observe(copy(1), user_id=2, chat_id=2, now=30)
+
+        # The first copy left the window
+        assert not index.observe(copy(2), user_id=3, chat_id=3, now=65)
+        assert index.observe(copy(3), user_id=4, chat_id=4, now=70)
+
+        # Long silence: the cluster is gone
+        other = skeleton("Совсем другое сообщение о встрече на следующей неделе в офисе")
+        index.observe(other, user_id=5, chat_id=5, now=1000)
+        assert index.get_stats()["clusters"] == 1
+        assert index.get_stats()["buckets"] == 1
+
+    def test_clusters_are_bounded(self):
+        index = SpamWaveIndex(min_copies=3, min_users=3, max_clusters=10)
+        index.observe(copy(0), user_id=1, chat_id=1, now=0)
+        index.observe(copy(1), user_id=2, chat_id=2, now=0)
+
+        for n in range(30):
+            # Recently repeated clusters survive the eviction
+            if n % 5 == 0:
+                index.observe(copy(n), user_id=100 + n, chat_id=100 + n, now=1)
+            index.observe(unique_text(n), user_id=1, chat_id=1, now=1)
+
+        stats = index.get_stats()
+        assert stats["clusters"] == 10
+        assert stats["evicted"] == 21
+        assert index.observe(copy(99), user_id=999, chat_id=999, now=2)
+
+    def test_repetition_inside_one_chat_is_not_a_wave(self):
+        index = SpamWaveIndex(min_copies=4, min_users=3, min_chats=2)
+
+        # Members of one chat repeating a phrase (greetings, a flash mob)
+        assert not any(index.observe(copy(n), user_id=n, chat_id=-100, now=0) for n in range(10))
+        # A copy in another chat makes it a wave
+        assert index.observe(copy(10), user_id=10, chat_id=-200, now=0)
+
+    def test_one_user_in_many_chats_is_not_a_wave(self):
+        index = SpamWaveIndex(min_copies=4, min_users=3, min_chats=2)
+
+        assert not any(index.observe(copy(n), user_id=1, chat_id=-100 - n, now=0) for n in range(10))
+
+    def test_chats_expire_with_the_window(self):
+        index = SpamWaveIndex(window=60, buckets=6, min_copies=3, min_users=3, min_chats=2)
+        index.observe(copy(0), user_id=1, chat_id=-1, now=0)
+        index.observe(copy(1), user_id=2, chat_id=-2, now=30)
+
+        # The only copy in chat -1 left the window
+        assert not index.observe(copy(2), user_id=3, chat_id=-2, now=65)
+        assert index.observe(copy(3), user_id=4, chat_id=-3, now=70)
+
+    def test_unrelated_messages_are_not_a_wave(self):
+        index = SpamWaveIndex(min_copies=2, min_users=2)
+
+        assert not index.observe(copy(0), user_id=1, chat_id=1, now=0)
+        assert not index.observe(skeleton("Давайте перенесем созвон на пятницу, у меня не получается завтра"), 2, 2, now=0)
+
+
+@pytest.mark.unit
+class TestLinkServiceSpamWaves:
+    """Wave copies are spam evidence"""
+
+    def make_message(self, text, user_id, forward_from_chat=None, chat_id=None):
+        return Message(
+            message_id=user_id,
+            date=datetime.datetime.now(),
+            chat=Chat(id=-100 - user_id if chat_id is None else chat_id, type="supergroup"),
+            from_user=User(id=user_id, is_bot=False, first_name="User"),
+            text=text,
+            forward_from_chat=forward_from_chat,
+        )
+
+    @pytest.mark.asyncio
+    async def test_wave_across_chats_is_flagged(self, make_link_service):
+        service = make_link_service()
+
+        results = [
+            await service.check_message_for_bot_links(self.make_message(WAVE.format(n=n, emoji=EMOJI[n]), user_id=n))
+            for n in range(5)
+        ]
+
+        assert results[:4] == [[], [], [], []]
+        assert results[4] == [("spam_wave", True)]
+        assert service._has_spam_evidence(results[4])
+
+    @pytest.mark.asyncio
+    async def test_repeated_phrase_in_one_chat_is_not_flagged(self, make_link_service):
+        service = make_link_service()
+        text = "С днем рождения, Анна! Желаем счастья, здоровья и успехов во всем"
+
+        for n in range(10):
+            message = self.make_message(text, user_id=n, chat_id=-100500)
+            assert await service.check_message_for_bot_links(message) == []
+
+        assert get_spam_waves().get_stats()["waves"] == 0
+
+    @pytest.mark.asyncio
+    async def test_channel_forwards_are_not_counted(self, make_link_service):
+        service = make_link_service()
+        channel = Chat(id=-1001, type="channel", title="News")
+
+        for n in range(6):
+            message = self.make_message(WAVE.format(n=n, emoji=""), user_id=n, forward_from_chat=channel)
+            assert ("spam_wave", True) not in await service.check_message_for_bot_links(message)
+
+        assert get_spam_waves().get_stats()["observed"] == 0
@@ -0,0 +1,84 @@
+"""
+Tests for the concurrent takedown path
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+
+from app.models.moderation_log import ModerationAction, ModerationLog
+from app.services.moderation import ModerationService, drain_side_effects
+
+
+def slow_bot(delay: float = 0.05):
+    """Bot whose delete/ban calls take `delay` seconds each."""
+
+    async def slow_call(**kwargs):
+        await asyncio.sleep(delay)
+        return True
+
+    bot = MagicMock()
+    bot.delete_message = AsyncMock(side_effect=slow_call)
+    bot.ban_chat_member = AsyncMock(side_effect=slow_call)
+    return bot
+
+
+@pytest.mark.unit
+class TestTakedown:
+    """ModerationService.takedown behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_delete_and_ban_run_concurrently(self, session_factory):
+        service = ModerationService(slow_bot(0.05), MagicMock(), session_factory=session_factory)
+
+        started = time.monotonic()
+        result = await service.takedown(chat_id=-100, message_id=7, user_id=42, reason="spam")
+        elapsed = time.monotonic() - started
+
+        assert result.deleted and result.banned
+        # One round-trip, not two
+        assert elapsed < 0.09
+        assert result.latency == pytest.approx(elapsed, abs=0.02)
+
+    @pytest.mark.asyncio
+    async def test_side_effects_recorded_in_background(self, session_factory):
+        service = ModerationService(slow_bot(0), MagicMock(), session_factory=session_factory)
+
+        await service.takedown(chat_id=-100, message_id=7, user_id=42, reason="spam")
+        await drain_side_effects()
+
+        async with session_factory() as session:
+            logs = (await session.execute(select(ModerationLog))).scalars().all()
+
+        actions = sorted(log.action.value for log in logs)
+        assert actions == sorted([ModerationAction.BAN.value, ModerationAction.DELETE_MESSAGE.value])
+        ban = next(log for log in logs if log.action == ModerationAction.BAN)
+        assert (ban.user_id, ban.chat_id, ban.reason) == (42, -100, "spam")
+
+    @pytest.mark.asyncio
+    async def test_failed_ban_still_records_delete(self, session_factory):
+        bot = slow_bot(0)
+        bot.ban_chat_member = AsyncMock(side_effect=RuntimeError("not enough rights"))
+        service = ModerationService(bot, MagicMock(), session_factory=session_factory)
+
+        result = await service.takedown(chat_id=-100, message_id=7, user_id=42)
+        await drain_side_effects()
+
+        assert result.deleted and not result.banned
+        async with session_factory() as session:
+            logs = (await session.execute(select(ModerationLog))).scalars().all()
+        assert [log.action for log in logs] == [ModerationAction.DELETE_MESSAGE]
+
+    @pytest.mark.asyncio
+    async def test_without_user_only_deletes(self, session_factory):
+        bot = slow_bot(0)
+        service = ModerationService(bot, MagicMock(), session_factory=session_factory)
+
+        result = await service.takedown(chat_id=-100, message_id=7)
+        await drain_side_effects()
+
+        assert result.deleted and not result.banned
+        bot.ban_chat_member.assert_not_called()
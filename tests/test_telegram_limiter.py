@@ -0,0 +1,124 @@
+"""
+Tests for outbound Telegram API limiter
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.methods import BanChatMember, DeleteMessage, GetChat, GetUpdates, SendMessage
+
+from app.services.telegram_limiter import CallPriority, TelegramLimiter, classify_method, get_limited_chat_id
+
+
+@pytest.mark.unit
+class TestMethodClassification:
+    """Priority classification of Bot API methods."""
+
+    def test_priorities(self):
+        assert classify_method(DeleteMessage(chat_id=-100, message_id=1)) == CallPriority.TAKEDOWN
+        assert classify_method(BanChatMember(chat_id=-100, user_id=1)) == CallPriority.TAKEDOWN
+        assert classify_method(GetChat(chat_id=-100)) == CallPriority.LOOKUP
+        assert classify_method(SendMessage(chat_id=1, text="hi")) == CallPriority.NOTIFICATION
+        assert classify_method(GetUpdates()) is None
+
+    def test_chat_limit_applies_only_to_group_sends(self):
+        assert get_limited_chat_id(SendMessage(chat_id=-100, text="hi")) == -100
+        assert get_limited_chat_id(SendMessage(chat_id=123, text="hi")) is None
+        assert get_limited_chat_id(DeleteMessage(chat_id=-100, message_id=1)) is None
+
+
+@pytest.mark.unit
+class TestLocalBuckets:
+    """Local fallback token buckets."""
+
+    def test_notifications_leave_reserve_for_takedowns(self):
+        limiter = TelegramLimiter(global_rate=1, global_burst=5, reserve=3, takedown_borrow=2)
+        floor = limiter.floors
+
+        # Only capacity - reserve notifications fit into the bucket
+        assert limiter._try_acquire_local(floor[CallPriority.NOTIFICATION], None) == 0
+        assert limiter._try_acquire_local(floor[CallPriority.NOTIFICATION], None) == 0
+        assert limiter._try_acquire_local(floor[CallPriority.NOTIFICATION], None) > 0
+
+        # Takedowns use the reserve and may borrow beyond it
+        for _ in range(5):
+            assert limiter._try_acquire_local(floor[CallPriority.TAKEDOWN], None) == 0
+        assert limiter._try_acquire_local(floor[CallPriority.TAKEDOWN], None) > 0
+
+    def test_per_chat_bucket(self):
+        limiter = TelegramLimiter(global_rate=100, global_burst=100, chat_rate_per_minute=2, reserve=0)
+        floor = limiter.floors[CallPriority.NOTIFICATION]
+
+        assert limiter._try_acquire_local(floor, -100) == 0
+        assert limiter._try_acquire_local(floor, -100) == 0
+        assert limiter._try_acquire_local(floor, -100) > 0
+        # Other chats are unaffected
+        assert limiter._try_acquire_local(floor, -200) == 0
+
+    def test_chat_buckets_are_bounded(self):
+        limiter = TelegramLimiter(global_rate=1000, global_burst=1000, chat_rate_per_minute=2, reserve=0)
+        limiter.MAX_LOCAL_CHAT_BUCKETS = 3
+        floor = limiter.floors[CallPriority.NOTIFICATION]
+
+        # Sustained traffic: no bucket refills in time, the least recently used ones are evicted
+        # while the busy chat keeps its (exhausted) bucket
+        for chat_id in range(-100, -110, -1):
+            limiter._try_acquire_local(floor, chat_id)
+            limiter._try_acquire_local(floor, -1)
+
+        assert len(limiter._chat_buckets) == 3
+        assert list(limiter._chat_buckets) == [-108, -109, -1]
+        assert limiter._try_acquire_local(floor, -1) > 0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_blocks_all_priorities(self):
+        limiter = TelegramLimiter()
+        await limiter.report_retry_after(5)
+
+        assert await limiter._try_acquire(limiter.floors[CallPriority.TAKEDOWN], None) > 4
+        assert limiter.get_stats()["retry_after_events"] == 1
+
+
+@pytest.mark.unit
+class TestRedisBuckets:
+    """Redis-backed coordination."""
+
+    @pytest.mark.asyncio
+    async def test_script_called_with_global_and_chat_keys(self):
+        script = AsyncMock(return_value=b"0")
+        redis_service = MagicMock()
+        redis_service.redis.register_script = MagicMock(return_value=script)
+
+        limiter = TelegramLimiter(key_prefix="test:tg")
+        limiter.attach_redis(redis_service)
+
+        await limiter.acquire(CallPriority.NOTIFICATION, -100)
+
+        keys = script.call_args.kwargs["keys"]
+        assert keys == ["test:tg:global", "test:tg:chat:-100", "test:tg:retry_after"]
+
+    @pytest.mark.asyncio
+    async def test_redis_failure_falls_back_to_local(self):
+        script = AsyncMock(side_effect=ConnectionError("down"))
+        redis_service = MagicMock()
+        redis_service.redis.register_script = MagicMock(return_value=script)
+
+        limiter = TelegramLimiter()
+        limiter.attach_redis(redis_service)
+
+        await limiter.acquire(CallPriority.TAKEDOWN)
+        assert limiter.get_stats()["redis_errors"] == 1
+        assert limiter._global_bucket.tokens < limiter.global_spec.capacity
+
+    @pytest.mark.asyncio
+    async def test_retry_after_shared_via_redis(self):
+        redis_service = MagicMock()
+        redis_service.redis.register_script = MagicMock(return_value=AsyncMock())
+        redis_service.redis.pttl = AsyncMock(return_value=-2)
+        redis_service.redis.set = AsyncMock(return_value=True)
+
+        limiter = TelegramLimiter(key_prefix="test:tg")
+        limiter.attach_redis(redis_service)
+        await limiter.report_retry_after(3)
+
+        redis_service.redis.set.assert_awaited_once_with("test:tg:retry_after", "1", px=3000)
@@ -0,0 +1,87 @@
+"""
+Tests for the obfuscated Telegram link recognizer
+"""
+
+import pytest
+
+from app.utils.telegram_links import BOT_LINK, INVITE_LINK, USERNAME_MENTION, find_link_candidates
+from app.utils.text_normalization import normalize
+
+# Labeled corpus: text -> expected candidates
+LINKS = [
+    # Plain
+    ("t.me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("https://t.me/Spam_Bot", [(BOT_LINK, "spam_bot")]),
+    ("http://www.telegram.me/news", [(BOT_LINK, "news")]),
+    ("telegram.dog/SpamBot", [(BOT_LINK, "spambot")]),
+    ("t.me/s/channel", [(BOT_LINK, "channel")]),
+    # Obfuscated dot and slash
+    ("t . me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("t[.]me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("t(.)me / spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("t dot me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("t[dot]me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("t me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("t。me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("telegram . me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    # URL-encoded
+    ("t.me%2Fspam_bot", [(BOT_LINK, "spam_bot")]),
+    ("https%3A%2F%2Ft%2Eme%2Fspam_bot", [(BOT_LINK, "spam_bot")]),
+    # tg:// scheme
+    ("tg://resolve?domain=SpamBot", [(BOT_LINK, "spambot")]),
+    ("tg://join?invite=AbCdEfGh12", [(INVITE_LINK, "AbCdEfGh12")]),
+    # Invites keep their case
+    ("t.me/joinchat/AAAAAEkQ1cZ-x", [(INVITE_LINK, "AAAAAEkQ1cZ-x")]),
+    ("https://t.me/+AbCdEf123456", [(INVITE_LINK, "AbCdEf123456")]),
+    ("t.me/joinchat", [(BOT_LINK, "joinchat")]),
+    # Mentions
+    ("@Friend", [(USERNAME_MENTION, "friend")]),
+    ("привет @spam_bot!", [(USERNAME_MENTION, "spam_bot")]),
+    # Several, in text order
+    (
+        "@a_bot then t.me/b_bot and tg://resolve?domain=c_bot",
+        [(USERNAME_MENTION, "a_bot"), (BOT_LINK, "b_bot"), (BOT_LINK, "c_bot")],
+    ),
+]
+
+NOT_LINKS = [
+    "Hello world",
+    "обычное сообщение",
+    "Just me/you",
+    "it me/x",
+    "nett.me/spam_bot",
+    "user@example.com",
+    "t.mex",
+    "telegram is great",
+    "https://example.com/t/me",
+]
+
+# Evasions that need text normalization first (homoglyphs, invisible and fullwidth chars)
+NORMALIZED_LINKS = [
+    ("т.me/spam_bоt", [(BOT_LINK, "spam_bot")]),
+    ("t​.‍me/spam_bot", [(BOT_LINK, "spam_bot")]),
+    ("Ｔ．ＭＥ／ｓｐａｍ＿ｂｏｔ", [(BOT_LINK, "spam_bot")]),
+    ("t.me%2F%D1%81pam_bot", [(BOT_LINK, "cpam_bot")]),
+]
+
+
+@pytest.mark.unit
+class TestTelegramLinks:
+    """find_link_candidates()"""
+
+    @pytest.mark.parametrize("text, expected", LINKS)
+    def test_recognizes_links(self, text, expected):
+        assert list(find_link_candidates(text)) == expected
+
+    @pytest.mark.parametrize("text", NOT_LINKS)
+    def test_ignores_non_links(self, text):
+        assert find_link_candidates(text) == ()
+
+    @pytest.mark.parametrize("text, expected", NORMALIZED_LINKS)
+    def test_recognizes_after_normalization(self, text, expected):
+        assert list(find_link_candidates(normalize(text).folded)) == expected
+
+    def test_long_tail_is_bounded(self):
+        # Bounded separators and names: no catastrophic backtracking
+        assert find_link_candidates("t" + " " * 10000 + "me/x") == ()
+        assert find_link_candidates("t.me/" + "a" * 100) == ((BOT_LINK, "a" * 64),)
@@ -0,0 +1,118 @@
+"""
+Tests for Bot API lookup cache
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError
+from aiogram.methods import BanChatMember, GetChat, GetChatMember, SendMessage
+
+from app.middlewares.telegram_lookup_cache import TelegramLookupCacheMiddleware
+from app.services.telegram_lookup_cache import TelegramLookupCache
+
+BOT = SimpleNamespace(id=1)
+
+
+def make_request(result=None, error=None, delay=0.0):
+    async def request(bot, method):
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result if result is not None else f"{type(method).__name__}:{getattr(method, 'chat_id', None)}"
+
+    return AsyncMock(side_effect=request)
+
+
+@pytest.mark.unit
+class TestTelegramLookupCache:
+    """TelegramLookupCacheMiddleware + TelegramLookupCache."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_is_served_from_cache(self):
+        middleware = TelegramLookupCacheMiddleware(TelegramLookupCache())
+        request = make_request()
+
+        first = await middleware(request, BOT, GetChat(chat_id=-100))
+        second = await middleware(request, BOT, GetChat(chat_id=-100))
+        other = await middleware(request, BOT, GetChatMember(chat_id=-100, user_id=5))
+
+        assert first == second == "GetChat:-100"
+        assert other == "GetChatMember:-100"
+        assert request.await_count == 2
+        stats = middleware.cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_are_coalesced(self):
+        cache = TelegramLookupCache()
+        middleware = TelegramLookupCacheMiddleware(cache)
+        request = make_request(delay=0.02)
+
+        results = await asyncio.gather(*(middleware(request, BOT, GetChat(chat_id=-100)) for _ in range(10)))
+
+        assert set(results) == {"GetChat:-100"}
+        assert request.await_count == 1
+        assert cache.get_stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_chat_not_found_is_cached_negatively(self):
+        middleware = TelegramLookupCacheMiddleware(TelegramLookupCache())
+        method = GetChat(chat_id="@missing")
+        request = make_request(error=TelegramBadRequest(method=method, message="Bad Request: chat not found"))
+
+        for _ in range(3):
+            with pytest.raises(TelegramBadRequest, match="chat not found"):
+                await middleware(request, BOT, GetChat(chat_id="@missing"))
+
+        assert request.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_not_cached(self):
+        middleware = TelegramLookupCacheMiddleware(TelegramLookupCache())
+        method = GetChat(chat_id=-100)
+        request = make_request(error=TelegramNetworkError(method=method, message="timeout"))
+
+        for _ in range(2):
+            with pytest.raises(TelegramNetworkError):
+                await middleware(request, BOT, GetChat(chat_id=-100))
+
+        assert request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_ttl(self):
+        cache = TelegramLookupCache(ttls={"getChat": 60, "getChatMember": 0}, max_entries=2)
+        middleware = TelegramLookupCacheMiddleware(cache)
+        request = make_request()
+
+        for chat_id in (-1, -2, -1, -3):
+            await middleware(request, BOT, GetChat(chat_id=chat_id))
+        assert request.await_count == 3
+        assert cache.get_stats()["evictions"] == 1
+
+        # -1 was used recently, -2 was evicted
+        await middleware(request, BOT, GetChat(chat_id=-1))
+        await middleware(request, BOT, GetChat(chat_id=-2))
+        assert request.await_count == 4
+
+        # Zero TTL - never served from cache
+        await middleware(request, BOT, GetChatMember(chat_id=-1, user_id=5))
+        await middleware(request, BOT, GetChatMember(chat_id=-1, user_id=5))
+        assert request.await_count == 6
+
+    @pytest.mark.asyncio
+    async def test_moderation_invalidates_chat_entries(self):
+        middleware = TelegramLookupCacheMiddleware(TelegramLookupCache())
+        request = make_request()
+
+        await middleware(request, BOT, GetChatMember(chat_id=-100, user_id=5))
+        await middleware(request, BOT, GetChat(chat_id=-200))
+        await middleware(request, BOT, SendMessage(chat_id=-100, text="hi"))
+        await middleware(request, BOT, BanChatMember(chat_id=-100, user_id=5))
+        await middleware(request, BOT, GetChatMember(chat_id=-100, user_id=5))
+        await middleware(request, BOT, GetChat(chat_id=-200))
+
+        called = [type(call.args[1]).__name__ for call in request.await_args_list]
+        assert called == ["GetChatMember", "GetChat", "SendMessage", "BanChatMember", "GetChatMember"]
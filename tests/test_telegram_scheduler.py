@@ -0,0 +1,154 @@
+"""
+Tests for prioritized Telegram API call scheduler
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import DeleteMessage, GetUpdates, SendMessage
+
+from app.middlewares.telegram_scheduler import TelegramSchedulerMiddleware
+from app.services.telegram_limiter import CallPriority, TelegramLimiter
+from app.services.telegram_scheduler import TelegramScheduler
+
+
+@pytest.fixture
+def limiter():
+    """Limiter that never throttles."""
+    limiter = TelegramLimiter()
+    limiter.acquire = AsyncMock(return_value=0.0)
+    limiter.report_retry_after = AsyncMock()
+    return limiter
+
+
+@pytest.mark.unit
+class TestTelegramScheduler:
+    """Priority ordering, retries and adaptive concurrency."""
+
+    @pytest.mark.asyncio
+    async def test_takedowns_jump_ahead_of_notifications(self, limiter):
+        scheduler = TelegramScheduler(limiter, initial_concurrency=1, min_concurrency=1, max_concurrency=1)
+        order = []
+        gate = asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+            order.append("blocker")
+
+        def call(name):
+            async def _call():
+                order.append(name)
+
+            return _call
+
+        first = asyncio.create_task(scheduler.run(CallPriority.LOOKUP, blocker))
+        await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(scheduler.run(CallPriority.NOTIFICATION, call(f"notify{i}"))) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(scheduler.run(CallPriority.TAKEDOWN, call("delete"))))
+        await asyncio.sleep(0)
+
+        gate.set()
+        await asyncio.gather(first, *tasks)
+
+        assert order[:2] == ["blocker", "delete"]
+        assert scheduler.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_retried_and_shrinks_limit(self, limiter):
+        scheduler = TelegramScheduler(limiter, initial_concurrency=8, retry_jitter=0)
+        method = SendMessage(chat_id=1, text="hi")
+        call = AsyncMock(side_effect=[TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1), "ok"])
+
+        assert await scheduler.run(CallPriority.NOTIFICATION, call) == "ok"
+        assert call.await_count == 2
+        limiter.report_retry_after.assert_awaited_once_with(1)
+        assert scheduler.concurrency_limit == 4
+        assert scheduler.get_stats()["priorities"]["notification"]["retries"] == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, limiter):
+        scheduler = TelegramScheduler(limiter, max_retries=1, retry_jitter=0)
+        method = SendMessage(chat_id=1, text="hi")
+        call = AsyncMock(side_effect=TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1))
+
+        with pytest.raises(TelegramRetryAfter):
+            await scheduler.run(CallPriority.NOTIFICATION, call)
+        assert call.await_count == 2
+        assert scheduler.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_on_fast_calls(self, limiter):
+        scheduler = TelegramScheduler(limiter, initial_concurrency=2, max_concurrency=4)
+        for _ in range(10):
+            await scheduler.run(CallPriority.LOOKUP, AsyncMock(return_value=None))
+        assert scheduler.concurrency_limit > 2
+
+    def test_latency_is_compared_per_method(self, limiter, monkeypatch):
+        monkeypatch.setattr("app.services.telegram_scheduler.DECREASE_COOLDOWN", 0.0)
+        scheduler = TelegramScheduler(limiter, initial_concurrency=8, max_concurrency=32)
+
+        # A fast getMe does not make every ban look slow
+        for _ in range(50):
+            scheduler._on_success(0.01, "getMe")
+            scheduler._on_success(0.3, "banChatMember")
+            scheduler._on_success(0.5, "deleteMessages")
+
+        assert scheduler.concurrency_limit > 8
+        assert scheduler.get_stats()["latency_baselines"]["getMe"] == 0.01
+
+    def test_latency_baseline_rises_after_a_lucky_response(self, limiter, monkeypatch):
+        monkeypatch.setattr("app.services.telegram_scheduler.DECREASE_COOLDOWN", 0.0)
+        scheduler = TelegramScheduler(limiter, initial_concurrency=8, max_concurrency=32)
+
+        scheduler._on_success(0.01, "banChatMember")
+        limits = []
+        for _ in range(100):
+            scheduler._on_success(0.3, "banChatMember")
+            limits.append(scheduler.concurrency_limit)
+
+        # The limit dips while the baseline catches up, then recovers
+        assert min(limits) < 8
+        assert limits[-1] > min(limits)
+        assert scheduler.get_stats()["latency_baselines"]["banChatMember"] > 0.15
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self, limiter):
+        scheduler = TelegramScheduler(limiter, initial_concurrency=1, min_concurrency=1, max_concurrency=1)
+        gate = asyncio.Event()
+
+        holder = asyncio.create_task(scheduler.run(CallPriority.LOOKUP, gate.wait))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(scheduler.run(CallPriority.NOTIFICATION, AsyncMock()))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        gate.set()
+        await holder
+
+        assert await scheduler.run(CallPriority.TAKEDOWN, AsyncMock(return_value="done")) == "done"
+        assert scheduler.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_middleware_routes_methods_through_scheduler(self, limiter):
+        scheduler = TelegramScheduler(limiter)
+        middleware = TelegramSchedulerMiddleware(scheduler)
+        make_request = AsyncMock(return_value=True)
+
+        assert await middleware(make_request, MagicMock(), DeleteMessage(chat_id=-100, message_id=1)) is True
+        limiter.acquire.assert_awaited_once_with(CallPriority.TAKEDOWN, None)
+        assert scheduler.get_stats()["priorities"]["takedown"]["calls"] == 1
+        assert list(scheduler.get_stats()["latency_baselines"]) == ["deleteMessage"]
+
+    @pytest.mark.asyncio
+    async def test_middleware_exempt_methods_bypass_scheduler(self, limiter):
+        scheduler = TelegramScheduler(limiter)
+        middleware = TelegramSchedulerMiddleware(scheduler)
+        make_request = AsyncMock(return_value=[])
+
+        await middleware(make_request, MagicMock(), GetUpdates())
+
+        make_request.assert_awaited_once()
+        limiter.acquire.assert_not_called()
@@ -0,0 +1,101 @@
+"""
+Tests for text normalization: NFKC, invisible characters and confusables
+"""
+
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.types import Chat, Message, User
+
+from app.services.links import LinkService
+from app.utils.keyword_engine import get_keyword_engine
+from app.utils.message_features import extract_features
+from app.utils.text_normalization import (
+    CONFUSABLES,
+    fold_confusables,
+    normalize,
+    normalize_text,
+    skeleton,
+)
+
+
+def make_message(text):
+    return Message(
+        message_id=1,
+        date=datetime.datetime.now(),
+        chat=Chat(id=-100, type="supergroup"),
+        from_user=User(id=42, is_bot=False, first_name="User"),
+        text=text,
+    )
+
+
+@pytest.mark.unit
+class TestNormalization:
+    """normalize_text(), fold_confusables(), skeleton()"""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("Ｔ．ＭＥ/spam_bot", "T.ME/spam_bot"),  # fullwidth
+            ("𝐛𝐨𝐭", "bot"),  # mathematical bold
+            ("t​.‍me/spam­_bot", "t.me/spam_bot"),  # zero-width, soft hyphen
+            ("b̶o̶t̶", "bot"),  # combining strikethrough
+            ("⁦bot⁩️", "bot"),  # bidi isolates, variation selector
+            ("tag\U000e0041\U000e0042", "tag"),  # tag characters
+        ],
+    )
+    def test_normalize_text(self, text, expected):
+        assert normalize_text(text) == expected
+
+    def test_keeps_composed_letters_and_emoji(self):
+        assert normalize_text("й ё é 😀") == "й ё é 😀"
+        assert normalize_text("й") == "й"
+
+    def test_folds_cyrillic_and_greek_lookalikes(self):
+        assert fold_confusables("т.me/bоt_sрam") == "t.me/bot_spam"
+        assert fold_confusables("Τеlеgrаm Bοt") == "Telegram Bot"
+        # Uppercase В/Н/М/К are not folded: "Вот" must not become "Bot"
+        assert skeleton("Вот") != "bot"
+
+    def test_normalize_variants(self):
+        result = normalize("т.me/SpamBоt")
+        assert result.normalized == "т.me/SpamBоt"
+        assert result.folded == "t.me/SpamBot"
+        assert result.skeleton == "t.me/spambot"
+
+    def test_ascii_is_returned_as_is(self):
+        text = "plain ascii t.me/spam_bot"
+        assert normalize_text(text) is text
+        assert normalize(text).folded is text
+
+    @pytest.mark.parametrize("char", sorted(CONFUSABLES))
+    def test_skeleton_is_idempotent(self, char):
+        for variant in (char, char.upper(), char.lower()):
+            assert skeleton(skeleton(variant)) == skeleton(variant)
+
+
+@pytest.mark.unit
+class TestNormalizedConsumers:
+    """Link candidates and keyword checks see through evasions."""
+
+    def test_link_candidates_from_folded_text(self):
+        features = extract_features(make_message("join т.me/sрam_bоt and t​.me/ｓpam_bot"))
+        assert features.text_links == (("bot_link", "spam_bot"), ("bot_link", "spam_bot"))
+
+    @pytest.mark.asyncio
+    async def test_link_service_detects_homoglyph_bot_link(self):
+        db = AsyncMock()
+        db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+        service = LinkService(MagicMock(), db)
+
+        assert await service.check_message_for_bot_links(make_message("подпишись: т.me/free_bоt")) == [("bot_link", True)]
+
+    @pytest.mark.parametrize("username", ["SpamBоt", "Spam_B​ot", "ＳｐａｍＢｏｔ", "b̶o̶t̶"])
+    def test_keyword_engine_sees_through_evasions(self, username):
+        assert get_keyword_engine().scan(username, ("bot_like_username",)) == {"bot_like_username"}
+
+    def test_cyrillic_keywords_match_mixed_script(self):
+        # "реклама" with Latin p, a, e
+        assert get_keyword_engine().scan("peклaмa", ("spam_words",)) == {"spam_words"}
+        assert extract_features(make_message("РЕКЛАМА")).keyword_hits >= {"spam_words"}